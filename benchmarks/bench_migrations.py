@@ -0,0 +1,102 @@
+"""
+Schema migration benchmark — per-load cost before and after stamping.
+
+Writes an unstamped lease store and thread store (as left by releases
+that migrated on every load) into a temporary DATA_DIR, times the
+_load_all_* helpers, runs run_store_migrations() once, and times the
+same loads again. The difference is the migration work the hot load
+path no longer does.
+
+Run:  python benchmarks/bench_migrations.py [--leases N] [--threads N]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ["MAPMYLEASE_SKIP_MIGRATIONS"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mapmylease import storage  # noqa: E402
+
+
+def build_stores(n_leases, n_threads):
+    leases = []
+    for i in range(n_leases):
+        leases.append({
+            "id": f"lease-{i}",
+            "lease_group_id": f"lease-{i}",
+            "version": 1,
+            "is_current": True,
+            "current_values": {
+                "lease_nickname": f"Flat {i}",
+                "monthly_rent": 45000,
+                "rent_due_day": 5,
+                "lock_in_period": {"duration_months": None},
+                "renewal_terms": {"rent_escalation_percent": None},
+                "expected_payments": storage._default_expected_payments(45000),
+                "first_month_mode": None,
+                "first_month_due_date": None,
+                "first_month_amount": None,
+            },
+            "needs_expected_payment_confirmation": False,
+        })
+    threads = [{
+        "id": f"thread-{i}",
+        "lease_group_id": f"lease-{i % max(n_leases, 1)}",
+        "topic_type": "payment_review",
+        "status": "resolved",
+        "needs_landlord_attention": False,
+        "escalation_started_at": None,
+        "last_reminder_at": None,
+        "auto_reminders_suppressed": False,
+    } for i in range(n_threads)]
+    return {"leases": leases}, {"threads": threads, "messages": []}
+
+
+def time_loads(repeat):
+    gc.collect()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            storage._load_all_leases()
+            storage._load_all_threads()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--leases", type=int, default=2_000)
+    parser.add_argument("--threads", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    lease_data, thread_data = build_stores(args.leases, args.threads)
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DATA_DIR = tmp
+        for store, data in (("leases", lease_data), ("threads", thread_data)):
+            with open(storage._store_path(store), "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+        before = time_loads(args.repeat)
+        applied = storage.run_store_migrations()
+        after = time_loads(args.repeat)
+
+    print(f"{args.leases:,} leases, {args.threads:,} threads, best of {args.repeat}")
+    print(f"migrated: {', '.join(f'{s} v{a}->v{b}' for s, (a, b) in applied.items())}")
+    print(f"load, unstamped (per-load migration checks): {before * 1000:8.2f} ms")
+    print(f"load, stamped   (schema_version check only): {after * 1000:8.2f} ms")
+    print(f"saved per load:                              {(before - after) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
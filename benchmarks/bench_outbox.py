@@ -0,0 +1,88 @@
+"""
+Notification outbox benchmark — drain throughput and delivery latency.
+
+Writes a synthetic portfolio (benchmarks/synthetic.py) to a temporary
+DATA_DIR, enqueues one delivery per message through the engine's own
+add_message_to_thread(), then drains the outbox with the file
+transport at several batch sizes. Each batch costs two threads-store
+writes (claim + record), so the batch size sets how far that cost is
+spread.
+
+Reports deliveries/s and latency (p50 / p95) per batch size, measured
+from the start of the drain to each delivery's sent_at, so it includes
+time spent queued behind earlier batches.
+
+Run:  python benchmarks/bench_outbox.py [--groups N] [--messages N] [--batch-sizes 1,10,50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ["MAPMYLEASE_SKIP_MIGRATIONS"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio  # noqa: E402
+from mapmylease import engine, notifications, storage  # noqa: E402
+
+
+def enqueue(n_messages):
+    """Add n_messages tenant replies across the open threads."""
+    threads = [t for t in storage._load_all_threads()["threads"] if t["status"] == "open"]
+    if not threads:
+        threads = [engine.ensure_thread_exists("lg-bench", "payment_review", "rent:2026-01")]
+    for i in range(n_messages):
+        engine.add_message_to_thread(threads[i % len(threads)]["id"], "tenant", "reply",
+                                     f"Paid, reference {i}")
+
+
+def drain_all(batch_size):
+    """Drain until nothing is due; return (seconds, batches)."""
+    batches = 0
+    start = time.perf_counter()
+    while notifications.drain_outbox(batch_size=batch_size)["claimed"]:
+        batches += 1
+    return time.perf_counter() - start, batches
+
+
+def latencies(since):
+    """Seconds from `since` to sent_at for every sent delivery."""
+    return [(datetime.fromisoformat(d["sent_at"]) - since).total_seconds()
+            for d in storage._load_all_threads()["deliveries"] if d["status"] == "sent"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--batch-sizes", default="1,10,50")
+    args = parser.parse_args()
+
+    notifications.NOTIFY_CHANNELS = ("file",)
+    notifications.NOTIFY_RATE_LIMITS["file"] = 1e9      # measure the outbox, not the limiter
+    portfolio = generate_portfolio(args.groups, seed=1)
+
+    print(f"{args.groups} lease groups, {args.messages:,} deliveries, file transport\n")
+    print(f"{'batch':>6}{'batches':>9}{'seconds':>9}{'per s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_portfolio(tmp, portfolio)
+            storage.DATA_DIR = tmp
+            notifications._rate_limiters.clear()
+            notifications._transport_instances.clear()
+            enqueue(args.messages)
+
+            drain_started = datetime.now()
+            seconds, batches = drain_all(batch_size)
+            lat = sorted(latencies(drain_started))
+            p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))] if lat else 0.0
+            print(f"{batch_size:>6}{batches:>9}{seconds:>9.2f}{len(lat) / seconds:>9.0f}"
+                  f"{statistics.median(lat or [0]) * 1000:>9.0f}{p95 * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
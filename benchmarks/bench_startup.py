@@ -0,0 +1,102 @@
+"""
+Startup benchmark — cold import time and per-worker RSS.
+
+Each sample is a fresh interpreter building an app (store migrations
+skipped) and reporting its own wall time and peak RSS. Three modes
+are compared:
+
+    lazy    `import app`: full app, PDF/OCR/AI packages load on first use
+    eager   `import app` with MAPMYLEASE_EAGER_IMPORTS=1 (old module-level imports)
+    tenant  create_tenant_app(): tenant routes only, no landlord/extraction code
+
+One extra `python -X importtime` run per mode lists the slowest
+top-level imports (cumulative microseconds).
+
+Run:  python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_BUILD = {
+    "lazy": "import app",
+    "eager": "import app",
+    "tenant": "from mapmylease.tenant import create_tenant_app; create_tenant_app()",
+}
+
+_PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+{build}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024  # bytes on macOS, KiB elsewhere
+print(elapsed, rss)
+"""
+
+
+def _env(mode):
+    env = dict(os.environ, MAPMYLEASE_SKIP_MIGRATIONS="1")
+    env.pop("MAPMYLEASE_EAGER_IMPORTS", None)
+    if mode == "eager":
+        env["MAPMYLEASE_EAGER_IMPORTS"] = "1"
+    return env
+
+
+def sample(mode):
+    """Return (import_seconds, peak_rss_kib) from one fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", _PROBE.replace("{build}", _BUILD[mode])],
+                         cwd=ROOT, env=_env(mode),
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[-2]), int(out[-1])
+
+
+def importtime(mode, top):
+    """Return the slowest top-level imports as (cumulative_us, module)."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", _BUILD[mode]],
+                            cwd=ROOT, env=_env(mode), capture_output=True, text=True,
+                            check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit() and not name.startswith(" ") and "." not in name:
+            rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start and RSS: lazy, eager and tenant-only.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    summary = {}
+    for mode in _BUILD:
+        samples = [sample(mode) for _ in range(args.runs)]
+        times = [t for t, _ in samples]
+        rss = [r for _, r in samples]
+        summary[mode] = (statistics.median(times), statistics.median(rss))
+        print(f"\n{mode:<6}  median {summary[mode][0] * 1000:8.1f} ms"
+              f"   min {min(times) * 1000:8.1f} ms   peak RSS {summary[mode][1] / 1024:6.1f} MiB")
+        for cumulative, name in importtime(mode, args.top):
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    (lazy_t, lazy_rss), (eager_t, eager_rss) = summary["lazy"], summary["eager"]
+    print(f"\nlazy saves {(eager_t - lazy_t) * 1000:.1f} ms per cold start"
+          f" and {(eager_rss - lazy_rss) / 1024:.1f} MiB RSS per worker")
+    tenant_t, tenant_rss = summary["tenant"]
+    print(f"tenant-only saves {(lazy_t - tenant_t) * 1000:.1f} ms and"
+          f" {(lazy_rss - tenant_rss) / 1024:.1f} MiB RSS per worker vs the full app")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Store codec benchmark — load/save time and file size per codec.
+
+Builds a synthetic dataset (10,000 payment confirmations, 50,000 thread
+messages) in a temporary DATA_DIR and times the app's own
+_save_*_file / _load_all_* helpers under each available codec, both
+compact and pretty (indent=2, the pre-codec on-disk format).
+
+Run:  python benchmarks/bench_store_codec.py [--repeat N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mapmylease import storage  # noqa: E402
+
+CONFIRMATIONS = 10_000
+MESSAGES = 50_000
+THREADS = 2_500
+
+
+def build_dataset():
+    """Return (payment_data, thread_data) shaped like the live stores."""
+    confirmations = []
+    for i in range(CONFIRMATIONS):
+        confirmations.append({
+            "id": str(uuid.uuid4()),
+            "lease_group_id": f"lg-{i % 50}",
+            "confirmation_type": ("rent", "maintenance", "utilities")[i % 3],
+            "period_month": i % 12 + 1,
+            "period_year": 2015 + i // 1200,
+            "amount_agreed": 45000,
+            "amount_declared": 45000,
+            "tds_deducted": None,
+            "date_paid": "2026-01-05",
+            "proof_files": [f"proofs/lg-{i % 50}/{i}.pdf"],
+            "verification_status": "unverified",
+            "disclaimer_acknowledged": "2026-01-05T10:00:00",
+            "submitted_at": "2026-01-05T10:00:00",
+            "submitted_via": "tenant_link",
+            "notes": None,
+        })
+
+    threads = []
+    for i in range(THREADS):
+        threads.append({
+            "id": str(uuid.uuid4()),
+            "lease_group_id": f"lg-{i % 50}",
+            "topic_type": "payment_review",
+            "topic_ref": f"rent:{2015 + i // 600}-{i % 12 + 1:02d}",
+            "status": "resolved" if i % 4 else "open",
+            "waiting_on": None if i % 4 else "landlord",
+            "created_at": "2026-01-05T10:00:00",
+            "resolved_at": None,
+            "needs_landlord_attention": False,
+            "escalation_started_at": None,
+            "last_reminder_at": None,
+            "auto_reminders_suppressed": False,
+        })
+
+    messages = []
+    for i in range(MESSAGES):
+        messages.append({
+            "id": str(uuid.uuid4()),
+            "thread_id": threads[i % THREADS]["id"],
+            "created_at": "2026-01-05T10:00:00",
+            "actor": "tenant" if i % 2 else "landlord",
+            "message_type": "reply",
+            "body": "Paid via bank transfer, reference attached.",
+            "payment_id": None,
+            "attachments": [],
+            "channel": "internal",
+            "delivered_via": ["internal"],
+            "external_ref": None,
+        })
+
+    return {"confirmations": confirmations}, {"threads": threads, "messages": messages}
+
+
+def best_of(repeat, fn):
+    """Best wall time of fn over repeat runs, GC paused (as timeit does)."""
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings)
+
+
+def bench_variant(codec, pretty, payment_data, thread_data, repeat):
+    storage.STORE_CODEC = codec
+    storage.STORE_PRETTY_JSON = pretty
+    for store in ("payments", "threads"):
+        try:
+            os.remove(storage._store_path(store))
+        except OSError:
+            pass
+    payment_data.pop("revision", None)
+    thread_data.pop("revision", None)
+
+    save = best_of(repeat, lambda: (storage._save_payment_file(payment_data),
+                                    storage._save_threads_file(thread_data)))
+    load = best_of(repeat, lambda: (storage._load_all_payments(),
+                                    storage._load_all_threads()))
+    size = sum(os.path.getsize(storage._store_path(s)) for s in ("payments", "threads"))
+    return save, load, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payment_data, thread_data = build_dataset()
+    codecs = ["json"]
+    if storage.MSGSPEC_AVAILABLE:
+        codecs.append("msgspec")
+    if storage.ORJSON_AVAILABLE:
+        codecs.append("orjson")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DATA_DIR = tmp
+        print(f"{CONFIRMATIONS:,} confirmations, {MESSAGES:,} messages, "
+              f"best of {args.repeat}\n")
+        print(f"{'codec':<10}{'layout':<9}{'save ms':>10}{'load ms':>10}{'size MB':>10}")
+        for codec in codecs:
+            for pretty in (True, False):
+                save, load, size = bench_variant(codec, pretty, payment_data,
+                                                 thread_data, args.repeat)
+                print(f"{codec:<10}{'pretty' if pretty else 'compact':<9}"
+                      f"{save * 1000:>10.1f}{load * 1000:>10.1f}{size / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
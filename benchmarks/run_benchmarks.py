@@ -0,0 +1,204 @@
+"""
+Benchmark suite for the store loaders, engine passes and hot routes.
+
+For each portfolio size a deterministic synthetic portfolio
+(benchmarks/synthetic.py) is written to a temporary DATA_DIR and every
+case is timed over several rounds after one warm-up call. The warm-up
+lets the engine reach steady state (threads materialised), which is
+what a dashboard sees on every load after the first. Cases whose
+warm-up is slow get fewer rounds so each stays within --budget.
+
+Results are written as JSON so runs can be compared:
+
+    python benchmarks/run_benchmarks.py                      # 10,100,1000
+    python benchmarks/run_benchmarks.py --sizes 10,100 --rounds 3
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/OLD.json
+
+--compare prints the median ratio per case and exits 1 if any case is
+slower than --threshold (default 1.25x).
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ["MAPMYLEASE_SKIP_MIGRATIONS"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio  # noqa: E402
+from mapmylease import engine, search, storage  # noqa: E402
+from mapmylease.landlord import create_app  # noqa: E402
+from mapmylease.tenant import create_tenant_app  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _cases(portfolio):
+    """Return [(name, callable)] for one portfolio already on disk."""
+    leases = [l for l in portfolio["leases"]["leases"] if l["is_current"]]
+    group_ids = [l["lease_group_id"] for l in leases]
+    token = next((t["token"] for t in portfolio["tenant_access"]["tenant_tokens"]
+                  if t["is_active"]), None)
+    client = create_app().test_client()
+    tenant_client = create_tenant_app().test_client()
+    today = datetime.now()
+
+    def governing_months():
+        for gid in group_ids:
+            for back in range(12):
+                index = today.year * 12 + today.month - 1 - back
+                engine.get_governing_lease_for_month(gid, index // 12, index % 12 + 1)
+
+    def materialise_all():
+        for lease in leases:
+            engine.materialise_system_threads(lease["lease_group_id"])
+
+    def materialise_missing_all():
+        for lease in leases:
+            engine.materialise_missing_payment_threads(lease["lease_group_id"], lease)
+
+    def get_ok(url, via=client):
+        def run():
+            response = via.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return run
+
+    cases = [
+        ("load_all_leases", storage._load_all_leases),
+        ("load_all_payments", storage._load_all_payments),
+        ("load_all_threads", storage._load_all_threads),
+        ("load_all_tenant_access", storage._load_all_tenant_access),
+        ("load_all_terminations", storage._load_all_terminations),
+        ("materialise_system_threads", materialise_all),
+        ("materialise_missing_payment_threads", materialise_missing_all),
+        ("auto_resolve_missing_payment_threads", engine.auto_resolve_missing_payment_threads),
+        ("send_missing_payment_reminders", engine.send_missing_payment_reminders),
+        ("escalate_missing_payment_threads", engine.escalate_missing_payment_threads),
+        ("get_governing_lease_for_month_x12", governing_months),
+        ("search_rebuild_index", search.rebuild_index),
+        ("search_query", lambda: search.search("koramangala rao")),
+        ("route_index_dashboard", get_ok("/")),
+        ("route_lease_detail", get_ok(f"/?lease_id={leases[0]['id']}")),
+    ]
+    if token:
+        cases.append(("route_tenant_page", get_ok(f"/tenant/{token}")))
+        cases.append(("route_tenant_page_tenant_app", get_ok(f"/tenant/{token}", tenant_client)))
+    return cases
+
+
+def _time(fn, rounds, budget):
+    """Warm up once, then time up to `rounds` calls within ~budget seconds."""
+    start = time.perf_counter()
+    fn()  # warm-up / reach engine steady state
+    warmup = time.perf_counter() - start
+    rounds = max(1, min(rounds, int(budget / warmup) if warmup else rounds))
+
+    timings = []
+    gc.collect()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, rounds, seed, budget, only=None):
+    results = []
+    for size in sizes:
+        portfolio = generate_portfolio(size, seed=seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_portfolio(tmp, portfolio)
+            storage.DATA_DIR = tmp
+            for name, fn in _cases(portfolio):
+                if only and only not in name:
+                    continue
+                timings = _time(fn, rounds, budget)
+                n = len(timings)
+                row = {
+                    "name": name,
+                    "size": size,
+                    "rounds": n,
+                    "min": min(timings),
+                    "median": statistics.median(timings),
+                    "mean": statistics.fmean(timings),
+                    "stdev": statistics.stdev(timings) if n > 1 else 0.0,
+                }
+                results.append(row)
+                print(f"{size:>6} {name:<40} median {row['median'] * 1000:10.2f} ms"
+                      f"   min {row['min'] * 1000:10.2f} ms", flush=True)
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nvs {baseline_path} (median ratio, >{threshold:.2f}x flagged)")
+    for row in results:
+        old = baseline.get((row["name"], row["size"]))
+        if not old or not old["median"]:
+            continue
+        ratio = row["median"] / old["median"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{row['size']:>6} {row['name']:<40} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time loaders, engine passes and routes.")
+    parser.add_argument("--sizes", default="10,100,1000",
+                        help="comma-separated lease-group counts")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="seconds per case; slow cases run fewer rounds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.rounds, args.seed, args.budget, only=args.only)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime("bench-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "created_at": datetime.now().isoformat(),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "store_codec": storage.STORE_CODEC,
+                "seed": args.seed,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Deterministic synthetic portfolio generator.
+
+Builds store contents shaped exactly like the live JSON files — lease
+groups with renewals, early terminations, multi-year confirmation
+histories, payment_review threads with messages, and tenant tokens —
+so benchmarks and tests never depend on anyone's real data.
+
+The same (n_groups, seed, today) always produces the same portfolio.
+
+Usage:
+    from benchmarks.synthetic import generate_portfolio, write_portfolio
+    portfolio = generate_portfolio(100, seed=1)
+    write_portfolio(data_dir, portfolio)
+
+    python benchmarks/synthetic.py OUT_DIR --groups 100 [--seed 1]
+"""
+
+import argparse
+import calendar
+import os
+import random
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mapmylease import storage  # noqa: E402
+
+_FIRST_NAMES = ["Asha", "Rahul", "Meera", "Vikram", "Priya", "Arjun", "Kavya",
+                "Rohan", "Ananya", "Karan", "Isha", "Dev", "Nisha", "Sameer"]
+_LAST_NAMES = ["Sharma", "Iyer", "Kapoor", "Reddy", "Mehta", "Nair", "Bose",
+               "Gupta", "Rao", "Singh", "Das", "Menon"]
+_LOCALITIES = ["Indiranagar", "Koramangala", "Bandra West", "Powai", "Saket",
+               "Gachibowli", "Salt Lake", "Aundh", "Adyar", "Vasant Kunj"]
+
+
+def _add_months(year, month, delta):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def _month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+class _Builder:
+    """Holds the RNG and id source for one generate_portfolio() call."""
+
+    def __init__(self, seed, today):
+        self.rng = random.Random(seed)
+        self.today = today
+
+    def uid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def name(self):
+        return f"{self.rng.choice(_FIRST_NAMES)} {self.rng.choice(_LAST_NAMES)}"
+
+    def stamp(self, d, hour=10):
+        return datetime(d.year, d.month, d.day, hour, self.rng.randint(0, 59)).isoformat()
+
+
+def _lease_version(b, group_id, version, is_current, start, months, cv_base):
+    end_y, end_m = _add_months(start.year, start.month, months - 1)
+    end = _month_end(end_y, end_m) - timedelta(days=start.day - 1)
+    rent = round(cv_base["monthly_rent"] * (1.05 ** (version - 1)), -2)
+    maintenance = cv_base["maintenance"]
+    lease_id = group_id if version == 1 else b.uid()
+    created = b.stamp(start - timedelta(days=10))
+    return {
+        "id": lease_id,
+        "lease_group_id": group_id,
+        "version": version,
+        "is_current": is_current,
+        "status": "active",
+        "created_at": created,
+        "updated_at": created,
+        "source_document": {
+            "filename": f"lease_{lease_id[:8]}.pdf",
+            "mimetype": "application/pdf",
+            "extracted_text": None,
+            "extracted_at": created,
+        },
+        "ai_extraction": None,
+        "current_values": {
+            "lease_nickname": cv_base["nickname"],
+            "lessor_name": cv_base["lessor"],
+            "lessee_name": cv_base["lessee"],
+            "lease_start_date": start.isoformat(),
+            "lease_end_date": end.isoformat(),
+            "monthly_rent": rent,
+            "security_deposit": rent * 3,
+            "rent_due_day": cv_base["due_day"],
+            "lock_in_period": {"duration_months": 6},
+            "renewal_terms": {"rent_escalation_percent": 5},
+            "expected_payments": [
+                {"type": "rent", "expected": True, "typical_amount": rent},
+                {"type": "maintenance", "expected": maintenance is not None,
+                 "typical_amount": maintenance},
+                {"type": "utilities", "expected": False, "typical_amount": None},
+            ],
+            "first_month_mode": None,
+            "first_month_due_date": None,
+            "first_month_amount": None,
+        },
+        "needs_expected_payment_confirmation": False,
+    }
+
+
+def _group(b, index, landlords, out):
+    """Append one lease group's records to the portfolio lists in out."""
+    rng = b.rng
+    group_id = b.uid()
+    cv_base = {
+        "nickname": f"{rng.randint(1, 40)}{rng.choice('ABCD')} {rng.choice(_LOCALITIES)} #{index}",
+        "lessor": rng.choice(landlords),
+        "lessee": b.name(),
+        "monthly_rent": rng.randrange(15_000, 150_000, 500),
+        "maintenance": rng.choice([None, None, 2_500, 4_000]),
+        "due_day": rng.randint(1, 10),
+    }
+
+    # 1-3 consecutive twelve-month versions, the last one current
+    n_versions = 1 + (rng.random() < 0.3) + (rng.random() < 0.1)
+    history_months = 12 * (n_versions - 1) + rng.randint(3, 12)
+    sy, sm = _add_months(b.today.year, b.today.month, -history_months)
+    versions = []
+    for v in range(1, n_versions + 1):
+        vy, vm = _add_months(sy, sm, 12 * (v - 1))
+        versions.append(_lease_version(b, group_id, v, v == n_versions,
+                                       date(vy, vm, 1), 12, cv_base))
+    out["leases"].extend(versions)
+    current = versions[-1]
+
+    # ~5% of groups were terminated early in the last few months
+    terminated_on = None
+    if rng.random() < 0.05:
+        terminated_on = b.today - timedelta(days=rng.randint(5, 90))
+        out["terminations"].append({
+            "id": b.uid(),
+            "lease_id": current["id"],
+            "termination_date": terminated_on.isoformat(),
+            "terminated_at": b.stamp(terminated_on),
+            "terminated_by": "landlord",
+            "note": "Tenant relocated",
+        })
+
+    # Tenant token: active for most groups, plus the odd revoked one
+    if rng.random() < 0.15:
+        out["tenant_access"].append({
+            "token": b.uid().replace("-", ""),
+            "lease_group_id": group_id,
+            "is_active": False,
+            "issued_at": b.stamp(date(sy, sm, 1)),
+            "revoked_at": b.stamp(date(sy, sm, 1) + timedelta(days=30)),
+            "revoked_reason": "tenant_changed",
+            "last_used_at": None,
+        })
+    if rng.random() < 0.9:
+        out["tenant_access"].append({
+            "token": b.uid().replace("-", ""),
+            "lease_group_id": group_id,
+            "is_active": True,
+            "issued_at": b.stamp(date(sy, sm, 1)),
+            "revoked_at": None,
+            "revoked_reason": None,
+            "last_used_at": None,
+        })
+
+    # Monthly confirmations up to last month; the last two months'
+    # threads are still open, older ones acknowledged.
+    last_y, last_m = _add_months(b.today.year, b.today.month, -1)
+    recent = {_add_months(b.today.year, b.today.month, -d) for d in (1, 2)}
+    y, m = sy, sm
+    while (y, m) <= (last_y, last_m):
+        if terminated_on and date(y, m, 1) > terminated_on:
+            break
+        governing = next(l for l in reversed(versions)
+                         if l["current_values"]["lease_start_date"] <= date(y, m, 28).isoformat())
+        gcv = governing["current_values"]
+        paid_on = date(y, m, min(gcv["rent_due_day"] + rng.randint(-2, 6), 28)) \
+            if gcv["rent_due_day"] > 2 else date(y, m, rng.randint(1, 10))
+        types = [("rent", gcv["monthly_rent"])]
+        if cv_base["maintenance"]:
+            types.append(("maintenance", cv_base["maintenance"]))
+        for ctype, amount in types:
+            # ~4% of months go unpaid (engine raises missing_payment)
+            if rng.random() < 0.04:
+                continue
+            payment_id = b.uid()
+            submitted = b.stamp(paid_on)
+            out["payments"].append({
+                "id": payment_id,
+                "lease_group_id": group_id,
+                "confirmation_type": ctype,
+                "period_month": m,
+                "period_year": y,
+                "amount_agreed": amount if ctype == "rent" else None,
+                "amount_declared": amount,
+                "tds_deducted": round(amount * 0.1) if ctype == "rent" and amount > 50_000 else None,
+                "date_paid": paid_on.isoformat(),
+                "proof_files": [f"proofs/{group_id}/{payment_id}_receipt.pdf"],
+                "verification_status": "unverified",
+                "disclaimer_acknowledged": submitted,
+                "submitted_at": submitted,
+                "submitted_via": "tenant_link",
+                "notes": None,
+            })
+
+            thread_id = b.uid()
+            is_open = (y, m) in recent
+            out["threads"].append({
+                "id": thread_id,
+                "lease_group_id": group_id,
+                "topic_type": "payment_review",
+                "topic_ref": f"{ctype}:{y}-{m:02d}",
+                "status": "open" if is_open else "resolved",
+                "waiting_on": "landlord" if is_open else None,
+                "created_at": submitted,
+                "resolved_at": None if is_open else b.stamp(paid_on + timedelta(days=3)),
+                "needs_landlord_attention": is_open,
+                "escalation_started_at": None,
+                "last_reminder_at": None,
+                "auto_reminders_suppressed": False,
+            })
+            if not is_open:
+                out["messages"].append({
+                    "id": b.uid(),
+                    "thread_id": thread_id,
+                    "created_at": b.stamp(paid_on + timedelta(days=3)),
+                    "actor": "landlord",
+                    "message_type": "acknowledge",
+                    "body": None,
+                    "payment_id": payment_id,
+                    "attachments": [],
+                    "channel": "internal",
+                    "delivered_via": ["internal"],
+                    "external_ref": None,
+                })
+        y, m = _add_months(y, m, 1)
+
+
+def generate_portfolio(n_groups, seed=0, today=None):
+    """Build a synthetic portfolio.
+
+    Args:
+        n_groups: number of lease groups (each 1-3 versions)
+        seed: RNG seed; same seed + today → identical output
+        today: date the histories run up to (default: date.today())
+
+    Returns:
+        dict: {store: data} for every key in storage.STORE_FILES
+    """
+    b = _Builder(seed, today or date.today())
+    landlords = [b.name() for _ in range(max(1, n_groups // 5))]
+    out = {"leases": [], "payments": [], "tenant_access": [], "threads": [],
+           "messages": [], "terminations": []}
+    for index in range(n_groups):
+        _group(b, index, landlords, out)
+
+    return {
+        "leases": {"leases": out["leases"]},
+        "payments": {"confirmations": out["payments"]},
+        "tenant_access": {"tenant_tokens": out["tenant_access"]},
+        "threads": {"threads": out["threads"], "messages": out["messages"], "deliveries": []},
+        "terminations": {"terminations": out["terminations"]},
+    }
+
+
+def write_portfolio(data_dir, portfolio):
+    """Write a portfolio into data_dir as current-schema store files.
+
+    Points storage.DATA_DIR at data_dir for the duration of the write.
+    """
+    previous = storage.DATA_DIR
+    storage.DATA_DIR = str(data_dir)
+    try:
+        for store, data in portfolio.items():
+            try:
+                os.remove(storage._store_path(store))
+            except OSError:
+                pass
+            storage._write_store(store, dict(data))
+    finally:
+        storage.DATA_DIR = previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic portfolio to a directory.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    portfolio = generate_portfolio(args.groups, seed=args.seed)
+    write_portfolio(args.out_dir, portfolio)
+    for store, data in portfolio.items():
+        sizes = ", ".join(f"{len(v):,} {k}" for k, v in data.items() if isinstance(v, list))
+        print(f"{storage.STORE_FILES[store]:<22} {sizes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Shared pytest fixtures.
+
+data_dir points every JSON store at a fresh temporary directory so
+tests never touch the real lease / payment / thread files.
+"""
+
+import json
+
+import pytest
+
+from mapmylease import storage
+from mapmylease.landlord import create_app
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Redirect all JSON stores to an empty temp directory."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def flask_app(data_dir):
+    """Full landlord + tenant app bound to the temp data directory."""
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(flask_app):
+    """Flask test client bound to the temp data directory."""
+    return flask_app.test_client()
+
+
+def write_store(data_dir, store, data):
+    """Write a store file directly (bypasses the app's save helpers)."""
+    path = data_dir / storage.STORE_FILES[store]
+    path.write_text(json.dumps(data), encoding="utf-8")
@@ -0,0 +1,14 @@
+"""
+MapMyLease application package.
+
+    mapmylease.storage        JSON stores, locking, migrations, uploads
+    mapmylease.engine         lease/payment/thread domain logic
+    mapmylease.extraction     PDF/OCR text extraction and AI suggestions
+    mapmylease.observability  logging, metrics, request profiling
+    mapmylease.web            shared Flask app construction
+    mapmylease.landlord       landlord views, JSON API, CLI, create_app()
+    mapmylease.tenant         tenant views, create_tenant_app()
+
+Kept import-free so `import mapmylease.tenant` loads only what the
+tenant app needs.
+"""
@@ -0,0 +1,290 @@
+"""
+Portfolio analytics: monthly occupancy, rent collection, days late,
+arrears and vacancy gaps across every lease group.
+
+One pass over the stores turns each (lease group, month) into a row of
+flat columns; the per-month series are then reductions over those
+columns (np.bincount / cumsum / histogram when NumPy is installed,
+plain loops otherwise — both give the same numbers).
+
+Analytics cover complete months only (up to the end of last month), so
+a result stays valid until the month rolls over or a store changes;
+it is cached on exactly that key.
+"""
+
+import calendar
+import importlib.util
+from datetime import date, datetime
+
+from mapmylease.engine import get_rent_due_info_for_month, latest_confirmations, resolve_governing_lease
+from mapmylease.observability import REPORT_CACHE_TOTAL
+from mapmylease.storage import (
+    _load_all_leases,
+    _load_all_payments,
+    _load_all_terminations,
+    _store_stamp,
+)
+
+# Vectorised reductions (optional). Imported on first use, like the
+# extraction packages, so app startup does not pay for it.
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+ANALYTICS_STORES = ("leases", "payments", "terminations")
+
+# (label, lowest days late, highest days late or None) — days after the
+# rent due date that date_paid falls; early payments count as on time
+DAYS_LATE_BUCKETS = [
+    ("on time", None, 0),
+    ("1-7 days", 1, 7),
+    ("8-15 days", 8, 15),
+    ("16-30 days", 16, 30),
+    ("31+ days", 31, None),
+]
+
+_OCCUPIED, _VACANT = 0, 1
+_COLUMNS = ("month", "status", "expected", "collected", "days_late")
+
+_analytics_cache = {}  # "portfolio" -> (cache key, result)
+
+
+def _iter_months(first, last):
+    year, month = first
+    while (year, month) <= last:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _first_lease_month(leases):
+    starts = []
+    for lease in leases:
+        if lease.get("status") == "draft":
+            continue
+        start = _parse_date((lease.get("current_values") or {}).get("lease_start_date"))
+        if start:
+            starts.append((start.year, start.month))
+    return min(starts) if starts else None
+
+
+def _collect_columns(as_of):
+    """Walk every (lease group, month) up to as_of into flat columns.
+
+    Returns:
+        tuple: (months, columns, gap_runs) — months is the list of
+               (year, month); columns is a dict of equal-length lists,
+               one entry per occupied or vacant lease-month
+    """
+    leases = _load_all_leases().get("leases", [])
+    last = (as_of.year, as_of.month)
+    first = _first_lease_month(leases)
+    if first is None or first > last:
+        return [], {name: [] for name in _COLUMNS}, []
+    months = list(_iter_months(first, last))
+
+    versions_by_group = {}
+    for lease in leases:
+        versions_by_group.setdefault(lease.get("lease_group_id"), []).append(lease)
+    for versions in versions_by_group.values():
+        versions.sort(key=lambda x: x.get("version", 1), reverse=True)
+    terminations = {}
+    for t in _load_all_terminations().get("terminations", []):
+        terminations.setdefault(t.get("lease_id"), t)
+
+    # (group, year, month) -> (amount declared, date_paid) of the latest
+    # rent submission: a correction replaces, never adds to, the month
+    rent_paid = {}
+    latest = latest_confirmations(_load_all_payments().get("confirmations", []))
+    for (group_id, ctype, year, month), c in latest.items():
+        if ctype != "rent":
+            continue
+        try:
+            amount = float(c.get("amount_declared") or 0)
+        except (TypeError, ValueError):
+            amount = 0.0
+        rent_paid[(group_id, year, month)] = (amount, _parse_date(c.get("date_paid")))
+
+    columns = {name: [] for name in _COLUMNS}
+    gap_runs = []
+    for group_id, versions in versions_by_group.items():
+        nickname = ((versions[0].get("current_values") or {}).get("lease_nickname")
+                    if versions else None)
+        run = None
+        for index, (year, month) in enumerate(months):
+            governing = resolve_governing_lease(versions, terminations, year, month)
+            if governing["status"] == "IN_LEASE":
+                status = _OCCUPIED
+            elif governing.get("reason") == "gap":
+                status = _VACANT
+            else:
+                continue
+
+            expected, collected, days_late = 0.0, 0.0, None
+            if status == _OCCUPIED:
+                due = get_rent_due_info_for_month(governing["lease"], year, month)
+                amount, paid_on = rent_paid.get((group_id, year, month), (0.0, None))
+                if due["due_date"] and due["expected_amount"] and due["due_date"] <= as_of:
+                    expected = float(due["expected_amount"])
+                    # Overpaying one month does not hide arrears in another
+                    collected = min(amount, expected)
+                if due["due_date"] and paid_on:
+                    days_late = (paid_on - due["due_date"]).days
+
+            columns["month"].append(index)
+            columns["status"].append(status)
+            columns["expected"].append(expected)
+            columns["collected"].append(collected)
+            columns["days_late"].append(days_late)
+
+            if status == _VACANT:
+                if run and run["to_index"] == index - 1:
+                    run["to_index"] = index
+                else:
+                    run = {"lease_group_id": group_id, "lease_nickname": nickname,
+                           "from_index": index, "to_index": index}
+                    gap_runs.append(run)
+
+    gaps = [{
+        "lease_group_id": r["lease_group_id"],
+        "lease_nickname": r["lease_nickname"],
+        "from": "%04d-%02d" % months[r["from_index"]],
+        "to": "%04d-%02d" % months[r["to_index"]],
+        "months": r["to_index"] - r["from_index"] + 1,
+    } for r in gap_runs]
+    return months, columns, gaps
+
+
+def _bucket_index(days):
+    for i, (_, low, high) in enumerate(DAYS_LATE_BUCKETS):
+        if (low is None or days >= low) and (high is None or days <= high):
+            return i
+    return len(DAYS_LATE_BUCKETS) - 1
+
+
+def _reduce_python(n, columns):
+    occupied, vacant = [0] * n, [0] * n
+    due, collected = [0.0] * n, [0.0] * n
+    late_sum, late_count = [0] * n, [0] * n
+    histogram = [0] * len(DAYS_LATE_BUCKETS)
+    for m, status, expected, paid, days_late in zip(
+            columns["month"], columns["status"], columns["expected"],
+            columns["collected"], columns["days_late"]):
+        if status == _VACANT:
+            vacant[m] += 1
+            continue
+        occupied[m] += 1
+        due[m] += expected
+        collected[m] += paid
+        if days_late is not None:
+            late_sum[m] += max(days_late, 0)
+            late_count[m] += 1
+            histogram[_bucket_index(days_late)] += 1
+
+    arrears, running = [], 0.0
+    for m in range(n):
+        running += due[m] - collected[m]
+        arrears.append(running)
+    return occupied, vacant, due, collected, late_sum, late_count, arrears, histogram
+
+
+def _reduce_numpy(n, columns):
+    import numpy as np
+
+    month = np.asarray(columns["month"], dtype=np.int64)
+    status = np.asarray(columns["status"], dtype=np.int8)
+    expected = np.asarray(columns["expected"], dtype=np.float64)
+    paid = np.asarray(columns["collected"], dtype=np.float64)
+    days_late = np.asarray([np.nan if d is None else d for d in columns["days_late"]],
+                           dtype=np.float64)
+
+    occupied_mask = status == _OCCUPIED
+    occupied = np.bincount(month[occupied_mask], minlength=n)
+    vacant = np.bincount(month[~occupied_mask], minlength=n)
+    due = np.bincount(month, weights=expected, minlength=n)
+    collected = np.bincount(month, weights=paid, minlength=n)
+
+    has_late = occupied_mask & ~np.isnan(days_late)
+    late_month = month[has_late]
+    late_days = days_late[has_late]
+    late_sum = np.bincount(late_month, weights=np.maximum(late_days, 0), minlength=n)
+    late_count = np.bincount(late_month, minlength=n)
+
+    # Bucket edges: on time = days <= 0, then each bucket's upper bound
+    edges = [high for _, _, high in DAYS_LATE_BUCKETS if high is not None]
+    histogram = np.bincount(np.searchsorted(edges, late_days, side="left"),
+                            minlength=len(DAYS_LATE_BUCKETS))
+
+    arrears = np.cumsum(due - collected)
+    return (occupied.tolist(), vacant.tolist(), due.tolist(), collected.tolist(),
+            late_sum.tolist(), late_count.tolist(), arrears.tolist(), histogram.tolist())
+
+
+def build_portfolio_analytics(as_of):
+    """Compute the monthly series for every month up to as_of.
+
+    Args:
+        as_of: date — the last day counted (end of the last complete month)
+
+    Returns:
+        dict: "months" (YYYY-MM labels) plus one equal-length list per
+              series: occupied_units, vacant_units, rent_due,
+              rent_collected, collection_rate (None when nothing was
+              due), avg_days_late (None when nothing was paid),
+              arrears_outstanding (cumulative unpaid rent); and
+              "days_late_distribution" and "vacancy_gaps"
+    """
+    months, columns, gaps = _collect_columns(as_of)
+    n = len(months)
+    reducer = _reduce_numpy if NUMPY_AVAILABLE and n else _reduce_python
+    (occupied, vacant, due, collected,
+     late_sum, late_count, arrears, histogram) = reducer(n, columns)
+
+    return {
+        "as_of": as_of.isoformat(),
+        "months": ["%04d-%02d" % ym for ym in months],
+        "occupied_units": [int(v) for v in occupied],
+        "vacant_units": [int(v) for v in vacant],
+        "rent_due": [round(v, 2) for v in due],
+        "rent_collected": [round(v, 2) for v in collected],
+        "collection_rate": [round(c / d, 4) if d else None for c, d in zip(collected, due)],
+        "avg_days_late": [round(s / c, 1) if c else None for s, c in zip(late_sum, late_count)],
+        "arrears_outstanding": [round(v, 2) for v in arrears],
+        "days_late_distribution": [
+            {"bucket": label, "count": int(count)}
+            for (label, _, _), count in zip(DAYS_LATE_BUCKETS, histogram)],
+        "vacancy_gaps": gaps,
+        "vectorised": reducer is _reduce_numpy,
+    }
+
+
+def last_month_end(today=None):
+    """The last day of the month before today."""
+    today = today or datetime.now().date()
+    year, month = (today.year - 1, 12) if today.month == 1 else (today.year, today.month - 1)
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def portfolio_analytics(today=None):
+    """build_portfolio_analytics() through last month, cached.
+
+    The cache key is the current month plus the leases / payments /
+    terminations store stamps.
+
+    Returns:
+        dict: see build_portfolio_analytics() (shared; do not mutate)
+    """
+    as_of = last_month_end(today)
+    key = (as_of, tuple(_store_stamp(store) for store in ANALYTICS_STORES))
+    cached = _analytics_cache.get("portfolio")
+    if cached and cached[0] == key:
+        REPORT_CACHE_TOTAL.inc("analytics", "hit")
+        return cached[1]
+    REPORT_CACHE_TOTAL.inc("analytics", "miss")
+    result = build_portfolio_analytics(as_of)
+    _analytics_cache["portfolio"] = (key, result)
+    return result
@@ -0,0 +1,405 @@
+"""
+Incremental, hash-verified snapshots of the data directory.
+
+    backups/
+      objects/{sha[:2]}/{sha}         file contents, stored once
+      snapshots/{snapshot_id}.json    manifest: path -> sha256, size, mtime
+
+take_snapshot() copies every store file (single files, the sharded
+groups/ tree and the thread archive) while holding every store lock,
+so the stores in a snapshot are mutually consistent. Uploads are
+copied after the locks are released: uploads are written before the
+records that reference them, so a snapshot's uploads are always a
+superset of what its stores point to.
+
+A file whose size and mtime match the previous manifest is not read
+again — its entry is carried over — and contents already in objects/
+are never copied twice. A snapshot therefore costs a stat per file
+plus a read of what actually changed. The manifest is written last;
+a snapshot without one never happened.
+
+restore_snapshot() puts the store files back exactly as they were
+(removing files the snapshot did not have, which also restores the
+store layout) and re-copies uploads that are missing or differ.
+Uploads added since are left in place. The objects it needs are
+re-hashed before anything is written, and a safety snapshot of the
+current state is taken first, so a restore can itself be undone.
+"""
+
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime
+
+from mapmylease import storage
+from mapmylease.storage import STORE_FILES, store_lock
+from mapmylease.thread_archive import THREAD_ARCHIVE_DIRNAME
+
+BACKUP_DIRNAME = "backups"
+
+# Directories under DATA_DIR that belong to the stores
+SNAPSHOT_DATA_DIRS = (storage.GROUPS_DIRNAME, THREAD_ARCHIVE_DIRNAME)
+
+
+class SnapshotError(Exception):
+    """Raised for a missing snapshot or a corrupt backup object."""
+
+
+def backup_dir():
+    """Return the backup root (MAPMYLEASE_BACKUP_DIR, else DATA_DIR/backups)."""
+    return os.environ.get("MAPMYLEASE_BACKUP_DIR") or os.path.join(storage.DATA_DIR, BACKUP_DIRNAME)
+
+
+def _objects_dir():
+    return os.path.join(backup_dir(), "objects")
+
+
+def _snapshots_dir():
+    return os.path.join(backup_dir(), "snapshots")
+
+
+def _object_path(sha256):
+    return os.path.join(_objects_dir(), sha256[:2], sha256)
+
+
+def _manifest_path(snapshot_id):
+    return os.path.join(_snapshots_dir(), snapshot_id + ".json")
+
+
+# ----------------------------------------------------------------
+# Files covered by a snapshot
+# ----------------------------------------------------------------
+
+def _walk_files(root):
+    """Yield paths relative to root of every regular file below it."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(".tmp"):
+                continue
+            yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+def _data_files():
+    """Relative paths of every store file under DATA_DIR, either layout."""
+    for filename in STORE_FILES.values():
+        if os.path.isfile(os.path.join(storage.DATA_DIR, filename)):
+            yield filename
+    for dirname in SNAPSHOT_DATA_DIRS:
+        for rel in _walk_files(os.path.join(storage.DATA_DIR, dirname)):
+            yield os.path.join(dirname, rel)
+
+
+def _upload_files():
+    return _walk_files(storage.UPLOAD_FOLDER)
+
+
+# ----------------------------------------------------------------
+# Object store
+# ----------------------------------------------------------------
+
+def _copy_hashed(src, dest):
+    """Copy src to dest via a temp file, hashing on the way.
+
+    Returns:
+        tuple: (sha256_hex, size, tmp_path) — the caller renames or
+               removes tmp_path
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = f"{dest}.{uuid.uuid4().hex[:8]}.tmp"
+    os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+    try:
+        with open(src, "rb") as fin, open(tmp_path, "wb") as fout:
+            for chunk in iter(lambda: fin.read(storage.PROOF_CHUNK_BYTES), b""):
+                digest.update(chunk)
+                size += len(chunk)
+                fout.write(chunk)
+            fout.flush()
+            os.fsync(fout.fileno())
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return digest.hexdigest(), size, tmp_path
+
+
+def _store_object(src):
+    """Add a file's contents to objects/ (if new).
+
+    Returns:
+        tuple: (sha256_hex, size, bytes newly stored)
+    """
+    sha256, size, tmp_path = _copy_hashed(src, os.path.join(_objects_dir(), "incoming"))
+    dest = _object_path(sha256)
+    if os.path.exists(dest):
+        os.remove(tmp_path)
+        return sha256, size, 0
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.replace(tmp_path, dest)
+    return sha256, size, size
+
+
+def _snapshot_entries(root, paths, previous, report):
+    """Build manifest entries for files under root.
+
+    Entries whose size and mtime match `previous` are reused unread.
+    """
+    entries = {}
+    for rel in paths:
+        full_path = os.path.join(root, rel)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            continue    # removed since the directory walk
+        prior = previous.get(rel)
+        if (prior and prior["size"] == st.st_size and prior["mtime_ns"] == st.st_mtime_ns
+                and os.path.exists(_object_path(prior["sha256"]))):
+            entries[rel] = prior
+            report["reused"] += 1
+            continue
+        sha256, size, stored = _store_object(full_path)
+        entries[rel] = {"sha256": sha256, "size": size, "mtime_ns": st.st_mtime_ns}
+        report["hashed"] += 1
+        report["bytes_copied"] += stored
+    return entries
+
+
+# ----------------------------------------------------------------
+# Snapshots
+# ----------------------------------------------------------------
+
+def _snapshot_ids():
+    """Snapshot ids, oldest first (ids start with their timestamp)."""
+    if not os.path.isdir(_snapshots_dir()):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(_snapshots_dir())
+                  if name.endswith(".json"))
+
+
+def _snapshot_time(snapshot_id):
+    return datetime.strptime(snapshot_id[:15], "%Y%m%dT%H%M%S")
+
+
+def list_snapshots():
+    """Return a summary of every snapshot, oldest first.
+
+    Returns:
+        list of dict: {"id", "created_at", "label", "files", "bytes"}
+    """
+    summaries = []
+    for snapshot_id in _snapshot_ids():
+        manifest = load_snapshot(snapshot_id)
+        entries = list(manifest["data"].values()) + list(manifest["uploads"].values())
+        summaries.append({"id": snapshot_id, "created_at": manifest["created_at"],
+                          "label": manifest.get("label"), "files": len(entries),
+                          "bytes": sum(e["size"] for e in entries)})
+    return summaries
+
+
+def load_snapshot(snapshot_id):
+    """Return one snapshot's manifest.
+
+    Raises:
+        SnapshotError: if there is no such snapshot
+    """
+    try:
+        with open(_manifest_path(snapshot_id), "rb") as f:
+            return storage._codec_loads(f.read())
+    except (OSError, json.JSONDecodeError) as e:
+        raise SnapshotError(f"no readable snapshot {snapshot_id!r}: {e}")
+
+
+def find_snapshot(when):
+    """Resolve a snapshot id, or the latest snapshot taken at or before a time.
+
+    Args:
+        when: a snapshot id, or an ISO date/datetime ("2026-10-01",
+              "2026-10-01T18:00")
+
+    Returns:
+        str: snapshot id
+
+    Raises:
+        SnapshotError: if nothing matches
+    """
+    snapshot_ids = _snapshot_ids()
+    if when in snapshot_ids:
+        return when
+    try:
+        cutoff = datetime.fromisoformat(when)
+    except ValueError:
+        raise SnapshotError(f"{when!r} is neither a snapshot id nor an ISO date")
+    if len(when) == 10:
+        cutoff = cutoff.replace(hour=23, minute=59, second=59)
+    earlier = [i for i in snapshot_ids if _snapshot_time(i) <= cutoff]
+    if not earlier:
+        raise SnapshotError(f"no snapshot at or before {when}")
+    return earlier[-1]
+
+
+def take_snapshot(label=None, now=None):
+    """Snapshot the stores (under every store lock) and the uploads.
+
+    Args:
+        label: optional note kept in the manifest
+        now: datetime to record (default: now)
+
+    Returns:
+        dict: {"id", "files", "reused", "hashed", "bytes_copied"}
+    """
+    now = now or datetime.now()
+    snapshot_ids = _snapshot_ids()
+    previous = load_snapshot(snapshot_ids[-1]) if snapshot_ids else {"data": {}, "uploads": {}}
+    report = {"id": f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}",
+              "reused": 0, "hashed": 0, "bytes_copied": 0}
+
+    with store_lock(*STORE_FILES):
+        data = _snapshot_entries(storage.DATA_DIR, list(_data_files()), previous["data"], report)
+    uploads = _snapshot_entries(storage.UPLOAD_FOLDER, list(_upload_files()),
+                                previous["uploads"], report)
+
+    manifest = {"id": report["id"], "created_at": now.isoformat(), "label": label,
+                "layout": storage.store_layout(), "data": data, "uploads": uploads}
+    path = _manifest_path(report["id"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    storage._write_file_atomic(path, storage._codec_dumps(manifest))
+    report["files"] = len(data) + len(uploads)
+    return report
+
+
+def verify_snapshot(snapshot_id):
+    """Re-hash every object a snapshot references.
+
+    Returns:
+        list of str: relative paths whose object is missing or corrupt
+    """
+    manifest = load_snapshot(snapshot_id)
+    bad = []
+    for section in ("data", "uploads"):
+        for rel, entry in manifest[section].items():
+            path = _object_path(entry["sha256"])
+            try:
+                ok = storage._hash_file(path)[0] == entry["sha256"]
+            except OSError:
+                ok = False
+            if not ok:
+                bad.append(f"{section}/{rel}")
+    return bad
+
+
+def _restore_file(entry, dest):
+    """Copy an object to dest atomically, checking its hash first.
+
+    Raises:
+        SnapshotError: if the object is missing or does not match
+    """
+    src = _object_path(entry["sha256"])
+    try:
+        sha256, _, tmp_path = _copy_hashed(src, dest)
+    except OSError as e:
+        raise SnapshotError(f"backup object for {dest} is unreadable: {e}")
+    if sha256 != entry["sha256"]:
+        os.remove(tmp_path)
+        raise SnapshotError(f"backup object for {dest} is corrupt")
+    os.replace(tmp_path, dest)
+
+
+def _prune_empty_dirs(root):
+    """Remove empty directories below and including root."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, _, _ in sorted(os.walk(root), key=lambda w: -len(w[0])):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+
+def restore_snapshot(snapshot_id):
+    """Put the data directory back to a snapshot. Stop the app first.
+
+    Works out which files differ, checks those objects' hashes, takes
+    a safety snapshot of the current state (undo by restoring that
+    one), and only then writes — all under every store lock.
+
+    Returns:
+        dict: {"safety_snapshot", "data_restored", "data_removed",
+               "uploads_restored"}
+
+    Raises:
+        SnapshotError: if the snapshot is missing or an object is
+                       missing or corrupt (nothing is written)
+    """
+    manifest = load_snapshot(snapshot_id)
+    with store_lock(*STORE_FILES):
+        plan = [(os.path.join(root, rel), entry, section)
+                for section, root in (("data", storage.DATA_DIR), ("uploads", storage.UPLOAD_FOLDER))
+                for rel, entry in manifest[section].items()
+                if not _matches(os.path.join(root, rel), entry)]
+        for dest, entry, _ in plan:
+            try:
+                ok = storage._hash_file(_object_path(entry["sha256"]))[0] == entry["sha256"]
+            except OSError:
+                ok = False
+            if not ok:
+                raise SnapshotError(f"backup object for {dest} is missing or corrupt")
+
+        report = {"safety_snapshot": take_snapshot(label=f"before restore of {snapshot_id}")["id"],
+                  "data_restored": 0, "data_removed": 0, "uploads_restored": 0}
+        for dest, entry, section in plan:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            _restore_file(entry, dest)
+            report[f"{section}_restored"] += 1
+
+        # Removing store files the snapshot lacks also switches the
+        # layout back: an emptied groups/ directory is pruned away
+        for rel in list(_data_files()):
+            if rel not in manifest["data"]:
+                os.remove(os.path.join(storage.DATA_DIR, rel))
+                report["data_removed"] += 1
+        for dirname in SNAPSHOT_DATA_DIRS:
+            _prune_empty_dirs(os.path.join(storage.DATA_DIR, dirname))
+    return report
+
+
+def _matches(path, entry):
+    try:
+        return (os.path.getsize(path) == entry["size"]
+                and storage.content_hash(path) == entry["sha256"])
+    except OSError:
+        return False
+
+
+def prune_snapshots(keep):
+    """Delete all but the newest `keep` snapshots and unreferenced objects.
+
+    Returns:
+        dict: {"snapshots": n removed, "objects": n removed, "bytes": n freed}
+    """
+    snapshot_ids = _snapshot_ids()
+    doomed = snapshot_ids[:-keep] if keep > 0 else snapshot_ids
+    for snapshot_id in doomed:
+        os.remove(_manifest_path(snapshot_id))
+
+    referenced = set()
+    for snapshot_id in snapshot_ids[len(doomed):]:
+        manifest = load_snapshot(snapshot_id)
+        for section in ("data", "uploads"):
+            referenced.update(e["sha256"] for e in manifest[section].values())
+
+    report = {"snapshots": len(doomed), "objects": 0, "bytes": 0}
+    for rel in list(_walk_files(_objects_dir())):
+        if os.path.basename(rel) in referenced:
+            continue
+        path = os.path.join(_objects_dir(), rel)
+        report["bytes"] += os.path.getsize(path)
+        os.remove(path)
+        report["objects"] += 1
+    _prune_empty_dirs(_objects_dir())
+    return report
@@ -0,0 +1,2354 @@
+"""
+Lease, payment, token and thread engine: queries over the stores and
+the write helpers built on them (thread lifecycle, reminders and
+escalation, tokens, terminations, renewals, coverage and governing
+lease rules).
+
+No Flask request handling lives here; both the landlord and the
+tenant app import it. The search index, thread archive and notification
+outbox are imported inside the functions that use them, so the tenant
+app does not load them (or sqlite3 and smtplib) at startup.
+"""
+
+import os
+from datetime import datetime, timedelta
+import re
+import calendar
+import uuid
+import secrets
+
+from mapmylease.observability import THREAD_ACTIONS_TOTAL, _timed
+from mapmylease.storage import (
+    UPLOAD_FOLDER,
+    _default_expected_payments,
+    _load_all_leases,
+    _load_all_payments,
+    _load_all_tenant_access,
+    _load_all_terminations,
+    _load_all_threads,
+    _load_group_records,
+    _retry_on_conflict,
+    _save_lease_file,
+    _save_payment_file,
+    _save_tenant_access_file,
+    _save_termination_file,
+    _save_threads_file,
+    store_lock,
+)
+
+
+# ── Thread query helpers (read-only — never call _save_threads_file) ────
+
+
+def get_threads_for_lease_group(lease_group_id, thread_data=None):
+    """Return all threads for a lease group.
+
+    Args:
+        lease_group_id: str
+        thread_data: optional preloaded dict from _load_all_threads()
+
+    Returns:
+        list of thread dicts (no guaranteed order).
+    """
+    if thread_data is None:
+        thread_data = _load_group_records("threads", lease_group_id)
+    return [t for t in thread_data.get("threads", [])
+            if t.get("lease_group_id") == lease_group_id]
+
+
+def get_messages_for_thread(thread_id, thread_data=None):
+    """Return messages for one thread, oldest first.
+
+    Args:
+        thread_id: str
+        thread_data: optional preloaded dict from _load_all_threads()
+
+    Returns:
+        list of message dicts, sorted by created_at ascending.
+    """
+    if thread_data is None:
+        thread_data = _load_all_threads()
+    msgs = [m for m in thread_data.get("messages", [])
+            if m.get("thread_id") == thread_id]
+    msgs.sort(key=lambda m: m.get("created_at", ""))
+    return msgs
+
+
+def count_landlord_attention_threads(lease_group_id, thread_data=None):
+    """Count open threads where needs_landlord_attention == true.
+
+    This is the badge count. Only escalated or explicitly flagged
+    threads are counted — not all threads waiting on landlord.
+
+    Args:
+        lease_group_id: str
+        thread_data: optional preloaded dict from _load_all_threads()
+
+    Returns:
+        int
+    """
+    threads = get_threads_for_lease_group(lease_group_id, thread_data)
+    return sum(1 for t in threads
+               if t.get("status") == "open"
+               and t.get("needs_landlord_attention") is True)
+
+
+def get_attention_summary_for_lease(lease_group_id, thread_data=None):
+    """List open threads needing landlord attention with display info.
+
+    Enriched for Action Console inline expansion. Each item includes
+    thread state fields, last_action summary, recent_messages (1-3),
+    and overdue_days (escalated missing_payment only).
+
+    Args:
+        lease_group_id: str
+        thread_data: optional preloaded dict from _load_all_threads()
+
+    Returns:
+        list of dicts, newest first. Each dict:
+            thread_id:     str
+            topic_type:    str
+            topic_ref:     str | None
+            status:        str
+            waiting_on:    str | None
+            display_label: str (e.g. "Rent — January 2026")
+            reason:        str (human-readable)
+            open_month:    str (YYYY-MM for View link, or None)
+            escalation_started_at:    str | None
+            last_reminder_at:         str | None
+            auto_reminders_suppressed: bool
+            expected_amount:          number | None (missing_payment only)
+            expected_due_date:        str | None (missing_payment only)
+            overdue_days:             int | None (escalated missing_payment only)
+            last_action:              dict | None
+            recent_messages:          list (last 1-3, oldest first)
+    """
+    month_names = ["January", "February", "March", "April", "May", "June",
+                   "July", "August", "September", "October", "November",
+                   "December"]
+
+    TOPIC_TYPE_LABELS = {
+        "payment_review": "Payment review",
+        "missing_payment": "Missing payment",
+        "renewal": "Renewal",
+        "general": "General",
+    }
+
+    # Human-readable summary for each message_type
+    _ACTION_SUMMARIES = {
+        "submission": "Payment submitted",
+        "flag": "Flag raised",
+        "reply": None,  # depends on actor
+        "reminder": "Reminder sent",
+        "auto_reminder": "Auto reminder sent",
+        "acknowledge": "Acknowledged",
+        "nudge": "Follow-up nudge",
+    }
+
+    threads = get_threads_for_lease_group(lease_group_id, thread_data)
+    attention = [t for t in threads
+                 if t.get("status") == "open"
+                 and t.get("needs_landlord_attention") is True]
+
+    # Look up lease names for modal draft text
+    lessee_name = ""
+    lessor_name = ""
+    all_leases = _load_all_leases().get("leases", [])
+    for l in all_leases:
+        if l.get("lease_group_id") == lease_group_id and l.get("is_current"):
+            cv = l.get("current_values", l)
+            lessee_name = cv.get("lessee_name") or ""
+            lessor_name = cv.get("lessor_name") or ""
+            break
+
+    today = datetime.utcnow().date()
+
+    items = []
+    for t in attention:
+        topic_type = t.get("topic_type", "general")
+        topic_ref = t.get("topic_ref")  # e.g. "rent:2026-01"
+
+        # Build display_label and open_month from topic_ref
+        display_label = TOPIC_TYPE_LABELS.get(topic_type, topic_type.title())
+        open_month = None
+
+        if topic_ref and ":" in topic_ref:
+            category, period = topic_ref.split(":", 1)
+            cat_display = category.title()
+            # Parse YYYY-MM into readable month
+            try:
+                year_str, month_str = period.split("-")
+                month_idx = int(month_str)
+                year_val = int(year_str)
+                if 1 <= month_idx <= 12:
+                    display_label = f"{cat_display} — {month_names[month_idx - 1]} {year_val}"
+                    open_month = period  # "2026-01"
+                else:
+                    display_label = f"{cat_display} — {period}"
+                    open_month = period
+            except (ValueError, IndexError):
+                display_label = f"{cat_display} — {period}"
+                open_month = period
+
+        # Determine reason from thread context
+        msgs = get_messages_for_thread(t["id"], thread_data)
+        if topic_type == "payment_review":
+            last_msg = msgs[-1] if msgs else None
+            if last_msg and last_msg.get("actor") == "tenant":
+                reason = "Tenant replied"
+            else:
+                reason = "Awaiting your review"
+        elif topic_type == "missing_payment":
+            reason = "Expected payment not yet submitted"
+        elif topic_type == "renewal":
+            reason = "Lease approaching expiry"
+        else:
+            reason = "Needs your attention"
+
+        # --- last_action: summary of the most recent message ---
+        last_action = None
+        if msgs:
+            last_msg = msgs[-1]
+            mt = last_msg.get("message_type", "")
+            actor = last_msg.get("actor", "")
+            summary = _ACTION_SUMMARIES.get(mt)
+            if summary is None:
+                # reply — depends on actor
+                if actor == "tenant":
+                    summary = "Tenant replied"
+                elif actor == "landlord":
+                    summary = "You replied"
+                else:
+                    summary = "System message"
+            last_action = {
+                "actor": actor,
+                "message_type": mt,
+                "timestamp": last_msg.get("created_at"),
+                "summary_text": summary,
+            }
+
+        # --- recent_messages: last 1-3, oldest first for display ---
+        _msg_fields = ("id", "actor", "message_type", "body",
+                       "created_at", "attachments", "payment_id")
+        recent_messages = [
+            {k: m.get(k) for k in _msg_fields}
+            for m in msgs[-3:]
+        ]
+
+        # --- overdue_days: escalated missing_payment only ---
+        overdue_days = None
+        if (
+            topic_type == "missing_payment"
+            and t.get("escalation_started_at")
+        ):
+            due_str = t.get("expected_due_date")
+            if due_str:
+                try:
+                    due_date = datetime.strptime(due_str, "%Y-%m-%d").date()
+                    diff = (today - due_date).days
+                    overdue_days = diff if diff > 0 else None
+                except ValueError:
+                    pass
+
+        # --- status_display + status_css: pre-computed for template ---
+        status_display = ""
+        status_css = ""
+        if topic_type == "missing_payment":
+            if t.get("escalation_started_at"):
+                day_word = "day" if overdue_days == 1 else "days"
+                status_display = f"Overdue by {overdue_days} {day_word}"
+            else:
+                status_display = "Expected payment not yet submitted"
+        elif topic_type == "payment_review":
+            status_css = "status-normal"
+            if t.get("waiting_on") == "landlord":
+                status_display = "Awaiting your review"
+            else:
+                status_display = "Awaiting tenant response"
+
+        item = {
+            "thread_id": t["id"],
+            "topic_type": topic_type,
+            "topic_ref": topic_ref,
+            "status": t.get("status"),
+            "waiting_on": t.get("waiting_on"),
+            "display_label": display_label,
+            "reason": reason,
+            "open_month": open_month,
+            "escalation_started_at": t.get("escalation_started_at"),
+            "last_reminder_at": t.get("last_reminder_at"),
+            "auto_reminders_suppressed": t.get("auto_reminders_suppressed", False),
+            "expected_amount": t.get("expected_amount") if topic_type == "missing_payment" else None,
+            "expected_due_date": t.get("expected_due_date") if topic_type == "missing_payment" else None,
+            "overdue_days": overdue_days,
+            "status_display": status_display,
+            "status_css": status_css,
+            "last_action": last_action,
+            "recent_messages": recent_messages,
+            "lessee_name": lessee_name,
+            "lessor_name": lessor_name,
+        }
+        items.append(item)
+
+    # Sort newest first by open_month (threads without open_month go last)
+    items.sort(key=lambda x: x.get("open_month") or "", reverse=True)
+    return items
+
+
+# ---------------------------------------------------------------------------
+# Action Console — global attention aggregator
+# ---------------------------------------------------------------------------
+_URGENCY_SORT = {"high": 0, "medium": 1, "normal": 2}
+
+
+def get_global_attention_summary(leases):
+    """Aggregate pre-computed _attention_items across all leases.
+
+    Reads lease["_attention_items"] (already computed by dashboard route).
+    Derives urgency from topic_type + reason. Groups by lease, sorts
+    by urgency. Does NOT re-evaluate thread state or engine logic.
+
+    Args:
+        leases: list of lease dicts with _attention_items already attached
+
+    Returns:
+        dict with lease_groups (list) and total_open_items (int)
+    """
+    lease_groups = []
+    total = 0
+
+    for lease in leases:
+        items = lease.get("_attention_items", [])
+        if not items:
+            continue
+
+        # Derive urgency and re-sort for console (high → medium → normal)
+        console_items = []
+        for item in items:
+            tt = item.get("topic_type", "")
+            reason = item.get("reason", "")
+            if tt == "missing_payment":
+                urgency = "high"
+            elif tt == "payment_review" and reason == "Tenant replied":
+                urgency = "medium"
+            else:
+                urgency = "normal"
+            console_items.append({**item, "urgency_level": urgency})
+
+        console_items.sort(key=lambda x: _URGENCY_SORT.get(
+            x.get("urgency_level", "normal"), 2))
+
+        cv = lease.get("current_values", lease)
+        display_name = (cv.get("lease_nickname")
+                        or cv.get("property_address")
+                        or "Untitled Lease")
+
+        lease_groups.append({
+            "lease_group_id": lease.get("lease_group_id", lease.get("id")),
+            "lease_id": lease.get("id"),
+            "lease_display_name": display_name,
+            "attention_count": len(console_items),
+            "items": console_items,
+        })
+        total += len(console_items)
+
+    # Sort lease groups: group with highest-urgency item first
+    lease_groups.sort(key=lambda g: _URGENCY_SORT.get(
+        g["items"][0].get("urgency_level", "normal"), 2))
+
+    return {"lease_groups": lease_groups, "total_open_items": total}
+
+
+def find_open_thread(lease_group_id, topic_type, topic_ref, thread_data=None):
+    """Find the first open thread matching the given criteria.
+
+    Checks OPEN threads only (resolved threads do not block).
+    Used for idempotency when creating threads via ensure_thread_exists.
+
+    Args:
+        lease_group_id: str
+        topic_type: str (e.g. "payment_review")
+        topic_ref: str | None (e.g. "rent:2026-01")
+        thread_data: optional preloaded dict from _load_all_threads()
+
+    Returns:
+        dict (thread) or None if no matching open thread exists.
+    """
+    threads = get_threads_for_lease_group(lease_group_id, thread_data)
+    for t in threads:
+        if (t.get("status") == "open"
+                and t.get("topic_type") == topic_type
+                and t.get("topic_ref") == topic_ref):
+            return t
+    return None
+
+
+def build_thread_timeline(thread_id, thread_data, payment_lookup):
+    """Build a chronological timeline for one thread.
+
+    Joins thread messages with payment details from the lookup dict.
+    Submission messages pull extra fields from the matching payment record.
+    A thread missing from thread_data is looked up in the cold archive.
+
+    Args:
+        thread_id: str
+        thread_data: preloaded dict from _load_all_threads()
+        payment_lookup: dict {payment_id: payment_confirmation_dict}
+
+    Returns:
+        list of timeline entry dicts, oldest first. Each entry:
+            entry_type:  "submission" | "event"
+            timestamp:   str (ISO)
+            ... plus type-specific fields
+    """
+    msgs = get_messages_for_thread(thread_id, thread_data)
+    if not msgs and not any(t.get("id") == thread_id for t in thread_data.get("threads", [])):
+        # Not in the hot store: the thread may have been archived
+        from mapmylease.thread_archive import find_archived_thread_data
+        archived = find_archived_thread_data(thread_id)
+        if archived:
+            msgs = get_messages_for_thread(thread_id, archived)
+    timeline = []
+
+    for msg in msgs:
+        if msg.get("message_type") == "submission":
+            # Enrich with payment record details
+            pid = msg.get("payment_id")
+            pc = payment_lookup.get(pid, {}) if pid else {}
+            timeline.append({
+                "entry_type": "submission",
+                "payment_id": pid,
+                "timestamp": msg.get("created_at", ""),
+                "amount_declared": pc.get("amount_declared"),
+                "amount_agreed": pc.get("amount_agreed"),
+                "tds_deducted": pc.get("tds_deducted"),
+                "date_paid": pc.get("date_paid"),
+                "submitted_via": pc.get("submitted_via"),
+                "notes": pc.get("notes"),
+                "proof_files": pc.get("proof_files", []),
+            })
+        else:
+            timeline.append({
+                "entry_type": "event",
+                "message_type": msg.get("message_type"),
+                "actor": msg.get("actor"),
+                "body": msg.get("body"),
+                "attachments": msg.get("attachments", []),
+                "timestamp": msg.get("created_at", ""),
+                "payment_id": msg.get("payment_id"),
+            })
+
+    return timeline
+
+
+# ── Thread write helpers ────────────────────────────────────────────────
+#
+# Each function: one _load_all_threads() at top, one _save_threads_file()
+# at end. No write helper ever calls another write helper.
+
+
+@_retry_on_conflict
+@store_lock("threads")
+def ensure_thread_exists(lease_group_id, topic_type, topic_ref,
+                         waiting_on="landlord",
+                         expected_due_date=None,
+                         expected_amount=None,
+                         is_first_month=None):
+    """Return an existing open thread or create a new one.
+
+    Checks OPEN threads only. Resolved threads do NOT block creation.
+
+    If an open thread exists, returns it without saving.
+    If none exists, creates a new thread and saves once.
+
+    Args:
+        lease_group_id: str
+        topic_type: str (e.g. "payment_review")
+        topic_ref: str | None (e.g. "rent:2026-01")
+        waiting_on: str ("landlord" | "tenant"), default "landlord"
+
+    Returns:
+        dict: the thread (existing or newly created)
+    """
+    thread_data = _load_all_threads()
+
+    existing = find_open_thread(lease_group_id, topic_type, topic_ref,
+                                thread_data)
+    if existing:
+        return existing
+
+    new_thread = {
+        "id": str(uuid.uuid4()),
+        "lease_group_id": lease_group_id,
+        "topic_type": topic_type,
+        "topic_ref": topic_ref,
+        "status": "open",
+        "waiting_on": waiting_on,
+        "created_at": datetime.now().isoformat(),
+        "resolved_at": None,
+        "needs_landlord_attention": False,
+        "escalation_started_at": None,
+        "last_reminder_at": None,
+        "auto_reminders_suppressed": False,
+    }
+    if expected_due_date is not None:
+        new_thread["expected_due_date"] = expected_due_date
+    if expected_amount is not None:
+        new_thread["expected_amount"] = expected_amount
+    if is_first_month is not None:
+        new_thread["is_first_month"] = is_first_month
+    thread_data["threads"].append(new_thread)
+    _save_threads_file(thread_data)
+    THREAD_ACTIONS_TOTAL.inc("created", topic_type)
+    return new_thread
+
+
+@_retry_on_conflict
+@store_lock("threads")
+def add_message_to_thread(thread_id, actor, message_type, body,
+                          payment_id=None, attachments=None):
+    """Append a message to a thread and apply waiting_on transition.
+
+    Explicit transitions (never inferred from message order):
+        flag       by landlord  → waiting_on = "tenant"
+        reply      by tenant    → waiting_on = "landlord"
+        reply      by landlord  → waiting_on = "tenant"
+        submission              → waiting_on = "landlord"
+        acknowledge             → status = "resolved", waiting_on = None,
+                                  resolved_at = now
+        reminder                → no change
+        nudge                   → no change
+
+    One load at top, one save at end. Acknowledge is handled inline
+    (no call to resolve_thread).
+
+    Returns None without saving if thread_id not found.
+
+    Args:
+        thread_id: str
+        actor: "landlord" | "tenant" | "system"
+        message_type: "submission" | "flag" | "reply" | "reminder"
+                      | "auto_reminder" | "acknowledge" | "nudge"
+        body: str | None
+        payment_id: str | None
+        attachments: list of str | None
+
+    Returns:
+        dict: the newly created message, or None if thread not found
+    """
+    thread_data = _load_all_threads()
+
+    thread = next((t for t in thread_data["threads"]
+                   if t["id"] == thread_id), None)
+    if not thread:
+        return None
+
+    new_message = {
+        "id": str(uuid.uuid4()),
+        "thread_id": thread_id,
+        "created_at": datetime.now().isoformat(),
+        "actor": actor,
+        "message_type": message_type,
+        "body": body,
+        "payment_id": payment_id,
+        "attachments": attachments or [],
+        "channel": "internal",
+        "delivered_via": ["internal"],
+        "external_ref": None,
+    }
+    thread_data["messages"].append(new_message)
+
+    if message_type == "flag" and actor == "landlord":
+        thread["waiting_on"] = "tenant"
+    elif message_type == "reply" and actor == "tenant":
+        thread["waiting_on"] = "landlord"
+    elif message_type == "reply" and actor == "landlord":
+        thread["waiting_on"] = "tenant"
+    elif message_type == "submission":
+        thread["waiting_on"] = "landlord"
+    elif message_type == "acknowledge":
+        thread["status"] = "resolved"
+        thread["waiting_on"] = None
+        thread["resolved_at"] = datetime.now().isoformat()
+    # reminder, auto_reminder, nudge → no change to waiting_on
+
+    # Manual landlord reminder on missing_payment: update last_reminder_at
+    # to permanently block automatic reminders (gated by last_reminder_at is None).
+    if message_type == "reminder" and thread.get("topic_type") == "missing_payment":
+        thread["last_reminder_at"] = datetime.now().isoformat()
+
+    # Sync needs_landlord_attention for payment_review threads only.
+    # missing_payment threads manage this via the escalation pipeline.
+    if thread.get("topic_type") == "payment_review":
+        if thread.get("status") == "resolved":
+            thread["needs_landlord_attention"] = False
+        elif thread.get("status") == "open" and thread.get("waiting_on") == "landlord":
+            thread["needs_landlord_attention"] = True
+        elif thread.get("status") == "open" and thread.get("waiting_on") == "tenant":
+            thread["needs_landlord_attention"] = False
+
+    from mapmylease.notifications import enqueue_deliveries
+    from mapmylease.search import index_message
+
+    enqueue_deliveries(thread_data, new_message, thread)
+    if _save_threads_file(thread_data):
+        index_message(new_message, thread)
+    return new_message
+
+
+@_retry_on_conflict
+@store_lock("threads")
+def resolve_thread(thread_id):
+    """Set a thread to resolved status.
+
+    Sets status="resolved", waiting_on=None, resolved_at=now.
+    Resolved threads are immutable history — this function never
+    reopens threads or deletes messages.
+
+    One load at top, one save at end.
+    Returns None without saving if thread_id not found.
+
+    Args:
+        thread_id: str
+
+    Returns:
+        dict: the updated thread, or None if thread_id not found
+    """
+    thread_data = _load_all_threads()
+
+    thread = next((t for t in thread_data["threads"]
+                   if t["id"] == thread_id), None)
+    if not thread:
+        return None
+
+    thread["status"] = "resolved"
+    thread["waiting_on"] = None
+    thread["resolved_at"] = datetime.now().isoformat()
+    thread["needs_landlord_attention"] = False
+
+    _save_threads_file(thread_data)
+    return thread
+
+
+@_timed("engine:materialise_system_threads")
+@_retry_on_conflict
+@store_lock("threads")
+def materialise_system_threads(lease_group_id):
+    """Lazily create payment_review threads for unthreaded payments.
+
+    For each unique (confirmation_type, period_year, period_month) group
+    in payment_data.json, checks whether ANY thread (open OR resolved)
+    already exists. If not, creates a new open thread with
+    waiting_on="landlord".
+
+    Idempotency: checks open AND resolved threads. This prevents
+    re-creating threads for already-reviewed payments. This is
+    intentionally different from ensure_thread_exists() which checks
+    open only.
+
+    Single load of threads.json at top, single save at end (only if
+    new threads were created). Reads payment_data.json via
+    _load_all_payments(). Does NOT call ensure_thread_exists().
+
+    Args:
+        lease_group_id: str
+
+    Returns:
+        bool: True if any threads were created, False otherwise
+    """
+    thread_data = _load_all_threads()
+    payment_data = _load_all_payments()
+
+    confirmations = [c for c in payment_data.get("confirmations", [])
+                     if c.get("lease_group_id") == lease_group_id]
+    if not confirmations:
+        return False
+
+    # Collect existing topic_refs for this lease group (open AND resolved,
+    # including resolved threads moved to the cold archive)
+    from mapmylease.thread_archive import archived_topic_refs
+    existing_refs = archived_topic_refs(lease_group_id, "payment_review")
+    for t in thread_data.get("threads", []):
+        if (t.get("lease_group_id") == lease_group_id
+                and t.get("topic_type") == "payment_review"):
+            existing_refs.add(t.get("topic_ref"))
+
+    # Group payments by (confirmation_type, period_year, period_month)
+    seen_refs = set()
+    for c in confirmations:
+        ctype = c.get("confirmation_type")
+        year = c.get("period_year")
+        month = c.get("period_month")
+        if not ctype or not year or not month:
+            continue
+        topic_ref = f"{ctype}:{year}-{str(month).zfill(2)}"
+        seen_refs.add(topic_ref)
+
+    # Create threads for refs that have no existing thread
+    created_count = 0
+    for topic_ref in seen_refs:
+        if topic_ref in existing_refs:
+            continue
+        new_thread = {
+            "id": str(uuid.uuid4()),
+            "lease_group_id": lease_group_id,
+            "topic_type": "payment_review",
+            "topic_ref": topic_ref,
+            "status": "open",
+            "waiting_on": "landlord",
+            "created_at": datetime.now().isoformat(),
+            "resolved_at": None,
+            "needs_landlord_attention": True,
+            "escalation_started_at": None,
+            "last_reminder_at": None,
+            "auto_reminders_suppressed": False,
+        }
+        thread_data["threads"].append(new_thread)
+        created_count += 1
+
+    if created_count:
+        _save_threads_file(thread_data)
+        THREAD_ACTIONS_TOTAL.inc("created", "payment_review", amount=created_count)
+
+    return created_count > 0
+
+
+@_timed("engine:materialise_missing_payment_threads")
+@_retry_on_conflict
+@store_lock("threads")
+def materialise_missing_payment_threads(lease_group_id, lease_data):
+    """Lazily create missing_payment threads for overdue unpaid rent.
+
+    For each month from tracking_start_date to today, calls
+    evaluate_missing_payment_status(). If rent is missing and
+    overdue, calls ensure_thread_exists() which handles
+    idempotency (no duplicate open threads).
+
+    Args:
+        lease_group_id: str
+        lease_data: full lease dict (with current_values)
+
+    Returns:
+        bool: True if any threads were created, False otherwise
+    """
+    cv = lease_data.get("current_values") or {}
+
+    if lease_data.get("status") == "draft":
+        return False
+
+    lease_start_str = cv.get("lease_start_date")
+    created_at_str = lease_data.get("created_at")
+    if not lease_start_str:
+        return False
+
+    try:
+        lease_start = datetime.strptime(lease_start_str, "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return False
+
+    if created_at_str:
+        try:
+            created_at = datetime.strptime(created_at_str[:10], "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            created_at = lease_start
+    else:
+        created_at = lease_start
+
+    tracking_start = max(lease_start, created_at)
+    today = datetime.now().date()
+
+    all_confirmations = _load_all_payments().get("confirmations", [])
+
+    y, m = tracking_start.year, tracking_start.month
+    created = False
+
+    while (y, m) <= (today.year, today.month):
+        result = evaluate_missing_payment_status(
+            lease_data, y, m, today,
+            payment_confirmations=all_confirmations
+        )
+
+        if result["should_create_thread"]:
+            topic_ref = f"rent:{y}-{str(m).zfill(2)}"
+            ensure_thread_exists(
+                lease_group_id,
+                "missing_payment",
+                topic_ref,
+                waiting_on="tenant",
+                expected_due_date=result["expected_due_date"].isoformat(),
+                expected_amount=result["expected_amount"],
+                is_first_month=result["is_first_month"],
+            )
+            created = True
+
+        if m == 12:
+            y += 1
+            m = 1
+        else:
+            m += 1
+
+    return created
+
+
+@_timed("engine:auto_resolve_missing_payment_threads")
+@_retry_on_conflict
+@store_lock("threads")
+def auto_resolve_missing_payment_threads():
+    """Resolve open missing_payment threads where rent has been submitted.
+
+    Loads threads.json and payment_data.json once. For each open
+    missing_payment thread, checks if a matching rent confirmation
+    exists. If so, resolves the thread.
+
+    Single load at top, single save at end (only if any resolved).
+
+    Returns:
+        bool: True if any threads were resolved, False otherwise
+    """
+    thread_data = _load_all_threads()
+    all_confirmations = _load_all_payments().get("confirmations", [])
+
+    resolved_count = 0
+    now_iso = datetime.now().isoformat()
+
+    for t in thread_data.get("threads", []):
+        if t.get("topic_type") != "missing_payment":
+            continue
+        if t.get("status") != "open":
+            continue
+
+        # Parse topic_ref "rent:YYYY-MM"
+        topic_ref = t.get("topic_ref", "")
+        if not topic_ref.startswith("rent:"):
+            continue
+        period = topic_ref[5:]  # "YYYY-MM"
+        try:
+            year_str, month_str = period.split("-")
+            year = int(year_str)
+            month = int(month_str)
+        except (ValueError, IndexError):
+            continue
+
+        lease_group_id = t.get("lease_group_id")
+
+        # Check if a matching rent confirmation exists
+        has_payment = any(
+            c.get("lease_group_id") == lease_group_id
+            and c.get("confirmation_type") == "rent"
+            and c.get("period_year") == year
+            and c.get("period_month") == month
+            for c in all_confirmations
+        )
+
+        if has_payment:
+            t["status"] = "resolved"
+            t["resolved_at"] = now_iso
+            t["needs_landlord_attention"] = False
+            resolved_count += 1
+
+    if resolved_count:
+        _save_threads_file(thread_data)
+        THREAD_ACTIONS_TOTAL.inc("auto_resolved", "missing_payment", amount=resolved_count)
+
+    return resolved_count > 0
+
+
+MONTH_NAMES = [
+    "", "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+
+@_timed("engine:send_missing_payment_reminders")
+@_retry_on_conflict
+@store_lock("threads")
+def send_missing_payment_reminders():
+    """Send one automatic reminder per open missing_payment thread during grace period.
+
+    For each open missing_payment thread where:
+    - today > expected_due_date (rent is overdue)
+    - today <= expected_due_date + 2 days (still in grace period)
+    - needs_landlord_attention is False (not yet escalated)
+    - auto_reminders_suppressed is False
+    - last_reminder_at is None (no reminder sent yet)
+
+    Appends a system message (queued for the tenant on every enabled
+    notification channel) and sets last_reminder_at.
+    Does NOT change needs_landlord_attention or escalation_started_at.
+
+    Single load at top, single save at end (only if any reminders sent).
+
+    Returns:
+        bool: True if any reminders were sent, False otherwise
+    """
+    from mapmylease.notifications import enqueue_deliveries
+    from mapmylease.search import index_messages
+
+    thread_data = _load_all_threads()
+    today = datetime.now().date()
+    sent_count = 0
+    reminders = []
+    now_iso = datetime.now().isoformat()
+
+    for t in thread_data.get("threads", []):
+        if t.get("topic_type") != "missing_payment":
+            continue
+        if t.get("status") != "open":
+            continue
+        if t.get("needs_landlord_attention") is True:
+            continue
+        if t.get("auto_reminders_suppressed") is True:
+            continue
+        if t.get("last_reminder_at") is not None:
+            continue
+
+        due_str = t.get("expected_due_date")
+        if not due_str:
+            continue
+        try:
+            due_date = datetime.strptime(due_str, "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            continue
+
+        # Must be overdue but still within 2-day grace period
+        if not (today > due_date and today <= due_date + timedelta(days=2)):
+            continue
+
+        # Parse month/year from topic_ref "rent:YYYY-MM"
+        topic_ref = t.get("topic_ref", "")
+        if not topic_ref.startswith("rent:"):
+            continue
+        period = topic_ref[5:]
+        try:
+            year_str, month_str = period.split("-")
+            year = int(year_str)
+            month = int(month_str)
+        except (ValueError, IndexError):
+            continue
+
+        month_label = f"{MONTH_NAMES[month]} {year}"
+        body = (
+            f"Reminder: Rent for {month_label} has not yet been confirmed. "
+            f"If payment has been made, please submit confirmation."
+        )
+
+        new_message = {
+            "id": str(uuid.uuid4()),
+            "thread_id": t["id"],
+            "created_at": now_iso,
+            "actor": "system",
+            "message_type": "auto_reminder",
+            "body": body,
+            "payment_id": None,
+            "attachments": [],
+            "channel": "internal",
+            "delivered_via": ["internal"],
+            "external_ref": None,
+        }
+        thread_data["messages"].append(new_message)
+        enqueue_deliveries(thread_data, new_message, t)
+        reminders.append((new_message, t))
+
+        t["last_reminder_at"] = now_iso
+        sent_count += 1
+
+    if sent_count:
+        if _save_threads_file(thread_data):
+            index_messages(reminders)
+        THREAD_ACTIONS_TOTAL.inc("reminded", "missing_payment", amount=sent_count)
+
+    return sent_count > 0
+
+
+@_timed("engine:escalate_missing_payment_threads")
+@_retry_on_conflict
+@store_lock("threads")
+def escalate_missing_payment_threads():
+    """Escalate open missing_payment threads after 2-day grace period.
+
+    For each open missing_payment thread where today > due_date + 2 days
+    and needs_landlord_attention is still False, sets
+    needs_landlord_attention = True and escalation_started_at = now.
+
+    Single load at top, single save at end (only if any escalated).
+
+    Returns:
+        bool: True if any threads were escalated, False otherwise
+    """
+    thread_data = _load_all_threads()
+    today = datetime.now().date()
+    escalated_count = 0
+    now_iso = datetime.now().isoformat()
+
+    for t in thread_data.get("threads", []):
+        if t.get("topic_type") != "missing_payment":
+            continue
+        if t.get("status") != "open":
+            continue
+        if t.get("needs_landlord_attention") is True:
+            continue
+
+        due_str = t.get("expected_due_date")
+        if not due_str:
+            continue
+        try:
+            due_date = datetime.strptime(due_str, "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            continue
+
+        if today > due_date + timedelta(days=2):
+            t["needs_landlord_attention"] = True
+            if t.get("escalation_started_at") is None:
+                t["escalation_started_at"] = now_iso
+            escalated_count += 1
+
+    if escalated_count:
+        _save_threads_file(thread_data)
+        THREAD_ACTIONS_TOTAL.inc("escalated", "missing_payment", amount=escalated_count)
+
+    return escalated_count > 0
+
+
+def get_termination_for_lease(lease_id):
+    """Look up whether a specific lease version has been terminated.
+
+    Args:
+        lease_id: The UUID string of a specific lease version (not group)
+
+    Returns:
+        dict: The termination event record if found, or None
+              At most one termination event exists per lease version.
+    """
+    if not lease_id:
+        return None
+    data = _load_all_terminations()
+    for t in data.get("terminations", []):
+        if t.get("lease_id") == lease_id:
+            return t
+    return None
+
+
+@_retry_on_conflict
+@store_lock("terminations")
+def create_termination_event(lease_id, termination_date, note=None):
+    """Create and persist a termination event for a lease version.
+
+    Args:
+        lease_id: UUID of the specific lease version to terminate
+        termination_date: Effective termination date (YYYY-MM-DD string)
+        note: Optional free-text reason for termination
+
+    Returns:
+        dict: {"success": True, "termination": <record>}
+              or {"success": False, "error": "<message>"}
+    """
+    # 1. Lease exists?
+    lease = get_lease_by_id(lease_id)
+    if not lease:
+        return {"success": False, "error": "Lease not found."}
+
+    # 2. Is current version?
+    if not lease.get("is_current"):
+        return {"success": False,
+                "error": "Only the current lease version can be terminated."}
+
+    # 3. Already terminated?
+    existing = get_termination_for_lease(lease_id)
+    if existing:
+        return {"success": False,
+                "error": "This lease has already been terminated."}
+
+    # 4. Valid date format?
+    termination_date = termination_date.strip() if termination_date else ""
+    try:
+        term_date = datetime.strptime(termination_date, "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return {"success": False,
+                "error": "Invalid termination date format."}
+
+    # 5. Within lease period?
+    cv = lease.get("current_values") or {}
+    start_str = cv.get("lease_start_date")
+    end_str = cv.get("lease_end_date")
+    if not start_str or not end_str:
+        return {"success": False,
+                "error": "Lease is missing start or end date."}
+    try:
+        start_date = datetime.strptime(start_str, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_str, "%Y-%m-%d").date()
+    except ValueError:
+        return {"success": False,
+                "error": "Lease has invalid start or end date."}
+
+    if not (start_date <= term_date <= end_date):
+        return {"success": False,
+                "error": "Termination date must be between the lease "
+                         "start date and end date."}
+
+    # Build record
+    record = {
+        "id": str(uuid.uuid4()),
+        "lease_id": lease_id,
+        "termination_date": termination_date,
+        "terminated_at": datetime.utcnow().isoformat(),
+        "terminated_by": "landlord",
+        "note": note.strip() if note and note.strip() else None,
+    }
+
+    # Persist
+    data = _load_all_terminations()
+    data["terminations"].append(record)
+    if not _save_termination_file(data):
+        return {"success": False,
+                "error": "Failed to save termination data."}
+
+    return {"success": True, "termination": record}
+
+
+@_retry_on_conflict
+@store_lock("tenant_access")
+def generate_tenant_token(lease_group_id):
+    """Generate a new tenant access token for a lease group.
+
+    Rules:
+    - lease_group_id must exist in lease_data.json
+    - At most ONE active token per lease_group_id
+    - If an active token already exists, FAILS (does not auto-revoke)
+
+    Returns:
+        dict: {"success": True, "token_record": {...}} or
+              {"success": False, "error": "..."}
+    """
+    # Verify lease_group_id exists
+    lease_data = _load_all_leases()
+    lease_exists = any(
+        lease.get("lease_group_id") == lease_group_id
+        for lease in lease_data.get("leases", [])
+    )
+    if not lease_exists:
+        return {"success": False, "error": "lease_group_not_found"}
+
+    # Check for existing active token
+    access_data = _load_all_tenant_access()
+    tokens = access_data.get("tenant_tokens", [])
+    for t in tokens:
+        if t.get("lease_group_id") == lease_group_id and t.get("is_active"):
+            return {"success": False, "error": "active_token_exists"}
+
+    # Create new token record (matches locked schema exactly)
+    token_record = {
+        "token": secrets.token_urlsafe(32),
+        "lease_group_id": lease_group_id,
+        "is_active": True,
+        "issued_at": datetime.now().isoformat(),
+        "revoked_at": None,
+        "revoked_reason": None,
+        "last_used_at": None,
+    }
+
+    tokens.append(token_record)
+    access_data["tenant_tokens"] = tokens
+    saved = _save_tenant_access_file(access_data)
+
+    if not saved:
+        return {"success": False, "error": "save_failed"}
+
+    return {"success": True, "token_record": token_record}
+
+
+def validate_token(token):
+    """Validate a tenant access token. Read-only, no side effects.
+
+    A token is valid if and only if is_active == true.
+    Does NOT check lease data or lease expiry.
+
+    Returns:
+        dict: {"valid": True, "lease_group_id": "...", "token_record": {...}} or
+              {"valid": False, "reason": "not_found" | "revoked" | "inactive"}
+    """
+    access_data = _load_all_tenant_access()
+    tokens = access_data.get("tenant_tokens", [])
+
+    for t in tokens:
+        if t.get("token") == token:
+            if t.get("is_active"):
+                return {
+                    "valid": True,
+                    "lease_group_id": t["lease_group_id"],
+                    "token_record": t,
+                }
+            # Inactive — determine reason
+            if t.get("revoked_at") is not None:
+                return {"valid": False, "reason": "revoked"}
+            return {"valid": False, "reason": "inactive"}
+
+    return {"valid": False, "reason": "not_found"}
+
+
+@_retry_on_conflict
+@store_lock("tenant_access")
+def revoke_tenant_token(token, reason=None):
+    """Revoke a tenant access token. Landlord-initiated only.
+
+    Rules:
+    - Sets is_active = false
+    - Sets revoked_at (write-once)
+    - revoked_reason is optional (may be null)
+    - NEVER deletes or alters payment history
+
+    Returns:
+        dict: {"success": True, "token_record": {...}} or
+              {"success": False, "error": "..."}
+    """
+    access_data = _load_all_tenant_access()
+    tokens = access_data.get("tenant_tokens", [])
+
+    for t in tokens:
+        if t.get("token") == token:
+            if not t.get("is_active"):
+                return {"success": False, "error": "already_revoked"}
+
+            t["is_active"] = False
+            t["revoked_at"] = datetime.now().isoformat()
+            t["revoked_reason"] = reason
+
+            saved = _save_tenant_access_file(access_data)
+            if not saved:
+                return {"success": False, "error": "save_failed"}
+
+            return {"success": True, "token_record": t}
+
+    return {"success": False, "error": "token_not_found"}
+
+
+def get_active_token_for_lease_group(lease_group_id):
+    """Fetch the active token for a lease group, if one exists.
+
+    Returns:
+        dict: The token record, or None if no active token exists.
+    """
+    access_data = _load_all_tenant_access()
+    tokens = access_data.get("tenant_tokens", [])
+
+    for t in tokens:
+        if t.get("lease_group_id") == lease_group_id and t.get("is_active"):
+            return t
+
+    return None
+
+
+def get_all_tokens_for_lease_group(lease_group_id):
+    """Fetch all tokens (active and revoked) for a lease group.
+
+    Returns:
+        list: All token records for this lease group, newest first.
+    """
+    access_data = _load_all_tenant_access()
+    tokens = access_data.get("tenant_tokens", [])
+    matching = [t for t in tokens if t.get("lease_group_id") == lease_group_id]
+    matching.sort(key=lambda t: t.get("issued_at", ""), reverse=True)
+    return matching
+
+
+@_retry_on_conflict
+@store_lock("payments")
+def append_payment_confirmations(records):
+    """Append new confirmation records in a single locked save.
+
+    The confirmations list is append-only, so a conflicting concurrent
+    append is simply retried on top of the fresh file.
+
+    Args:
+        records: list of confirmation dicts (PAYMENT CONFIRMATION SCHEMA)
+
+    Returns:
+        bool: True on success, False on failure
+    """
+    payment_data = _load_all_payments()
+    payment_data.setdefault("confirmations", []).extend(records)
+    return _save_payment_file(payment_data)
+
+
+def get_payments_for_lease_group(lease_group_id):
+    """Fetch all payment confirmations for a lease group. Read-only.
+
+    Returns:
+        list: Confirmation records, newest first.
+    """
+    payment_data = _load_group_records("payments", lease_group_id)
+    confirmations = payment_data.get("confirmations", [])
+    matching = [c for c in confirmations if c.get("lease_group_id") == lease_group_id]
+    matching.sort(key=lambda c: c.get("submitted_at", ""), reverse=True)
+    return matching
+
+
+def latest_confirmations(confirmations):
+    """Keep only the latest submission per lease group, type and month.
+
+    Confirmations are append-only, so a correction is a new submission
+    for the same month; totals (analytics, the TDS report) count each
+    month once. Latest is the greatest submitted_at, ties going to the
+    record later in the list.
+
+    Args:
+        confirmations: iterable of confirmation dicts
+
+    Returns:
+        dict: {(lease_group_id, confirmation_type, period_year, period_month):
+               confirmation}
+    """
+    latest = {}
+    for c in sorted(confirmations, key=lambda c: c.get("submitted_at") or ""):
+        latest[(c.get("lease_group_id"), c.get("confirmation_type"),
+                c.get("period_year"), c.get("period_month"))] = c
+    return latest
+
+
+def compute_monthly_coverage(expected_payments, month_payments):
+    """Compute payment category coverage for a single month.
+
+    Args:
+        expected_payments: list of dicts with 'type' and 'expected' keys
+                           (from lease.current_values.expected_payments)
+        month_payments: list of payment confirmation dicts for this month
+
+    Returns:
+        dict with expected, covered, missing categories and summary
+    """
+    expected_categories = [
+        ep["type"] for ep in (expected_payments or [])
+        if ep.get("expected")
+    ]
+
+    covered_set = set(
+        pc.get("confirmation_type")
+        for pc in month_payments
+        if pc.get("confirmation_type") in expected_categories
+    )
+    covered_categories = [cat for cat in expected_categories if cat in covered_set]
+
+    missing_categories = [cat for cat in expected_categories if cat not in covered_set]
+
+    total = len(expected_categories)
+    covered = len(covered_categories)
+
+    return {
+        "expected_categories": expected_categories,
+        "covered_categories": covered_categories,
+        "missing_categories": missing_categories,
+        "coverage_summary": f"{covered} / {total}" if total > 0 else None,
+        "is_complete": total == 0 or covered >= total,
+    }
+
+
+def evaluate_missing_payment_status(lease_data, year, month, today_date,
+                                    payment_confirmations=None):
+    """Determine whether a missing_payment thread should exist for a given month.
+
+    Pure evaluator — no file writes, no thread creation.
+    Combines get_rent_due_info_for_month() (what's due) with
+    compute_monthly_coverage() (what's been submitted).
+
+    Args:
+        lease_data: full lease dict (with current_values)
+        year: int
+        month: int
+        today_date: date object (usually today)
+        payment_confirmations: optional pre-loaded list of confirmation dicts.
+            If None, loads from _load_all_payments().
+
+    Returns:
+        dict with should_create_thread, expected_due_date,
+        expected_amount, is_first_month
+    """
+    no = {"should_create_thread": False, "expected_due_date": None,
+          "expected_amount": None, "is_first_month": None}
+
+    rent_info = get_rent_due_info_for_month(lease_data, year, month)
+    due_date = rent_info.get("due_date")
+    expected_amount = rent_info.get("expected_amount")
+    is_first_month = rent_info.get("is_first_month")
+
+    if due_date is None or expected_amount is None:
+        return no
+
+    if due_date >= today_date:
+        return no
+
+    cv = lease_data.get("current_values") or {}
+    expected_payments = cv.get("expected_payments", [])
+    lease_group_id = lease_data.get("lease_group_id", lease_data.get("id"))
+
+    if payment_confirmations is None:
+        payment_confirmations = _load_all_payments().get("confirmations", [])
+    month_payments = [c for c in payment_confirmations
+                      if c.get("lease_group_id") == lease_group_id
+                      and c.get("period_year") == year
+                      and c.get("period_month") == month]
+
+    coverage = compute_monthly_coverage(expected_payments, month_payments)
+
+    if "rent" in coverage.get("missing_categories", []):
+        return {
+            "should_create_thread": True,
+            "expected_due_date": due_date,
+            "expected_amount": expected_amount,
+            "is_first_month": is_first_month,
+        }
+
+    return no
+
+
+def load_lease_data():
+    """Load saved lease data from JSON file if it exists.
+
+    For backward compatibility, returns the first lease or None.
+    Use _load_all_leases() to get the full collection.
+    """
+    all_data = _load_all_leases()
+    leases = all_data.get("leases", [])
+    return leases[0] if leases else None
+
+
+def get_all_leases(current_only=False):
+    """Get all leases as a list.
+
+    Args:
+        current_only: If True, only return leases where is_current=True
+                      (filters out old versions for dashboard display)
+
+    Returns:
+        list: List of lease objects, sorted by updated_at (most recent first)
+    """
+    all_data = _load_all_leases()
+    leases = all_data.get("leases", [])
+
+    if current_only:
+        leases = [l for l in leases if l.get("is_current", True) and l.get("status", "active") != "draft"]
+
+    # Sort by updated_at (most recent first)
+    return sorted(
+        leases,
+        key=lambda x: x.get("updated_at") or x.get("created_at") or "",
+        reverse=True
+    )
+
+
+def get_lease_by_id(lease_id):
+    """Get a specific lease by its ID.
+
+    Args:
+        lease_id: The UUID string of the lease
+
+    Returns:
+        dict: The lease object, or None if not found
+    """
+    if not lease_id:
+        return None
+    all_data = _load_all_leases()
+    for lease in all_data.get("leases", []):
+        if lease.get("id") == lease_id:
+            return lease
+    return None
+
+
+def get_lease_versions(lease_group_id):
+    """Get all versions of a lease group, sorted by version (newest first).
+
+    Args:
+        lease_group_id: The UUID string of the lease group
+
+    Returns:
+        list: List of lease objects in the group, sorted by version descending
+    """
+    if not lease_group_id:
+        return []
+    all_data = _load_group_records("leases", lease_group_id)
+    versions = [l for l in all_data.get("leases", [])
+                if l.get("lease_group_id") == lease_group_id]
+    return sorted(versions, key=lambda x: x.get("version", 1), reverse=True)
+
+
+def get_earliest_start_date(versions):
+    """Get the earliest lease_start_date across all versions in a lease group.
+
+    Args:
+        versions: List of lease version dicts (pre-loaded, not re-fetched).
+
+    Returns:
+        str: ISO date string (YYYY-MM-DD) of the earliest start, or None.
+    """
+    earliest = None
+    for v in versions:
+        cv = v.get("current_values", v)
+        start_str = cv.get("lease_start_date")
+        if start_str:
+            try:
+                d = datetime.strptime(start_str, "%Y-%m-%d").date()
+                if earliest is None or d < earliest:
+                    earliest = d
+            except (ValueError, TypeError):
+                pass
+    return earliest.isoformat() if earliest else None
+
+
+def get_tenant_continuity_duration(versions, current_tenant_name):
+    """Compute how long the current tenant has continuously held the lease.
+
+    Walks versions from newest to oldest. Finds the earliest contiguous
+    version where the tenant name matches (after title normalization via
+    _normalize_name). Duration is from that version's start date to today.
+
+    Args:
+        versions: List of lease version dicts (pre-loaded, not re-fetched).
+                  Will be defensively sorted newest-first by version number.
+        current_tenant_name: The current tenant's name string.
+
+    Returns:
+        str: Formatted duration like "1y 5m", "1y", "5m", or "< 1m".
+             None if tenant name is empty or continuity cannot be determined.
+    """
+    if not current_tenant_name:
+        return None
+    _, current_key = _normalize_name(current_tenant_name)
+    if not current_key:
+        return None
+    # Defensive sort: newest first by version number
+    sorted_versions = sorted(versions, key=lambda x: x.get("version", 1), reverse=True)
+    continuity_start = None
+    for v in sorted_versions:
+        cv = v.get("current_values", v)
+        _, tenant_key = _normalize_name(cv.get("lessee_name"))
+        if tenant_key == current_key:
+            start_str = cv.get("lease_start_date")
+            if start_str:
+                continuity_start = start_str
+        else:
+            break
+    if not continuity_start:
+        return None
+    try:
+        start = datetime.strptime(continuity_start, "%Y-%m-%d").date()
+        today = datetime.now().date()
+        years = today.year - start.year
+        months = today.month - start.month
+        if today.day < start.day:
+            months -= 1
+        if months < 0:
+            years -= 1
+            months += 12
+        if years > 0 and months > 0:
+            return f"{years}y {months}m"
+        elif years > 0:
+            return f"{years}y"
+        elif months > 0:
+            return f"{months}m"
+        else:
+            return "< 1m"
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse_month_tuple(date_str):
+    """Parse 'YYYY-MM-DD' string to (year, month) tuple.
+
+    Args:
+        date_str: A date string in YYYY-MM-DD format
+
+    Returns:
+        tuple: (year, month) as integers, or None if invalid/missing
+               (including a month outside 1-12)
+    """
+    if not date_str:
+        return None
+    try:
+        parts = date_str.split("-")
+        year, month = int(parts[0]), int(parts[1])
+    except (ValueError, IndexError):
+        return None
+    if not 1 <= month <= 12:
+        return None
+    return (year, month)
+
+
+def calculate_prorated_amount(start_date_str, monthly_rent):
+    """Calculate prorated rent for a partial first month.
+
+    This is a pure helper — no I/O, no side effects.
+    Used as an assistive suggestion only. The landlord must
+    explicitly confirm any prorated amount before it is stored.
+
+    Args:
+        start_date_str: Lease start date as "YYYY-MM-DD"
+        monthly_rent: Full monthly rent amount (number)
+
+    Returns:
+        int (rounded prorated amount) or None if inputs invalid
+    """
+    if not start_date_str or monthly_rent is None:
+        return None
+    try:
+        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None
+    try:
+        rent = float(monthly_rent)
+        if rent <= 0:
+            return None
+    except (ValueError, TypeError):
+        return None
+
+    days_in_month = calendar.monthrange(start_date.year, start_date.month)[1]
+    days_occupied = days_in_month - start_date.day + 1
+    prorated = rent * (days_occupied / days_in_month)
+    return round(prorated)
+
+
+def get_rent_due_info_for_month(lease, year, month):
+    """Return correct rent due date and expected amount for a given month.
+
+    Pure helper — no I/O, no side effects, no lease mutation.
+    The engine (Phase 6+) calls this to determine when rent is due
+    and how much is expected for any calendar month.
+
+    Args:
+        lease: Full lease dict (must have current_values)
+        year: Calendar year (int)
+        month: Calendar month 1-12 (int)
+
+    Returns:
+        dict with keys:
+            due_date: date object or None
+            expected_amount: int or None
+            is_first_month: bool
+    """
+    from datetime import date
+
+    safe_none = {"due_date": None, "expected_amount": None, "is_first_month": False}
+
+    cv = lease.get("current_values") if lease else None
+    if not cv:
+        return safe_none
+
+    # --- Extract fields safely ---
+    lease_start_str = cv.get("lease_start_date")
+    rent_due_day = cv.get("rent_due_day")
+    monthly_rent = cv.get("monthly_rent")
+    first_month_mode = cv.get("first_month_mode")
+    first_month_due_str = cv.get("first_month_due_date")
+    first_month_amount = cv.get("first_month_amount")
+
+    # Parse lease start date
+    try:
+        lease_start = datetime.strptime(lease_start_str, "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return safe_none
+
+    # rent_due_day must be a valid integer
+    if rent_due_day is None:
+        return safe_none
+    try:
+        rent_due_day = int(rent_due_day)
+    except (ValueError, TypeError):
+        return safe_none
+
+    # monthly_rent must be a valid positive integer
+    try:
+        monthly_rent = int(float(monthly_rent))
+        if monthly_rent <= 0:
+            return safe_none
+    except (ValueError, TypeError):
+        return safe_none
+
+    # --- Determine if this is the first lease month ---
+    is_first_month = (year == lease_start.year and month == lease_start.month)
+
+    # --- Helper: clamp due day to month length ---
+    days_in_month = calendar.monthrange(year, month)[1]
+    effective_due_day = min(rent_due_day, days_in_month)
+
+    # --- Non-first month: standard rent ---
+    if not is_first_month:
+        due_date = date(year, month, effective_due_day)
+        return {
+            "due_date": due_date,
+            "expected_amount": monthly_rent,
+            "is_first_month": False,
+        }
+
+    # --- First month handling ---
+
+    # Mode not set: treat as standard month (Option B — landlord-explicit)
+    if first_month_mode is None:
+        due_date = date(year, month, effective_due_day)
+        return {
+            "due_date": due_date,
+            "expected_amount": monthly_rent,
+            "is_first_month": True,
+        }
+
+    if first_month_mode == "prorated_immediate":
+        if first_month_amount is None:
+            return {"due_date": None, "expected_amount": None, "is_first_month": True}
+        return {
+            "due_date": lease_start,
+            "expected_amount": first_month_amount,
+            "is_first_month": True,
+        }
+
+    if first_month_mode == "prorated_next_due_day":
+        if first_month_amount is None:
+            return {"due_date": None, "expected_amount": None, "is_first_month": True}
+        # Compute next due date after lease_start_date
+        if lease_start.day < rent_due_day:
+            # Due day hasn't passed yet this month
+            next_month_year = lease_start.year
+            next_month_month = lease_start.month
+        else:
+            # Due day already passed — next month
+            if lease_start.month == 12:
+                next_month_year = lease_start.year + 1
+                next_month_month = 1
+            else:
+                next_month_year = lease_start.year
+                next_month_month = lease_start.month + 1
+        next_days_in_month = calendar.monthrange(next_month_year, next_month_month)[1]
+        clamped_day = min(rent_due_day, next_days_in_month)
+        due_date = date(next_month_year, next_month_month, clamped_day)
+        return {
+            "due_date": due_date,
+            "expected_amount": first_month_amount,
+            "is_first_month": True,
+        }
+
+    if first_month_mode == "custom":
+        if first_month_amount is None or not first_month_due_str:
+            return {"due_date": None, "expected_amount": None, "is_first_month": True}
+        try:
+            due_date = datetime.strptime(first_month_due_str, "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            return {"due_date": None, "expected_amount": None, "is_first_month": True}
+        return {
+            "due_date": due_date,
+            "expected_amount": first_month_amount,
+            "is_first_month": True,
+        }
+
+    # Unknown mode — fail safely
+    return {"due_date": None, "expected_amount": None, "is_first_month": True}
+
+
+def get_governing_lease_for_month(lease_group_id, target_year, target_month):
+    """Find the single governing lease for a specific month in a lease group.
+
+    Uses date-based selection (NOT is_current). For a given (year, month),
+    finds which lease version's term covers that month, accounting for
+    early termination events.
+
+    Args:
+        lease_group_id: UUID string of the lease group
+        target_year: int, e.g. 2025
+        target_month: int, 1-12
+
+    Returns:
+        dict with one of two structures:
+        - {"status": "IN_LEASE", "lease": <dict>, "lease_id": <str>, "version": <int>}
+        - {"status": "OUT_OF_LEASE", "reason": <str>, "lease": None}
+          where reason is one of:
+            "pre_lease"  — target month is before any lease in this group started
+            "post_lease" — target month is after all leases in this group have ended
+            "gap"        — target month falls between lease versions with no coverage
+            "terminated" — target month falls after the effective termination date
+                           of a lease version, and no other lease version governs
+                           that month
+    """
+    terminations = {}
+    for t in _load_all_terminations().get("terminations", []):
+        terminations.setdefault(t.get("lease_id"), t)
+    return resolve_governing_lease(get_lease_versions(lease_group_id), terminations,
+                                   target_year, target_month)
+
+
+def resolve_governing_lease(all_versions, terminations, target_year, target_month):
+    """get_governing_lease_for_month() over pre-loaded data.
+
+    For callers that walk many groups and months (exports, reports,
+    analytics) and must not reload the stores per month.
+
+    Args:
+        all_versions: list of lease versions of one lease group
+        terminations: {lease_id: termination event}
+        target_year: int, e.g. 2025
+        target_month: int, 1-12
+
+    Returns:
+        dict: same structures as get_governing_lease_for_month()
+    """
+    if not all_versions:
+        return {"status": "OUT_OF_LEASE", "reason": "pre_lease", "lease": None}
+
+    target = (target_year, target_month)
+
+    eligible = []
+    terminated_would_match = False
+
+    for lease in all_versions:
+        if lease.get("status") == "draft":
+            continue
+
+        cv = lease.get("current_values") or {}
+        start_tuple = _parse_month_tuple(cv.get("lease_start_date"))
+        end_tuple = _parse_month_tuple(cv.get("lease_end_date"))
+
+        if start_tuple is None or end_tuple is None:
+            continue
+
+        # Determine effective end: termination overrides lease_end_date
+        effective_end = end_tuple
+        termination = terminations.get(lease.get("id"))
+        if termination:
+            term_tuple = _parse_month_tuple(termination.get("termination_date"))
+            if term_tuple is not None:
+                effective_end = term_tuple
+
+        # Check date eligibility
+        if start_tuple <= target <= effective_end:
+            eligible.append({
+                "lease": lease,
+                "start_tuple": start_tuple,
+                "version": lease.get("version", 1),
+            })
+        elif termination and start_tuple <= target <= end_tuple:
+            # Would have been eligible without termination
+            terminated_would_match = True
+
+    # Pick the best eligible lease
+    if eligible:
+        eligible.sort(
+            key=lambda x: (x["start_tuple"], x["version"]),
+            reverse=True
+        )
+        best = eligible[0]["lease"]
+        return {
+            "status": "IN_LEASE",
+            "lease": best,
+            "lease_id": best.get("id"),
+            "version": best.get("version", 1),
+        }
+
+    # No eligible lease — determine OUT_OF_LEASE reason
+    if terminated_would_match:
+        return {"status": "OUT_OF_LEASE", "reason": "terminated", "lease": None}
+
+    # Collect date ranges from all non-draft versions to determine positional reason
+    all_starts = []
+    all_ends = []
+    for lease in all_versions:
+        if lease.get("status") == "draft":
+            continue
+        cv = lease.get("current_values") or {}
+        start_tuple = _parse_month_tuple(cv.get("lease_start_date"))
+        end_tuple = _parse_month_tuple(cv.get("lease_end_date"))
+        if start_tuple is not None:
+            all_starts.append(start_tuple)
+        if end_tuple is not None:
+            all_ends.append(end_tuple)
+
+    if not all_starts:
+        return {"status": "OUT_OF_LEASE", "reason": "pre_lease", "lease": None}
+
+    earliest_start = min(all_starts)
+    latest_end = max(all_ends)
+
+    if target < earliest_start:
+        return {"status": "OUT_OF_LEASE", "reason": "pre_lease", "lease": None}
+    elif target > latest_end:
+        return {"status": "OUT_OF_LEASE", "reason": "post_lease", "lease": None}
+    else:
+        return {"status": "OUT_OF_LEASE", "reason": "gap", "lease": None}
+
+
+def cleanup_draft_leases(leases):
+    """Remove abandoned draft leases and restore previous versions if needed.
+
+    For each draft lease:
+    - Deletes the uploaded file from disk (if it exists)
+    - If the draft is a renewal (version > 1), restores is_current=True
+      on the previous version in the same lease_group_id
+    - Removes the draft lease from the list
+
+    Args:
+        leases: list of lease dictionaries (already loaded from JSON)
+
+    Returns:
+        list: the cleaned leases list with drafts removed
+    """
+    drafts = [l for l in leases if l.get("status") == "draft"]
+
+    for draft in drafts:
+        # 1. Delete uploaded file from disk
+        source_doc = draft.get("source_document") or {}
+        filename = source_doc.get("filename")
+        if filename:
+            file_path = os.path.join(UPLOAD_FOLDER, filename)
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+        # 2. If renewal, restore previous version
+        if draft.get("version", 1) > 1:
+            group_id = draft.get("lease_group_id")
+            draft_version = draft.get("version", 1)
+            # Find the highest version below this draft in the same group
+            previous = [
+                l for l in leases
+                if l.get("lease_group_id") == group_id
+                and l.get("version", 1) < draft_version
+            ]
+            if previous:
+                best = max(previous, key=lambda l: l.get("version", 1))
+                best["is_current"] = True
+
+    # 3. Remove all drafts from the list
+    leases = [l for l in leases if l.get("status") != "draft"]
+
+    return leases
+
+
+@_retry_on_conflict
+@store_lock("leases")
+def create_lease_renewal(original_lease_id):
+    """Create a renewal (new version) of an existing lease.
+
+    Rules:
+    - New version = max(version) + 1 in the group
+    - Previous current lease -> is_current = False
+    - New lease -> is_current = True
+
+    Args:
+        original_lease_id: ID of any lease in the group
+
+    Returns:
+        dict: The new lease version, or None on failure
+    """
+    original = get_lease_by_id(original_lease_id)
+    if not original:
+        return None
+
+    lease_group_id = original.get("lease_group_id", original_lease_id)
+
+    # Get all versions to find max version number
+    versions = get_lease_versions(lease_group_id)
+    max_version = max((v.get("version", 1) for v in versions), default=0)
+
+    # Mark all existing versions as not current
+    all_data = _load_all_leases()
+    for lease in all_data.get("leases", []):
+        if lease.get("lease_group_id") == lease_group_id:
+            lease["is_current"] = False
+
+    # Create new version
+    now = datetime.now().isoformat()
+
+    # Get current_values from original lease (handles both old and new structure)
+    orig_cv = original.get("current_values") or original
+
+    new_lease = {
+        "id": str(uuid.uuid4()),
+        "lease_group_id": lease_group_id,
+        "version": max_version + 1,
+        "is_current": True,
+        "created_at": now,
+        "updated_at": now,
+        "source_document": {
+            "filename": None,
+            "mimetype": None,
+            "extracted_text": None,
+            "extracted_at": None,
+        },
+        "ai_extraction": None,
+        "current_values": {
+            # Copy relevant fields from original
+            "lease_nickname": orig_cv.get("lease_nickname"),
+            "lessor_name": orig_cv.get("lessor_name"),
+            "lessee_name": orig_cv.get("lessee_name"),
+            # Dates left empty for user to fill
+            "lease_start_date": None,
+            "lease_end_date": None,
+            "monthly_rent": orig_cv.get("monthly_rent"),
+            "security_deposit": orig_cv.get("security_deposit"),
+            "rent_due_day": orig_cv.get("rent_due_day"),
+            "lock_in_period": {
+                "duration_months": None
+            },
+            "renewal_terms": {
+                "rent_escalation_percent": None
+            },
+            "expected_payments": orig_cv.get(
+                "expected_payments",
+                _default_expected_payments(orig_cv.get("monthly_rent"))
+            ),
+            "first_month_mode": None,
+            "first_month_due_date": None,
+            "first_month_amount": None,
+        },
+        "needs_expected_payment_confirmation": True,
+    }
+
+    all_data["leases"].append(new_lease)
+    _save_lease_file(all_data)
+
+    return new_lease
+
+
+def _normalize_name(name):
+    """Remove common titles from a name and normalize for comparison.
+
+    Returns:
+        tuple: (display_name, key) where display_name is title-cased
+               and key is lowercased for comparison. Both are None if
+               name is empty/whitespace.
+    """
+    if not name:
+        return None, None
+    cleaned = re.sub(r'^(prof\.?|mrs\.?|mr\.?|ms\.?|dr\.?)\s*', '', name.strip(), flags=re.IGNORECASE)
+    cleaned = ' '.join(cleaned.split())
+    if not cleaned:
+        return None, None
+    return cleaned.title(), cleaned.lower()
+
+
+def group_leases_by_lessor(leases):
+    """Group leases by lessor_name for dashboard display.
+
+    Returns:
+        OrderedDict: {display_name: [leases]} sorted alphabetically,
+                     with "Unknown Landlord" at the end if present.
+    """
+    from collections import OrderedDict
+
+    groups = {}  # lessor_key -> {"display_name": str, "leases": []}
+
+    for lease in leases:
+        # Handle both old (flat) and new (nested) structure
+        cv = lease.get("current_values") or lease
+        raw_lessor = cv.get("lessor_name")
+        if not raw_lessor or not raw_lessor.strip():
+            lessor_key = "unknown landlord"
+            display_name = "Unknown Landlord"
+        else:
+            display_name, lessor_key = _normalize_name(raw_lessor)
+            if not display_name:
+                display_name = "Unknown Landlord"
+                lessor_key = "unknown landlord"
+
+        if lessor_key not in groups:
+            groups[lessor_key] = {"display_name": display_name, "leases": []}
+        groups[lessor_key]["leases"].append(lease)
+
+    # Sort groups alphabetically, but put "Unknown Landlord" at the end
+    sorted_keys = sorted(
+        [k for k in groups.keys() if k != "unknown landlord"]
+    )
+    if "unknown landlord" in groups:
+        sorted_keys.append("unknown landlord")
+
+    return OrderedDict(
+        (groups[k]["display_name"], groups[k]["leases"]) for k in sorted_keys
+    )
+
+
+def calculate_lease_expiry_status(lease_data):
+    """Calculate lease expiry status and urgency level.
+
+    Returns:
+        dict with days_remaining, urgency, message - or None if date missing/invalid
+    """
+    if not lease_data:
+        return None
+
+    # Handle both old (flat) and new (nested) structure
+    cv = lease_data.get("current_values") or lease_data
+    end_date_str = cv.get("lease_end_date")
+    if not end_date_str:
+        return None
+
+    try:
+        end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+    today = datetime.now().date()
+    days_remaining = (end_date - today).days
+
+    # Determine urgency level based on thresholds: 60, 30, 10 days
+    if days_remaining <= 0:
+        urgency = "critical"
+        message = "Lease has expired!" if days_remaining == 0 else f"Lease expired {abs(days_remaining)} days ago"
+    elif days_remaining <= 10:
+        urgency = "urgent"
+        message = f"Lease expires in {days_remaining} day{'s' if days_remaining != 1 else ''}!"
+    elif days_remaining <= 30:
+        urgency = "warning"
+        message = f"Lease expires in {days_remaining} days"
+    elif days_remaining <= 60:
+        urgency = "info"
+        message = f"Lease expires in {days_remaining} days"
+    else:
+        urgency = "none"
+        message = f"Lease expires in {days_remaining} days"
+
+    return {
+        "days_remaining": days_remaining,
+        "urgency": urgency,
+        "message": message,
+        "end_date": end_date_str
+    }
+
+
+def calculate_rent_payment_status(lease_data):
+    """Calculate rent payment status and urgency level.
+
+    Returns:
+        dict with days_remaining, urgency, message - or None if rent_due_day missing/invalid
+    """
+    if not lease_data:
+        return None
+
+    # Handle both old (flat) and new (nested) structure
+    cv = lease_data.get("current_values") or lease_data
+    rent_due_day_str = cv.get("rent_due_day")
+    if not rent_due_day_str:
+        return None
+
+    try:
+        rent_due_day = int(rent_due_day_str)
+        if not (1 <= rent_due_day <= 31):
+            return None
+    except (ValueError, TypeError):
+        return None
+
+    today = datetime.now().date()
+
+    # Calculate next rent due date
+    if today.day < rent_due_day:
+        # Due date is this month
+        try:
+            next_due = today.replace(day=rent_due_day)
+        except ValueError:
+            # Handle months with fewer days (e.g., Feb 30 -> Feb 28)
+            last_day = calendar.monthrange(today.year, today.month)[1]
+            next_due = today.replace(day=min(rent_due_day, last_day))
+    elif today.day == rent_due_day:
+        # Due today
+        next_due = today
+    else:
+        # Due date is next month
+        if today.month == 12:
+            next_month = today.replace(year=today.year + 1, month=1, day=1)
+        else:
+            next_month = today.replace(month=today.month + 1, day=1)
+        last_day = calendar.monthrange(next_month.year, next_month.month)[1]
+        next_due = next_month.replace(day=min(rent_due_day, last_day))
+
+    days_remaining = (next_due - today).days
+
+    # Determine urgency level
+    if days_remaining < 0:
+        urgency = "critical"
+        message = f"Rent is {abs(days_remaining)} day{'s' if abs(days_remaining) != 1 else ''} overdue!"
+    elif days_remaining == 0:
+        urgency = "urgent"
+        message = "Rent is due today!"
+    elif days_remaining == 1:
+        urgency = "urgent"
+        message = "Rent is due tomorrow!"
+    elif days_remaining <= 3:
+        urgency = "warning"
+        message = f"Rent due in {days_remaining} days"
+    elif days_remaining <= 7:
+        urgency = "info"
+        message = f"Rent due in {days_remaining} days"
+    else:
+        urgency = "none"
+        message = f"Rent due in {days_remaining} days"
+
+    return {
+        "days_remaining": days_remaining,
+        "urgency": urgency,
+        "message": message,
+        "due_day": rent_due_day,
+        "next_due_date": next_due.isoformat()
+    }
+
+
+def calculate_reminder_status(lease_data):
+    """Calculate combined reminder status for lease expiry and rent payment.
+
+    Returns:
+        dict with lease_expiry and rent_payment status objects
+    """
+    return {
+        "lease_expiry": calculate_lease_expiry_status(lease_data),
+        "rent_payment": calculate_rent_payment_status(lease_data)
+    }
+
+
+def get_global_alerts(leases, max_alerts=5):
+    """Aggregate alerts across all leases for dashboard display.
+
+    Args:
+        leases: List of lease objects
+        max_alerts: Maximum number of alerts to return (default 5)
+
+    Returns:
+        List of alert dicts sorted by urgency (most urgent first)
+    """
+    # Urgency priority for sorting (lower = more urgent)
+    urgency_priority = {
+        "critical": 0,
+        "urgent": 1,
+        "warning": 2,
+        "info": 3,
+    }
+
+    alerts = []
+
+    for lease in leases:
+        lease_id = lease.get("id")
+        # Handle both old (flat) and new (nested) structure
+        cv = lease.get("current_values") or lease
+        lease_nickname = cv.get("lease_nickname") or "Untitled Lease"
+        lessor_name = cv.get("lessor_name") or "Unknown Landlord"
+
+        # Check lease expiry
+        expiry_status = calculate_lease_expiry_status(lease)
+        if expiry_status and expiry_status.get("urgency") not in (None, "none"):
+            alerts.append({
+                "type": "lease_expiry",
+                "urgency": expiry_status["urgency"],
+                "message": expiry_status["message"],
+                "lease_id": lease_id,
+                "lease_nickname": lease_nickname,
+                "lessor_name": lessor_name,
+            })
+
+        # Check rent payment
+        rent_status = calculate_rent_payment_status(lease)
+        if rent_status and rent_status.get("urgency") not in (None, "none"):
+            alerts.append({
+                "type": "rent_due",
+                "urgency": rent_status["urgency"],
+                "message": rent_status["message"],
+                "lease_id": lease_id,
+                "lease_nickname": lease_nickname,
+                "lessor_name": lessor_name,
+            })
+
+    # Sort by urgency priority (critical first)
+    alerts.sort(key=lambda a: urgency_priority.get(a["urgency"], 99))
+
+    # Limit to max_alerts
+    return alerts[:max_alerts]
+
+
+def compare_lease_versions(current_lease, previous_lease):
+    """Compare two lease versions and return list of changes.
+
+    Args:
+        current_lease: The current (newer) lease version
+        previous_lease: The previous (older) lease version
+
+    Returns:
+        list: List of change dicts with {field, label, old_value, new_value, change_type}
+    """
+    if not current_lease or not previous_lease:
+        return []
+
+    # Fields to compare with their display labels
+    fields_to_compare = [
+        ("lessee_name", "Tenant Name"),
+        ("monthly_rent", "Monthly Rent"),
+        ("security_deposit", "Security Deposit"),
+        ("rent_due_day", "Rent Due Day"),
+        ("lease_start_date", "Start Date"),
+        ("lease_end_date", "End Date"),
+    ]
+
+    # Nested fields
+    nested_fields = [
+        ("lock_in_period", "duration_months", "Lock-in Period (months)"),
+        ("renewal_terms", "rent_escalation_percent", "Rent Escalation (%)"),
+    ]
+
+    current_cv = current_lease.get("current_values") or {}
+    previous_cv = previous_lease.get("current_values") or {}
+
+    changes = []
+
+    # Compare simple fields
+    for field, label in fields_to_compare:
+        old_val = previous_cv.get(field)
+        new_val = current_cv.get(field)
+
+        # Normalize empty values
+        old_normalized = None if (old_val is None or str(old_val).strip() == "") else old_val
+        new_normalized = None if (new_val is None or str(new_val).strip() == "") else new_val
+
+        # Skip if both are empty
+        if old_normalized is None and new_normalized is None:
+            continue
+
+        # Determine change type
+        if str(old_normalized) == str(new_normalized):
+            change_type = "unchanged"
+        elif old_normalized is None:
+            change_type = "added"
+        elif new_normalized is None:
+            change_type = "removed"
+        else:
+            change_type = "changed"
+
+        changes.append({
+            "field": field,
+            "label": label,
+            "old_value": old_val,
+            "new_value": new_val,
+            "change_type": change_type
+        })
+
+    # Compare nested fields
+    for parent, child, label in nested_fields:
+        old_parent = previous_cv.get(parent) or {}
+        new_parent = current_cv.get(parent) or {}
+        old_val = old_parent.get(child) if isinstance(old_parent, dict) else None
+        new_val = new_parent.get(child) if isinstance(new_parent, dict) else None
+
+        # Normalize empty values
+        old_normalized = None if (old_val is None or str(old_val).strip() == "") else old_val
+        new_normalized = None if (new_val is None or str(new_val).strip() == "") else new_val
+
+        # Skip if both are empty
+        if old_normalized is None and new_normalized is None:
+            continue
+
+        # Determine change type
+        if str(old_normalized) == str(new_normalized):
+            change_type = "unchanged"
+        elif old_normalized is None:
+            change_type = "added"
+        elif new_normalized is None:
+            change_type = "removed"
+        else:
+            change_type = "changed"
+
+        changes.append({
+            "field": f"{parent}.{child}",
+            "label": label,
+            "old_value": old_val,
+            "new_value": new_val,
+            "change_type": change_type
+        })
+
+    return changes
@@ -0,0 +1,303 @@
+"""
+Document text extraction (pypdf, Tesseract OCR) and AI field
+suggestions (Anthropic).
+
+The PDF/OCR/AI packages are imported inside the functions that use
+them: most requests — dashboard, tenant pages, JSON API — never
+extract, and these imports dominate cold start and worker memory.
+MAPMYLEASE_EAGER_IMPORTS=1 loads them at import instead (useful with
+gunicorn --preload, where workers share the parent's pages).
+"""
+
+import os
+import json
+import time
+import logging
+import importlib.util
+
+from mapmylease.observability import (
+    AI_TOKENS_TOTAL,
+    OCR_PAGES_TOTAL,
+    _log_event,
+    _timed,
+    log,
+)
+
+# AI extraction (optional) — checked without importing the package
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
+
+
+@_timed("ocr:image")
+def extract_text_from_image(file_path):
+    """Extract text from image using OCR."""
+    try:
+        from PIL import Image
+        import pytesseract
+
+        start = time.perf_counter()
+        image = Image.open(file_path)
+        text = pytesseract.image_to_string(image)
+        OCR_PAGES_TOTAL.inc("image", "ocr")
+        result = text.strip() if text.strip() else None
+        _log_event(logging.INFO, "extract.image", chars=len(result) if result else 0,
+                   ms=(time.perf_counter() - start) * 1000)
+        return result
+    except Exception as e:
+        _log_event(logging.WARNING, "extract.image.failed", error=str(e))
+        return None
+
+
+def select_preview_page(page_texts):
+    """Select the best page for preview, avoiding stamp/cover pages."""
+    if not page_texts:
+        return None
+
+    # Keywords indicating actual lease content
+    lease_keywords = [
+        "parties", "lease", "agreement", "between",
+        "lessor", "lessee", "tenant", "landlord"
+    ]
+
+    # Keywords indicating stamp/cover pages to skip
+    skip_keywords = [
+        "stamp duty", "e-stamp", "stamp", "certificate",
+        "government", "registration"
+    ]
+
+    for page_text in page_texts:
+        if not page_text:
+            continue
+
+        text_lower = page_text.lower()
+
+        # Check for lease keywords
+        has_lease_keyword = any(kw in text_lower for kw in lease_keywords)
+
+        # Check for skip keywords
+        has_skip_keyword = any(kw in text_lower for kw in skip_keywords)
+
+        # Select this page if it has lease content and isn't a stamp page
+        if has_lease_keyword and not has_skip_keyword:
+            return page_text
+
+    # Fallback to first page
+    return page_texts[0] if page_texts else None
+
+
+@_timed("ocr:pdf")
+def extract_text_from_pdf(file_path):
+    """Extract text from PDF, with OCR fallback for scanned documents.
+
+    Returns:
+        tuple: (full_text, page_texts) where page_texts is a list of per-page strings
+    """
+    try:
+        from pypdf import PdfReader
+
+        # First try direct text extraction
+        start = time.perf_counter()
+        reader = PdfReader(file_path)
+        page_texts = []
+        page_ms = []
+        for page in reader.pages:
+            page_start = time.perf_counter()
+            page_text = page.extract_text()
+            page_texts.append(page_text.strip() if page_text else "")
+            page_ms.append((time.perf_counter() - page_start) * 1000)
+
+        full_text = "\n".join(page_texts)
+
+        # If we got meaningful text, return it
+        if full_text.strip():
+            OCR_PAGES_TOTAL.inc("pdf", "text", amount=len(page_texts))
+            _log_extraction("text", page_texts, page_ms, full_text, start)
+            return full_text.strip(), page_texts
+
+        # Fallback: OCR for scanned PDFs
+        _log_event(logging.INFO, "extract.pdf.ocr_fallback", pages=len(page_texts))
+        import pytesseract
+        from pdf2image import convert_from_path
+
+        start = time.perf_counter()
+        images = convert_from_path(file_path)
+        page_texts = []
+        page_ms = []
+        for image in images:
+            page_start = time.perf_counter()
+            page_text = pytesseract.image_to_string(image)
+            page_texts.append(page_text.strip() if page_text else "")
+            page_ms.append((time.perf_counter() - page_start) * 1000)
+
+        full_text = "\n".join(page_texts)
+        OCR_PAGES_TOTAL.inc("pdf", "ocr", amount=len(page_texts))
+        _log_extraction("ocr", page_texts, page_ms, full_text, start)
+        return (full_text.strip() if full_text.strip() else None, page_texts)
+
+    except Exception as e:
+        _log_event(logging.WARNING, "extract.pdf.failed", error=str(e))
+        return None, []
+
+
+def _log_extraction(method, page_texts, page_ms, full_text, start):
+    """Log a PDF extraction summary (INFO) and per-page stats (DEBUG)."""
+    _log_event(logging.INFO, "extract.pdf", method=method, pages=len(page_texts),
+               chars=len(full_text.strip()), ms=(time.perf_counter() - start) * 1000)
+    for i, (text, ms) in enumerate(zip(page_texts, page_ms), start=1):
+        _log_event(logging.DEBUG, "extract.pdf.page", method=method, page=i,
+                   chars=len(text), ms=ms)
+
+
+def extract_text(file_path, mimetype):
+    """Extract text based on file type.
+
+    Returns:
+        tuple: (full_text, page_texts) for preview selection
+    """
+    if mimetype == "application/pdf":
+        return extract_text_from_pdf(file_path)
+    elif mimetype in ["image/png", "image/jpeg"]:
+        text = extract_text_from_image(file_path)
+        # Single-page image: return as one-element list
+        return text, [text] if text else []
+    return None, []
+
+
+def create_preview(text, max_length=300):
+    """Create a truncated preview of extracted text."""
+    if not text:
+        return None
+    # Normalize whitespace
+    text = " ".join(text.split())
+    if len(text) <= max_length:
+        return text
+    # Truncate at word boundary
+    return text[:max_length].rsplit(" ", 1)[0] + "..."
+
+
+@_timed("ai:extract")
+def ai_extract_lease_fields(full_text):
+    """Use Claude AI to extract lease fields from text.
+
+    Returns:
+        dict with extracted fields, or None on any failure
+    """
+    if not ANTHROPIC_AVAILABLE:
+        _log_event(logging.INFO, "ai.extract.skipped", reason="anthropic_not_installed")
+        return None
+
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        _log_event(logging.INFO, "ai.extract.skipped", reason="no_api_key")
+        return None
+
+    if not full_text or not full_text.strip():
+        _log_event(logging.INFO, "ai.extract.skipped", reason="no_text")
+        return None
+
+    import anthropic
+
+    try:
+        client = anthropic.Anthropic(api_key=api_key)
+
+        prompt = f"""You are a lease document analyzer. Extract the following fields from this lease document text.
+
+IMPORTANT RULES:
+- Be conservative: only extract values you are confident about
+- If a field is unclear, ambiguous, or not found, use null
+- For dates, use YYYY-MM-DD format
+- For monetary values, extract the number only (no currency symbols)
+- Provide evidence (a short quote from the text) for each extracted value
+- The "page" field should be null unless you can determine it from context
+- For rent_due_day: extract the day of month (1-31) when rent is due. Look for phrases like "due on the 1st", "payable by the 15th", "on or before the first day", etc.
+
+LOCK-IN PERIOD RULES:
+- Extract the lock-in period as a number of MONTHS only
+- Look for phrases like "lock-in period", "minimum term", "cannot terminate before", "committed for"
+- Convert years to months if needed (e.g., "1 year lock-in" = 12)
+- If not explicitly mentioned, use null — do NOT infer or guess
+
+RENT ESCALATION RULES:
+- Extract the rent escalation percentage ONLY if explicitly stated
+- Look for phrases like "rent shall increase by X%", "escalation of X%", "annual increment of X%", "X% increase upon renewal"
+- Extract ONLY the percentage number (e.g., 5 for "5%")
+- This is informational only — do NOT calculate or apply it
+- If not explicitly mentioned, use null — do NOT infer or guess
+
+LEASE NICKNAME RULES:
+- Generate a short, human-friendly nickname (2-6 words)
+- Prefer format: "City - Condo/Locality Name - Apartment/House Number"
+- Include flat/unit/apartment number if clearly stated in the document
+- Good examples: "Gurgaon - World Spa - A5-102", "Mumbai - Prestige Tower - 1201", "Bangalore - DLF Phase 3 - 5A"
+- If no unit number found, omit it: "Mumbai - Prestige Tower", "Gurgaon - World Spa"
+- If city is unclear but building is known: "World Spa - A5-102"
+- If location is unclear, use generic fallback: "Residential Lease" or "Commercial Lease"
+- Only include details explicitly mentioned in the document — NEVER guess or hallucinate
+- If you cannot determine ANY useful identifying info, use null
+
+Return ONLY valid JSON matching this exact schema (no other text):
+
+{{
+  "lease_nickname": null,
+  "lessor_name": {{ "value": null, "page": null, "evidence": null }},
+  "lessee_name": {{ "value": null, "page": null, "evidence": null }},
+  "start_date": {{ "value": null, "page": null, "evidence": null }},
+  "end_date": {{ "value": null, "page": null, "evidence": null }},
+  "monthly_rent": {{ "value": null, "page": null, "evidence": null }},
+  "rent_due_day": {{ "value": null, "page": null, "evidence": null }},
+  "security_deposit": {{ "value": null, "page": null, "evidence": null }},
+  "lock_in_duration_months": {{ "value": null, "page": null, "evidence": null }},
+  "rent_escalation_percent": {{ "value": null, "page": null, "evidence": null }},
+  "confidence_notes": null
+}}
+
+LEASE DOCUMENT TEXT:
+{full_text}"""
+
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=1024,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            AI_TOKENS_TOTAL.inc("extract", "input", amount=usage.input_tokens or 0)
+            AI_TOKENS_TOTAL.inc("extract", "output", amount=usage.output_tokens or 0)
+
+        # Extract the text response
+        response_text = message.content[0].text.strip()
+
+        # Handle potential markdown code blocks
+        if response_text.startswith("```"):
+            lines = response_text.split("\n")
+            # Remove first line (```json) and last line (```)
+            response_text = "\n".join(lines[1:-1])
+
+        result = json.loads(response_text)
+        return result
+
+    except anthropic.APIError as e:
+        _log_event(logging.WARNING, "ai.extract.failed", reason="api_error", error=str(e))
+        return None
+    except json.JSONDecodeError as e:
+        _log_event(logging.WARNING, "ai.extract.failed", reason="invalid_json", error=str(e))
+        return None
+    except Exception:
+        log.exception("ai.extract.failed", extra={"fields": {"reason": "unexpected"}})
+        return None
+
+
+def preload_extraction_dependencies():
+    """Import the PDF/OCR/AI packages now instead of on first use."""
+    import pypdf  # noqa: F401
+    import pytesseract  # noqa: F401
+    import pdf2image  # noqa: F401
+    import PIL.Image  # noqa: F401
+    if ANTHROPIC_AVAILABLE:
+        import anthropic  # noqa: F401
+
+
+if os.environ.get("MAPMYLEASE_EAGER_IMPORTS", "").lower() in ("1", "true", "yes"):
+    preload_extraction_dependencies()
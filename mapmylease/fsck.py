@@ -0,0 +1,338 @@
+"""
+Consistency checker for cross-store references (`flask --app app fsck`).
+
+The stores point at each other by id and nothing enforces it; a
+dangling reference only shows up as a silent .get() miss somewhere in
+the engine. check_stores() loads every store once, builds the id sets
+once, and walks each record once, reporting:
+
+  orphan_*               record points at a lease group, lease, thread
+                         or payment that does not exist
+  duplicate_id           two records in one store share an id
+  duplicate_open_thread  more than one open thread per (lease group,
+                         topic_type, topic_ref) — find_open_thread()
+                         only ever sees the first, so replies split
+                         across threads
+  duplicate_current_lease / duplicate_active_token
+                         more than one current version / active token
+                         per lease group
+  missing_proof_file     proof or attachment path that resolves to
+                         no bytes on disk
+  invalid_date / invalid_period
+                         unparseable ISO dates, period_month out of range
+
+With repair=True, only issues with one obviously right fix are
+repaired, under the threads and tenant_access locks:
+
+  duplicate_open_thread  messages move to the first open thread for
+                         the topic; the others are dropped
+  orphan_message         dropped (its thread no longer exists), with
+                         its outbox deliveries
+  orphan_delivery        unsent outbox delivery for a missing message:
+                         dropped
+  orphan_payment_ref     message payment_id set to None
+  orphan_token / duplicate_active_token
+                         revoked (the newest active token is kept)
+
+Payments are append-only and leases, terminations, dates and files
+need a human, so everything else is report-only.
+"""
+
+import time
+from datetime import datetime
+
+from mapmylease.storage import (
+    _load_all_leases,
+    _load_all_payments,
+    _load_all_tenant_access,
+    _load_all_terminations,
+    _load_all_threads,
+    _retry_on_conflict,
+    _save_tenant_access_file,
+    _save_threads_file,
+    resolve_proof_path,
+    store_lock,
+)
+
+# (store, record key) -> [(field, "date" | "datetime", required)]
+DATE_FIELDS = {
+    "leases": [("lease_start_date", "date", False), ("lease_end_date", "date", False)],
+    "confirmations": [("date_paid", "date", False), ("submitted_at", "datetime", True)],
+    "threads": [("created_at", "datetime", True), ("resolved_at", "datetime", False),
+                ("escalation_started_at", "datetime", False),
+                ("last_reminder_at", "datetime", False)],
+    "messages": [("created_at", "datetime", True)],
+    "terminations": [("termination_date", "date", True)],
+    "tenant_tokens": [("issued_at", "datetime", True), ("revoked_at", "datetime", False),
+                      ("last_used_at", "datetime", False)],
+}
+
+REPAIRABLE = frozenset({"duplicate_open_thread", "orphan_message", "orphan_payment_ref",
+                        "orphan_delivery", "orphan_token", "duplicate_active_token"})
+
+FSCK_REVOKED_REASON = "fsck: token for a missing lease group or a second active token"
+
+
+def _issue(check, store, record_id, detail):
+    return {"check": check, "store": store, "id": record_id, "detail": detail,
+            "repairable": check in REPAIRABLE}
+
+
+def _bad_date(value, kind):
+    """True if value is not an ISO date/datetime string."""
+    if not isinstance(value, str):
+        return True
+    try:
+        if kind == "date":
+            datetime.strptime(value, "%Y-%m-%d")
+        else:
+            datetime.fromisoformat(value)
+    except ValueError:
+        return True
+    return False
+
+
+def _check_dates(issues, store, kind_key, values, record_id):
+    for field, kind, required in DATE_FIELDS[kind_key]:
+        value = values.get(field)
+        if value is None and not required:
+            continue
+        if value in (None, "") or _bad_date(value, kind):
+            issues.append(_issue("invalid_date", store, record_id, f"{field}={value!r}"))
+
+
+def _check_ids(issues, store, records):
+    """Return the set of ids in records, reporting duplicates."""
+    ids = set()
+    for record in records:
+        record_id = record.get("id")
+        if record_id in ids:
+            issues.append(_issue("duplicate_id", store, record_id, "id used twice"))
+        ids.add(record_id)
+    return ids
+
+
+def find_issues(stores):
+    """Check loaded stores against each other. Pure: nothing is written.
+
+    Args:
+        stores: {"leases", "payments", "tenant_access", "threads",
+                 "terminations"} -> the dicts their loaders return
+
+    Returns:
+        list of issue dicts: {"check", "store", "id", "detail", "repairable"}
+        ("id" is the token string itself for tenant_access issues)
+    """
+    issues = []
+    leases = stores["leases"].get("leases", [])
+    confirmations = stores["payments"].get("confirmations", [])
+    threads = stores["threads"].get("threads", [])
+    messages = stores["threads"].get("messages", [])
+    deliveries = stores["threads"].get("deliveries", [])
+    terminations = stores["terminations"].get("terminations", [])
+    tokens = stores["tenant_access"].get("tenant_tokens", [])
+
+    lease_ids = _check_ids(issues, "leases", leases)
+    payment_ids = _check_ids(issues, "payments", confirmations)
+    thread_ids = _check_ids(issues, "threads", threads)
+    message_ids = _check_ids(issues, "threads", messages)
+    _check_ids(issues, "terminations", terminations)
+    group_ids = {l.get("lease_group_id") for l in leases}
+
+    current_groups = set()
+    for lease in leases:
+        if lease.get("is_current"):
+            if lease.get("lease_group_id") in current_groups:
+                issues.append(_issue("duplicate_current_lease", "leases", lease.get("id"),
+                                     f"lease_group_id={lease.get('lease_group_id')}"))
+            current_groups.add(lease.get("lease_group_id"))
+        _check_dates(issues, "leases", "leases", lease.get("current_values") or {},
+                     lease.get("id"))
+
+    for c in confirmations:
+        if c.get("lease_group_id") not in group_ids:
+            issues.append(_issue("orphan_confirmation", "payments", c.get("id"),
+                                 f"lease_group_id={c.get('lease_group_id')}"))
+        for path in c.get("proof_files") or []:
+            if resolve_proof_path(path) is None:
+                issues.append(_issue("missing_proof_file", "payments", c.get("id"), path))
+        month = c.get("period_month")
+        if not isinstance(month, int) or not 1 <= month <= 12 or not isinstance(c.get("period_year"), int):
+            issues.append(_issue("invalid_period", "payments", c.get("id"),
+                                 f"{c.get('period_year')!r}-{month!r}"))
+        _check_dates(issues, "payments", "confirmations", c, c.get("id"))
+
+    open_topics = set()
+    for t in threads:
+        if t.get("lease_group_id") not in group_ids:
+            issues.append(_issue("orphan_thread", "threads", t.get("id"),
+                                 f"lease_group_id={t.get('lease_group_id')}"))
+        if t.get("status") == "open":
+            topic = (t.get("lease_group_id"), t.get("topic_type"), t.get("topic_ref"))
+            if topic in open_topics:
+                issues.append(_issue("duplicate_open_thread", "threads", t.get("id"),
+                                     "{}/{}".format(t.get("topic_type"), t.get("topic_ref"))))
+            open_topics.add(topic)
+        _check_dates(issues, "threads", "threads", t, t.get("id"))
+
+    for m in messages:
+        if m.get("thread_id") not in thread_ids:
+            issues.append(_issue("orphan_message", "threads", m.get("id"),
+                                 f"thread_id={m.get('thread_id')}"))
+        if m.get("payment_id") is not None and m.get("payment_id") not in payment_ids:
+            issues.append(_issue("orphan_payment_ref", "threads", m.get("id"),
+                                 f"payment_id={m.get('payment_id')}"))
+        for path in m.get("attachments") or []:
+            if resolve_proof_path(path) is None:
+                issues.append(_issue("missing_proof_file", "threads", m.get("id"), path))
+        _check_dates(issues, "threads", "messages", m, m.get("id"))
+
+    for d in deliveries:
+        if d.get("status") != "sent" and d.get("message_id") not in message_ids:
+            issues.append(_issue("orphan_delivery", "threads", d.get("id"),
+                                 f"message_id={d.get('message_id')}"))
+
+    for term in terminations:
+        if term.get("lease_id") not in lease_ids:
+            issues.append(_issue("orphan_termination", "terminations", term.get("id"),
+                                 f"lease_id={term.get('lease_id')}"))
+        _check_dates(issues, "terminations", "terminations", term, term.get("id"))
+
+    active_groups = set()
+    # Newest first, so the token kept on repair is the latest issued
+    for token in sorted(tokens, key=lambda t: t.get("issued_at") or "", reverse=True):
+        label = token.get("token")
+        if token.get("lease_group_id") not in group_ids:
+            if token.get("is_active"):
+                issues.append(_issue("orphan_token", "tenant_access", label,
+                                     f"lease_group_id={token.get('lease_group_id')}"))
+        elif token.get("is_active"):
+            if token.get("lease_group_id") in active_groups:
+                issues.append(_issue("duplicate_active_token", "tenant_access", label,
+                                     f"lease_group_id={token.get('lease_group_id')}"))
+            active_groups.add(token.get("lease_group_id"))
+        _check_dates(issues, "tenant_access", "tenant_tokens", token, label)
+
+    return issues
+
+
+def _load_stores():
+    return {"leases": _load_all_leases(), "payments": _load_all_payments(),
+            "tenant_access": _load_all_tenant_access(), "threads": _load_all_threads(),
+            "terminations": _load_all_terminations()}
+
+
+def _record_count(stores):
+    return sum(len(v) for data in stores.values() for v in data.values() if isinstance(v, list))
+
+
+# ----------------------------------------------------------------
+# Repair
+# ----------------------------------------------------------------
+
+def _merge_duplicate_threads(thread_data, duplicate_ids):
+    """Fold duplicate open threads into the first open one per topic."""
+    survivors = {}
+    for t in thread_data["threads"]:
+        if t.get("status") == "open" and t.get("id") not in duplicate_ids:
+            survivors.setdefault((t.get("lease_group_id"), t.get("topic_type"),
+                                  t.get("topic_ref")), t)
+    merged_into = {}
+    for t in thread_data["threads"]:
+        if t.get("id") in duplicate_ids:
+            survivor = survivors[(t.get("lease_group_id"), t.get("topic_type"), t.get("topic_ref"))]
+            survivor["needs_landlord_attention"] = (survivor.get("needs_landlord_attention")
+                                                    or t.get("needs_landlord_attention", False))
+            merged_into[t["id"]] = survivor["id"]
+    for m in thread_data["messages"]:
+        if m.get("thread_id") in merged_into:
+            m["thread_id"] = merged_into[m["thread_id"]]
+    thread_data["threads"] = [t for t in thread_data["threads"] if t.get("id") not in merged_into]
+    return len(merged_into)
+
+
+def _repair(stores, issues, now):
+    """Apply the repairable fixes to loaded stores, in place.
+
+    Returns:
+        dict: {check: number repaired}; the stores that changed are
+              "threads" / "tenant_access" keys with a positive count
+    """
+    by_check = {}
+    for issue in issues:
+        if issue["repairable"]:
+            by_check.setdefault(issue["check"], set()).add(issue["id"])
+    repaired = {}
+    thread_data = stores["threads"]
+
+    if "duplicate_open_thread" in by_check:
+        repaired["duplicate_open_thread"] = _merge_duplicate_threads(
+            thread_data, by_check["duplicate_open_thread"])
+    if "orphan_message" in by_check:
+        before = len(thread_data["messages"])
+        thread_data["messages"] = [m for m in thread_data["messages"]
+                                   if m.get("id") not in by_check["orphan_message"]]
+        repaired["orphan_message"] = before - len(thread_data["messages"])
+        by_check.setdefault("orphan_delivery", set()).update(
+            d.get("id") for d in thread_data.get("deliveries", [])
+            if d.get("message_id") in by_check["orphan_message"])
+    if "orphan_payment_ref" in by_check:
+        for m in thread_data["messages"]:
+            if m.get("id") in by_check["orphan_payment_ref"]:
+                m["payment_id"] = None
+        repaired["orphan_payment_ref"] = len(by_check["orphan_payment_ref"])
+    if by_check.get("orphan_delivery"):
+        before = len(thread_data.get("deliveries", []))
+        thread_data["deliveries"] = [d for d in thread_data.get("deliveries", [])
+                                     if d.get("id") not in by_check["orphan_delivery"]]
+        repaired["orphan_delivery"] = before - len(thread_data["deliveries"])
+
+    revoke = by_check.get("orphan_token", set()) | by_check.get("duplicate_active_token", set())
+    if revoke:
+        count = 0
+        for token in stores["tenant_access"].get("tenant_tokens", []):
+            if token.get("is_active") and token.get("token") in revoke:
+                token["is_active"] = False
+                token["revoked_at"] = now.isoformat()
+                token["revoked_reason"] = FSCK_REVOKED_REASON
+                count += 1
+        repaired["tokens_revoked"] = count
+    return repaired
+
+
+@_retry_on_conflict
+@store_lock("tenant_access", "threads")
+def _check_and_repair(now):
+    stores = _load_stores()
+    issues = find_issues(stores)
+    repaired = _repair(stores, issues, now)
+    if any(repaired.get(k) for k in ("duplicate_open_thread", "orphan_message", "orphan_payment_ref",
+                                     "orphan_delivery")):
+        _save_threads_file(stores["threads"])
+    if repaired.get("tokens_revoked"):
+        _save_tenant_access_file(stores["tenant_access"])
+    return stores, issues, repaired
+
+
+def check_stores(repair=False, now=None):
+    """Run every cross-store check once; optionally repair.
+
+    Args:
+        repair: apply the safe fixes listed in the module docstring
+        now: datetime recorded on revoked tokens (default: now)
+
+    Returns:
+        dict: {"records": n checked, "issues": [...], "counts":
+               {check: n}, "repaired": {check: n}, "seconds": float}
+    """
+    started = time.perf_counter()
+    if repair:
+        stores, issues, repaired = _check_and_repair(now or datetime.now())
+    else:
+        stores, repaired = _load_stores(), {}
+        issues = find_issues(stores)
+    counts = {}
+    for issue in issues:
+        counts[issue["check"]] = counts.get(issue["check"], 0) + 1
+    return {"records": _record_count(stores), "issues": issues, "counts": counts,
+            "repaired": repaired, "seconds": round(time.perf_counter() - started, 3)}
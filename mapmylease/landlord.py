@@ -0,0 +1,2492 @@
+"""
+Landlord app: dashboard view-model and month history, lease upload and
+editing, the read-only JSON API, thread actions, and the CLI.
+
+create_app() builds the full app — landlord and tenant routes — and is
+what `flask --app app` and app.py serve.
+"""
+
+import os
+from datetime import datetime
+import uuid
+import hashlib
+import logging
+import time
+from flask import (render_template, request, redirect, url_for, flash, jsonify, abort, current_app,
+                   Response, stream_with_context)
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+import click
+
+from mapmylease.analytics import ANALYTICS_STORES, portfolio_analytics
+from mapmylease.backups import (
+    SnapshotError,
+    find_snapshot,
+    list_snapshots,
+    prune_snapshots,
+    restore_snapshot,
+    take_snapshot,
+    verify_snapshot,
+)
+from mapmylease.engine import (
+    _parse_month_tuple,
+    add_message_to_thread,
+    auto_resolve_missing_payment_threads,
+    build_thread_timeline,
+    calculate_prorated_amount,
+    calculate_reminder_status,
+    cleanup_draft_leases,
+    compare_lease_versions,
+    compute_monthly_coverage,
+    count_landlord_attention_threads,
+    create_termination_event,
+    ensure_thread_exists,
+    escalate_missing_payment_threads,
+    find_open_thread,
+    generate_tenant_token,
+    get_all_leases,
+    get_all_tokens_for_lease_group,
+    get_attention_summary_for_lease,
+    get_earliest_start_date,
+    get_global_alerts,
+    get_global_attention_summary,
+    get_lease_by_id,
+    get_lease_versions,
+    get_messages_for_thread,
+    get_payments_for_lease_group,
+    get_tenant_continuity_duration,
+    get_termination_for_lease,
+    get_threads_for_lease_group,
+    group_leases_by_lessor,
+    materialise_missing_payment_threads,
+    materialise_system_threads,
+    revoke_tenant_token,
+    send_missing_payment_reminders,
+)
+from mapmylease.extraction import (
+    ai_extract_lease_fields,
+    create_preview,
+    extract_text,
+    select_preview_page,
+)
+from mapmylease.fsck import check_stores
+from mapmylease.notifications import (
+    NOTIFY_CHANNELS,
+    NOTIFY_WORKER,
+    _drain_batch,
+    outbox_status,
+    run_outbox_worker,
+    start_outbox_worker,
+)
+from mapmylease.observability import (
+    API_CACHE_TOTAL,
+    _log_event,
+    register_observability_routes,
+)
+from mapmylease.previews import PREVIEW_SIZES, get_proof_preview
+from mapmylease.reports import (
+    EXPORT_FORMATS,
+    TDS_REPORT_COLUMNS,
+    financial_year,
+    iter_csv,
+    iter_ledger_rows,
+    ledger_filters,
+    parse_financial_year,
+    tds_report,
+)
+from mapmylease.search import SEARCH_DEFAULT_LIMIT, index_lease, rebuild_index, search
+from mapmylease.storage import (
+    PROOF_ALLOWED_EXTENSIONS,
+    STORE_FILES,
+    UPLOAD_FOLDER,
+    _codec_dumps,
+    _codec_loads,
+    _default_expected_payments,
+    _load_all_leases,
+    _load_all_payments,
+    _load_all_threads,
+    _read_store_bytes,
+    _save_lease_file,
+    _store_stamp,
+    allowed_file,
+    content_hash,
+    convert_store_layout,
+    dedupe_proof_files,
+    load_proof_metadata,
+    resolve_proof_path,
+    run_store_migrations,
+    save_proof_file,
+    store_layout,
+    store_lock,
+    unit_of_work,
+)
+from mapmylease.tenant import register_tenant_routes
+from mapmylease.thread_archive import archive_resolved_threads, with_archived_threads
+from mapmylease.web import format_date_filter, make_app, send_upload
+
+
+# In-memory storage for uploads
+uploads = {}
+
+
+def get_active_lease():
+    """Get the currently active lease based on request context.
+
+    Selection priority:
+    1. ?lease_id query parameter
+    2. Most recently updated lease
+    3. None if no leases exist
+
+    Returns:
+        dict: The active lease object, or None
+    """
+    leases = get_all_leases()
+
+    if not leases:
+        return None
+
+    # Check for explicit lease_id in query params
+    lease_id = request.args.get("lease_id")
+    if lease_id:
+        lease = get_lease_by_id(lease_id)
+        if lease:
+            return lease
+
+    # Fallback to most recently updated lease (already sorted)
+    return leases[0] if leases else None
+
+
+# ----------------------------------------------------------------
+# Dashboard view-model
+# ----------------------------------------------------------------
+
+
+def attach_dashboard_view_model(leases, thread_data):
+    """Attach dashboard card fields (underscore-prefixed) to each lease.
+
+    Read-only with respect to the data files: the engine pipeline
+    (materialise / auto-resolve / remind / escalate) must already have
+    run if fresh attention state is wanted. Shared by the dashboard
+    route and the JSON API so both see identical card data.
+
+    versions_cache ensures get_lease_versions is called at most once
+    per lease_group_id, avoiding repeated JSON file reads.
+
+    Args:
+        leases: list of current lease dicts (mutated in place)
+        thread_data: full threads.json structure
+
+    Returns:
+        list: the same leases list, for convenience
+    """
+    versions_cache = {}
+    for lease in leases:
+        cv = lease.get("current_values", lease)
+        lgid = lease.get("lease_group_id", lease.get("id"))
+        if lgid not in versions_cache:
+            versions_cache[lgid] = get_lease_versions(lgid)
+        versions = versions_cache[lgid]
+        lease["_earliest_start_date"] = get_earliest_start_date(versions)
+        lease["_tenant_continuity"] = get_tenant_continuity_duration(versions, cv.get("lessee_name"))
+
+        attention_count = count_landlord_attention_threads(lgid, thread_data)
+        lease["_needs_attention"] = attention_count > 0
+        lease["_attention_count"] = attention_count
+        lease["_attention_items"] = get_attention_summary_for_lease(lgid, thread_data) if attention_count > 0 else []
+
+        # Lifecycle state for dashboard card
+        # Priority: TERMINATED > EXPIRED > ACTIVE
+        # Only the current version can show a lifecycle ribbon.
+        is_current = lease.get("is_current", False)
+
+        termination = get_termination_for_lease(lease.get("id"))
+        is_terminated = is_current and termination is not None
+        lease["_is_terminated"] = is_terminated
+        lease["_termination_date_display"] = format_date_filter(termination["termination_date"]) if is_terminated else None
+        lease["_termination_days_elapsed"] = (datetime.utcnow().date() - datetime.strptime(termination["termination_date"], "%Y-%m-%d").date()).days if is_terminated else None
+
+        # Expired: current version, past end date, NOT terminated
+        is_expired = False
+        if is_current and not is_terminated:
+            end_date_str = cv.get("lease_end_date")
+            if end_date_str:
+                try:
+                    end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+                    is_expired = end_date < datetime.utcnow().date()
+                except ValueError:
+                    pass
+        lease["_is_expired"] = is_expired
+
+        # Can renew: terminated OR expired (not active)
+        lease["_can_renew"] = is_terminated or is_expired
+
+    return leases
+
+
+# ----------------------------------------------------------------
+# Lease detail month history (paginated)
+# ----------------------------------------------------------------
+# The lease detail view renders only the most recent
+# MONTH_HISTORY_PAGE_SIZE months server-side. Older months (and their
+# thread timelines) are fetched on demand from lease_month_history().
+# Older months that need attention are pulled forward onto the first
+# page, at most MONTH_HISTORY_ATTENTION_LIMIT of them; the rest show up
+# when the landlord loads earlier months.
+MONTH_HISTORY_PAGE_SIZE = 12
+MONTH_HISTORY_ATTENTION_LIMIT = 12
+
+_MONTH_DISPLAY_NAMES = ["January", "February", "March", "April", "May", "June",
+                        "July", "August", "September", "October", "November",
+                        "December"]
+
+
+def _previous_month(year, month):
+    """Return the (year, month) tuple immediately before the given month."""
+    if month == 1:
+        return year - 1, 12
+    return year, month - 1
+
+
+def get_month_history_bounds(lease_data, payment_confirmations):
+    """Return the (start, end) month tuples covered by the detail view.
+
+    Start is the lease start month, falling back to the earliest
+    submission period. End is always the current month.
+
+    Args:
+        lease_data: full lease dict (with current_values)
+        payment_confirmations: pre-loaded confirmations for the lease group
+
+    Returns:
+        tuple: ((start_year, start_month), (end_year, end_month)),
+               or None if no start month can be determined
+    """
+    start_year, start_month = None, None
+
+    # Priority 1: lease start date
+    cv = lease_data.get("current_values") or {}
+    lease_start = _parse_month_tuple(cv.get("lease_start_date"))
+    if lease_start:
+        start_year, start_month = lease_start
+
+    # Priority 2: earliest submission period
+    if start_year is None and payment_confirmations:
+        earliest = min(payment_confirmations,
+                       key=lambda c: (c.get("period_year", 9999), c.get("period_month", 13)))
+        start_year = earliest.get("period_year")
+        start_month = earliest.get("period_month")
+
+    if not (start_year and start_month):
+        return None
+
+    now = datetime.now()
+    return (start_year, start_month), (now.year, now.month)
+
+
+def get_month_history_page(bounds, before=None, limit=MONTH_HISTORY_PAGE_SIZE):
+    """Select one page of months from the history bounds, newest first.
+
+    Pure helper — only month tuples are produced, no summaries are built.
+
+    Args:
+        bounds: ((start_year, start_month), (end_year, end_month))
+                from get_month_history_bounds(), or None
+        before: optional (year, month) — only months strictly older are
+                returned. None starts from the end of the range.
+        limit: maximum number of months in the page
+
+    Returns:
+        tuple: (months, next_before) where months is a list of
+               (year, month) tuples newest first, and next_before is the
+               oldest month in the page if older months remain, else None
+    """
+    if not bounds or limit <= 0:
+        return [], None
+
+    start, end = bounds
+    cursor = end if before is None else min(end, _previous_month(*before))
+
+    months = []
+    while cursor >= start and len(months) < limit:
+        months.append(cursor)
+        cursor = _previous_month(*cursor)
+
+    next_before = months[-1] if months and cursor >= start else None
+    return months, next_before
+
+
+def _format_month(month_tuple):
+    """(2026, 3) -> "2026-03"."""
+    return f"{month_tuple[0]}-{str(month_tuple[1]).zfill(2)}"
+
+
+def _older_attention_months(lease_data, bounds, before, payment_confirmations, lease_threads):
+    """Return the months older than `before` that need attention.
+
+    Read straight off the confirmation and thread lists, without
+    building month summaries: a month needs attention if an expected
+    category has no confirmation, a confirmed category has no review
+    thread yet, or its review thread is open and waiting on someone.
+    These are exactly the older months build_landlord_monthly_summary()
+    marks visible.
+
+    Returns:
+        list of (year, month) tuples, newest first
+    """
+    if not bounds or before is None:
+        return []
+    start = bounds[0]
+    expected = {ep["type"] for ep in (lease_data.get("current_values") or {}).get(
+        "expected_payments", []) if ep.get("expected")}
+
+    paid = {}
+    for c in payment_confirmations:
+        period = (c.get("period_year"), c.get("period_month"))
+        if c.get("confirmation_type") in expected and start <= period < before:
+            paid.setdefault(period, set()).add(c.get("confirmation_type"))
+
+    reviewed = set()
+    months = set()
+    for t in lease_threads:
+        if t.get("topic_type") != "payment_review":
+            continue
+        ref = t.get("topic_ref") or ""
+        reviewed.add(ref)
+        period = _parse_month_tuple(ref[-7:])
+        if (period and start <= period < before and t.get("status") == "open"
+                and t.get("waiting_on") in ("landlord", "tenant")
+                and ref.partition(":")[0] in paid.get(period, ())):
+            months.add(period)
+
+    cursor = _previous_month(*before)
+    while expected and cursor >= start:
+        covered = paid.get(cursor, set())
+        if covered != expected or any(f"{cat}:{_format_month(cursor)}" not in reviewed
+                                      for cat in covered):
+            months.add(cursor)
+        cursor = _previous_month(*cursor)
+    return sorted(months, reverse=True)
+
+
+def get_older_attention_summaries(lease_data, bounds, before, payment_confirmations,
+                                  lease_threads, thread_data,
+                                  limit=MONTH_HISTORY_ATTENTION_LIMIT):
+    """Return summaries of the newest `limit` months older than `before`
+    that need attention.
+
+    The first page of the lease detail view shows these below the
+    recent months (older months appear only if they need attention).
+    Summaries and thread timelines are built only for those months.
+
+    Returns:
+        list of month summary dicts (visible=True), newest first
+    """
+    months = _older_attention_months(lease_data, bounds, before, payment_confirmations,
+                                     lease_threads)[:limit]
+    summaries = build_landlord_monthly_summary(lease_data, months, payment_confirmations,
+                                               lease_threads, thread_data)
+    return [ms for ms in summaries if ms["visible"]]
+
+
+def _find_category_thread(threads_by_ref, cat_ref):
+    """Return the thread for a category topic_ref (prefer open, fall back to resolved)."""
+    cat_thread = None
+    for t in threads_by_ref.get(cat_ref, []):
+        if t.get("status") == "open":
+            return t
+        elif cat_thread is None:
+            cat_thread = t
+    return cat_thread
+
+
+def build_landlord_monthly_summary(lease_data, months, payment_confirmations,
+                                   lease_threads, thread_data):
+    """Build landlord monthly summary rows for the given months.
+
+    Args:
+        lease_data: full lease dict (with current_values)
+        months: list of (year, month) tuples, newest first
+        payment_confirmations: pre-loaded confirmations for the lease group
+        lease_threads: pre-loaded threads for the lease group
+        thread_data: preloaded dict from _load_all_threads()
+
+    Returns:
+        list of month summary dicts in the same order as months. Each dict
+        carries year, month, month_name, count, review_status, review_date,
+        category_details, the compute_monthly_coverage() fields and visible.
+    """
+    cv = lease_data.get("current_values") or {}
+    now = datetime.now()
+
+    # Bucket payments by period and review threads by topic_ref once,
+    # instead of rescanning both lists for every month.
+    payments_by_period = {}
+    for c in payment_confirmations:
+        payments_by_period.setdefault(
+            (c.get("period_year"), c.get("period_month")), []).append(c)
+
+    threads_by_ref = {}
+    threads_by_period = {}
+    for t in lease_threads:
+        if t.get("topic_type") != "payment_review":
+            continue
+        ref = t.get("topic_ref") or ""
+        threads_by_ref.setdefault(ref, []).append(t)
+        threads_by_period.setdefault(ref[-7:], []).append(t)
+
+    monthly_summary = []
+    for y, m in months:
+        month_payments = payments_by_period.get((y, m), [])
+        count = len(month_payments)
+
+        # Derive review status from thread status/waiting_on
+        review_status = "not_submitted"
+        review_date = None
+        period_str = f"{y}-{str(m).zfill(2)}"
+
+        if count > 0:
+            # Find threads for this month across categories
+            month_threads = threads_by_period.get(period_str, [])
+            # Worst-case across all category threads for this month
+            worst_priority = 4  # resolved/acknowledged
+            for mt in month_threads:
+                if mt.get("status") == "open" and mt.get("waiting_on") == "landlord":
+                    if worst_priority > 1:
+                        worst_priority = 1
+                        review_date = mt.get("created_at")
+                elif mt.get("status") == "open" and mt.get("waiting_on") == "tenant":
+                    if worst_priority > 2:
+                        worst_priority = 2
+                        review_date = mt.get("created_at")
+
+            if worst_priority == 1:
+                review_status = "pending"  # landlord needs to act
+            elif worst_priority == 2:
+                review_status = "flagged"
+            elif not month_threads:
+                review_status = "pending"
+            else:
+                review_status = "acknowledged"
+                review_date = None
+
+        # Compute coverage (skip current month)
+        if (y, m) == (now.year, now.month):
+            coverage = {"expected_categories": None, "covered_categories": None,
+                        "missing_categories": None, "coverage_summary": None,
+                        "is_complete": None}
+        else:
+            coverage = compute_monthly_coverage(
+                cv.get("expected_payments", []), month_payments)
+
+        # Compute per-category review state from threads
+        if (y, m) == (now.year, now.month):
+            category_details = None
+        elif count == 0:
+            category_details = {}
+        else:
+            category_details = {}
+            for cat in (coverage.get("covered_categories") or []):
+                cat_thread = _find_category_thread(threads_by_ref, f"{cat}:{period_str}")
+
+                if cat_thread is None:
+                    state = "pending_review"
+                    category_details[cat] = {
+                        "state": state, "date": None,
+                        "actor": None, "flag_date": None,
+                    }
+                elif cat_thread.get("status") == "resolved":
+                    category_details[cat] = {
+                        "state": "acknowledged",
+                        "date": cat_thread.get("resolved_at"),
+                        "actor": None, "flag_date": None,
+                    }
+                elif cat_thread.get("waiting_on") == "tenant":
+                    msgs = get_messages_for_thread(cat_thread["id"], thread_data)
+                    flag_msg = next((m for m in msgs if m.get("message_type") == "flag"), None)
+                    category_details[cat] = {
+                        "state": "flagged",
+                        "date": msgs[-1].get("created_at") if msgs else None,
+                        "actor": "landlord",
+                        "flag_date": flag_msg.get("created_at") if flag_msg else None,
+                    }
+                elif cat_thread.get("waiting_on") == "landlord":
+                    msgs = get_messages_for_thread(cat_thread["id"], thread_data)
+                    last_msg = msgs[-1] if msgs else None
+                    flag_msg = next((m for m in msgs if m.get("message_type") == "flag"), None)
+                    if last_msg and last_msg.get("actor") == "tenant":
+                        category_details[cat] = {
+                            "state": "tenant_replied",
+                            "date": last_msg.get("created_at"),
+                            "actor": "tenant",
+                            "flag_date": flag_msg.get("created_at") if flag_msg else None,
+                        }
+                    else:
+                        category_details[cat] = {
+                            "state": "pending_review",
+                            "date": None, "actor": None,
+                            "flag_date": None,
+                        }
+
+        monthly_summary.append({
+            "year": y, "month": m,
+            "month_name": _MONTH_DISPLAY_NAMES[m - 1],
+            "count": count,
+            "review_status": review_status,
+            "review_date": review_date,
+            "category_details": category_details,
+            **coverage,
+        })
+
+    # Mark visibility: last 6 months always visible,
+    # older months only if they have unresolved issues
+    cutoff_m = now.month - 5
+    cutoff_y = now.year
+    if cutoff_m <= 0:
+        cutoff_m += 12
+        cutoff_y -= 1
+    for ms in monthly_summary:
+        within_window = (ms["year"], ms["month"]) >= (cutoff_y, cutoff_m)
+        if within_window:
+            ms["visible"] = True
+        else:
+            has_missing = bool(ms.get("missing_categories"))
+            has_unresolved = False
+            cd = ms.get("category_details")
+            if cd and isinstance(cd, dict):
+                for cat_info in cd.values():
+                    if isinstance(cat_info, dict) and cat_info.get("state") != "acknowledged":
+                        has_unresolved = True
+                        break
+            ms["visible"] = has_missing or has_unresolved
+
+    return monthly_summary
+
+
+def build_payment_threads_by_month(monthly_summary, payment_confirmations,
+                                   lease_threads, thread_data, payment_lookup):
+    """Build grouped thread modal data for the given summary months.
+
+    Each month gets a list of thread dicts with timeline, status, etc.
+    Timelines are only built for the months passed in, so the cost is
+    bounded by the page size rather than the age of the lease.
+
+    Returns:
+        dict: {(year, month): [thread dicts]} — months without threads omitted
+    """
+    cat_order = ["rent", "maintenance", "utilities"]
+    cat_display = {"rent": "Rent", "maintenance": "Maintenance",
+                   "utilities": "Utilities"}
+
+    threads_by_ref = {}
+    for t in lease_threads:
+        if t.get("topic_type") == "payment_review":
+            threads_by_ref.setdefault(t.get("topic_ref") or "", []).append(t)
+
+    payments_by_key = {}
+    for pc in payment_confirmations:
+        key = (pc.get("confirmation_type"), pc.get("period_year"), pc.get("period_month"))
+        payments_by_key.setdefault(key, []).append(pc)
+
+    payment_threads_by_month = {}
+    for ms in monthly_summary:
+        y, m_val = ms["year"], ms["month"]
+        if ms["count"] == 0:
+            continue
+        period_str = f"{y}-{str(m_val).zfill(2)}"
+        month_thread_list = []
+        for cat in cat_order:
+            # Find thread (prefer open, fall back to resolved)
+            cat_thread = _find_category_thread(threads_by_ref, f"{cat}:{period_str}")
+            if not cat_thread:
+                continue
+            # Get payments for this category+month
+            cat_payments = list(payments_by_key.get((cat, y, m_val), []))
+            if not cat_payments:
+                continue
+            cat_payments.sort(key=lambda c: c.get("submitted_at", ""))
+            latest_sub = cat_payments[-1]
+            # Action targeting: latest message with payment_id, else latest submission
+            msgs = get_messages_for_thread(cat_thread["id"], thread_data)
+            action_payment_id = latest_sub.get("id")
+            for msg in reversed(msgs):
+                if msg.get("payment_id"):
+                    action_payment_id = msg["payment_id"]
+                    break
+            # Build timeline
+            timeline = build_thread_timeline(cat_thread["id"],
+                                             thread_data, payment_lookup)
+            month_thread_list.append({
+                "payment_type": cat,
+                "payment_type_display": cat_display.get(cat, cat.title()),
+                "status": cat_thread.get("status"),
+                "waiting_on": cat_thread.get("waiting_on"),
+                "submission_count": len(cat_payments),
+                "latest_submission": latest_sub,
+                "action_payment_id": action_payment_id,
+                "conversation_open": (cat_thread.get("status") == "open"
+                                      and cat_thread.get("waiting_on") == "tenant"),
+                "timeline": timeline,
+            })
+        if month_thread_list:
+            payment_threads_by_month[(y, m_val)] = month_thread_list
+
+    return payment_threads_by_month
+
+
+def index():
+    """Display the main page or dashboard."""
+    global uploads
+    lease_id = request.args.get("lease_id")
+    edit_mode = request.args.get("edit") == "true"
+    new_lease = request.args.get("new") == "true"
+    renew_from = request.args.get("renew_from")  # Lease ID to renew from
+    focus_monthly_attention = request.args.get("focus") == "monthly_attention"
+    open_month = request.args.get("open_month")  # e.g. "2026-01"
+    return_to_attention = request.args.get("return_to") == "attention"
+    return_attention_for = request.args.get("return_attention_for")
+
+    # Dashboard-first: if no lease_id specified, show dashboard
+    # Unless ?new=true is specified (show upload form)
+    if not lease_id and not new_lease:
+        # Clean up abandoned renewal drafts before showing dashboard
+        with store_lock("leases"):
+            all_data = _load_all_leases()
+            original_leases = all_data.get("leases", [])
+            cleaned_leases = cleanup_draft_leases(original_leases)
+            if len(cleaned_leases) != len(original_leases):
+                all_data["leases"] = cleaned_leases
+                _save_lease_file(all_data)
+
+        # Dashboard shows only current versions (not old renewals)
+        leases = get_all_leases(current_only=True)
+
+        # Engine pipeline. All thread writes are staged in one unit of
+        # work so the pass costs a single threads.json commit. Each
+        # helper locks threads only for its own step, and the unit only
+        # to commit, so tenant replies never wait for the whole pass.
+        with unit_of_work("threads", hold_locks=False) as unit:
+            # Materialise threads for all lease groups, then compute
+            # attention badges from threads.json (single load).
+            thread_data = _load_all_threads()
+            any_materialised = False
+
+            for lease in leases:
+                lgid = lease.get("lease_group_id", lease.get("id"))
+
+                # Materialise creates threads for unthreaded payments
+                if materialise_system_threads(lgid):
+                    any_materialised = True
+
+                # Materialise missing_payment threads for overdue rent
+                if materialise_missing_payment_threads(lgid, lease):
+                    any_materialised = True
+
+            # Reload thread_data if any threads were created by materialisation
+            if any_materialised:
+                thread_data = _load_all_threads()
+
+            # Auto-resolve missing_payment threads where rent now exists
+            if auto_resolve_missing_payment_threads():
+                thread_data = _load_all_threads()
+
+            # Send automatic reminders for missing_payment threads in grace period
+            if send_missing_payment_reminders():
+                thread_data = _load_all_threads()
+
+            # Escalate missing_payment threads past grace period
+            if escalate_missing_payment_threads():
+                thread_data = _load_all_threads()
+
+        # A write raced the pass: show what is on disk; the next load
+        # materialises again
+        if not unit.ok:
+            thread_data = _load_all_threads()
+
+        # Pre-compute card view-model data for each lease.
+        attach_dashboard_view_model(leases, thread_data)
+
+        grouped_leases = group_leases_by_lessor(leases)
+
+        # Landlord filter — applied after grouping
+        all_lessor_names = list(grouped_leases.keys())
+        selected_landlord = request.args.get("landlord", "all")
+        if selected_landlord != "all" and selected_landlord in grouped_leases:
+            grouped_leases = {
+                k: v for k, v in grouped_leases.items()
+                if k == selected_landlord
+            }
+            # Filter leases for console to match
+            filtered_lease_ids = {
+                l.get("lease_group_id", l.get("id"))
+                for v in grouped_leases.values() for l in v
+            }
+            console_leases = [
+                l for l in leases
+                if l.get("lease_group_id", l.get("id")) in filtered_lease_ids
+            ]
+        else:
+            selected_landlord = "all"
+            console_leases = leases
+
+        console_data = get_global_attention_summary(console_leases)
+        return render_template("index.html",
+                               uploads=uploads,
+                               leases=leases,
+                               grouped_leases=grouped_leases,
+                               all_lessor_names=all_lessor_names,
+                               selected_landlord=selected_landlord,
+                               console_data=console_data,
+                               lease_data=None,
+                               edit_mode=False,
+                               reminder_status=None,
+                               show_dashboard=True,
+                               renew_from=None,
+                               renew_from_lease=None,
+                               return_attention_for=return_attention_for,
+                               payment_threads_by_month={})
+
+    # Clear stale in-memory upload data so upload page renders clean
+    if new_lease:
+        uploads = {}
+
+    # Get all leases for sidebar/navigation (current only)
+    leases = get_all_leases(current_only=True)
+
+    # Handle renewal context
+    renew_from_lease = None
+    if renew_from:
+        renew_from_lease = get_lease_by_id(renew_from)
+        if not renew_from_lease:
+            flash("Original lease not found for renewal.", "error")
+            renew_from = None
+
+    # Specific lease requested via ?lease_id=
+    if lease_id:
+        lease_data = get_lease_by_id(lease_id)
+        if not lease_data:
+            flash("Lease not found.", "error")
+            return redirect(url_for("index"))
+    else:
+        lease_data = None
+
+    reminder_status = calculate_reminder_status(lease_data)
+
+    # Attach lifecycle data for lease detail view
+    # Priority: TERMINATED > EXPIRED > ACTIVE
+    # Mirrors dashboard enrichment for full parity.
+    if lease_data:
+        is_current = lease_data.get("is_current", False)
+        termination = get_termination_for_lease(lease_data.get("id"))
+        lease_data["_termination"] = termination
+
+        # Terminated: current version + termination record exists
+        is_terminated = is_current and termination is not None
+        lease_data["_is_terminated"] = is_terminated
+        lease_data["_termination_date_display"] = format_date_filter(termination["termination_date"]) if is_terminated else None
+        lease_data["_termination_days_elapsed"] = (datetime.utcnow().date() - datetime.strptime(termination["termination_date"], "%Y-%m-%d").date()).days if is_terminated else None
+
+        # Expired: current version, past end date, NOT terminated
+        is_expired = False
+        expiry_date_display = None
+        if is_current and not is_terminated:
+            cv = lease_data.get("current_values") or {}
+            end_date_str = cv.get("lease_end_date")
+            if end_date_str:
+                try:
+                    end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+                    if end_date < datetime.utcnow().date():
+                        is_expired = True
+                        expiry_date_display = format_date_filter(end_date_str)
+                except ValueError:
+                    pass
+        lease_data["_is_expired"] = is_expired
+        lease_data["_expiry_date_display"] = expiry_date_display
+
+        # Can renew: terminated OR expired (not active)
+        lease_data["_can_renew"] = is_terminated or is_expired
+
+        # Prorated suggestion for First Month UI (display-only, never saved)
+        lease_data["_prorated_suggestion"] = None
+        if edit_mode:
+            cv = lease_data.get("current_values") or {}
+            _ps_start = cv.get("lease_start_date")
+            _ps_due_day = cv.get("rent_due_day")
+            if _ps_start and _ps_due_day:
+                try:
+                    _ps_start_day = datetime.strptime(_ps_start, "%Y-%m-%d").day
+                    _ps_due_day_int = int(_ps_due_day)
+                except (ValueError, TypeError):
+                    _ps_start_day = None
+                    _ps_due_day_int = None
+                if _ps_start_day is not None and _ps_due_day_int is not None and _ps_start_day > _ps_due_day_int:
+                    lease_data["_prorated_suggestion"] = calculate_prorated_amount(
+                        _ps_start, cv.get("monthly_rent")
+                    )
+
+    # Get lease versions for history display
+    lease_versions = []
+    version_changes = []
+    if lease_data:
+        lease_group_id = lease_data.get("lease_group_id", lease_data.get("id"))
+        lease_versions = get_lease_versions(lease_group_id)
+
+        # Compare with previous version if this is a renewal (version > 1)
+        current_version = lease_data.get("version", 1)
+        if current_version > 1:
+            # Find the previous version
+            previous_version = None
+            for v in lease_versions:
+                if v.get("version") == current_version - 1:
+                    previous_version = v
+                    break
+            if previous_version:
+                version_changes = compare_lease_versions(lease_data, previous_version)
+
+    # Load tenant access and payment data for view mode
+    tenant_tokens = []
+    active_tenant_token = None
+    payment_confirmations = []
+    thread_data = None
+    lease_threads = []
+    payment_lookup = {}
+    if lease_data and not edit_mode:
+        tenant_tokens = get_all_tokens_for_lease_group(lease_group_id)
+        active_tenant_token = next((t for t in tenant_tokens if t.get("is_active")), None)
+        payment_confirmations = get_payments_for_lease_group(lease_group_id)
+
+        # Materialise threads for any unthreaded payments, then load
+        materialise_system_threads(lease_group_id)
+        thread_data = with_archived_threads(_load_all_threads(), lease_group_id)
+        lease_threads = get_threads_for_lease_group(lease_group_id, thread_data)
+
+        # Attention data for lease detail view (mirrors dashboard enrichment)
+        attention_count = count_landlord_attention_threads(lease_group_id, thread_data)
+        lease_data["_attention_count"] = attention_count
+        lease_data["_attention_items"] = get_attention_summary_for_lease(lease_group_id, thread_data) if attention_count > 0 else []
+
+        # Build payment lookup for timeline enrichment
+        payment_lookup = {
+            c["id"]: c for c in payment_confirmations
+        }
+
+    # Compute monthly submission summary (Step 9).
+    # Only the most recent MONTH_HISTORY_PAGE_SIZE months are built here;
+    # older months are fetched on demand via lease_month_history().
+    monthly_summary = []
+    month_history_next_before = None
+    month_history_skip = ""
+    if payment_confirmations is not None and lease_data and not edit_mode:
+        bounds = get_month_history_bounds(lease_data, payment_confirmations)
+        page_months, next_before = get_month_history_page(bounds)
+        monthly_summary = build_landlord_monthly_summary(
+            lease_data, page_months, payment_confirmations,
+            lease_threads, thread_data)
+
+        if next_before:
+            # Older months that need attention are always shown, and a
+            # deep link (?open_month=YYYY-MM) to an older month must
+            # still find its row and thread blocks on the page.
+            extra = get_older_attention_summaries(
+                lease_data, bounds, next_before, payment_confirmations,
+                lease_threads, thread_data)
+            open_month_tuple = _parse_month_tuple(open_month)
+            if (open_month_tuple and bounds[0] <= open_month_tuple < next_before
+                    and not any((ms["year"], ms["month"]) == open_month_tuple for ms in extra)):
+                extra += build_landlord_monthly_summary(
+                    lease_data, [open_month_tuple], payment_confirmations,
+                    lease_threads, thread_data)
+                extra.sort(key=lambda ms: (ms["year"], ms["month"]), reverse=True)
+            monthly_summary += extra
+            # "Load earlier months" skips the months already rendered
+            month_history_skip = ",".join(_format_month((ms["year"], ms["month"])) for ms in extra)
+            month_history_next_before = _format_month(next_before)
+
+    # Build thread-based data per month for the grouped modal view.
+    payment_threads_by_month = {}
+    if payment_confirmations and lease_data and not edit_mode and thread_data:
+        payment_threads_by_month = build_payment_threads_by_month(
+            monthly_summary, payment_confirmations, lease_threads,
+            thread_data, payment_lookup)
+
+    return render_template("index.html",
+                           uploads=uploads,
+                           lease_data=lease_data,
+                           edit_mode=edit_mode,
+                           reminder_status=reminder_status,
+                           leases=leases,
+                           show_dashboard=False,
+                           renew_from=renew_from,
+                           renew_from_lease=renew_from_lease,
+                           lease_versions=lease_versions,
+                           version_changes=version_changes,
+                           tenant_tokens=tenant_tokens,
+                           active_tenant_token=active_tenant_token,
+                           payment_confirmations=payment_confirmations,
+                           thread_data=thread_data,
+                           lease_threads=lease_threads,
+                           payment_lookup=payment_lookup,
+                           monthly_summary=monthly_summary,
+                           payment_threads_by_month=payment_threads_by_month,
+                           month_history_next_before=month_history_next_before,
+                           month_history_skip=month_history_skip,
+                           focus_monthly_attention=focus_monthly_attention,
+                           open_month=open_month,
+                           return_to_attention=return_to_attention)
+
+
+def _month_cursor_param():
+    """Parse ?before=YYYY-MM; None if absent, 400 if malformed."""
+    raw = request.args.get("before")
+    if not raw:
+        return None
+    before = _parse_month_tuple(raw)
+    if before is None:
+        abort(400, description="before must be YYYY-MM with a month from 01 to 12.")
+    return before
+
+
+def lease_month_history(lease_id):
+    """Return one older page of the lease detail month history as JSON.
+
+    Read-only. Query params:
+        before: "YYYY-MM" — only months strictly older are returned
+        limit:  page size (default MONTH_HISTORY_PAGE_SIZE, max 60)
+        skip:   comma-separated "YYYY-MM" months the page already shows
+                (older months that need attention); left out of the result
+
+    Returns JSON with:
+        months:       monthly summary dicts (newest first, all visible)
+        rows_html:    rendered summary table rows for those months
+        threads_html: rendered thread blocks for the submissions modal
+        next_before:  "YYYY-MM" cursor for the next page, or null
+    """
+    lease_data = get_lease_by_id(lease_id)
+    if not lease_data:
+        abort(404)
+
+    before = _month_cursor_param()
+    limit = request.args.get("limit", MONTH_HISTORY_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, 60))
+    skip = {_parse_month_tuple(m) for m in request.args.get("skip", "").split(",")}
+
+    lease_group_id = lease_data.get("lease_group_id", lease_data.get("id"))
+    payment_confirmations = get_payments_for_lease_group(lease_group_id)
+    thread_data = with_archived_threads(_load_all_threads(), lease_group_id)
+    lease_threads = get_threads_for_lease_group(lease_group_id, thread_data)
+    payment_lookup = {c["id"]: c for c in payment_confirmations}
+
+    bounds = get_month_history_bounds(lease_data, payment_confirmations)
+    page_months, next_before = get_month_history_page(bounds, before=before,
+                                                      limit=limit)
+    page_months = [m for m in page_months if m not in skip]
+    monthly_summary = build_landlord_monthly_summary(
+        lease_data, page_months, payment_confirmations, lease_threads,
+        thread_data)
+    # Older months were explicitly requested — show every row.
+    for ms in monthly_summary:
+        ms["visible"] = True
+
+    payment_threads_by_month = build_payment_threads_by_month(
+        monthly_summary, payment_confirmations, lease_threads, thread_data,
+        payment_lookup)
+
+    return jsonify({
+        "months": monthly_summary,
+        "rows_html": render_template("_month_summary_rows.html",
+                                     months=monthly_summary),
+        "threads_html": render_template("_payment_threads.html",
+                                        months=monthly_summary,
+                                        payment_threads_by_month=payment_threads_by_month,
+                                        lease_data=lease_data),
+        "next_before": _format_month(next_before) if next_before else None,
+    })
+
+
+# ----------------------------------------------------------------
+# READ-ONLY JSON API (dashboard data)
+# ----------------------------------------------------------------
+# Polling-friendly views of what the dashboard renders. Every
+# response carries an ETag built from the version stamps of the
+# stores it reads, today's date (expiry / due-date logic is
+# date-relative) and the query string. A matching If-None-Match is
+# answered with 304 BEFORE any store is loaded, so an unchanged poll
+# costs a handful of stat() calls.
+#
+# These endpoints never run the engine pipeline (materialisation,
+# auto-resolve, reminders, escalation) — that stays with the
+# dashboard GET. They report state as of the last engine pass.
+#
+# The ETag is stamped before the payload is built: if a write lands
+# mid-build the client simply refetches next poll, never the reverse.
+# ----------------------------------------------------------------
+
+def _api_etag(stores):
+    """Build a strong ETag for a JSON API response.
+
+    Args:
+        stores: iterable of STORE_FILES keys the response depends on
+
+    Returns:
+        str: hex digest (unquoted; werkzeug adds the quotes)
+    """
+    parts = [f"{name}={_store_stamp(name)}" for name in sorted(stores)]
+    parts.append(datetime.now().date().isoformat())
+    parts.append(request.path)
+    parts.append("&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True))))
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _conditional_json(stores, build_payload):
+    """Return 304 if the client's ETag is current, else the JSON payload.
+
+    Args:
+        stores: STORE_FILES keys the payload is derived from
+        build_payload: zero-arg callable producing a JSON-serialisable
+                       object; only called on a cache miss
+
+    Returns:
+        flask.Response
+    """
+    etag = _api_etag(stores)
+    if request.if_none_match.contains(etag):
+        API_CACHE_TOTAL.inc("hit")
+        response = current_app.response_class(status=304)
+    else:
+        API_CACHE_TOTAL.inc("miss")
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _api_dashboard_leases():
+    """Current leases with dashboard card fields attached (read-only)."""
+    leases = get_all_leases(current_only=True)
+    return attach_dashboard_view_model(leases, _load_all_threads())
+
+
+def api_leases():
+    """Dashboard lease list as JSON (current versions only)."""
+    return _conditional_json(
+        ("leases", "threads", "terminations"),
+        lambda: {"leases": _api_dashboard_leases()})
+
+
+def api_attention():
+    """Global attention summary (Action Console) as JSON."""
+    return _conditional_json(
+        ("leases", "threads", "terminations"),
+        lambda: get_global_attention_summary(_api_dashboard_leases()))
+
+
+def api_alerts():
+    """Global expiry / rent-due alerts as JSON.
+
+    Query params:
+        max: maximum number of alerts (default 5, capped at 50)
+    """
+    max_alerts = max(1, min(request.args.get("max", 5, type=int), 50))
+    return _conditional_json(
+        ("leases",),
+        lambda: {"alerts": get_global_alerts(get_all_leases(current_only=True),
+                                             max_alerts=max_alerts)})
+
+
+def api_analytics():
+    """Portfolio analytics time series as JSON (complete months only)."""
+    return _conditional_json(ANALYTICS_STORES, portfolio_analytics)
+
+
+def api_lease_monthly_summary(lease_id):
+    """One page of a lease's monthly summary as JSON.
+
+    Query params mirror lease_month_history():
+        before: "YYYY-MM" cursor (omit for the most recent page)
+        limit:  page size (default MONTH_HISTORY_PAGE_SIZE, max 60)
+
+    Unlike the dashboard, every month in the page is returned; the
+    "visible" flag is left as computed so clients can apply the same
+    collapse rule the lease detail view uses.
+    """
+    before = _month_cursor_param()
+
+    def build():
+        lease_data = get_lease_by_id(lease_id)
+        if not lease_data:
+            abort(404)
+
+        limit = max(1, min(request.args.get("limit", MONTH_HISTORY_PAGE_SIZE, type=int), 60))
+
+        lease_group_id = lease_data.get("lease_group_id", lease_data.get("id"))
+        payment_confirmations = get_payments_for_lease_group(lease_group_id)
+        thread_data = with_archived_threads(_load_all_threads(), lease_group_id)
+        lease_threads = get_threads_for_lease_group(lease_group_id, thread_data)
+
+        bounds = get_month_history_bounds(lease_data, payment_confirmations)
+        page_months, next_before = get_month_history_page(bounds, before=before,
+                                                          limit=limit)
+        monthly_summary = build_landlord_monthly_summary(
+            lease_data, page_months, payment_confirmations, lease_threads,
+            thread_data)
+        return {
+            "lease_id": lease_data.get("id"),
+            "lease_group_id": lease_group_id,
+            "months": monthly_summary,
+            "next_before": _format_month(next_before) if next_before else None,
+        }
+
+    return _conditional_json(("leases", "payments", "threads"), build)
+
+
+def upload_file():
+    """Handle file upload."""
+    global uploads
+    if "file" not in request.files:
+        flash("No file selected", "error")
+        return redirect(url_for("index"))
+
+    file = request.files["file"]
+
+    if file.filename == "":
+        flash("No file selected", "error")
+        return redirect(url_for("index"))
+
+    if not allowed_file(file.filename):
+        flash("Invalid file type. Please upload PDF, PNG, JPG, or JPEG.", "error")
+        return redirect(url_for("index"))
+
+    # Check if this is a renewal upload
+    renew_from = request.form.get("renew_from")
+    original_lease = None
+    if renew_from:
+        original_lease = get_lease_by_id(renew_from)
+        if not original_lease:
+            flash("Original lease not found for renewal.", "error")
+            return redirect(url_for("index"))
+
+    # Secure the filename and save
+    filename = secure_filename(file.filename)
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(file_path)
+
+    # Extract text (best-effort, non-blocking)
+    mimetype = file.mimetype
+    extracted_text, page_texts = extract_text(file_path, mimetype)
+
+    # Select best page for preview (avoids stamp/cover pages)
+    preview_text = select_preview_page(page_texts)
+    preview = create_preview(preview_text)
+
+    # Store upload metadata (in-memory for AI extraction)
+    uploads[filename] = {
+        "filename": filename,
+        "path": file_path,
+        "mimetype": mimetype,
+        "extracted_text": extracted_text,
+        "preview": preview,
+    }
+
+    now = datetime.now().isoformat()
+    new_lease_id = str(uuid.uuid4())
+
+    # Cleanup + append is one read-modify-write on the lease store
+    with store_lock("leases"):
+        all_data = _load_all_leases()
+
+        # Clean up any abandoned draft leases before creating a new one
+        all_data["leases"] = cleanup_draft_leases(all_data.get("leases", []))
+        _save_lease_file(all_data)
+
+        if original_lease:
+            # RENEWAL: Create new version in existing lease group
+            lease_group_id = original_lease.get("lease_group_id", original_lease.get("id"))
+
+            # Find max version in group
+            versions = [l for l in all_data.get("leases", [])
+                        if l.get("lease_group_id") == lease_group_id]
+            max_version = max((v.get("version", 1) for v in versions), default=0)
+
+            # Mark all existing versions in group as not current
+            for lease in all_data.get("leases", []):
+                if lease.get("lease_group_id") == lease_group_id:
+                    lease["is_current"] = False
+
+            # Get current_values from original lease (handles both old and new structure)
+            if "current_values" in original_lease:
+                orig_values = original_lease["current_values"]
+            else:
+                # Fallback for leases not yet migrated
+                orig_values = original_lease
+
+            # Create renewal lease with copied fields
+            new_lease = {
+                "id": new_lease_id,
+                "lease_group_id": lease_group_id,
+                "version": max_version + 1,
+                "is_current": True,
+                "status": "draft",
+                "created_at": now,
+                "updated_at": now,
+                "source_document": {
+                    "filename": filename,
+                    "mimetype": mimetype,
+                    "extracted_text": extracted_text,
+                    "extracted_at": now,
+                },
+                "ai_extraction": None,
+                "current_values": {
+                    # Convenience defaults only (property/landlord identity)
+                    "lease_nickname": orig_values.get("lease_nickname"),
+                    "lessor_name": orig_values.get("lessor_name"),
+                    # All other fields must come from renewal PDF or manual entry
+                    "lessee_name": None,
+                    "lease_start_date": None,
+                    "lease_end_date": None,
+                    "monthly_rent": None,
+                    "security_deposit": None,
+                    "rent_due_day": None,
+                    # Lease-specific terms (not inherited)
+                    "lock_in_period": {
+                        "duration_months": None
+                    },
+                    "renewal_terms": {
+                        "rent_escalation_percent": None
+                    },
+                    "expected_payments": orig_values.get(
+                        "expected_payments",
+                        _default_expected_payments(orig_values.get("monthly_rent"))
+                    ),
+                    "first_month_mode": None,
+                    "first_month_due_date": None,
+                    "first_month_amount": None,
+                },
+                "needs_expected_payment_confirmation": True,
+            }
+            flash_msg = "Renewal lease uploaded! Review and update the new lease terms."
+        else:
+            # NEW LEASE: Create fresh lease entry
+            new_lease = {
+                "id": new_lease_id,
+                "lease_group_id": new_lease_id,
+                "version": 1,
+                "is_current": True,
+                "status": "draft",
+                "created_at": now,
+                "updated_at": now,
+                "source_document": {
+                    "filename": filename,
+                    "mimetype": mimetype,
+                    "extracted_text": extracted_text,
+                    "extracted_at": now,
+                },
+                "ai_extraction": None,
+                "current_values": {
+                    "lease_nickname": None,
+                    "lessor_name": None,
+                    "lessee_name": None,
+                    "lease_start_date": None,
+                    "lease_end_date": None,
+                    "monthly_rent": None,
+                    "security_deposit": None,
+                    "rent_due_day": None,
+                    "lock_in_period": {
+                        "duration_months": None
+                    },
+                    "renewal_terms": {
+                        "rent_escalation_percent": None
+                    },
+                    "expected_payments": _default_expected_payments(),
+                    "first_month_mode": None,
+                    "first_month_due_date": None,
+                    "first_month_amount": None,
+                },
+                "needs_expected_payment_confirmation": False,
+            }
+            flash_msg = "Lease uploaded! Fill in details manually or use AI extraction."
+
+        # Persist to lease collection
+        all_data["leases"].append(new_lease)
+        if _save_lease_file(all_data):
+            index_lease(new_lease)
+
+    # Flash appropriate message
+    if extracted_text:
+        flash(flash_msg, "success")
+    else:
+        flash("Lease uploaded. Text extraction failed - please fill in details manually.", "success")
+
+    # Clear in-memory upload data (already persisted to lease_data.json)
+    uploads = {}
+
+    # Redirect to new lease in edit mode
+    return redirect(url_for("index", lease_id=new_lease_id, edit="true"))
+
+
+def _normalize_string(value):
+    """Normalize string: return None if empty/whitespace, otherwise stripped string."""
+    if value is None:
+        return None
+    stripped = str(value).strip()
+    return stripped if stripped else None
+
+
+def _validate_date(value):
+    """Validate date in YYYY-MM-DD format. Returns valid string or None."""
+    normalized = _normalize_string(value)
+    if not normalized:
+        return None
+    try:
+        datetime.strptime(normalized, "%Y-%m-%d")
+        return normalized
+    except ValueError:
+        return None
+
+
+def _validate_positive_number(value):
+    """Validate positive number (int or float as string). Returns string or None."""
+    normalized = _normalize_string(value)
+    if not normalized:
+        return None
+    try:
+        num = float(normalized)
+        return normalized if num >= 0 else None
+    except ValueError:
+        return None
+
+
+def _validate_day_of_month(value):
+    """Validate day of month (1-31). Returns string or None."""
+    normalized = _normalize_string(value)
+    if not normalized:
+        return None
+    try:
+        day = int(normalized)
+        return normalized if 1 <= day <= 31 else None
+    except ValueError:
+        return None
+
+
+@store_lock("leases")
+def save_lease():
+    """Save confirmed lease details to JSON file."""
+    now = datetime.now().isoformat()
+    lease_id = request.form.get("lease_id")  # For editing existing lease
+
+    # Validate and normalize form data into current_values
+    current_values = {
+        "lease_nickname": _normalize_string(request.form.get("lease_nickname")),
+        "lessor_name": _normalize_string(request.form.get("lessor_name")),
+        "lessee_name": _normalize_string(request.form.get("lessee_name")),
+        "lease_start_date": _validate_date(request.form.get("lease_start_date")),
+        "lease_end_date": _validate_date(request.form.get("lease_end_date")),
+        "monthly_rent": _validate_positive_number(request.form.get("monthly_rent")),
+        "security_deposit": _validate_positive_number(request.form.get("security_deposit")),
+        "rent_due_day": _validate_day_of_month(request.form.get("rent_due_day")),
+        "lock_in_period": {
+            "duration_months": _validate_positive_number(request.form.get("lock_in_months"))
+        },
+        "renewal_terms": {
+            "rent_escalation_percent": _validate_positive_number(request.form.get("rent_escalation_percent"))
+        },
+    }
+
+    # Build expected_payments from form inputs
+    monthly_rent_value = current_values.get("monthly_rent")
+
+    maintenance_checked = request.form.get("expect_maintenance") == "1"
+    maintenance_amount = None
+    if maintenance_checked:
+        maintenance_amount = _validate_positive_number(
+            request.form.get("maintenance_amount")
+        )
+
+    utilities_checked = request.form.get("expect_utilities") == "1"
+
+    current_values["expected_payments"] = [
+        {"type": "rent", "expected": True, "typical_amount": monthly_rent_value},
+        {"type": "maintenance", "expected": maintenance_checked, "typical_amount": maintenance_amount},
+        {"type": "utilities", "expected": utilities_checked, "typical_amount": None},
+    ]
+
+    # --- First month fields (strict invariant) ---
+    first_month_mode = None
+    first_month_due_date = None
+    first_month_amount = None
+
+    parsed_start = current_values.get("lease_start_date")
+    parsed_due_day = current_values.get("rent_due_day")
+
+    if parsed_start and parsed_due_day:
+        try:
+            start_day = datetime.strptime(parsed_start, "%Y-%m-%d").day
+            due_day = int(parsed_due_day)
+        except (ValueError, TypeError):
+            start_day = None
+            due_day = None
+
+        if start_day is not None and due_day is not None and start_day > due_day:
+            raw_mode = _normalize_string(request.form.get("first_month_mode"))
+            raw_due_date = _validate_date(request.form.get("first_month_due_date"))
+            raw_amount = _validate_positive_number(request.form.get("first_month_amount"))
+
+            if raw_mode in ("prorated_immediate", "prorated_next_due_day"):
+                if raw_amount is not None and float(raw_amount) > 0:
+                    first_month_mode = raw_mode
+                    first_month_due_date = None
+                    first_month_amount = round(float(raw_amount))
+
+            elif raw_mode == "custom":
+                if raw_due_date is not None and raw_amount is not None and float(raw_amount) > 0:
+                    first_month_mode = raw_mode
+                    first_month_due_date = raw_due_date
+                    first_month_amount = round(float(raw_amount))
+
+    current_values["first_month_mode"] = first_month_mode
+    current_values["first_month_due_date"] = first_month_due_date
+    current_values["first_month_amount"] = first_month_amount
+
+    # Load existing leases
+    all_data = _load_all_leases()
+    leases = all_data.get("leases", [])
+
+    if lease_id:
+        # Update existing lease
+        for i, lease in enumerate(leases):
+            if lease.get("id") == lease_id:
+                # Update current_values
+                lease["current_values"] = current_values
+                lease["updated_at"] = now
+                lease["status"] = "active"
+                lease["needs_expected_payment_confirmation"] = False
+                # source_document and ai_extraction are preserved automatically
+                break
+        else:
+            # Lease ID not found - this shouldn't happen normally
+            flash("Lease not found.", "error")
+            return redirect(url_for("index"))
+    else:
+        # New lease (rare: usually created via upload)
+        new_id = str(uuid.uuid4())
+        source_filename = _normalize_string(request.form.get("source_filename"))
+        new_lease = {
+            "id": new_id,
+            "lease_group_id": new_id,
+            "version": 1,
+            "is_current": True,
+            "created_at": now,
+            "updated_at": now,
+            "source_document": {
+                "filename": source_filename,
+                "mimetype": None,
+                "extracted_text": None,
+                "extracted_at": None,
+            },
+            "ai_extraction": None,
+            "current_values": current_values,
+            "needs_expected_payment_confirmation": False,
+        }
+        leases.append(new_lease)
+
+    all_data["leases"] = leases
+
+    if _save_lease_file(all_data):
+        saved_id = lease_id or new_id
+        index_lease(next(l for l in leases if l.get("id") == saved_id))
+        flash("Lease details saved successfully!", "success")
+    else:
+        flash("Failed to save lease details. Please try again.", "error")
+
+    # Redirect to dashboard to show all leases including the new one
+    return redirect(url_for("index"))
+
+
+@store_lock("leases")
+def reset_lease():
+    """Delete a lease version with proper fallback handling.
+
+    Security: Requires confirmation text to match expected value.
+    - Single version deletion: confirm_text must equal "DELETE"
+    - Group deletion: confirm_text must equal the lease nickname
+
+    Version Fallback Logic:
+    - If deleting a non-current version: just remove it
+    - If deleting the current version: promote previous version to current
+    - If deleting the only version: delete entire lease group
+    """
+    global uploads
+    uploads = {}  # Clear in-memory uploads
+
+    # Get the lease ID to delete
+    lease_id = request.form.get("lease_id") or request.args.get("lease_id")
+
+    # Get confirmation text from form
+    confirm_text = request.form.get("confirm_text", "").strip()
+    expected_text = request.form.get("expected_text", "DELETE").strip()
+
+    # If no ID provided, get the active lease
+    if not lease_id:
+        active_lease = get_active_lease()
+        lease_id = active_lease.get("id") if active_lease else None
+
+    if not lease_id:
+        flash("No lease to delete.", "error")
+        return redirect(url_for("index"))
+
+    # Fetch the lease to validate against
+    lease_to_delete = get_lease_by_id(lease_id)
+    if not lease_to_delete:
+        flash("Lease not found.", "error")
+        return redirect(url_for("index"))
+
+    # SECURITY: Validate confirmation text on backend
+    if expected_text == "DELETE":
+        # Standard single version deletion
+        if confirm_text.upper() != "DELETE":
+            flash("Deletion aborted: confirmation text did not match. Type DELETE to confirm.", "error")
+            return redirect(url_for("index", lease_id=lease_id))
+    else:
+        # Group deletion - expected_text is the lease nickname
+        del_cv = lease_to_delete.get("current_values") or lease_to_delete
+        lease_nickname = del_cv.get("lease_nickname") or "Untitled Lease"
+        if confirm_text != lease_nickname:
+            flash("Deletion aborted: confirmation text did not match the lease name.", "error")
+            return redirect(url_for("index", lease_id=lease_id))
+
+    # Confirmation validated - proceed with deletion
+    all_data = _load_all_leases()
+    leases = all_data.get("leases", [])
+
+    # Get lease group info
+    lease_group_id = lease_to_delete.get("lease_group_id", lease_id)
+    is_current_version = lease_to_delete.get("is_current", True)
+    deleted_version = lease_to_delete.get("version", 1)
+    delete_group = request.form.get("delete_group") == "true"
+
+    # Find all versions in this lease group
+    group_versions = [l for l in leases if l.get("lease_group_id") == lease_group_id]
+    group_versions_sorted = sorted(group_versions, key=lambda x: x.get("version", 1), reverse=True)
+
+    # If delete_group flag is set, delete ALL versions in the group
+    if delete_group:
+        for gl in group_versions:
+            gl_doc = gl.get("source_document") or {}
+            gl_filename = gl_doc.get("filename")
+            if gl_filename:
+                try:
+                    os.remove(os.path.join(UPLOAD_FOLDER, gl_filename))
+                except OSError:
+                    pass
+        leases = [l for l in leases if l.get("lease_group_id") != lease_group_id]
+        all_data["leases"] = leases
+        _save_lease_file(all_data)
+        flash("Lease and all its versions have been permanently deleted.", "success")
+        return redirect(url_for("index"))
+
+    # Determine the action based on version count
+    if len(group_versions) <= 1:
+        # CASE 1: Only one version - delete entire lease group
+        for gl in group_versions:
+            gl_doc = gl.get("source_document") or {}
+            gl_filename = gl_doc.get("filename")
+            if gl_filename:
+                try:
+                    os.remove(os.path.join(UPLOAD_FOLDER, gl_filename))
+                except OSError:
+                    pass
+        leases = [l for l in leases if l.get("lease_group_id") != lease_group_id]
+        all_data["leases"] = leases
+        _save_lease_file(all_data)
+        flash("Lease deleted as no versions remain.", "success")
+        return redirect(url_for("index"))
+
+    elif is_current_version:
+        # CASE 2: Deleting the current version - need to promote previous version
+        # Delete uploaded file from disk
+        del_doc = lease_to_delete.get("source_document") or {}
+        del_filename = del_doc.get("filename")
+        if del_filename:
+            try:
+                os.remove(os.path.join(UPLOAD_FOLDER, del_filename))
+            except OSError:
+                pass
+        # Remove the current version
+        leases = [l for l in leases if l.get("id") != lease_id]
+
+        # Find the previous version to promote (highest version number after current)
+        previous_versions = [v for v in group_versions_sorted if v.get("id") != lease_id]
+        if previous_versions:
+            # Promote the most recent previous version
+            new_current_id = previous_versions[0].get("id")
+            for lease in leases:
+                if lease.get("id") == new_current_id:
+                    lease["is_current"] = True
+                    new_current_version = lease.get("version", 1)
+                    break
+
+            all_data["leases"] = leases
+            _save_lease_file(all_data)
+            flash(f"Current lease version deleted. Reverted to version {new_current_version}.", "success")
+            # Redirect to the new current version
+            return redirect(url_for("index", lease_id=new_current_id))
+        else:
+            # Edge case: no previous versions found (shouldn't happen, but handle gracefully)
+            leases = [l for l in leases if l.get("lease_group_id") != lease_group_id]
+            all_data["leases"] = leases
+            _save_lease_file(all_data)
+            flash("Lease deleted as no versions remain.", "success")
+            return redirect(url_for("index"))
+
+    else:
+        # CASE 3: Deleting a non-current version - just remove it
+        # Delete uploaded file from disk
+        del_doc = lease_to_delete.get("source_document") or {}
+        del_filename = del_doc.get("filename")
+        if del_filename:
+            try:
+                os.remove(os.path.join(UPLOAD_FOLDER, del_filename))
+            except OSError:
+                pass
+        leases = [l for l in leases if l.get("id") != lease_id]
+        all_data["leases"] = leases
+        _save_lease_file(all_data)
+
+        # Find the current version to redirect to
+        current_version = next(
+            (l for l in leases if l.get("lease_group_id") == lease_group_id and l.get("is_current")),
+            None
+        )
+        if current_version:
+            flash(f"Version {deleted_version} deleted. Current version unchanged.", "success")
+            return redirect(url_for("index", lease_id=current_version.get("id")))
+        else:
+            flash("Lease version deleted successfully.", "success")
+            return redirect(url_for("index"))
+
+
+def terminate_lease(lease_id):
+    """Record an early termination for a lease version."""
+    termination_date = request.form.get("termination_date", "").strip()
+    note = request.form.get("termination_note", "").strip()
+
+    if not termination_date:
+        flash("Termination date is required.", "error")
+        return redirect(url_for("index", lease_id=lease_id))
+
+    result = create_termination_event(lease_id, termination_date,
+                                      note=note or None)
+
+    if result.get("success"):
+        flash("Lease termination recorded.", "success")
+    else:
+        flash(result.get("error", "An unexpected error occurred."), "error")
+
+    return redirect(url_for("index", lease_id=lease_id))
+
+
+def ai_prefill():
+    """AI-assisted pre-fill of lease fields. Saves AI results to lease."""
+    # Get lease_id from request
+    lease_id = request.json.get("lease_id") if request.is_json else request.form.get("lease_id")
+
+    if not lease_id:
+        return jsonify({
+            "success": False,
+            "error": "No lease specified."
+        })
+
+    # Load the lease
+    all_data = _load_all_leases()
+    lease = None
+    for l in all_data.get("leases", []):
+        if l.get("id") == lease_id:
+            lease = l
+            break
+
+    if not lease:
+        return jsonify({
+            "success": False,
+            "error": "Lease not found."
+        })
+
+    # Get extracted text from lease's source_document
+    source_doc = lease.get("source_document") or {}
+    extracted_text = source_doc.get("extracted_text")
+    filename = source_doc.get("filename", "unknown")
+
+    _log_event(logging.DEBUG, "ai.prefill", lease_id=lease_id, source_file=filename,
+               chars=len(extracted_text) if extracted_text else 0)
+
+    # Check if the original document is missing (legacy lease)
+    file_missing = (
+        not source_doc.get("filename")
+        or not os.path.exists(os.path.join(UPLOAD_FOLDER, source_doc.get("filename", "")))
+    )
+    if not extracted_text and file_missing:
+        return jsonify({
+            "success": False,
+            "error_code": "no_document",
+            "error": "This lease was created before document storage was enabled. The original PDF is no longer available."
+        })
+
+    if not extracted_text:
+        return jsonify({
+            "success": False,
+            "error": "No extracted text available for this lease. The document may need to be re-uploaded."
+        })
+
+    # Check for API key
+    if not os.environ.get("ANTHROPIC_API_KEY"):
+        return jsonify({
+            "success": False,
+            "error": "AI service not configured. Please set ANTHROPIC_API_KEY environment variable."
+        })
+
+    # Call AI extraction
+    result = ai_extract_lease_fields(extracted_text)
+
+    if result is None:
+        return jsonify({
+            "success": False,
+            "error": "AI extraction failed. Please try again or fill in the fields manually."
+        })
+
+    # Save AI extraction results to lease. The AI call can take many
+    # seconds, so the lease store is re-read under the lock here rather
+    # than held locked across the call.
+    now = datetime.now().isoformat()
+    with store_lock("leases"):
+        all_data = _load_all_leases()
+        lease = next((l for l in all_data.get("leases", [])
+                      if l.get("id") == lease_id), None)
+        if not lease:
+            return jsonify({
+                "success": False,
+                "error": "Lease not found."
+            })
+        lease["ai_extraction"] = {
+            "ran_at": now,
+            "fields": result
+        }
+        lease["updated_at"] = now
+        _save_lease_file(all_data)
+
+    return jsonify({
+        "success": True,
+        "data": result
+    })
+
+
+def view_pdf(filename):
+    """Serve a PDF file from the uploads folder for viewing.
+
+    Strong ETag (content hash) with revalidation and Range support, so
+    reopening the viewer costs a 304 and large PDFs load in parts.
+    """
+    # Security: Only allow PDF files
+    if not filename.lower().endswith('.pdf'):
+        flash("Invalid file type.", "error")
+        return redirect(url_for("index"))
+
+    file_path = safe_join(UPLOAD_FOLDER, filename)
+    if not file_path or not os.path.isfile(file_path):
+        abort(404)
+
+    # Served inline (displays in browser, not download)
+    return send_upload(file_path, content_hash(file_path), mimetype="application/pdf")
+
+
+def view_proof(lease_group_id, filename):
+    """Serve a proof file recorded under uploads/proofs/{lease_group_id}/.
+
+    Read-only. Validates against PROOF_ALLOWED_EXTENSIONS (independent
+    of upload rules). Path traversal prevented by safe_join; the bytes
+    may live at that path or in the blob store (resolve_proof_path).
+    """
+    # Validate extension against proof-specific serving rules
+    if not ("." in filename and
+            filename.rsplit(".", 1)[1].lower() in PROOF_ALLOWED_EXTENSIONS):
+        flash("Invalid file type.", "error")
+        return redirect(url_for("index"))
+
+    relative_path = safe_join("proofs", secure_filename(lease_group_id), filename)
+    resolved = resolve_proof_path(relative_path) if relative_path else None
+    if not resolved:
+        abort(404)
+
+    # Proofs are immutable: cache for good, keyed by content hash
+    metadata = load_proof_metadata(relative_path) or {}
+    etag = metadata.get("sha256") or content_hash(resolved)
+    return send_upload(resolved, etag, immutable=True)
+
+
+def view_proof_preview(lease_group_id, size, filename):
+    """Serve a JPEG thumbnail ("thumb") or web-sized ("web") proof preview.
+
+    Rendered on first request and cached by content hash
+    (previews.get_proof_preview). Images that cannot be rendered fall
+    back to the original; PDFs without a renderable first page 404.
+    """
+    relative_path = safe_join("proofs", secure_filename(lease_group_id), filename)
+    if not relative_path or size not in PREVIEW_SIZES:
+        abort(404)
+
+    preview_path = get_proof_preview(relative_path, size)
+    if not preview_path:
+        if filename.rsplit(".", 1)[-1].lower() in ("png", "jpg", "jpeg"):
+            return redirect(url_for("view_proof", lease_group_id=lease_group_id, filename=filename))
+        abort(404)
+
+    # Named {sha256}-{size}.jpg: the name is the content
+    etag = os.path.splitext(os.path.basename(preview_path))[0]
+    return send_upload(preview_path, etag, immutable=True, mimetype="image/jpeg")
+
+
+# ----------------------------------------------------------------
+# SEARCH
+# ----------------------------------------------------------------
+
+def search_route():
+    """Ranked full-text search over leases and thread messages (JSON).
+
+    Query params: q (required), limit (default 20, max 100).
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing q parameter."}), 400
+    try:
+        limit = int(request.args.get("limit", SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer."}), 400
+    return jsonify(search(query, limit=limit))
+
+
+def export_ledger():
+    """Stream the payment ledger as CSV or XLSX for the accountant.
+
+    Query params: format (csv|xlsx, default csv), lease_group_id,
+    fy (2025 or 2025-26), from / to (YYYY-MM), type (comma-separated).
+    """
+    export_format = request.args.get("format", "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": "format must be csv or xlsx."}), 400
+    try:
+        filters = ledger_filters(
+            lease_group_id=request.args.get("lease_group_id"),
+            period_from=request.args.get("from"),
+            period_to=request.args.get("to"),
+            fy=request.args.get("fy"),
+            types=request.args.get("type"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    serialise, mimetype = EXPORT_FORMATS[export_format]
+    filename = "ledger"
+    if request.args.get("fy"):
+        filename += "-fy" + request.args["fy"].strip()
+    return Response(
+        stream_with_context(serialise(iter_ledger_rows(**filters))),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+def _requested_financial_year():
+    """?fy= as a starting year; defaults to the current financial year."""
+    if request.args.get("fy"):
+        return parse_financial_year(request.args["fy"])
+    today = datetime.now().date()
+    return financial_year(today.year, today.month)
+
+
+def tds_report_page():
+    """Per-tenant rent received and TDS for one financial year."""
+    try:
+        fy_start = _requested_financial_year()
+    except ValueError as e:
+        abort(400, description=str(e))
+    return render_template("tds_report.html", report=tds_report(fy_start))
+
+
+def tds_report_csv():
+    """tds_report_page() as a CSV download."""
+    try:
+        fy_start = _requested_financial_year()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    report = tds_report(fy_start)
+    return Response(
+        iter_csv(report["rows"], TDS_REPORT_COLUMNS),
+        mimetype="text/csv; charset=utf-8",
+        headers={"Content-Disposition":
+                 f'attachment; filename="tds-report-fy{report["financial_year"]}.csv"'},
+    )
+
+
+def analytics_page():
+    """Portfolio trends: occupancy, collection rate, days late, arrears."""
+    return render_template("analytics.html", analytics=portfolio_analytics())
+
+
+# ----------------------------------------------------------------
+# LANDLORD TENANT ACCESS MANAGEMENT (Phase 1 — Step 7)
+# ----------------------------------------------------------------
+
+def generate_token_route(lease_group_id):
+    """Landlord action: generate a tenant access link."""
+    result = generate_tenant_token(lease_group_id)
+    # Find a lease_id in this group to redirect back to
+    leases = _load_all_leases().get("leases", [])
+    redirect_lease_id = None
+    for l in leases:
+        if l.get("lease_group_id") == lease_group_id and l.get("is_current"):
+            redirect_lease_id = l.get("id")
+            break
+    if result.get("success"):
+        flash("Tenant access link generated.", "success")
+    else:
+        error = result.get("error", "unknown")
+        if error == "active_token_exists":
+            flash("An active tenant link already exists for this lease.", "error")
+        elif error == "lease_group_not_found":
+            flash("Lease not found.", "error")
+        else:
+            flash("Failed to generate tenant link.", "error")
+    return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+
+def revoke_token_route(lease_group_id):
+    """Landlord action: revoke a tenant access link."""
+    token = request.form.get("token", "").strip()
+    reason = request.form.get("revoke_reason", "").strip() or None
+    # Find a lease_id in this group to redirect back to
+    leases = _load_all_leases().get("leases", [])
+    redirect_lease_id = None
+    for l in leases:
+        if l.get("lease_group_id") == lease_group_id and l.get("is_current"):
+            redirect_lease_id = l.get("id")
+            break
+    if not token:
+        flash("No token specified.", "error")
+        return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+    result = revoke_tenant_token(token, reason=reason)
+    if result.get("success"):
+        flash("Tenant access has been revoked.", "success")
+    else:
+        error = result.get("error", "unknown")
+        if error == "already_revoked":
+            flash("This link was already revoked.", "error")
+        else:
+            flash("Failed to revoke tenant link.", "error")
+    return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+
+def thread_send_reminder(thread_id):
+    """Landlord action: send a payment reminder for a missing_payment thread.
+
+    Validates thread exists, is missing_payment, and is open.
+    Calls add_message_to_thread() which handles last_reminder_at.
+    Redirects to dashboard.
+    """
+    thread_data = _load_all_threads()
+    thread = next((t for t in thread_data["threads"]
+                   if t["id"] == thread_id), None)
+
+    if not thread:
+        abort(404)
+    if thread.get("topic_type") != "missing_payment":
+        abort(404)
+    if thread.get("status") != "open":
+        abort(404)
+
+    # 24-hour cooldown: block if reminder sent within last 24h.
+    last_reminder = thread.get("last_reminder_at")
+    if last_reminder:
+        try:
+            last_dt = datetime.fromisoformat(last_reminder)
+            if (datetime.utcnow() - last_dt).total_seconds() < 86400:
+                abort(400)
+        except (ValueError, TypeError):
+            pass
+
+    body = (request.form.get("body") or "").strip()
+    if not body:
+        abort(400)
+
+    add_message_to_thread(
+        thread_id=thread_id,
+        actor="landlord",
+        message_type="reminder",
+        body=body,
+    )
+
+    return redirect(url_for("index"))
+
+
+def thread_review_acknowledge(thread_id):
+    """Landlord action: acknowledge a payment_review thread.
+
+    Marks thread as resolved via add_message_to_thread(acknowledge).
+    add_message_to_thread handles needs_landlord_attention sync.
+    Redirects to dashboard.
+    """
+    thread_data = _load_all_threads()
+    thread = next((t for t in thread_data["threads"]
+                   if t["id"] == thread_id), None)
+
+    if not thread:
+        abort(404)
+    if thread.get("topic_type") != "payment_review":
+        abort(404)
+    if thread.get("status") != "open":
+        abort(404)
+
+    body = (request.form.get("body") or "").strip()
+    if not body:
+        abort(400)
+
+    add_message_to_thread(
+        thread_id=thread_id,
+        actor="landlord",
+        message_type="acknowledge",
+        body=body,
+    )
+
+    return redirect(url_for("index"))
+
+
+def thread_review_flag(thread_id):
+    """Landlord action: flag a payment_review thread for tenant clarification.
+
+    Sets waiting_on=tenant via add_message_to_thread(flag).
+    add_message_to_thread handles needs_landlord_attention sync.
+    Thread remains open. Redirects to dashboard.
+    """
+    thread_data = _load_all_threads()
+    thread = next((t for t in thread_data["threads"]
+                   if t["id"] == thread_id), None)
+
+    if not thread:
+        abort(404)
+    if thread.get("topic_type") != "payment_review":
+        abort(404)
+    if thread.get("status") != "open":
+        abort(404)
+
+    body = (request.form.get("body") or "").strip()
+    if not body:
+        abort(400)
+
+    add_message_to_thread(
+        thread_id=thread_id,
+        actor="landlord",
+        message_type="flag",
+        body=body,
+    )
+
+    return redirect(url_for("index"))
+
+
+def submit_payment_review(lease_group_id, payment_id):
+    """Landlord action: add a message for a payment confirmation.
+
+    Supports: flagged, response, acknowledged.
+    Writes to threads.json. Never modifies payment_data.json.
+    """
+    # Find a lease_id in this group to redirect back to
+    leases = _load_all_leases().get("leases", [])
+    redirect_lease_id = None
+    for l in leases:
+        if l.get("lease_group_id") == lease_group_id and l.get("is_current"):
+            redirect_lease_id = l.get("id")
+            break
+
+    # Validate payment_id exists and belongs to this lease_group_id
+    payment_data = _load_all_payments()
+    payment_record = None
+    for c in payment_data.get("confirmations", []):
+        if c.get("id") == payment_id and c.get("lease_group_id") == lease_group_id:
+            payment_record = c
+            break
+
+    if not payment_record:
+        flash("Payment confirmation not found.", "error")
+        return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+    # Validate event_type
+    event_type = request.form.get("review_type", "").strip()
+    if event_type not in ("acknowledged", "flagged", "response"):
+        flash("Invalid review type.", "error")
+        return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+    # Message — required for flagged and response, optional otherwise
+    message = request.form.get("internal_note", "").strip() or None
+
+    if event_type == "flagged" and not message:
+        flash("Please add a message for the tenant when flagging a submission.", "error")
+        return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+    if event_type == "response" and not message:
+        flash("Please add a message to your reply.", "error")
+        return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+    # Derive topic_ref from payment record
+    confirmation_type = payment_record.get("confirmation_type")
+    period_year = payment_record.get("period_year")
+    period_month = payment_record.get("period_month")
+    topic_ref = f"{confirmation_type}:{period_year}-{period_month:02d}"
+
+    # For response: validate conversation is open via thread
+    if event_type == "response":
+        open_thread = find_open_thread(lease_group_id, "payment_review", topic_ref)
+        if not open_thread:
+            flash("No open conversation to reply to.", "error")
+            return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+    # Handle optional file upload
+    msg_id = str(uuid.uuid4())
+    attachments = []
+    upload_file = request.files.get("attachment")
+    if upload_file and upload_file.filename:
+        relative_path, error = save_proof_file(lease_group_id, msg_id, upload_file)
+        if error:
+            flash(f"File upload failed: {error}", "error")
+            return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+        attachments.append(relative_path)
+
+    # Map old event_type → message_type
+    EVENT_TO_MESSAGE_TYPE = {
+        "flagged": "flag",
+        "response": "reply",
+        "acknowledged": "acknowledge",
+    }
+    message_type = EVENT_TO_MESSAGE_TYPE[event_type]
+
+    # Ensure thread exists, then add message (one threads.json commit)
+    with unit_of_work("threads") as unit:
+        thread = ensure_thread_exists(lease_group_id, "payment_review",
+                                      topic_ref, waiting_on="landlord")
+        result = add_message_to_thread(
+            thread_id=thread["id"],
+            actor="landlord",
+            message_type=message_type,
+            body=message,
+            payment_id=payment_id,
+            attachments=attachments,
+        )
+
+    # add_message_to_thread() returns once the message is staged;
+    # unit.ok says whether threads.json was actually written
+    saved = bool(result) and unit.ok
+    if saved:
+        flash("Review saved.", "success")
+    else:
+        flash("Failed to save review. Please try again.", "error")
+
+    # Smart redirect: stay on month modal if open threads remain
+    # for this period, otherwise return to attention overview.
+    if saved and redirect_lease_id and period_year and period_month:
+        still_open = find_open_thread(lease_group_id, "payment_review", topic_ref)
+        if still_open:
+            open_month = f"{period_year}-{period_month:02d}"
+            return redirect(url_for("index", lease_id=redirect_lease_id,
+                                    open_month=open_month, return_to="attention"))
+        else:
+            return redirect(url_for("index", return_attention_for=redirect_lease_id))
+
+    return redirect(url_for("index", lease_id=redirect_lease_id or ""))
+
+
+LANDLORD_ROUTES = [
+    ("/", index, ["GET"]),
+    ("/lease/<lease_id>/months", lease_month_history, ["GET"]),
+    ("/api/leases", api_leases, ["GET"]),
+    ("/api/attention", api_attention, ["GET"]),
+    ("/api/alerts", api_alerts, ["GET"]),
+    ("/api/leases/<lease_id>/monthly-summary", api_lease_monthly_summary, ["GET"]),
+    ("/api/analytics", api_analytics, ["GET"]),
+    ("/upload", upload_file, ["POST"]),
+    ("/save_lease", save_lease, ["POST"]),
+    ("/reset", reset_lease, ["POST"]),
+    ("/lease/<lease_id>/terminate", terminate_lease, ["POST"]),
+    ("/ai_prefill", ai_prefill, ["POST"]),
+    ("/view_pdf/<filename>", view_pdf, ["GET"]),
+    ("/view_proof/<lease_group_id>/<filename>", view_proof, ["GET"]),
+    ("/view_proof/<lease_group_id>/preview/<size>/<filename>", view_proof_preview, ["GET"]),
+    ("/search", search_route, ["GET"]),
+    ("/export/ledger", export_ledger, ["GET"]),
+    ("/reports/tds", tds_report_page, ["GET"]),
+    ("/reports/tds.csv", tds_report_csv, ["GET"]),
+    ("/analytics", analytics_page, ["GET"]),
+    ("/lease/<lease_group_id>/generate-token", generate_token_route, ["POST"]),
+    ("/lease/<lease_group_id>/revoke-token", revoke_token_route, ["POST"]),
+    ("/thread/<thread_id>/reminder", thread_send_reminder, ["POST"]),
+    ("/thread/<thread_id>/review/acknowledge", thread_review_acknowledge, ["POST"]),
+    ("/thread/<thread_id>/review/flag", thread_review_flag, ["POST"]),
+    ("/lease/<lease_group_id>/payment/<payment_id>/review", submit_payment_review, ["POST"]),
+]
+
+
+
+def register_landlord_routes(app):
+    """Attach the landlord views under their historical endpoint names."""
+    for rule, view, methods in LANDLORD_ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
+
+
+# ----------------------------------------------------------------
+# CLI commands (flask --app app <command>)
+# ----------------------------------------------------------------
+
+@click.command("migrate")
+@with_appcontext
+def migrate_command():
+    """Apply pending store schema migrations."""
+    # Creating the app already ran the startup pass; report it too.
+    applied = {**current_app.config.get("STARTUP_MIGRATIONS", {}), **run_store_migrations()}
+    for store in STORE_FILES:
+        if store in applied:
+            click.echo(f"{STORE_FILES[store]}: v{applied[store][0]} -> v{applied[store][1]}")
+        else:
+            click.echo(f"{STORE_FILES[store]}: up to date")
+
+
+@click.command("export-json")
+@click.argument("out_dir", type=click.Path(file_okay=False))
+def export_json_command(out_dir):
+    """Write pretty-printed (indent=2) copies of every store to OUT_DIR.
+
+    Read-only: the live files in DATA_DIR are never modified, so this
+    is safe while the app is running.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for store, filename in STORE_FILES.items():
+        content = _read_store_bytes(store)
+        if content is None:
+            click.echo(f"skip   {filename} (missing)")
+            continue
+        with open(os.path.join(out_dir, filename), "wb") as f:
+            f.write(_codec_dumps(_codec_loads(content), pretty=True))
+        click.echo(f"wrote  {os.path.join(out_dir, filename)}")
+
+
+@click.command("dedupe-proofs")
+@click.option("--dry-run", is_flag=True, help="Report what would be reclaimed; change nothing.")
+def dedupe_proofs_command(dry_run):
+    """Move proof uploads into the content-addressed blob store.
+
+    Identical files are kept once; every recorded proof path keeps
+    resolving through view_proof.
+    """
+    report = dedupe_proof_files(dry_run=dry_run)
+    verb = "would reclaim" if dry_run else "reclaimed"
+    click.echo(f"{report['files']} proof files, {report['duplicates']} duplicates,"
+               f" {verb} {report['bytes_reclaimed']:,} bytes")
+
+
+@click.command("reindex")
+def reindex_command():
+    """Rebuild the full-text search index from the stores."""
+    click.echo(f"indexed {rebuild_index()} documents")
+
+
+@click.command("export-ledger")
+@click.argument("out_file", type=click.Path(dir_okay=False))
+@click.option("--format", "export_format", type=click.Choice(sorted(EXPORT_FORMATS)),
+              help="Defaults to the OUT_FILE extension, else csv.")
+@click.option("--fy", help="Financial year, e.g. 2025 or 2025-26 (April–March).")
+@click.option("--from", "period_from", help="First period, YYYY-MM.")
+@click.option("--to", "period_to", help="Last period, YYYY-MM.")
+@click.option("--lease-group", "lease_group_id", help="Only this lease group.")
+@click.option("--type", "types", help="Confirmation types, e.g. rent,maintenance.")
+def export_ledger_command(out_file, export_format, fy, period_from, period_to, lease_group_id, types):
+    """Write the payment ledger (CSV or XLSX) to OUT_FILE, row by row."""
+    if not export_format:
+        ext = os.path.splitext(out_file)[1].lstrip(".").lower()
+        export_format = ext if ext in EXPORT_FORMATS else "csv"
+    try:
+        filters = ledger_filters(lease_group_id=lease_group_id, period_from=period_from,
+                                 period_to=period_to, fy=fy, types=types)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    serialise = EXPORT_FORMATS[export_format][0]
+    rows = 0
+
+    def counted(it):
+        nonlocal rows
+        for row in it:
+            rows += 1
+            yield row
+
+    # iter_csv yields text, iter_xlsx bytes
+    with (open(out_file, "w", encoding="utf-8", newline="") if export_format == "csv"
+          else open(out_file, "wb")) as f:
+        for chunk in serialise(counted(iter_ledger_rows(**filters))):
+            f.write(chunk)
+    click.echo(f"wrote {rows} rows to {out_file}")
+
+
+@click.command("archive-threads")
+@click.option("--older-than-days", type=int, default=None,
+              help="Days since resolution (default MAPMYLEASE_THREAD_ARCHIVE_DAYS or 180).")
+@click.option("--dry-run", is_flag=True, help="Report what would move; change nothing.")
+def archive_threads_command(older_than_days, dry_run):
+    """Move old resolved threads and their messages to the cold archive."""
+    report = archive_resolved_threads(older_than_days=older_than_days, dry_run=dry_run)
+    verb = "would archive" if dry_run else "archived"
+    click.echo(f"{verb} {report['threads']} threads, {report['messages']} messages"
+               f" from {report['lease_groups']} lease groups;"
+               f" {report['hot_threads']} threads stay in {STORE_FILES['threads']}")
+
+
+@click.command("convert-layout")
+@click.argument("layout", type=click.Choice(["sharded", "single"]))
+def convert_layout_command(layout):
+    """Convert leases, payments and threads to LAYOUT.
+
+    "sharded" keeps one directory per lease group under DATA_DIR/groups/;
+    "single" is the one-file-per-store layout. Stop the app first.
+    """
+    if store_layout() == layout:
+        click.echo(f"already {layout}")
+        return
+    converted = convert_store_layout(layout)
+    for store, groups in converted.items():
+        click.echo(f"{STORE_FILES[store]}: {groups} lease groups -> {layout}")
+
+
+@click.command("snapshot")
+@click.option("--label", default=None, help="Note stored with the snapshot.")
+@click.option("--keep", type=int, default=None,
+              help="Afterwards, delete all but the newest KEEP snapshots.")
+@click.option("--list", "list_only", is_flag=True, help="List snapshots; take none.")
+def snapshot_command(label, keep, list_only):
+    """Take an incremental snapshot of the stores and uploads.
+
+    Backups go to MAPMYLEASE_BACKUP_DIR (default DATA_DIR/backups).
+    Safe while the app is running.
+    """
+    if list_only:
+        for s in list_snapshots():
+            click.echo(f"{s['id']}  {s['files']} files  {s['bytes']} bytes"
+                       + (f"  {s['label']}" if s["label"] else ""))
+        return
+    report = take_snapshot(label=label)
+    click.echo(f"snapshot {report['id']}: {report['files']} files,"
+               f" {report['hashed']} read, {report['reused']} unchanged,"
+               f" {report['bytes_copied']} bytes copied")
+    if keep is not None:
+        pruned = prune_snapshots(keep)
+        click.echo(f"pruned {pruned['snapshots']} snapshots, {pruned['objects']} objects"
+                   f" ({pruned['bytes']} bytes)")
+
+
+@click.command("restore-snapshot")
+@click.argument("when")
+@click.option("--check", is_flag=True, help="Only verify the snapshot's objects.")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+def restore_snapshot_command(when, check, yes):
+    """Restore the snapshot WHEN (an id, or the latest at/before an ISO date).
+
+    Stop the app first. The current state is snapshotted before
+    anything is overwritten.
+    """
+    try:
+        snapshot_id = find_snapshot(when)
+        if check:
+            bad = verify_snapshot(snapshot_id)
+            for rel in bad:
+                click.echo(f"corrupt  {rel}")
+            click.echo(f"{snapshot_id}: {'ok' if not bad else f'{len(bad)} bad objects'}")
+            return
+        if not yes:
+            click.confirm(f"Restore {snapshot_id} over the current data?", abort=True)
+        report = restore_snapshot(snapshot_id)
+    except SnapshotError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"restored {snapshot_id}: {report['data_restored']} store files written,"
+               f" {report['data_removed']} removed, {report['uploads_restored']} uploads;"
+               f" previous state saved as {report['safety_snapshot']}")
+
+
+@click.command("fsck")
+@click.option("--repair", is_flag=True, help="Apply the safe fixes (see mapmylease.fsck).")
+@click.option("--limit", type=int, default=50, show_default=True,
+              help="Issues to list (counts always cover all).")
+def fsck_command(repair, limit):
+    """Check references between the stores; exit 1 if issues remain."""
+    report = check_stores(repair=repair)
+    for issue in report["issues"][:limit]:
+        record_id = issue["id"]
+        if issue["store"] == "tenant_access" and record_id:
+            record_id = record_id[:8] + "…"     # never print whole tokens
+        click.echo(f"{issue['check']:<24} {issue['store']:<13} {record_id}  {issue['detail']}")
+    if len(report["issues"]) > limit:
+        click.echo(f"... {len(report['issues']) - limit} more")
+    for check, count in sorted(report["counts"].items()):
+        click.echo(f"{check}: {count}")
+    for check, count in sorted(report["repaired"].items()):
+        click.echo(f"repaired {check}: {count}")
+    click.echo(f"checked {report['records']} records in {report['seconds']}s,"
+               f" {len(report['issues'])} issues")
+    remaining = [i for i in report["issues"] if not (repair and i["repairable"])]
+    if remaining:
+        raise SystemExit(1)
+
+
+@click.command("drain-outbox")
+@click.option("--loop", is_flag=True, help="Keep draining until interrupted.")
+@click.option("--batch-size", type=int, default=None,
+              help="Deliveries per batch (default MAPMYLEASE_NOTIFY_BATCH_SIZE).")
+def drain_outbox_command(loop, batch_size):
+    """Send pending notification deliveries (see mapmylease.notifications)."""
+    if not NOTIFY_CHANNELS:
+        click.echo("No channels configured (MAPMYLEASE_NOTIFY_CHANNELS); nothing is enqueued.")
+    if loop:
+        click.echo("Draining outbox; Ctrl+C to stop.")
+        try:
+            run_outbox_worker()
+        except KeyboardInterrupt:
+            pass
+        return
+    totals = {"sent": 0, "retry": 0, "dead": 0}
+    while True:
+        report, wait = _drain_batch(batch_size=batch_size)
+        for key in totals:
+            totals[key] += report[key]
+        if report["rate_limited"] and not report["claimed"]:
+            time.sleep(wait)            # until the limited channel's next token
+        elif not report["claimed"]:
+            break
+    click.echo(f"sent {totals['sent']}, retry {totals['retry']}, dead {totals['dead']}")
+    for channel, by_status in sorted(outbox_status().items()):
+        counts = ", ".join(f"{status} {n}" for status, n in sorted(by_status.items()))
+        click.echo(f"{channel}: {counts}")
+
+
+def create_app():
+    """Build the full MapMyLease app (landlord + tenant routes, CLI)."""
+    app = make_app(__name__)
+    register_landlord_routes(app)
+    register_tenant_routes(app)
+    register_observability_routes(app)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(export_json_command)
+    app.cli.add_command(dedupe_proofs_command)
+    app.cli.add_command(reindex_command)
+    app.cli.add_command(export_ledger_command)
+    app.cli.add_command(archive_threads_command)
+    app.cli.add_command(convert_layout_command)
+    app.cli.add_command(snapshot_command)
+    app.cli.add_command(restore_snapshot_command)
+    app.cli.add_command(fsck_command)
+    app.cli.add_command(drain_outbox_command)
+
+    # MAPMYLEASE_NOTIFY_WORKER=1 drains the notification outbox in a
+    # daemon thread of this process (or run `flask --app app drain-outbox --loop`).
+    # Landlord app only: the public tenant app never sends.
+    if NOTIFY_WORKER:
+        start_outbox_worker()
+    return app
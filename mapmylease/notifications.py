@@ -0,0 +1,506 @@
+"""
+Notification outbox: deliver thread messages outside the app.
+
+When a message is written, enqueue_deliveries() adds one delivery per
+enabled channel to threads.json["deliveries"] in the same save, so a
+message and its pending deliveries commit (or fail) together — no
+separate notification file. Messages from the landlord or the system
+go to the tenant (with their /tenant/<token> link); tenant messages go
+to the landlord.
+
+drain_outbox() sends one batch:
+  1. claim — under the threads lock, mark up to NOTIFY_BATCH_SIZE due
+     deliveries "sending", within each channel's rate limit
+  2. send — no lock held; each channel's transport gets its claimed
+     deliveries as one batch
+  3. record — under the lock again: "sent" (and the channel added to
+     the message's delivered_via), or back to "pending" with
+     exponential backoff, or "dead" after NOTIFY_MAX_ATTEMPTS
+
+A claim older than NOTIFY_CLAIM_SECONDS (a worker died mid-send) is
+claimable again, so delivery is at-least-once. Sent deliveries are
+dropped after NOTIFY_RETAIN_DAYS, dead ones NOTIFY_DEAD_RETAIN_DAYS
+after their last attempt.
+
+Transports are looked up by channel name in TRANSPORTS; add one with
+register_transport(). Built in, for local use and measurement:
+  "file"  appends JSON lines to DATA_DIR/outbox/<channel>.jsonl
+  "smtp"  sends plain-text mail to an SMTP debugging server
+          (e.g. `python -m aiosmtpd -n -l localhost:1025`)
+
+Nothing is enqueued unless MAPMYLEASE_NOTIFY_CHANNELS names at least
+one channel. The worker runs as `flask --app app drain-outbox --loop`,
+or as a thread in the landlord app process with MAPMYLEASE_NOTIFY_WORKER=1.
+
+Rate limits are token buckets held in memory, so they are per process.
+run_outbox_worker() therefore drains only while it holds
+DATA_DIR/outbox/drainer.lock: under gunicorn -w N every worker starts
+a thread, but one drains at a time and the limits hold as configured.
+The one-shot CLI does not take the lock; don't run it beside a worker.
+"""
+
+import os
+import uuid
+import fcntl
+import threading
+import time
+from datetime import datetime, timedelta
+
+from mapmylease import storage
+from mapmylease.observability import NOTIFICATION_LATENCY_SECONDS, NOTIFICATIONS_TOTAL
+from mapmylease.storage import (
+    _load_all_tenant_access,
+    _load_all_threads,
+    _retry_on_conflict,
+    _save_threads_file,
+    store_lock,
+)
+
+NOTIFY_CHANNELS = tuple(c.strip() for c in os.environ.get("MAPMYLEASE_NOTIFY_CHANNELS", "").split(",")
+                        if c.strip())
+NOTIFY_BATCH_SIZE = int(os.environ.get("MAPMYLEASE_NOTIFY_BATCH_SIZE", "50"))
+NOTIFY_MAX_ATTEMPTS = int(os.environ.get("MAPMYLEASE_NOTIFY_MAX_ATTEMPTS", "6"))
+NOTIFY_BACKOFF_SECONDS = 30         # first retry; doubles per attempt
+NOTIFY_BACKOFF_MAX_SECONDS = 3600
+NOTIFY_CLAIM_SECONDS = 300
+NOTIFY_RETAIN_DAYS = 7
+NOTIFY_DEAD_RETAIN_DAYS = 30        # days since the last attempt
+NOTIFY_POLL_SECONDS = float(os.environ.get("MAPMYLEASE_NOTIFY_POLL_SECONDS", "5"))
+NOTIFY_BASE_URL = os.environ.get("MAPMYLEASE_BASE_URL", "").rstrip("/")
+NOTIFY_WORKER = os.environ.get("MAPMYLEASE_NOTIFY_WORKER", "").lower() in ("1", "true", "yes")
+
+# Deliveries per second per channel: "smtp=5,file=1000"; others use the default
+NOTIFY_DEFAULT_RATE = 20.0
+NOTIFY_RATE_LIMITS = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition("=") for item in
+                          os.environ.get("MAPMYLEASE_NOTIFY_RATE_LIMITS", "").split(","))
+    if name.strip() and rate
+}
+
+# Who hears about a message, by its actor
+NOTIFY_RECIPIENTS = {"landlord": "tenant", "system": "tenant", "tenant": "landlord"}
+# Landlord-side follow-up prompts, never sent anywhere
+NOTIFY_SKIP_MESSAGE_TYPES = {"nudge"}
+
+OUTBOX_DIRNAME = "outbox"
+DRAINER_LOCK_FILENAME = "drainer.lock"
+
+# Set when something is enqueued in this process, so a worker thread
+# here wakes up at once instead of at its next poll
+_outbox_wakeup = threading.Event()
+
+
+# ----------------------------------------------------------------
+# Enqueue (called by the engine inside its threads-store write)
+# ----------------------------------------------------------------
+
+def _tenant_link(lease_group_id):
+    for token in _load_all_tenant_access().get("tenant_tokens", []):
+        if token.get("lease_group_id") == lease_group_id and token.get("is_active"):
+            return f"{NOTIFY_BASE_URL}/tenant/{token['token']}"
+    return None
+
+
+def enqueue_deliveries(thread_data, message, thread, now=None):
+    """Add pending deliveries for a new message to loaded thread data.
+
+    Does not save: the caller's save of thread_data commits them
+    together with the message.
+
+    Args:
+        thread_data: dict from _load_all_threads(), modified in place
+        message: the new message dict
+        thread: the message's thread dict
+        now: datetime (default: now)
+
+    Returns:
+        list of delivery dicts added (empty if no channel is enabled)
+    """
+    recipient = NOTIFY_RECIPIENTS.get(message.get("actor"))
+    if (not NOTIFY_CHANNELS or recipient is None
+            or message.get("message_type") in NOTIFY_SKIP_MESSAGE_TYPES):
+        return []
+
+    now_iso = (now or datetime.now()).isoformat()
+    lease_group_id = thread.get("lease_group_id")
+    link = _tenant_link(lease_group_id) if recipient == "tenant" else None
+    subject = "MapMyLease: {} {}".format(
+        (thread.get("topic_type") or "thread").replace("_", " "), thread.get("topic_ref") or "").strip()
+
+    added = []
+    for channel in NOTIFY_CHANNELS:
+        added.append({
+            "id": str(uuid.uuid4()),
+            "message_id": message["id"],
+            "thread_id": thread.get("id"),
+            "lease_group_id": lease_group_id,
+            "channel": channel,
+            "recipient": recipient,
+            "subject": subject,
+            "body": message.get("body") or "",
+            "link": link,
+            "status": "pending",
+            "attempts": 0,
+            "enqueued_at": now_iso,
+            "next_attempt_at": now_iso,
+            "claimed_at": None,
+            "last_attempt_at": None,
+            "sent_at": None,
+            "last_error": None,
+            "external_ref": None,
+        })
+    thread_data.setdefault("deliveries", []).extend(added)
+    _outbox_wakeup.set()
+    return added
+
+
+# ----------------------------------------------------------------
+# Transports
+# ----------------------------------------------------------------
+# A transport is built once per channel: factory(channel) -> object
+# with send_batch(deliveries) returning, per delivery and in order,
+# an external_ref (str) on success or an Exception on failure. An
+# exception raised by send_batch fails the whole batch.
+# ----------------------------------------------------------------
+
+class FileTransport:
+    """Appends deliveries as JSON lines to DATA_DIR/outbox/<channel>.jsonl."""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send_batch(self, deliveries):
+        path = os.path.join(storage.DATA_DIR, OUTBOX_DIRNAME, f"{self.channel}.jsonl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            for d in deliveries:
+                f.write(storage._codec_dumps({
+                    "delivery_id": d["id"], "recipient": d["recipient"],
+                    "lease_group_id": d["lease_group_id"], "subject": d["subject"],
+                    "body": d["body"], "link": d["link"],
+                    "delivered_at": datetime.now().isoformat()}, pretty=False) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return [f"file:{d['id']}" for d in deliveries]
+
+
+class SmtpDebugTransport:
+    """Plain-text mail over one SMTP connection per batch.
+
+    Meant for a local debugging server. Addresses are synthetic
+    (MAPMYLEASE_SMTP_TO, default "{recipient}+{lease_group_id}@localhost")
+    because leases hold no contact details.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.host = os.environ.get("MAPMYLEASE_SMTP_HOST", "localhost")
+        self.port = int(os.environ.get("MAPMYLEASE_SMTP_PORT", "1025"))
+        self.sender = os.environ.get("MAPMYLEASE_SMTP_FROM", "mapmylease@localhost")
+        self.to = os.environ.get("MAPMYLEASE_SMTP_TO", "{recipient}+{lease_group_id}@localhost")
+
+    def send_batch(self, deliveries):
+        import smtplib
+        from email.message import EmailMessage
+
+        results = []
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            for d in deliveries:
+                mail = EmailMessage()
+                mail["From"] = self.sender
+                mail["To"] = self.to.format(recipient=d["recipient"], lease_group_id=d["lease_group_id"])
+                mail["Subject"] = d["subject"]
+                mail["Message-ID"] = f"<{d['id']}@mapmylease>"
+                mail.set_content(d["body"] + (f"\n\n{d['link']}" if d["link"] else ""))
+                try:
+                    smtp.send_message(mail)
+                    results.append(mail["Message-ID"])
+                except smtplib.SMTPException as e:
+                    results.append(e)
+        return results
+
+
+TRANSPORTS = {
+    "file": FileTransport,
+    "smtp": SmtpDebugTransport,
+}
+
+_transport_instances = {}
+
+
+def register_transport(channel, factory):
+    """Make `channel` deliverable through factory(channel)."""
+    TRANSPORTS[channel] = factory
+    _transport_instances.pop(channel, None)
+
+
+def _transport(channel):
+    if channel not in _transport_instances:
+        factory = TRANSPORTS.get(channel)
+        if factory is None:
+            raise KeyError(f"no transport for channel {channel!r}")
+        _transport_instances[channel] = factory(channel)
+    return _transport_instances[channel]
+
+
+class _RateLimiter:
+    """Token bucket: `rate` per second, bursts up to one second's worth
+    (at least one delivery, so rates below 1/s still make progress)."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, wanted):
+        self._refill()
+        granted = min(wanted, int(self.tokens))
+        self.tokens -= granted
+        return granted
+
+    def wait_seconds(self):
+        """Seconds until the next whole token (0 if one is available)."""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+_rate_limiters = {}
+
+
+def _rate_limiter(channel):
+    if channel not in _rate_limiters:
+        _rate_limiters[channel] = _RateLimiter(NOTIFY_RATE_LIMITS.get(channel, NOTIFY_DEFAULT_RATE))
+    return _rate_limiters[channel]
+
+
+# ----------------------------------------------------------------
+# Draining
+# ----------------------------------------------------------------
+
+def _claimable(delivery, now_iso, stale_iso):
+    if delivery.get("status") == "pending":
+        return delivery.get("next_attempt_at", "") <= now_iso
+    return delivery.get("status") == "sending" and (delivery.get("claimed_at") or "") < stale_iso
+
+
+@_retry_on_conflict
+@store_lock("threads")
+def _claim_batch(now, batch_size):
+    thread_data = _load_all_threads()
+    now_iso = now.isoformat()
+    stale_iso = (now - timedelta(seconds=NOTIFY_CLAIM_SECONDS)).isoformat()
+
+    due = {}
+    for d in thread_data.get("deliveries", []):
+        if _claimable(d, now_iso, stale_iso):
+            due.setdefault(d.get("channel"), []).append(d)
+    claimed = []
+    deferred = 0
+    waits = []
+    for channel, items in sorted(due.items()):
+        room = batch_size - len(claimed)
+        if room <= 0:
+            break
+        items.sort(key=lambda d: d.get("next_attempt_at", ""))
+        limiter = _rate_limiter(channel)
+        granted = limiter.take(min(room, len(items)))
+        if granted < min(room, len(items)):
+            deferred += min(room, len(items)) - granted
+            waits.append(limiter.wait_seconds())
+        for d in items[:granted]:
+            d["status"] = "sending"
+            d["claimed_at"] = now_iso
+            claimed.append(dict(d))
+    if claimed:
+        _save_threads_file(thread_data)
+    return claimed, deferred, min(waits, default=0.0)
+
+
+def _backoff(attempts):
+    return min(NOTIFY_BACKOFF_SECONDS * 2 ** (attempts - 1), NOTIFY_BACKOFF_MAX_SECONDS)
+
+
+@_retry_on_conflict
+@store_lock("threads")
+def _record_results(outcomes, now):
+    """Apply send outcomes {delivery_id: external_ref | Exception}."""
+    thread_data = _load_all_threads()
+    now_iso = now.isoformat()
+    messages = {m.get("id"): m for m in thread_data.get("messages", [])}
+    counts = {"sent": 0, "retry": 0, "dead": 0}
+
+    for d in thread_data.get("deliveries", []):
+        if d.get("id") not in outcomes or d.get("status") != "sending":
+            continue
+        outcome = outcomes[d["id"]]
+        d["attempts"] = d.get("attempts", 0) + 1
+        d["claimed_at"] = None
+        d["last_attempt_at"] = now_iso
+        if isinstance(outcome, Exception):
+            d["last_error"] = f"{type(outcome).__name__}: {outcome}"[:300]
+            if d["attempts"] >= NOTIFY_MAX_ATTEMPTS:
+                d["status"] = result = "dead"
+            else:
+                d["status"] = "pending"
+                d["next_attempt_at"] = (now + timedelta(seconds=_backoff(d["attempts"]))).isoformat()
+                result = "retry"
+        else:
+            d["status"] = result = "sent"
+            d["sent_at"] = now_iso
+            d["external_ref"] = outcome
+            message = messages.get(d.get("message_id"))
+            if message is not None:
+                delivered = message.setdefault("delivered_via", ["internal"])
+                if d["channel"] not in delivered:
+                    delivered.append(d["channel"])
+                if message.get("external_ref") is None:
+                    message["external_ref"] = outcome
+            NOTIFICATION_LATENCY_SECONDS.observe(
+                (now - datetime.fromisoformat(d["enqueued_at"])).total_seconds(), d["channel"])
+        counts[result] += 1
+        NOTIFICATIONS_TOTAL.inc(d["channel"], result)
+
+    thread_data["deliveries"] = [d for d in thread_data.get("deliveries", [])
+                                 if not _expired(d, now)]
+    _save_threads_file(thread_data)
+    return counts
+
+
+def _expired(delivery, now):
+    """True for a sent or dead delivery past its retention period."""
+    if delivery.get("status") == "sent":
+        cutoff = (now - timedelta(days=NOTIFY_RETAIN_DAYS)).isoformat()
+        return (delivery.get("sent_at") or "") < cutoff
+    if delivery.get("status") == "dead":
+        cutoff = (now - timedelta(days=NOTIFY_DEAD_RETAIN_DAYS)).isoformat()
+        return (delivery.get("last_attempt_at") or delivery.get("enqueued_at") or "") < cutoff
+    return False
+
+
+def drain_outbox(now=None, batch_size=None):
+    """Claim, send and record one batch of due deliveries.
+
+    Args:
+        now: datetime deliveries are due by and results are stamped
+             with (default: the clock, read again after sending)
+        batch_size: max deliveries this call (default NOTIFY_BATCH_SIZE)
+
+    Returns:
+        dict: {"claimed", "sent", "retry", "dead", "rate_limited"}
+              (rate_limited: due but held back by a channel's limit)
+    """
+    return _drain_batch(now, batch_size)[0]
+
+
+def _drain_batch(now=None, batch_size=None):
+    """drain_outbox(), also returning the seconds until a rate-limited
+    channel can send again (0.0 if none was limited)."""
+    claimed, deferred, wait = _claim_batch(now or datetime.now(), batch_size or NOTIFY_BATCH_SIZE)
+    report = {"claimed": len(claimed), "sent": 0, "retry": 0, "dead": 0,
+              "rate_limited": deferred}
+    if not claimed:
+        return report, wait
+
+    by_channel = {}
+    for d in claimed:
+        by_channel.setdefault(d["channel"], []).append(d)
+    outcomes = {}
+    for channel, items in by_channel.items():
+        try:
+            results = _transport(channel).send_batch(items)
+        except Exception as e:  # any transport failure is retried
+            print(f"[WARNING] Notification transport {channel!r} failed: {e}")
+            results = [e] * len(items)
+        outcomes.update(zip((d["id"] for d in items), results))
+
+    report.update(_record_results(outcomes, now or datetime.now()))
+    return report, wait
+
+
+def outbox_status():
+    """Return delivery counts by channel and status.
+
+    Returns:
+        dict: {channel: {status: count}}
+    """
+    status = {}
+    for d in _load_all_threads().get("deliveries", []):
+        by_status = status.setdefault(d.get("channel"), {})
+        by_status[d.get("status")] = by_status.get(d.get("status"), 0) + 1
+    return status
+
+
+# ----------------------------------------------------------------
+# Background worker
+# ----------------------------------------------------------------
+
+def _try_drainer_lock():
+    """Take DATA_DIR/outbox/drainer.lock without blocking.
+
+    Returns:
+        the open fd if this process is now the drainer, else None
+    """
+    path = os.path.join(storage.DATA_DIR, OUTBOX_DIRNAME, DRAINER_LOCK_FILENAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except BlockingIOError:
+        os.close(fd)
+        return None
+
+
+def run_outbox_worker(stop_event=None, poll_seconds=None):
+    """Drain the outbox until stop_event is set.
+
+    Only the process holding the drainer lock drains; the others check
+    again every poll_seconds. The drainer drains back to back while
+    batches come back full, sleeps until the next token while a channel
+    is rate limited, and otherwise waits up to poll_seconds, waking
+    early when this process enqueues.
+    """
+    stop_event = stop_event or threading.Event()
+    poll_seconds = NOTIFY_POLL_SECONDS if poll_seconds is None else poll_seconds
+    lock_fd = None
+    try:
+        while not stop_event.is_set():
+            if lock_fd is None:
+                lock_fd = _try_drainer_lock()
+                if lock_fd is None:
+                    stop_event.wait(poll_seconds)
+                    continue
+            _outbox_wakeup.clear()
+            try:
+                report, wait = _drain_batch()
+            except Exception as e:  # keep the worker alive; the next pass retries
+                print(f"[WARNING] Outbox drain failed: {e}")
+                report, wait = {"claimed": 0, "rate_limited": 0}, 0.0
+            if report["rate_limited"] and not report["claimed"]:
+                stop_event.wait(wait)       # the limited channel's next token
+            elif report["claimed"] < NOTIFY_BATCH_SIZE:
+                _outbox_wakeup.wait(poll_seconds)
+    finally:
+        if lock_fd is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+
+_worker_thread = None
+
+
+def start_outbox_worker():
+    """Start the in-process worker thread once (MAPMYLEASE_NOTIFY_WORKER=1)."""
+    global _worker_thread
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=run_outbox_worker, name="mapmylease-outbox",
+                                          daemon=True)
+        _worker_thread.start()
+    return _worker_thread
@@ -0,0 +1,494 @@
+"""
+Logging, metrics and request profiling shared by every MapMyLease app.
+
+Nothing here imports the store or engine modules at import time, so
+storage can depend on it (@_timed, request I/O counters).
+"""
+
+import os
+import json
+from datetime import datetime
+import uuid
+import functools
+import threading
+import time
+import bisect
+import collections
+import cProfile
+import atexit
+import logging
+import logging.handlers
+import queue
+from flask import render_template, request, abort, current_app, before_render_template, template_rendered
+
+
+# ----------------------------------------------------------------
+# Logging
+# ----------------------------------------------------------------
+# The "mapmylease" logger writes one key=value line per event:
+#
+#     2026-10-19T10:00:00 INFO extract.pdf method=text pages=4 chars=9123 ms=41.2
+#
+# Request threads only enqueue records (QueueHandler); a listener
+# thread formats and writes them to stderr, so logging never blocks
+# on terminal or file I/O. MAPMYLEASE_LOG_LEVEL sets the level
+# (default INFO); per-page detail is logged at DEBUG.
+#
+# Extracted lease text is never logged — only counts and timings.
+# ----------------------------------------------------------------
+
+LOG_LEVEL = os.environ.get("MAPMYLEASE_LOG_LEVEL", "INFO").upper()
+
+log = logging.getLogger("mapmylease")
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+
+
+def _log_value(value):
+    """Render a field value; strings with spaces/quotes are JSON-quoted."""
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    text = str(value)
+    if not text or any(c in text for c in ' "='):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+class _KeyValueFormatter(logging.Formatter):
+    """Format "<time> <LEVEL> <event> key=value ..." lines."""
+
+    def format(self, record):
+        line = f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')} {record.levelname} {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={_log_value(v)}" for k, v in fields.items())
+        return line
+
+
+def _log_event(level, event, **fields):
+    """Log one structured event; skipped cheaply below the configured level.
+
+    Args:
+        level: logging level, e.g. logging.INFO
+        event: dotted event name, e.g. "extract.pdf"
+        **fields: key=value pairs appended to the line
+    """
+    if log.isEnabledFor(level):
+        log.log(level, event, extra={"fields": fields})
+
+
+def _start_log_listener():
+    global _log_listener
+    stream = logging.StreamHandler()
+    stream.setFormatter(_KeyValueFormatter())
+    _log_listener = logging.handlers.QueueListener(_log_queue, stream)
+    _log_listener.start()
+
+
+def _configure_logging():
+    """Attach the queue handler once (left alone if the host configured it)."""
+    if log.handlers:
+        return
+    log.addHandler(logging.handlers.QueueHandler(_log_queue))
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+    _start_log_listener()
+    atexit.register(lambda: _log_listener.stop())
+    # The listener thread does not survive fork (gunicorn --preload)
+    os.register_at_fork(after_in_child=_start_log_listener)
+
+
+_configure_logging()
+
+
+# ----------------------------------------------------------------
+# Metrics (Prometheus text exposition at /metrics)
+# ----------------------------------------------------------------
+# In-process counters and histograms, always on and cheap (a lock and
+# a bisect per observation). /metrics renders them in the Prometheus
+# text format, so any scraper — or plain curl — can read them; no
+# client library, agent or push gateway is needed.
+#
+# Values are per process. With several workers each reports its own
+# series; aggregate with sum() on the scraping side.
+# ----------------------------------------------------------------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_METRICS = []
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    """Render a Prometheus label set, e.g. {store="leases",le="0.1"}."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+
+class _Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def exposition(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}"
+                for key, value in items]
+
+
+class _Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}           # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def exposition(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket"
+                             f"{_format_labels(self.labels, key, [('le', repr(float(bound)))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+REQUEST_SECONDS = _Histogram(
+    "mapmylease_request_duration_seconds", "Request latency by Flask endpoint.",
+    ("endpoint", "method"))
+REQUESTS_TOTAL = _Counter(
+    "mapmylease_requests_total", "Requests by Flask endpoint and status code.",
+    ("endpoint", "method", "status"))
+STORE_LOAD_SECONDS = _Histogram(
+    "mapmylease_store_load_seconds", "Time in _load_all_* helpers.", ("store",))
+STORE_SAVE_SECONDS = _Histogram(
+    "mapmylease_store_save_seconds", "Time in _save_* helpers (staged saves included).", ("store",))
+STORE_IO_BYTES = _Histogram(
+    "mapmylease_store_io_bytes", "Bytes per store file read or committed.",
+    ("store", "op"), buckets=BYTES_BUCKETS)
+ENGINE_PASS_SECONDS = _Histogram(
+    "mapmylease_engine_pass_seconds", "Duration of one thread-engine pass.", ("pass",))
+THREAD_ACTIONS_TOTAL = _Counter(
+    "mapmylease_thread_actions_total",
+    "Threads created / auto-resolved / reminded / escalated.", ("action", "topic_type"))
+OCR_SECONDS = _Histogram(
+    "mapmylease_ocr_seconds", "Text extraction time per document.", ("source",))
+OCR_PAGES_TOTAL = _Counter(
+    "mapmylease_ocr_pages_total",
+    "Pages extracted (method=text: embedded PDF text, ocr: Tesseract).", ("source", "method"))
+AI_SECONDS = _Histogram(
+    "mapmylease_ai_seconds", "AI call latency.", ("operation",))
+AI_TOKENS_TOTAL = _Counter(
+    "mapmylease_ai_tokens_total", "AI tokens used.", ("operation", "direction"))
+PREVIEW_SECONDS = _Histogram(
+    "mapmylease_preview_seconds", "Proof thumbnail/preview generation time (cache misses).", ("kind",))
+API_CACHE_TOTAL = _Counter(
+    "mapmylease_api_cache_total",
+    "JSON API conditional requests (hit = answered 304 from ETag).", ("result",))
+REPORT_CACHE_TOTAL = _Counter(
+    "mapmylease_report_cache_total", "Cached report lookups (reports, analytics).",
+    ("report", "result"))
+NOTIFICATIONS_TOTAL = _Counter(
+    "mapmylease_notifications_total",
+    "Outbox delivery attempts (result: sent / retry / dead).", ("channel", "result"))
+NOTIFICATION_LATENCY_SECONDS = _Histogram(
+    "mapmylease_notification_latency_seconds",
+    "Message written to delivery confirmed by the transport.", ("channel",))
+
+# @_timed("<kind>:<label>") observes into the histogram for <kind>
+_TIMING_METRICS = {
+    "load": STORE_LOAD_SECONDS,
+    "save": STORE_SAVE_SECONDS,
+    "engine": ENGINE_PASS_SECONDS,
+    "ocr": OCR_SECONDS,
+    "ai": AI_SECONDS,
+    "preview": PREVIEW_SECONDS,
+}
+
+
+def render_metrics():
+    """Return every metric in Prometheus text exposition format (0.0.4)."""
+    from mapmylease.storage import STORE_FILES, _store_path
+
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.exposition())
+
+    # Current store file sizes, read at scrape time
+    lines.append("# HELP mapmylease_store_file_bytes Current size of each store file.")
+    lines.append("# TYPE mapmylease_store_file_bytes gauge")
+    for store in STORE_FILES:
+        try:
+            size = os.path.getsize(_store_path(store))
+        except OSError:
+            continue
+        lines.append(f"mapmylease_store_file_bytes{_format_labels(('store',), (store,))} {size}")
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------
+# Request profiling (opt-in)
+# ----------------------------------------------------------------
+# MAPMYLEASE_PROFILE=1 records, per request: wall time, time in each
+# store load/save helper, OCR and AI calls, template rendering, and
+# the number of JSON parses and fsyncs. Recent requests are kept in
+# memory and the slowest are listed at /debug/perf.
+#
+# MAPMYLEASE_PROFILE_CPROFILE=1 additionally runs cProfile for every
+# request and keeps a .prof file (DATA_DIR/profiles/) for any request
+# slower than MAPMYLEASE_PROFILE_SLOW_MS (default 500). Inspect with
+#     python -m pstats DATA_DIR/profiles/<file>.prof
+#
+# @_timed always feeds the /metrics histograms; the per-request
+# profile is only filled in while profiling is on.
+# ----------------------------------------------------------------
+
+PERF_ENABLED = os.environ.get("MAPMYLEASE_PROFILE", "").lower() in ("1", "true", "yes")
+PERF_CPROFILE = os.environ.get("MAPMYLEASE_PROFILE_CPROFILE", "").lower() in ("1", "true", "yes")
+PERF_SLOW_MS = float(os.environ.get("MAPMYLEASE_PROFILE_SLOW_MS", "500"))
+PERF_HISTORY = 500             # requests kept for /debug/perf
+
+_request_io = threading.local()
+_perf_history = collections.deque(maxlen=PERF_HISTORY)
+
+
+def _timed(name):
+    """Decorator: record the call's duration in metrics and the request profile.
+
+    Args:
+        name: "<kind>:<label>", e.g. "load:leases", "ocr:pdf", "ai:extract";
+              <kind> selects the histogram in _TIMING_METRICS
+    """
+    kind, label = name.split(":", 1)
+    histogram = _TIMING_METRICS[kind]
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                histogram.observe(elapsed, label)
+                perf = getattr(_request_io, "perf", None)
+                if perf is not None:
+                    _record_timing(perf, name, elapsed)
+        return wrapper
+    return decorator
+
+
+def _record_timing(perf, name, seconds):
+    """Accumulate one timed call into a request profile."""
+    bucket = perf["timings"].setdefault(name, {"calls": 0, "ms": 0.0})
+    bucket["calls"] += 1
+    bucket["ms"] += seconds * 1000
+
+
+def _perf_render_started(sender, template, context, **extra):
+    perf = getattr(_request_io, "perf", None)
+    if perf is not None:
+        perf["_render_starts"].append(time.perf_counter())
+
+
+def _perf_render_finished(sender, template, context, **extra):
+    perf = getattr(_request_io, "perf", None)
+    if perf is not None and perf["_render_starts"]:
+        started = perf["_render_starts"].pop()
+        _record_timing(perf, f"render:{template.name}", time.perf_counter() - started)
+
+
+def _start_request_profile():
+    """Begin a profile for the current request (profiling enabled only)."""
+    _request_io.perf = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "method": request.method,
+        # The route pattern, never the URL: /tenant/<token> paths and
+        # query strings can carry live tenant credentials
+        "path": request.url_rule.rule if request.url_rule else "(unmatched)",
+        "endpoint": request.endpoint,
+        "timings": {},
+        "_render_starts": [],
+        "_t0": time.perf_counter(),
+        "_cprofile": None,
+    }
+    if PERF_CPROFILE:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another thread's profiler is active (Python 3.12+ allows one)
+            return
+        _request_io.perf["_cprofile"] = profiler
+
+
+def _finish_request_profile(status_code):
+    """Close the current request's profile and add it to the history."""
+    perf = getattr(_request_io, "perf", None)
+    if perf is None:
+        return
+    _request_io.perf = None
+
+    profiler = perf.pop("_cprofile")
+    if profiler is not None:
+        profiler.disable()
+
+    wall_ms = (time.perf_counter() - perf.pop("_t0")) * 1000
+    perf.pop("_render_starts")
+    perf["status"] = status_code
+    perf["wall_ms"] = round(wall_ms, 2)
+    perf["parses"] = getattr(_request_io, "parses", 0)
+    perf["fsyncs"] = getattr(_request_io, "fsyncs", 0)
+    for bucket in perf["timings"].values():
+        bucket["ms"] = round(bucket["ms"], 2)
+    perf["profile_file"] = None
+
+    if profiler is not None and wall_ms >= PERF_SLOW_MS:
+        from mapmylease import storage
+
+        profile_dir = os.path.join(storage.DATA_DIR, "profiles")
+        os.makedirs(profile_dir, exist_ok=True)
+        name = "{}-{}-{}.prof".format(
+            datetime.now().strftime("%Y%m%d-%H%M%S"),
+            (perf["endpoint"] or "unknown").replace(".", "_"),
+            uuid.uuid4().hex[:6],
+        )
+        try:
+            profiler.dump_stats(os.path.join(profile_dir, name))
+            perf["profile_file"] = name
+        except OSError as e:
+            print(f"[WARNING] Failed to write profile {name}: {e}")
+
+    _perf_history.append(perf)
+
+
+def _reset_request_io():
+    _request_io.started = time.perf_counter()
+    _request_io.fsyncs = 0
+    _request_io.parses = 0
+    if PERF_ENABLED and request.endpoint not in ("static", "debug_perf", "metrics"):
+        _start_request_profile()
+
+
+def _report_request_io(response):
+    """Expose the number of store fsyncs this request performed."""
+    response.headers["X-Store-Fsyncs"] = str(getattr(_request_io, "fsyncs", 0))
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_SECONDS.observe(time.perf_counter() - _request_io.started, endpoint, request.method)
+    REQUESTS_TOTAL.inc(endpoint, request.method, str(response.status_code))
+    _finish_request_profile(response.status_code)
+    return response
+
+
+def _discard_request_profile(exc):
+    """Close a profile left open by a request that raised."""
+    _finish_request_profile(500)
+
+
+# ----------------------------------------------------------------
+# Metrics and debug views (landlord app only; see
+# register_observability_routes)
+# ----------------------------------------------------------------
+
+def metrics():
+    """Prometheus text exposition of this process's metrics."""
+    return current_app.response_class(render_metrics(),
+                                      mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def debug_perf():
+    """List the slowest recent requests recorded by the profiler.
+
+    Query params:
+        limit: number of requests to show (default 50)
+
+    Returns 404 unless profiling is enabled.
+    """
+    if not PERF_ENABLED:
+        abort(404)
+    limit = max(1, request.args.get("limit", 50, type=int))
+    recent = list(_perf_history)
+    slowest = sorted(recent, key=lambda p: p["wall_ms"], reverse=True)[:limit]
+    return render_template(
+        "debug_perf.html",
+        requests=slowest,
+        recorded=len(recent),
+        history_size=PERF_HISTORY,
+        slow_ms=PERF_SLOW_MS,
+        cprofile=PERF_CPROFILE,
+    )
+
+
+OBSERVABILITY_ROUTES = [
+    ("/metrics", metrics, ["GET"]),
+    ("/debug/perf", debug_perf, ["GET"]),
+]
+
+
+def install_observability(app):
+    """Attach request accounting and profiling hooks.
+
+    Called by every app factory so landlord and tenant workers record
+    the same series. The views that expose them are mounted separately
+    by register_observability_routes().
+    """
+    app.before_request(_reset_request_io)
+    app.after_request(_report_request_io)
+    app.teardown_request(_discard_request_profile)
+    before_render_template.connect(_perf_render_started, app)
+    template_rendered.connect(_perf_render_finished, app)
+
+
+def register_observability_routes(app):
+    """Mount /metrics and /debug/perf.
+
+    Landlord app only: the tenant app is public, and these pages are
+    not meant for tenants.
+    """
+    for rule, view, methods in OBSERVABILITY_ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
@@ -0,0 +1,114 @@
+"""
+Proof thumbnails and web-sized previews.
+
+Generated lazily on first request and cached on disk under
+uploads/previews/{sha256}-{size}.jpg. Keyed by content hash, so a
+receipt stored once in the blob store (storage.save_proof_file) also
+gets one set of previews, and a cached preview never goes stale.
+
+Pillow (and pdf2image/poppler for a PDF's first page) are imported
+inside the functions that use them, like the extraction packages.
+"""
+
+import os
+import tempfile
+
+from mapmylease import storage
+from mapmylease.observability import _timed
+
+# Longest edge in pixels. "thumb" is for timelines and lists; "web"
+# replaces the 8 MB original for on-screen viewing.
+PREVIEW_SIZES = {"thumb": 320, "web": 1600}
+PREVIEW_JPEG_QUALITY = 80
+PREVIEW_DIRNAME = "previews"
+
+_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg"}
+
+
+def _preview_cache_path(sha256, size):
+    return os.path.join(storage.UPLOAD_FOLDER, PREVIEW_DIRNAME, f"{sha256}-{size}.jpg")
+
+
+def _open_source_image(source_path, max_edge):
+    """Return a Pillow image for an image or a PDF's first page, or None."""
+    ext = source_path.rsplit(".", 1)[-1].lower()
+
+    if ext in _IMAGE_EXTENSIONS:
+        from PIL import Image, ImageOps
+
+        img = Image.open(source_path)
+        # JPEG: let the decoder downscale by 1/2..1/8 while decoding —
+        # much faster and lighter than decoding a 12 MP photo in full
+        img.draft("RGB", (max_edge, max_edge))
+        # Phone photos are usually stored sideways with an EXIF rotation
+        return ImageOps.exif_transpose(img)
+
+    if ext == "pdf":
+        from pdf2image import convert_from_path
+
+        pages = convert_from_path(source_path, first_page=1, last_page=1,
+                                  size=(max_edge, None))
+        return pages[0] if pages else None
+
+    return None
+
+
+@_timed("preview:render")
+def _render_preview(source_path, dest_path, max_edge):
+    """Render a JPEG preview of source_path into dest_path (tmp + rename).
+
+    Returns:
+        bool: True on success, False if the source cannot be rendered
+    """
+    try:
+        img = _open_source_image(source_path, max_edge)
+        if img is None:
+            return False
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_edge, max_edge))
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, "JPEG", quality=PREVIEW_JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return True
+    except Exception as e:
+        # Missing Pillow/poppler, corrupt or unsupported file
+        print(f"[WARNING] Could not render preview for {os.path.basename(source_path)}: {e}")
+        return False
+
+
+def get_proof_preview(relative_path, size="thumb"):
+    """Return the path of a cached JPEG preview for a proof, or None.
+
+    Renders and caches the preview on first use.
+
+    Args:
+        relative_path: proof path as stored in proof_files / attachments
+        size: key of PREVIEW_SIZES
+
+    Returns:
+        str: absolute path of the preview, or None if the proof is
+             missing or cannot be rendered
+    """
+    if size not in PREVIEW_SIZES:
+        return None
+    source_path = storage.resolve_proof_path(relative_path)
+    if not source_path:
+        return None
+
+    metadata = storage.load_proof_metadata(relative_path) or {}
+    sha256 = metadata.get("sha256") or storage.content_hash(source_path)
+    cache_path = _preview_cache_path(sha256, size)
+    if os.path.isfile(cache_path):
+        return cache_path
+
+    if not _render_preview(source_path, cache_path, PREVIEW_SIZES[size]):
+        return None
+    return cache_path
@@ -0,0 +1,473 @@
+"""
+Accountant-facing exports and reports over the payment confirmations.
+
+The ledger export walks payment_data.json once and yields one row per
+confirmation, joined with the lease nickname and the lease version that
+governed its period. Rows are produced by generators and serialised
+incrementally (CSV, or a minimal XLSX written through a non-seekable
+zip stream), so the response and CLI output never hold the whole
+ledger in memory.
+
+The annual TDS report folds the same rows into per-tenant totals for
+one April–March financial year, cached until the stores change.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from mapmylease.engine import resolve_governing_lease
+from mapmylease.observability import REPORT_CACHE_TOTAL
+from mapmylease.storage import (
+    _load_all_leases,
+    _load_all_payments,
+    _load_all_terminations,
+    _store_stamp,
+)
+
+CONFIRMATION_TYPES = ("rent", "maintenance", "utilities")
+
+# (column, header) in output order
+LEDGER_COLUMNS = [
+    ("period", "Period"),
+    ("financial_year", "Financial year"),
+    ("lease_group_id", "Lease group"),
+    ("lease_nickname", "Lease"),
+    ("governing_version", "Governing version"),
+    ("governing_lease_id", "Governing lease id"),
+    ("lessor_name", "Lessor"),
+    ("lessee_name", "Lessee"),
+    ("confirmation_type", "Type"),
+    ("amount_agreed", "Amount agreed"),
+    ("amount_declared", "Amount declared"),
+    ("tds_deducted", "TDS deducted"),
+    ("date_paid", "Date paid"),
+    ("submitted_at", "Submitted at"),
+    ("submitted_via", "Submitted via"),
+    ("verification_status", "Verification"),
+    ("proof_count", "Proofs"),
+    ("payment_id", "Confirmation id"),
+    ("notes", "Notes"),
+]
+
+# Flush serialised rows to the client in chunks of about this size
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+
+# ----------------------------------------------------------------
+# Financial years and filters
+# ----------------------------------------------------------------
+
+def financial_year(year, month):
+    """Return the starting calendar year of the April–March year of a month."""
+    return year if month >= 4 else year - 1
+
+
+def financial_year_label(start_year):
+    """2025 -> '2025-26'."""
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+
+def parse_financial_year(value):
+    """'2025' or '2025-26' -> 2025.
+
+    Raises:
+        ValueError: with a message fit for the user
+    """
+    match = re.fullmatch(r"(\d{4})(?:-\d{2})?", (value or "").strip())
+    if not match:
+        raise ValueError("fy must be a year such as 2025 or 2025-26.")
+    return int(match.group(1))
+
+
+def _parse_period(value, name):
+    match = re.fullmatch(r"(\d{4})-(\d{1,2})", value.strip())
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(f"{name} must be YYYY-MM.")
+    return int(match.group(1)), int(match.group(2))
+
+
+def ledger_filters(lease_group_id=None, period_from=None, period_to=None, fy=None, types=None):
+    """Validate export filters given as strings (query params, CLI options).
+
+    Args:
+        lease_group_id: restrict to one lease group
+        period_from: first period, 'YYYY-MM' (inclusive)
+        period_to: last period, 'YYYY-MM' (inclusive)
+        fy: financial year, '2025' or '2025-26' (April 2025 – March 2026);
+            combined with period_from/period_to if both are given
+        types: comma-separated confirmation types, e.g. 'rent,maintenance'
+
+    Returns:
+        dict: keyword arguments for iter_ledger_rows()
+
+    Raises:
+        ValueError: with a message fit for the user
+    """
+    filters = {"lease_group_id": lease_group_id or None,
+               "period_from": None, "period_to": None, "types": None}
+    if fy:
+        start = parse_financial_year(fy)
+        filters["period_from"], filters["period_to"] = (start, 4), (start + 1, 3)
+    if period_from:
+        filters["period_from"] = max(filter(None, [filters["period_from"],
+                                                   _parse_period(period_from, "from")]))
+    if period_to:
+        filters["period_to"] = min(filter(None, [filters["period_to"],
+                                                 _parse_period(period_to, "to")]))
+    if types:
+        wanted = {t.strip() for t in types.split(",") if t.strip()}
+        unknown = wanted - set(CONFIRMATION_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown confirmation type: {', '.join(sorted(unknown))}.")
+        filters["types"] = wanted
+    return filters
+
+
+# ----------------------------------------------------------------
+# Ledger rows
+# ----------------------------------------------------------------
+
+def iter_ledger_rows(lease_group_id=None, period_from=None, period_to=None, types=None):
+    """Yield one ledger row per payment confirmation, oldest period first.
+
+    The stores are read once up front; the governing lease version is
+    resolved once per (lease group, month) from that pre-loaded data.
+
+    Args:
+        lease_group_id: only this lease group (None = all)
+        period_from: (year, month) inclusive lower bound, or None
+        period_to: (year, month) inclusive upper bound, or None
+        types: set of confirmation types (None = all)
+
+    Yields:
+        dict: keyed by the LEDGER_COLUMNS column names
+    """
+    confirmations = []
+    for c in _load_all_payments().get("confirmations", []):
+        if lease_group_id and c.get("lease_group_id") != lease_group_id:
+            continue
+        if types and c.get("confirmation_type") not in types:
+            continue
+        period = (c.get("period_year") or 0, c.get("period_month") or 0)
+        if (period_from and period < period_from) or (period_to and period > period_to):
+            continue
+        confirmations.append((period, c))
+    confirmations.sort(key=lambda pc: (pc[0], pc[1].get("lease_group_id") or "",
+                                       pc[1].get("confirmation_type") or "",
+                                       pc[1].get("submitted_at") or ""))
+
+    versions_by_group = {}
+    for lease in _load_all_leases().get("leases", []):
+        versions_by_group.setdefault(lease.get("lease_group_id"), []).append(lease)
+    for versions in versions_by_group.values():
+        versions.sort(key=lambda x: x.get("version", 1), reverse=True)
+    terminations = {}
+    for t in _load_all_terminations().get("terminations", []):
+        terminations.setdefault(t.get("lease_id"), t)
+
+    governing_cache = {}
+    for (year, month), c in confirmations:
+        group_id = c.get("lease_group_id")
+        key = (group_id, year, month)
+        if key not in governing_cache:
+            governing_cache[key] = resolve_governing_lease(
+                versions_by_group.get(group_id, []), terminations, year, month)
+        governing = governing_cache[key]
+
+        # Out of lease (late or stray confirmation): fall back to the
+        # newest version for the nickname and parties
+        lease = governing.get("lease") or next(iter(versions_by_group.get(group_id, [])), None)
+        cv = (lease or {}).get("current_values") or {}
+        yield {
+            "period": f"{year:04d}-{month:02d}",
+            "financial_year": financial_year_label(financial_year(year, month)),
+            "lease_group_id": group_id,
+            "lease_nickname": cv.get("lease_nickname"),
+            "governing_version": governing.get("version"),
+            "governing_lease_id": governing.get("lease_id"),
+            "lessor_name": cv.get("lessor_name"),
+            "lessee_name": cv.get("lessee_name"),
+            "confirmation_type": c.get("confirmation_type"),
+            "amount_agreed": c.get("amount_agreed"),
+            "amount_declared": c.get("amount_declared"),
+            "tds_deducted": c.get("tds_deducted"),
+            "date_paid": c.get("date_paid"),
+            "submitted_at": c.get("submitted_at"),
+            "submitted_via": c.get("submitted_via"),
+            "verification_status": c.get("verification_status"),
+            "proof_count": len(c.get("proof_files") or []),
+            "payment_id": c.get("id"),
+            "notes": c.get("notes"),
+        }
+
+
+# ----------------------------------------------------------------
+# Serialisers (generators of str / bytes chunks)
+# ----------------------------------------------------------------
+
+# Spreadsheet apps evaluate a CSV field starting with these as a
+# formula; notes and nicknames are user-entered, so such fields get a
+# leading '. XLSX cells are typed inline strings, never evaluated, and
+# are written unchanged.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _safe_text(value):
+    """Return a CSV field value that a spreadsheet will not evaluate."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows, columns=LEDGER_COLUMNS):
+    """Serialise rows as CSV, yielding text chunks of ~EXPORT_CHUNK_CHARS.
+
+    Text cells that would start a formula are prefixed with ' (see
+    _safe_text()); numbers are written as they are.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in columns])
+    # Header goes out before the stores are read
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(["" if row[name] is None else _safe_text(row[name]) for name, _ in columns])
+        if buffer.tell() >= EXPORT_CHUNK_CHARS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """Write-only file object collecting bytes until drained.
+
+    It has no tell()/seek(), so zipfile writes entries in streaming mode
+    (sizes and CRC in data descriptors after each entry).
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Ledger" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'),
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None or value == "":
+            cells.append("<c/>")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c t="n"><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub("", str(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return "<row>" + "".join(cells) + "</row>"
+
+
+def iter_xlsx(rows, columns=LEDGER_COLUMNS):
+    """Serialise rows as a single-sheet XLSX workbook, yielding bytes chunks.
+
+    Cells are inline strings and plain numbers (no shared-strings table
+    or styles), which is what lets the sheet be written row by row.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            zf.writestr(name, content)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            sheet.write(_xlsx_row([header for _, header in columns]).encode("utf-8"))
+            pending = []
+            pending_chars = 0
+            for row in rows:
+                xml = _xlsx_row([row[name] for name, _ in columns])
+                pending.append(xml)
+                pending_chars += len(xml)
+                if pending_chars >= EXPORT_CHUNK_CHARS:
+                    sheet.write("".join(pending).encode("utf-8"))
+                    pending, pending_chars = [], 0
+                    yield sink.drain()
+            sheet.write("".join(pending).encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+# ----------------------------------------------------------------
+# Annual TDS / rent-received report
+# ----------------------------------------------------------------
+# One row per (lease group, lessee) for a financial year: what was
+# agreed, what the tenant declared paid and the TDS they deducted, per
+# confirmation type and in total. A renewal with a new lessee starts a
+# new row. A correction is a new submission for the same month, so only
+# the latest submission per (lease group, type, month) is counted.
+# Cached per year; the cache entry carries the stamps of the stores it
+# was built from, so a new confirmation (or lease edit) rebuilds it on
+# the next request.
+# ----------------------------------------------------------------
+TDS_REPORT_STORES = ("payments", "leases", "terminations")
+
+TDS_REPORT_COLUMNS = [
+    ("financial_year", "Financial year"),
+    ("lease_group_id", "Lease group"),
+    ("lease_nickname", "Lease"),
+    ("lessee_name", "Lessee"),
+    ("lessor_name", "Lessor"),
+    ("months", "Months"),
+    ("confirmations", "Confirmations"),
+    ("rent_declared", "Rent declared"),
+    ("maintenance_declared", "Maintenance declared"),
+    ("utilities_declared", "Utilities declared"),
+    ("amount_agreed", "Total agreed"),
+    ("amount_declared", "Total declared"),
+    ("difference", "Declared - agreed"),
+    ("tds_deducted", "TDS deducted"),
+]
+
+_tds_report_cache = {}  # fy start year -> (store stamps, report)
+
+
+def _money(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def build_tds_report(fy_start):
+    """Aggregate one financial year's confirmations in a single pass.
+
+    Args:
+        fy_start: starting calendar year (2025 = April 2025 – March 2026)
+
+    Returns:
+        dict: {"fy_start", "financial_year", "rows": [...], "totals": {...}}
+              rows are keyed by TDS_REPORT_COLUMNS, sorted by lease and lessee;
+              "confirmations" counts one (the latest) per type and month
+    """
+    # Ledger rows come oldest submission first within each
+    # (lease group, type, month), so the last one seen is the latest
+    latest = {}
+    for entry in iter_ledger_rows(period_from=(fy_start, 4), period_to=(fy_start + 1, 3)):
+        latest[(entry["lease_group_id"], entry["confirmation_type"], entry["period"])] = entry
+
+    rows = {}
+    for entry in latest.values():
+        key = (entry["lease_group_id"], entry["lessee_name"] or "")
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {
+                "financial_year": entry["financial_year"],
+                "lease_group_id": entry["lease_group_id"],
+                "lease_nickname": entry["lease_nickname"],
+                "lessee_name": entry["lessee_name"],
+                "lessor_name": entry["lessor_name"],
+                "months": set(),
+                "confirmations": 0,
+                "amount_agreed": 0.0,
+                "amount_declared": 0.0,
+                "tds_deducted": 0.0,
+            }
+            for ctype in CONFIRMATION_TYPES:
+                row[f"{ctype}_declared"] = 0.0
+        row["months"].add(entry["period"])
+        row["confirmations"] += 1
+        declared = _money(entry["amount_declared"])
+        row["amount_agreed"] += _money(entry["amount_agreed"])
+        row["amount_declared"] += declared
+        row["tds_deducted"] += _money(entry["tds_deducted"])
+        if entry["confirmation_type"] in CONFIRMATION_TYPES:
+            row[f"{entry['confirmation_type']}_declared"] += declared
+
+    money_columns = ["amount_agreed", "amount_declared", "tds_deducted", "difference"] + [
+        f"{ctype}_declared" for ctype in CONFIRMATION_TYPES]
+    totals = dict.fromkeys(money_columns, 0.0)
+    totals["confirmations"] = 0
+    for row in rows.values():
+        row["months"] = len(row["months"])
+        row["difference"] = row["amount_declared"] - row["amount_agreed"]
+        for column in money_columns:
+            row[column] = round(row[column], 2)
+            totals[column] += row[column]
+        totals["confirmations"] += row["confirmations"]
+    for column in money_columns:
+        totals[column] = round(totals[column], 2)
+
+    return {
+        "fy_start": fy_start,
+        "financial_year": financial_year_label(fy_start),
+        "rows": sorted(rows.values(), key=lambda r: ((r["lease_nickname"] or "").lower(),
+                                                     (r["lessee_name"] or "").lower())),
+        "totals": totals,
+    }
+
+
+def tds_report(fy_start):
+    """build_tds_report(), cached per year until the stores change.
+
+    Returns:
+        dict: see build_tds_report() (shared; do not mutate)
+    """
+    stamps = tuple(_store_stamp(store) for store in TDS_REPORT_STORES)
+    cached = _tds_report_cache.get(fy_start)
+    if cached and cached[0] == stamps:
+        REPORT_CACHE_TOTAL.inc("tds", "hit")
+        return cached[1]
+    REPORT_CACHE_TOTAL.inc("tds", "miss")
+    report = build_tds_report(fy_start)
+    _tds_report_cache[fy_start] = (stamps, report)
+    return report
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "xlsx": (iter_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
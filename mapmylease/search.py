@@ -0,0 +1,430 @@
+"""
+Full-text search over lease documents, lease details and thread
+messages.
+
+Backed by SQLite FTS5 (DATA_DIR/search_index.sqlite3) when the
+interpreter's sqlite3 has it, otherwise by an in-memory inverted index
+with BM25 ranking. Either way the index is derived data: it is kept
+current incrementally by index_lease() / index_message() after the
+writes that change searchable text (upload_file, save_lease,
+add_message_to_thread, send_missing_payment_reminders), and rebuilt
+from the stores whenever their version stamps show a write it did not
+see (another process, a migration, fsck, an archive pass).
+
+An incremental update only moves a store's recorded stamp forward if
+the index had seen every write before this one (recorded stamp ==
+the stamp just before the commit); otherwise it marks the store stale
+so the next search rebuilds.
+"""
+
+import os
+import re
+import html
+import math
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from mapmylease import storage
+from mapmylease.thread_archive import iter_archived_threads
+
+SEARCH_INDEX_FILE = "search_index.sqlite3"
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Stores whose text is indexed; their stamps decide freshness
+_INDEXED_STORES = ("leases", "threads")
+
+# Title matches outrank body matches
+_TITLE_WEIGHT = 5.0
+
+# snippet() markers, turned into <mark> after HTML-escaping
+_MARK_START, _MARK_END = "\x01", "\x02"
+_SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_available():
+    try:
+        with closing(sqlite3.connect(":memory:")) as conn:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_available()
+
+
+# ----------------------------------------------------------------
+# Documents
+# ----------------------------------------------------------------
+
+def _flatten_values(value):
+    """Yield the leaf values of a nested current_values dict as text.
+
+    Field names are left out: every lease has them, so they would
+    match everything ("escalation" in rent_escalation_percent).
+    """
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten_values(item)
+    elif value not in (None, "") and not isinstance(value, bool):
+        yield str(value)
+
+
+def _lease_document(lease):
+    cv = lease.get("current_values") or {}
+    source = lease.get("source_document") or {}
+    body = "\n".join(list(_flatten_values(cv)) + [source.get("extracted_text") or ""])
+    return {
+        "kind": "lease",
+        "doc_id": lease["id"],
+        "lease_group_id": lease.get("lease_group_id", lease["id"]),
+        "ref": str(lease.get("version", 1)),
+        "title": cv.get("lease_nickname") or source.get("filename") or "Untitled lease",
+        "body": body,
+    }
+
+
+def _message_document(message, thread):
+    return {
+        "kind": "message",
+        "doc_id": message["id"],
+        "lease_group_id": thread.get("lease_group_id"),
+        "ref": message.get("thread_id"),
+        "title": f"{thread.get('topic_type', '')} {thread.get('topic_ref') or ''}".strip(),
+        "body": message.get("body") or "",
+    }
+
+
+def _all_documents():
+    """Build every document from the current stores."""
+    docs = [_lease_document(lease) for lease in storage._load_all_leases().get("leases", [])]
+    thread_data = storage._load_all_threads()
+    threads = {t["id"]: t for t in thread_data.get("threads", [])}
+    for message in thread_data.get("messages", []):
+        thread = threads.get(message.get("thread_id"))
+        if thread and message.get("body"):
+            docs.append(_message_document(message, thread))
+    # Archiving rewrites threads.json, so this runs after every archive pass
+    for thread, messages in iter_archived_threads():
+        if thread.get("id") in threads:
+            continue
+        docs.extend(_message_document(m, thread) for m in messages if m.get("body"))
+    return docs
+
+
+def _current_stamps():
+    return {store: storage._store_stamp(store) for store in _INDEXED_STORES}
+
+
+def _query_tokens(query):
+    return [t.lower() for t in _TOKEN_RE.findall(query or "")][:16]
+
+
+def _mark_html(text):
+    """HTML-escape a snippet and turn its markers into <mark> tags."""
+    return (html.escape(text)
+            .replace(_MARK_START, "<mark>")
+            .replace(_MARK_END, "</mark>"))
+
+
+# ----------------------------------------------------------------
+# SQLite FTS5 backend
+# ----------------------------------------------------------------
+# One connection per call: sqlite3 connections are cheap to open and
+# this keeps worker threads and forked processes independent.
+
+def _index_path():
+    return os.path.join(storage.DATA_DIR, SEARCH_INDEX_FILE)
+
+
+def _connect():
+    # unicode61 without porter: FTS5 does not stem prefix queries, so
+    # "escalat*" would miss a stemmed "escal" token
+    conn = sqlite3.connect(_index_path(), timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_docs USING fts5("
+        "kind UNINDEXED, doc_id UNINDEXED, lease_group_id UNINDEXED, ref UNINDEXED, "
+        "title, body, tokenize = 'unicode61 remove_diacritics 2')")
+    conn.execute("CREATE TABLE IF NOT EXISTS search_meta (store TEXT PRIMARY KEY, stamp TEXT)")
+    return conn
+
+
+def _fts_upsert(conn, doc):
+    conn.execute("DELETE FROM search_docs WHERE doc_id = ?", (doc["doc_id"],))
+    conn.execute(
+        "INSERT INTO search_docs (kind, doc_id, lease_group_id, ref, title, body) "
+        "VALUES (:kind, :doc_id, :lease_group_id, :ref, :title, :body)", doc)
+
+
+def _fts_record_stamps(conn, stores):
+    stamps = _current_stamps()
+    conn.executemany("INSERT OR REPLACE INTO search_meta (store, stamp) VALUES (?, ?)",
+                     [(store, stamps[store]) for store in stores])
+
+
+def _fts_advance_stamp(conn, store, before, after):
+    """Record `after` for store if the index was current at `before`;
+    otherwise drop the store's stamp so the next search rebuilds."""
+    row = conn.execute("SELECT stamp FROM search_meta WHERE store = ?", (store,)).fetchone()
+    if before is not None and row is not None and row[0] in (before, after):
+        conn.execute("UPDATE search_meta SET stamp = ? WHERE store = ?", (after, store))
+    else:
+        conn.execute("DELETE FROM search_meta WHERE store = ?", (store,))
+
+
+def _fts_is_current(conn):
+    recorded = dict(conn.execute("SELECT store, stamp FROM search_meta"))
+    return recorded == _current_stamps()
+
+
+def _fts_rebuild(conn):
+    with conn:
+        conn.execute("DELETE FROM search_docs")
+        for doc in _all_documents():
+            _fts_upsert(conn, doc)
+        _fts_record_stamps(conn, _INDEXED_STORES)
+        conn.execute("INSERT INTO search_docs (search_docs) VALUES ('optimize')")
+
+
+def _fts_search(conn, tokens, limit):
+    match = " ".join(f'"{t}"' for t in tokens[:-1]) + f' "{tokens[-1]}"*'
+    rows = conn.execute(
+        "SELECT kind, doc_id, lease_group_id, ref, title, "
+        "snippet(search_docs, 5, ?, ?, '…', ?), "
+        "bm25(search_docs, 0, 0, 0, 0, ?, 1.0) AS rank "
+        "FROM search_docs WHERE search_docs MATCH ? ORDER BY rank LIMIT ?",
+        (_MARK_START, _MARK_END, _SNIPPET_TOKENS, _TITLE_WEIGHT, match, limit)).fetchall()
+    return [_hit(kind, doc_id, group, ref, title, snippet, -rank)
+            for kind, doc_id, group, ref, title, snippet, rank in rows]
+
+
+# ----------------------------------------------------------------
+# Pure-Python fallback (no FTS5)
+# ----------------------------------------------------------------
+
+class _MemoryIndex:
+    """Inverted index {token: {doc_id: weighted tf}} with BM25 scoring."""
+
+    K1, B = 1.2, 0.75
+
+    def __init__(self, docs):
+        self.docs = {}
+        self.postings = {}
+        self.lengths = {}
+        for doc in docs:
+            self.add(doc)
+
+    def add(self, doc):
+        doc_id = doc["doc_id"]
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        self.docs[doc_id] = doc
+        counts = {}
+        for token in _TOKEN_RE.findall(doc["title"].lower()):
+            counts[token] = counts.get(token, 0) + _TITLE_WEIGHT
+        for token in _TOKEN_RE.findall(doc["body"].lower()):
+            counts[token] = counts.get(token, 0) + 1
+        self.lengths[doc_id] = sum(counts.values())
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[doc_id] = tf
+
+    def remove(self, doc_id):
+        self.docs.pop(doc_id, None)
+        self.lengths.pop(doc_id, None)
+        for token in [t for t, docs in self.postings.items() if doc_id in docs]:
+            del self.postings[token][doc_id]
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def _matching(self, token, prefix):
+        if not prefix:
+            return self.postings.get(token, {})
+        merged = {}
+        for candidate, docs in self.postings.items():
+            if candidate.startswith(token):
+                for doc_id, tf in docs.items():
+                    merged[doc_id] = merged.get(doc_id, 0) + tf
+        return merged
+
+    def search(self, tokens, limit):
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_len = sum(self.lengths.values()) / n
+        scores = None
+        for i, token in enumerate(tokens):
+            postings = self._matching(token, prefix=(i == len(tokens) - 1))
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            token_scores = {}
+            for doc_id, tf in postings.items():
+                norm = tf + self.K1 * (1 - self.B + self.B * self.lengths[doc_id] / avg_len)
+                token_scores[doc_id] = idf * tf * (self.K1 + 1) / norm
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        hits = []
+        for doc_id, score in ranked:
+            doc = self.docs[doc_id]
+            hits.append(_hit(doc["kind"], doc_id, doc["lease_group_id"], doc["ref"],
+                             doc["title"], _memory_snippet(doc["body"], tokens), score))
+        return hits
+
+
+def _memory_snippet(text, tokens):
+    """Return ~_SNIPPET_TOKENS words around the first query-token match."""
+    words = text.split()
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in tokens) + r")", re.IGNORECASE)
+    first = next((i for i, w in enumerate(words) if pattern.search(w)), 0)
+    start = max(0, first - _SNIPPET_TOKENS // 4)
+    window = words[start:start + _SNIPPET_TOKENS]
+    snippet = pattern.sub(lambda m: _MARK_START + m.group(0) + _MARK_END, " ".join(window))
+    return ("…" if start else "") + snippet + ("…" if start + _SNIPPET_TOKENS < len(words) else "")
+
+
+_memory_index = None
+_memory_stamps = None
+_memory_lock = threading.Lock()
+
+
+def _memory_current():
+    """Return the in-memory index, rebuilding it if the stores changed."""
+    global _memory_index, _memory_stamps
+    with _memory_lock:
+        stamps = _current_stamps()
+        if _memory_index is None or stamps != _memory_stamps:
+            _memory_index = _MemoryIndex(_all_documents())
+            _memory_stamps = stamps
+        return _memory_index
+
+
+# ----------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------
+
+def _hit(kind, doc_id, lease_group_id, ref, title, snippet, score):
+    hit = {
+        "kind": kind,
+        "lease_group_id": lease_group_id,
+        "title": title,
+        "snippet_html": _mark_html(snippet or ""),
+        "score": round(score, 4),
+    }
+    if kind == "lease":
+        hit.update({"lease_id": doc_id, "version": int(ref) if ref and ref.isdigit() else None})
+    else:
+        hit.update({"message_id": doc_id, "thread_id": ref})
+    return hit
+
+
+def _update(docs, store):
+    """Apply incremental document upserts after a write to `store`.
+
+    Runs once the write has committed (after its unit of work, if any).
+    Best effort: a failure only means the next search rebuilds.
+    """
+    storage.after_commit(store, lambda before, after: _apply_update(docs, store, before, after))
+
+
+def _apply_update(docs, store, before, after):
+    if FTS5_AVAILABLE:
+        try:
+            with closing(_connect()) as conn, conn:
+                for doc in docs:
+                    _fts_upsert(conn, doc)
+                _fts_advance_stamp(conn, store, before, after)
+        except sqlite3.Error as e:
+            print(f"[WARNING] Search index update failed: {e}")
+        return
+
+    global _memory_index, _memory_stamps
+    with _memory_lock:
+        if _memory_index is None:
+            return
+        if before is not None and _memory_stamps.get(store) in (before, after):
+            for doc in docs:
+                _memory_index.add(doc)
+            _memory_stamps = {**_memory_stamps, store: after}
+        else:
+            _memory_index, _memory_stamps = None, None
+
+
+def index_lease(lease):
+    """Index (or re-index) one lease version after it was saved."""
+    _update([_lease_document(lease)], "leases")
+
+
+def index_message(message, thread):
+    """Index a thread message after it was saved."""
+    index_messages([(message, thread)])
+
+
+def index_messages(items):
+    """Index messages written by one threads save.
+
+    Args:
+        items: [(message, thread)] for the messages that save added
+    """
+    _update([_message_document(m, t) for m, t in items if m.get("body")], "threads")
+
+
+def rebuild_index():
+    """Rebuild the whole index from the stores.
+
+    Returns:
+        int: number of documents indexed
+    """
+    global _memory_index, _memory_stamps
+    if FTS5_AVAILABLE:
+        with closing(_connect()) as conn:
+            _fts_rebuild(conn)
+            return conn.execute("SELECT count(*) FROM search_docs").fetchone()[0]
+    with _memory_lock:
+        _memory_index, _memory_stamps = None, None
+    return len(_memory_current().docs)
+
+
+def search(query, limit=SEARCH_DEFAULT_LIMIT):
+    """Search leases and messages.
+
+    All query words must match; the last one also matches as a prefix
+    ("esc" finds "escalation").
+
+    Args:
+        query: free text
+        limit: maximum hits (capped at SEARCH_MAX_LIMIT)
+
+    Returns:
+        dict: {"query", "backend", "took_ms", "hits": [...]}, hits best
+              first, each with kind, lease_group_id, title, snippet_html
+              (escaped, matches in <mark>), score, and lease_id/version
+              or message_id/thread_id
+    """
+    start = time.perf_counter()
+    tokens = _query_tokens(query)
+    limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+    hits = []
+    if tokens:
+        if FTS5_AVAILABLE:
+            with closing(_connect()) as conn:
+                if not _fts_is_current(conn):
+                    _fts_rebuild(conn)
+                hits = _fts_search(conn, tokens, limit)
+        else:
+            hits = _memory_current().search(tokens, limit)
+    return {
+        "query": query,
+        "backend": "fts5" if FTS5_AVAILABLE else "memory",
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        "hits": hits,
+    }
@@ -0,0 +1,1791 @@
+"""
+JSON store layer: file locations, codec, cross-process locking,
+revisions, the optional per-lease-group sharded layout, unit of work,
+per-store load/save helpers, schema migrations, and the uploads folder.
+
+Imports only the standard library, the optional JSON codecs and
+mapmylease.observability — never Flask views, OCR or AI packages.
+"""
+
+import os
+import json
+from datetime import datetime
+import re
+import uuid
+import hashlib
+import tempfile
+import shutil
+import fcntl
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from werkzeug.utils import secure_filename
+
+from mapmylease.observability import _request_io, _timed, STORE_IO_BYTES
+
+# Faster JSON codecs for the data stores (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# Repository root: default home of the JSON stores and uploads/
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ----------------------------------------------------------------
+# Data store locations
+# ----------------------------------------------------------------
+# Every JSON store lives in DATA_DIR (the project directory unless
+# MAPMYLEASE_DATA_DIR is set). Load/save helpers resolve their paths
+# through _store_path() so the location is decided in one place.
+# ----------------------------------------------------------------
+
+DATA_DIR = os.environ.get("MAPMYLEASE_DATA_DIR") or PROJECT_DIR
+
+STORE_FILES = {
+    "leases": "lease_data.json",
+    "payments": "payment_data.json",
+    "tenant_access": "tenant_access.json",
+    "threads": "threads.json",
+    "terminations": "termination_data.json",
+}
+
+
+def _store_path(store, suffix=".json"):
+    """Return the on-disk path for a named store.
+
+    For a store in the sharded layout this is its head file under
+    groups/ (see "Per-lease-group sharded layout"); lock files always
+    stay in DATA_DIR.
+
+    Args:
+        store: key in STORE_FILES (e.g. "leases", "threads")
+        suffix: ".json" for the live file, ".tmp" for the atomic-write temp
+
+    Returns:
+        str: absolute path inside DATA_DIR
+    """
+    if suffix != ".lock" and _is_sharded(store):
+        return os.path.join(_groups_dir(), os.path.splitext(STORE_FILES[store])[0] + suffix)
+    return _single_store_path(store, suffix)
+
+
+def _single_store_path(store, suffix=".json"):
+    """Return a store's path in the single-file layout, whatever the current layout."""
+    base = os.path.splitext(STORE_FILES[store])[0]
+    return os.path.join(DATA_DIR, base + suffix)
+
+
+def _store_stamp(store):
+    """Return a cheap version stamp for a store without reading it.
+
+    Every save goes through os.replace, so a new inode / mtime / size
+    identifies a new version of the file. A missing file stamps as "0".
+
+    Returns:
+        str: "<inode>-<mtime_ns>-<size>" or "0"
+    """
+    try:
+        st = os.stat(_store_path(store))
+    except OSError:
+        return "0"
+    return f"{st.st_ino}-{st.st_mtime_ns}-{st.st_size}"
+
+
+# ----------------------------------------------------------------
+# Store serialisation (codec)
+# ----------------------------------------------------------------
+# Stores are written compact by default; set MAPMYLEASE_PRETTY_JSON=1
+# to keep the old indent=2 layout on disk. For humans, use
+# `flask --app app export-json` to get pretty copies instead.
+#
+# MAPMYLEASE_JSON_CODEC picks the encoder/decoder:
+#   "auto"    orjson if installed, else msgspec, else stdlib (default)
+#   "orjson" / "msgspec" / "json"  force one (falls back to stdlib
+#                                   if the package is not installed)
+# All codecs read each other's output — files stay plain JSON.
+# ----------------------------------------------------------------
+
+STORE_PRETTY_JSON = os.environ.get("MAPMYLEASE_PRETTY_JSON", "").lower() in ("1", "true", "yes")
+
+
+def _resolve_store_codec(requested):
+    """Return the codec name actually usable for a requested codec."""
+    if requested in ("auto", "orjson") and ORJSON_AVAILABLE:
+        return "orjson"
+    if requested in ("auto", "msgspec") and MSGSPEC_AVAILABLE:
+        return "msgspec"
+    return "json"
+
+
+STORE_CODEC = _resolve_store_codec(os.environ.get("MAPMYLEASE_JSON_CODEC", "auto"))
+
+
+def _codec_dumps(obj, pretty=None):
+    """Encode a store to UTF-8 JSON bytes with the configured codec."""
+    if pretty is None:
+        pretty = STORE_PRETTY_JSON
+    if STORE_CODEC == "orjson":
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if STORE_CODEC == "msgspec" and not pretty:
+        return msgspec.json.encode(obj)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _codec_loads(content):
+    """Decode JSON bytes/str with the configured codec.
+
+    Raises:
+        json.JSONDecodeError: for invalid input, whatever the codec
+    """
+    _request_io.parses = getattr(_request_io, "parses", 0) + 1
+    if STORE_CODEC == "orjson":
+        return orjson.loads(content)  # orjson.JSONDecodeError subclasses it
+    if STORE_CODEC == "msgspec":
+        try:
+            return msgspec.json.decode(content)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), "", 0) from e
+    return json.loads(content)
+
+
+# ----------------------------------------------------------------
+# Cross-process store locking and optimistic concurrency
+# ----------------------------------------------------------------
+# Several worker processes (e.g. gunicorn -w N) may share DATA_DIR.
+# Two mechanisms keep read-modify-write cycles from losing updates:
+#
+#   1. store_lock(*stores) — exclusive fcntl.flock on a sidecar
+#      "<store>.lock" file, held across load → modify → save.
+#      Locks are taken in STORE_FILES order and are reentrant
+#      within a thread, so nested helpers never self-deadlock.
+#
+#   2. A top-level "revision" counter in every store. A save only
+#      succeeds if the on-disk revision still equals the revision
+#      that was loaded; otherwise StoreConflict is raised and
+#      _retry_on_conflict re-runs the whole load → modify → save.
+#
+# Plain reads take no lock: os.replace guarantees a reader always
+# sees a complete file.
+# ----------------------------------------------------------------
+
+STORE_LOCK_TIMEOUT = 30        # seconds, for out-of-order acquisition
+STORE_CONFLICT_RETRIES = 5
+
+_STORE_ORDER = {name: i for i, name in enumerate(STORE_FILES)}
+_held_locks = threading.local()
+_REVISION_HEAD = re.compile(rb'\A\s*\{\s*"revision"\s*:\s*(\d+)')
+
+
+class StoreConflict(Exception):
+    """Raised when a store changed on disk since it was loaded."""
+
+
+class StoreLockTimeout(Exception):
+    """Raised when a store lock could not be acquired in time."""
+
+
+def _acquire_store_lock(store, ordered):
+    """Open and flock one store's lock file. Returns the open fd."""
+    fd = os.open(_store_path(store, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if ordered:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return fd
+        # Out of canonical order: poll so two such callers cannot
+        # deadlock forever.
+        deadline = time.monotonic() + STORE_LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise StoreLockTimeout(store)
+                time.sleep(0.01)
+    except BaseException:
+        os.close(fd)
+        raise
+
+
+@contextmanager
+def store_lock(*stores):
+    """Hold exclusive cross-process locks on one or more stores.
+
+    Usable as a context manager or a decorator. Reentrant per thread:
+    stores already held by this thread are skipped.
+
+    Args:
+        *stores: STORE_FILES keys (e.g. "payments", "threads")
+    """
+    held = getattr(_held_locks, "fds", None)
+    if held is None:
+        held = _held_locks.fds = {}
+
+    acquired = []
+    try:
+        for store in sorted(set(stores), key=_STORE_ORDER.__getitem__):
+            if store in held:
+                continue
+            ordered = all(_STORE_ORDER[h] < _STORE_ORDER[store] for h in held)
+            held[store] = _acquire_store_lock(store, ordered)
+            acquired.append(store)
+        yield
+    finally:
+        for store in reversed(acquired):
+            fd = held.pop(store)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _retry_on_conflict(func):
+    """Re-run a locked read-modify-write function on StoreConflict."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(STORE_CONFLICT_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except StoreConflict:
+                if attempt == STORE_CONFLICT_RETRIES - 1:
+                    raise
+                time.sleep(0.005 * (attempt + 1))
+    return wrapper
+
+
+def _disk_revision(store):
+    """Return the revision currently on disk (0 if missing/unreadable).
+
+    Saves always write "revision" as the first key, so the common case
+    reads only the first few bytes of the file.
+    """
+    try:
+        with open(_store_path(store), "rb") as f:
+            match = _REVISION_HEAD.match(f.read(64))
+            if match:
+                return int(match.group(1))
+            f.seek(0)
+            data = _codec_loads(f.read() or b"{}")
+    except (OSError, ValueError):
+        return 0
+    return data.get("revision", 0) if isinstance(data, dict) else 0
+
+
+def _serialise_store(store, data, revision):
+    """Serialise a store dict with "revision" and "schema_version" first.
+
+    Data without a schema_version was built by current code (e.g. the
+    empty default for a missing file), so it is stamped as current.
+    """
+    payload = {"revision": revision,
+               "schema_version": data.get("schema_version", SCHEMA_VERSIONS[store])}
+    payload.update((k, v) for k, v in data.items()
+                   if k not in ("revision", "schema_version"))
+    return _codec_dumps(payload)
+
+
+def _commit_store_bytes(store, content):
+    """Write serialised store bytes: tmp file + fsync + os.replace.
+
+    Caller must hold store_lock(store). In the sharded layout the bytes
+    are split into per-group shards by _commit_sharded().
+
+    Returns:
+        bool: True on success, False on failure
+    """
+    if _is_sharded(store):
+        data = _codec_loads(content)
+        return _commit_sharded(store, data, data.get("revision", 0))
+
+    json_path = _store_path(store)
+    tmp_path = _store_path(store, ".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        _request_io.fsyncs = getattr(_request_io, "fsyncs", 0) + 1
+        STORE_IO_BYTES.observe(len(content), store, "write")
+
+        os.replace(tmp_path, json_path)
+        return True
+    except (IOError, OSError) as e:
+        print(f"[WARNING] Failed to save {STORE_FILES[store]}: {e}")
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return False
+
+
+def _write_store(store, data):
+    """Atomically write a store after checking its revision.
+
+    Takes the store's lock (reentrant) for the check-and-replace. On
+    success data["revision"] is bumped in place, so the caller may save
+    the same dict again. Inside a unit_of_work() that covers this store
+    the write is staged and committed once when the unit ends.
+
+    Returns:
+        bool: True on success, False on I/O failure
+
+    Raises:
+        StoreConflict: if the file changed since data was loaded
+    """
+    loaded_revision = data.get("revision", 0)
+
+    staged = getattr(_uow_local, "staged", None)
+    if staged is not None and store in _uow_local.stores:
+        # Revisions are checked again under the lock at commit.
+        if store in staged:
+            if loaded_revision != staged[store][1]:
+                raise StoreConflict(store)
+            new_revision = loaded_revision
+        else:
+            if _disk_revision(store) != loaded_revision:
+                raise StoreConflict(store)
+            new_revision = loaded_revision + 1
+        staged[store] = (_serialise_store(store, data, new_revision), new_revision)
+        data["revision"] = new_revision
+        return True
+
+    with store_lock(store):
+        if _disk_revision(store) != loaded_revision:
+            raise StoreConflict(store)
+        before = _store_stamp(store)
+        if _is_sharded(store):
+            committed = _commit_sharded(store, data, loaded_revision + 1)
+        else:
+            committed = _commit_store_bytes(store, _serialise_store(store, data, loaded_revision + 1))
+        if not committed:
+            return False
+        _last_commit(store, (before, _store_stamp(store)))
+
+    data["revision"] = loaded_revision + 1
+    return True
+
+
+def _read_store_bytes(store):
+    """Return a store's current JSON bytes, or None if it does not exist.
+
+    Sees writes staged by the current thread's unit_of_work(), so a
+    load after a save inside the unit reads its own writes.
+    """
+    staged = getattr(_uow_local, "staged", None)
+    if staged is not None and store in staged:
+        return staged[store][0]
+
+    if _is_sharded(store):
+        data = _read_sharded_store(store)
+        if data is None:
+            return None
+        return _serialise_store(store, data, data.get("revision", 0))
+
+    json_path = _store_path(store)
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, "rb") as f:
+        content = f.read()
+    STORE_IO_BYTES.observe(len(content), store, "read")
+    return content
+
+
+def _read_store(store):
+    """Return a store decoded, or None if it is missing or empty.
+
+    Like _read_store_bytes() (sees staged writes), but a sharded store
+    is assembled straight from its shards without a round trip through
+    bytes.
+
+    Raises:
+        json.JSONDecodeError: if the file (or a shard) is not valid JSON
+        OSError: if a shard is missing or fails its digest
+    """
+    staged = getattr(_uow_local, "staged", None)
+    if (staged is None or store not in staged) and _is_sharded(store):
+        return _read_sharded_store(store)
+    content = _read_store_bytes(store)
+    if not content or not content.strip():
+        return None
+    return _codec_loads(content)
+
+
+# ----------------------------------------------------------------
+# Per-lease-group sharded layout (optional)
+# ----------------------------------------------------------------
+# By default every store is one file in DATA_DIR. When the directory
+# DATA_DIR/groups/ exists, the leases, payments and threads stores are
+# instead kept per lease group:
+#
+#     groups/lease_data.json            head: revision, schema_version,
+#     groups/payment_data.json            {lease_group_id: shard digest},
+#     groups/threads.json                 other top-level keys
+#     groups/<lease_group_id>/lease.<digest>.json
+#     groups/<lease_group_id>/payments.<digest>.json
+#     groups/<lease_group_id>/threads.<digest>.json
+#
+# The heads double as the global lease-group list; tenant_access.json
+# (the token index) and termination_data.json stay single files.
+#
+# Locks, revisions and the load/save helpers are unchanged and still
+# per store. Shard files are named by the digest of their content and
+# never overwritten: a commit writes new files for the groups whose
+# bytes changed, then the head, which names every group's digest. The
+# head write is the commit point — until it lands readers still see
+# the old head and the old shards, so a failed or interrupted commit
+# leaves only unreferenced files. Superseded shards are removed after
+# the head is written. The head's stamp is the store's stamp.
+# _load_group_records() reads one group's shard only.
+#
+# A reader that finds a shard gone (a commit removed it after the
+# reader took the head) re-reads the head and retries. A shard that is
+# still missing or fails its digest after retries is corrupt: the read
+# raises OSError, which the loaders treat like an unreadable file.
+#
+# Switch layouts with `flask --app app convert-layout sharded|single`
+# while the app is stopped.
+# ----------------------------------------------------------------
+
+GROUPS_DIRNAME = "groups"
+
+SHARD_FILES = {
+    "leases": "lease.json",
+    "payments": "payments.json",
+    "threads": "threads.json",
+}
+
+# Top-level list keys of each sharded store, split by lease group
+_SHARD_RECORD_KEYS = {
+    "leases": ("leases",),
+    "payments": ("confirmations",),
+    "threads": ("threads", "messages", "deliveries"),
+}
+
+# Shard for records without a lease_group_id (or orphan messages)
+_UNGROUPED = "_ungrouped"
+
+SHARD_READ_RETRIES = 3
+
+
+def _groups_dir():
+    return os.path.join(DATA_DIR, GROUPS_DIRNAME)
+
+
+def _is_sharded(store):
+    """True if `store` is currently kept in the sharded layout."""
+    return store in SHARD_FILES and os.path.isdir(_groups_dir())
+
+
+def store_layout():
+    """Return "sharded" or "single" for the current DATA_DIR."""
+    return "sharded" if os.path.isdir(_groups_dir()) else "single"
+
+
+def _shard_dir(lease_group_id, root=None):
+    return os.path.join(root or _groups_dir(), secure_filename(str(lease_group_id)) or _UNGROUPED)
+
+
+def _shard_path(store, lease_group_id, digest, root=None):
+    name, ext = os.path.splitext(SHARD_FILES[store])
+    return os.path.join(_shard_dir(lease_group_id, root), f"{name}.{digest}{ext}")
+
+
+def _remove_stale_shards(store, lease_group_id, keep, root=None):
+    """Remove a group's shard files for `store` other than `keep` (a
+    digest, or None to remove them all and the emptied directory)."""
+    directory = _shard_dir(lease_group_id, root)
+    name, ext = os.path.splitext(SHARD_FILES[store])
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return
+    for entry in entries:
+        if (entry.startswith(name + ".") and entry.endswith(ext)
+                and entry != f"{name}.{keep}{ext}"):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+    if keep is None:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+
+def _shard_digest(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _partition_store(store, data):
+    """Split a store's records by lease group.
+
+    Messages carry no lease_group_id; they follow their thread.
+
+    Returns:
+        dict: {lease_group_id: {record_key: [...]}}
+    """
+    keys = _SHARD_RECORD_KEYS[store]
+    groups = {}
+
+    def bucket(gid):
+        return groups.setdefault(gid or _UNGROUPED, {key: [] for key in keys})
+
+    for key in keys:
+        if key == "messages":
+            continue
+        for record in data.get(key) or []:
+            bucket(record.get("lease_group_id"))[key].append(record)
+    if store == "threads":
+        group_of = {t.get("id"): t.get("lease_group_id") for t in data.get("threads") or []}
+        for message in data.get("messages") or []:
+            bucket(group_of.get(message.get("thread_id")))["messages"].append(message)
+    return groups
+
+
+def _write_file_atomic(path, content):
+    """tmp file + fsync + os.replace; raises OSError on failure."""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _request_io.fsyncs = getattr(_request_io, "fsyncs", 0) + 1
+
+
+def _read_head(store, root=None):
+    path = os.path.join(root or _groups_dir(), STORE_FILES[store])
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    STORE_IO_BYTES.observe(len(content), store, "read")
+    return _codec_loads(content) if content.strip() else None
+
+
+def _commit_sharded(store, data, revision, root=None):
+    """Write a store in the sharded layout: new shards, then the head.
+
+    Nothing a reader can see changes until the head is replaced; if
+    any write fails, the shards this call created are removed again.
+
+    Caller must hold store_lock(store).
+
+    Args:
+        store: key in SHARD_FILES
+        data: the whole store, decoded
+        revision: revision to record in the head
+        root: groups directory to write (default: the live one)
+
+    Returns:
+        bool: True on success, False on failure
+    """
+    root = root or _groups_dir()
+    schema_version = data.get("schema_version", SCHEMA_VERSIONS[store])
+    try:
+        old_head = _read_head(store, root) or {}
+    except json.JSONDecodeError:
+        old_head = {}
+    old_digests = old_head.get("groups") or {}
+
+    digests = {}
+    created = []
+    written = 0
+    try:
+        for gid, records in _partition_store(store, data).items():
+            shard = {"schema_version": schema_version, "lease_group_id": gid}
+            shard.update(records)
+            content = _codec_dumps(shard)
+            digests[gid] = _shard_digest(content)
+            path = _shard_path(store, gid, digests[gid], root)
+            if old_digests.get(gid) == digests[gid] or os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_file_atomic(path, content)
+            created.append(path)
+            written += len(content)
+
+        keys = _SHARD_RECORD_KEYS[store]
+        head = {"revision": revision, "schema_version": schema_version, "groups": digests,
+                "extra": {k: v for k, v in data.items()
+                          if k not in keys and k not in ("revision", "schema_version")}}
+        content = _codec_dumps(head)
+        _write_file_atomic(os.path.join(root, STORE_FILES[store]), content)
+        STORE_IO_BYTES.observe(written + len(content), store, "write")
+    except (IOError, OSError) as e:
+        print(f"[WARNING] Failed to save sharded {STORE_FILES[store]}: {e}")
+        for path in created:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return False
+
+    for gid in set(old_digests) | set(digests):
+        if old_digests.get(gid) != digests.get(gid):
+            _remove_stale_shards(store, gid, digests.get(gid), root)
+    return True
+
+
+def _read_shard(store, gid, digest, root=None):
+    """Return (shard dict, digest matched) for one group's shard;
+    (None, False) if the file is gone."""
+    try:
+        with open(_shard_path(store, gid, digest, root), "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None, False
+    STORE_IO_BYTES.observe(len(content), store, "read")
+    if _shard_digest(content) != digest:
+        return None, False
+    return _codec_loads(content), True
+
+
+def _read_sharded_store(store, groups=None, root=None):
+    """Assemble a sharded store (or some of its groups) from disk.
+
+    Args:
+        store: key in SHARD_FILES
+        groups: lease_group_ids to read (default: all)
+        root: groups directory to read (default: the live one)
+
+    Returns:
+        dict in the single-file shape, or None if the store has no head
+
+    Raises:
+        OSError: if a shard the head names is missing or corrupt
+    """
+    for attempt in range(SHARD_READ_RETRIES):
+        head = _read_head(store, root)
+        if head is None:
+            return None
+        digests = head.get("groups") or {}
+        wanted = digests if groups is None else [g for g in groups if g in digests]
+
+        data = {"revision": head.get("revision", 0),
+                "schema_version": head.get("schema_version", 0)}
+        data.update(head.get("extra") or {})
+        for key in _SHARD_RECORD_KEYS[store]:
+            data[key] = []
+        bad = []
+        for gid in wanted:
+            shard, matched = _read_shard(store, gid, digests[gid], root)
+            if not matched:
+                bad.append(gid)
+                continue
+            for key in _SHARD_RECORD_KEYS[store]:
+                data[key].extend(shard.get(key) or [])
+        if not bad:
+            return data
+        if attempt < SHARD_READ_RETRIES - 1:
+            time.sleep(0.005 * (attempt + 1))
+    print(f"[WARNING] {STORE_FILES[store]}: shards missing or corrupt for "
+          f"{', '.join(map(str, bad))}")
+    raise OSError(f"{STORE_FILES[store]}: shards missing or corrupt for {', '.join(map(str, bad))}")
+
+
+def _load_group_records(store, lease_group_id):
+    """Load one lease group's records from leases, payments or threads.
+
+    In the sharded layout this reads the head and that group's shard
+    only; otherwise it loads the whole store and filters. Read-only:
+    never save the result back.
+
+    Args:
+        store: "leases", "payments" or "threads"
+        lease_group_id: str
+
+    Returns:
+        dict in the store's shape, holding only that group's records
+        ({"leases": [...]}, {"confirmations": [...]} or
+        {"threads": [...], "messages": [...]})
+    """
+    staged = getattr(_uow_local, "staged", None)
+    if _is_sharded(store) and (staged is None or store not in staged):
+        try:
+            data = _read_sharded_store(store, groups=[lease_group_id])
+        except (json.JSONDecodeError, OSError):
+            data = None
+        if data is None:
+            return {key: [] for key in _SHARD_RECORD_KEYS[store]}
+        if data.get("schema_version", 0) < SCHEMA_VERSIONS[store]:
+            data = _upgrade_store(store, data)
+        return data
+
+    data = _STORE_LOADERS[store]()
+    partition = _partition_store(store, data).get(lease_group_id)
+    return partition or {key: [] for key in _SHARD_RECORD_KEYS[store]}
+
+
+def convert_store_layout(target):
+    """Convert leases, payments and threads between the two layouts.
+
+    Holds the three stores' locks throughout and bumps each revision,
+    so a process still holding data loaded before the switch gets
+    StoreConflict instead of overwriting. Run with the app stopped.
+
+    Args:
+        target: "sharded" or "single"
+
+    Returns:
+        dict: {store: number of lease groups} for the stores converted
+              (empty if DATA_DIR is already in the target layout)
+
+    Raises:
+        ValueError: for an unknown target
+    """
+    if target not in ("sharded", "single"):
+        raise ValueError(f"unknown layout {target!r}")
+    if store_layout() == target:
+        return {}
+
+    converted = {}
+    groups_dir = _groups_dir()
+    with store_lock(*SHARD_FILES):
+        if target == "sharded":
+            build_dir = groups_dir + ".tmp"
+            shutil.rmtree(build_dir, ignore_errors=True)
+            os.makedirs(build_dir)
+            for store in SHARD_FILES:
+                data = _read_store(store) or {}
+                if not _commit_sharded(store, data, data.get("revision", 0) + 1, root=build_dir):
+                    shutil.rmtree(build_dir, ignore_errors=True)
+                    raise OSError(f"could not write sharded {STORE_FILES[store]}")
+                converted[store] = len(_partition_store(store, data))
+            os.replace(build_dir, groups_dir)
+            for store in SHARD_FILES:
+                try:
+                    os.remove(_single_store_path(store))
+                except OSError:
+                    pass
+        else:
+            for store in SHARD_FILES:
+                data = _read_sharded_store(store) or {}
+                converted[store] = len(_partition_store(store, data))
+                _write_file_atomic(_single_store_path(store),
+                                   _serialise_store(store, data, data.get("revision", 0) + 1))
+            retired = groups_dir + ".old"
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(groups_dir, retired)
+            shutil.rmtree(retired, ignore_errors=True)
+    return converted
+
+
+# ----------------------------------------------------------------
+# Unit of work (one fsync per store per request)
+# ----------------------------------------------------------------
+# A request that calls several write helpers on the same store (the
+# dashboard engine pipeline, ensure_thread_exists + add_message_...)
+# would otherwise pay a full serialise + fsync + rename per call.
+#
+#     with unit_of_work("threads") as unit:
+#         ...any number of _save_threads_file() calls...
+#     if not unit.ok:
+#         ...nothing (or not everything) was written...
+#
+# Saves are staged in memory (loads see them) and each dirty store is
+# written exactly once on exit. A save inside the unit returns True
+# once staged, so callers check unit.ok, not the save's return value.
+# If the block raises, staged writes are discarded and nothing is
+# written.
+#
+# By default locks for the named stores are taken up front in
+# canonical order and held for the whole unit. With hold_locks=False
+# (long passes such as the dashboard pipeline) each helper takes its
+# own lock as usual and the unit locks only to commit; a store written
+# by someone else since it was first staged is then not committed
+# (unit.ok is False) and the caller re-runs or re-reads.
+#
+# Units do not nest; a save to a store the unit does not name is
+# written immediately as usual.
+# ----------------------------------------------------------------
+
+_uow_local = threading.local()
+_commit_local = threading.local()
+
+
+def _last_commit(store, stamps=None):
+    """Set or (stamps=None) take this thread's latest commit of store:
+    (stamp before, stamp after), or None."""
+    commits = getattr(_commit_local, "commits", None)
+    if commits is None:
+        commits = _commit_local.commits = {}
+    if stamps is None:
+        return commits.pop(store, None)
+    commits[store] = stamps
+    return stamps
+
+
+def after_commit(store, callback):
+    """Run callback(before, after) for the save this thread just made.
+
+    before / after are the store's stamps (_store_stamp) around the
+    commit, so derived data (the search index) can tell whether it saw
+    every write up to `before`. Inside a unit_of_work() covering the
+    store the call waits for the unit's commit and is dropped if the
+    unit fails; with no commit to report it gets (None, None).
+    """
+    if getattr(_uow_local, "staged", None) is not None and store in _uow_local.stores:
+        _uow_local.after_commit.append((store, callback))
+        return
+    callback(*(_last_commit(store) or (None, None)))
+
+
+class UnitOfWork:
+    """What a unit_of_work() wrote; filled in when the block exits.
+
+    Attributes:
+        ok: True if every staged store was committed (None until exit)
+        failed: STORE_FILES keys staged but not written, through an I/O
+                error or (hold_locks=False) a concurrent write
+    """
+
+    def __init__(self):
+        self.ok = None
+        self.failed = []
+
+
+@contextmanager
+def unit_of_work(*stores, hold_locks=True):
+    """Batch saves to the named stores into one commit per store.
+
+    Args:
+        *stores: STORE_FILES keys the block may write
+        hold_locks: hold the stores' locks for the whole block (default)
+                    rather than only while committing
+
+    Yields:
+        UnitOfWork: check .ok after the block
+    """
+    if getattr(_uow_local, "staged", None) is not None:
+        raise RuntimeError("unit_of_work() does not nest")
+
+    unit = UnitOfWork()
+    with store_lock(*(stores if hold_locks else ())):
+        _uow_local.stores = frozenset(stores)
+        _uow_local.staged = {}
+        _uow_local.after_commit = []
+        try:
+            yield unit
+            staged, callbacks = _uow_local.staged, _uow_local.after_commit
+        finally:
+            _uow_local.staged = None
+            _uow_local.stores = frozenset()
+            _uow_local.after_commit = []
+
+        committed = {}
+        with store_lock(*staged):       # already held unless hold_locks=False
+            for store in sorted(staged, key=_STORE_ORDER.__getitem__):
+                content, new_revision = staged[store]
+                if _disk_revision(store) != new_revision - 1:
+                    print(f"[WARNING] {STORE_FILES[store]} changed during the unit of work; "
+                          f"its staged writes were not committed")
+                    unit.failed.append(store)
+                    continue
+                before = _store_stamp(store)
+                if _commit_store_bytes(store, content):
+                    committed[store] = (before, _store_stamp(store))
+                else:
+                    unit.failed.append(store)
+    unit.ok = not unit.failed
+    for store, callback in callbacks:
+        if store in committed:
+            callback(*committed[store])
+
+
+@_timed("save:leases")
+def _save_lease_file(data):
+    """Atomically save lease data to JSON file.
+
+    Returns:
+        bool: True on success, False on failure
+
+    Raises:
+        StoreConflict: if the file changed since data was loaded
+    """
+    return _write_store("leases", data)
+
+
+# ----------------------------------------------------------------
+# PAYMENT CONFIRMATION SCHEMA (Phase 1 — LOCKED & AUTHORITATIVE)
+# ----------------------------------------------------------------
+# Each record in payment_data.json["confirmations"] follows this
+# structure. This schema is locked. Do NOT add, remove, or rename
+# fields without explicit scope approval.
+#
+# {
+#   "id":                       str (uuid4),
+#   "lease_group_id":           str (uuid4, links to lease group),
+#   "confirmation_type":        "rent" | "maintenance" | "utilities",
+#   "period_month":             int (1–12),
+#   "period_year":              int (YYYY),
+#   "amount_agreed":            number | null (rent only; null for others),
+#   "amount_declared":          number (required, positive),
+#   "tds_deducted":             number | null (null ≠ 0),
+#   "date_paid":                str (ISO date YYYY-MM-DD) | null,
+#   "proof_files":              list of str (relative file paths),
+#   "verification_status":      "unverified" (ALWAYS in Phase 1),
+#   "disclaimer_acknowledged":  str (ISO timestamp, required),
+#   "submitted_at":             str (ISO timestamp, server-generated),
+#   "submitted_via":            "tenant_link" | "landlord_manual",
+#   "notes":                    str | null
+# }
+#
+# Rules:
+# - The confirmations list is append-only: new records are added,
+#   existing records are NEVER modified or deleted
+# - Every record is frozen at creation — no field is changed after
+#   writing, including proof_files
+# - Corrections or missing proof: submit a NEW record
+# - Multiple submissions per month are allowed
+# - verification_status is always "unverified" in Phase 1
+# - amount_agreed comes from the lease; amount_declared from tenant
+# - Only "rent" type uses amount_agreed; others are declaration-only
+# - "Submitted" or "declared" never means "verified"
+# - tds_deducted: null = not provided; 0 = explicitly no TDS
+# - Period is determined solely by (period_month, period_year),
+#   NOT by date_paid or submitted_at
+# ----------------------------------------------------------------
+
+# ----------------------------------------------------------------
+# TENANT TOKEN SCHEMA (Phase 1 — LOCKED & AUTHORITATIVE)
+# ----------------------------------------------------------------
+# Each record in tenant_access.json["tenant_tokens"] follows this
+# structure. This schema is locked. Do NOT add, remove, or rename
+# fields without explicit scope approval.
+#
+# {
+#   "token":                    str (secrets.token_urlsafe(32), ~43 chars),
+#   "lease_group_id":           str (uuid4, links to lease group),
+#   "is_active":                bool (mutable — only access control field),
+#   "issued_at":                str (ISO timestamp),
+#   "revoked_at":               str (ISO timestamp) | null (write-once),
+#   "revoked_reason":           str | null (write-once),
+#   "last_used_at":             str (ISO timestamp) | null (mutable)
+# }
+#
+# Rules:
+# - token string IS the identifier (no separate id field)
+# - Tokens are bound to lease_group_id (survive renewals)
+# - At most ONE active token per lease_group_id at any time
+# - Landlord can revoke and regenerate tokens
+# - If tenant changes on renewal, landlord is prompted to decide
+# - Revoking a token NEVER deletes payment history
+# - Token validity: is_active == true (lease expiry does NOT affect validity in Phase 1)
+# - Anyone with the token can submit (no identity verification)
+# - Only is_active and last_used_at are mutable after creation
+# - revoked_at and revoked_reason are write-once (set at revocation)
+# ----------------------------------------------------------------
+
+
+@_timed("load:payments")
+def _load_all_payments():
+    """Load the full payment confirmation collection from JSON file.
+
+    Returns:
+        dict: {"confirmations": [...]} structure,
+              or {"confirmations": []} if file is missing or invalid
+    """
+    try:
+        data = _read_store("payments")
+
+        if data is None:
+            return {"confirmations": []}
+
+        return data
+
+    except json.JSONDecodeError:
+        return {"confirmations": []}
+    except IOError:
+        return {"confirmations": []}
+
+
+@_timed("save:payments")
+def _save_payment_file(data):
+    """Atomically save payment data to JSON file.
+
+    Returns:
+        bool: True on success, False on failure
+
+    Raises:
+        StoreConflict: if the file changed since data was loaded
+    """
+    return _write_store("payments", data)
+
+
+@_timed("load:tenant_access")
+def _load_all_tenant_access():
+    """Load the full tenant access token collection from JSON file.
+
+    Returns:
+        dict: {"tenant_tokens": [...]} structure,
+              or {"tenant_tokens": []} if file is missing or invalid
+    """
+    try:
+        data = _read_store("tenant_access")
+
+        if data is None:
+            return {"tenant_tokens": []}
+
+        return data
+
+    except json.JSONDecodeError:
+        return {"tenant_tokens": []}
+    except IOError:
+        return {"tenant_tokens": []}
+
+
+@_timed("save:tenant_access")
+def _save_tenant_access_file(data):
+    """Atomically save tenant access data to JSON file.
+
+    Returns:
+        bool: True on success, False on failure
+
+    Raises:
+        StoreConflict: if the file changed since data was loaded
+    """
+    return _write_store("tenant_access", data)
+
+
+# ── THREAD-BASED REVIEW SYSTEM ──────────────────────────────────────────
+# All payment review interactions are stored in threads.json.
+# Event-based landlord_review_data.json architecture has been removed.
+# All reads and writes derive state from threads + messages.
+# ─────────────────────────────────────────────────────────────────────────
+
+
+@_timed("load:threads")
+def _load_all_threads():
+    """Load the full thread collection from JSON file.
+
+    Returns:
+        dict: {"threads": [...], "messages": [...]} structure,
+              or {"threads": [], "messages": []} if file is missing or invalid
+    """
+    try:
+        data = _read_store("threads")
+
+        if data is None:
+            return {"threads": [], "messages": []}
+
+        if "threads" not in data:
+            data["threads"] = []
+        if "messages" not in data:
+            data["messages"] = []
+
+        if data.get("schema_version", 0) < SCHEMA_VERSIONS["threads"]:
+            data = _upgrade_store("threads", data)
+
+        return data
+
+    except json.JSONDecodeError:
+        return {"threads": [], "messages": []}
+    except IOError:
+        return {"threads": [], "messages": []}
+
+
+def _migrate_threads_v1(data):
+    """Schema v1: backfill thread-level escalation fields."""
+    data.setdefault("threads", [])
+    data.setdefault("messages", [])
+    for t in data["threads"]:
+        if "needs_landlord_attention" not in t:
+            t["needs_landlord_attention"] = False
+            t.setdefault("escalation_started_at", None)
+            t.setdefault("last_reminder_at", None)
+            t.setdefault("auto_reminders_suppressed", False)
+    return data
+
+
+def _migrate_threads_v2(data):
+    """Schema v2: add the notification outbox ("deliveries")."""
+    data.setdefault("deliveries", [])
+    return data
+
+
+@_timed("save:threads")
+def _save_threads_file(data):
+    """Atomically save thread data to JSON file.
+
+    Returns:
+        bool: True on success, False on failure
+
+    Raises:
+        StoreConflict: if the file changed since data was loaded
+    """
+    return _write_store("threads", data)
+
+
+@_timed("load:terminations")
+def _load_all_terminations():
+    """Load the full termination event collection from JSON file.
+
+    Returns:
+        dict: {"terminations": [...]} structure,
+              or {"terminations": []} if file is missing or invalid
+    """
+    try:
+        data = _read_store("terminations")
+
+        if data is None:
+            return {"terminations": []}
+
+        return data
+
+    except json.JSONDecodeError:
+        return {"terminations": []}
+    except IOError:
+        return {"terminations": []}
+
+
+@_timed("save:terminations")
+def _save_termination_file(data):
+    """Atomically save termination data to JSON file.
+
+    Returns:
+        bool: True on success, False on failure
+
+    Raises:
+        StoreConflict: if the file changed since data was loaded
+    """
+    return _write_store("terminations", data)
+
+
+@_timed("load:leases")
+def _load_all_leases():
+    """Load the full lease collection from JSON file.
+
+    Returns:
+        dict: {"leases": [...]} structure, or {"leases": []} if none
+    """
+    try:
+        data = _read_store("leases")
+
+        if data is None:
+            return {"leases": []}
+
+
+        if data.get("schema_version", 0) < SCHEMA_VERSIONS["leases"]:
+            data = _upgrade_store("leases", data)
+
+        return data
+
+    except json.JSONDecodeError as e:
+        print(f"[WARNING] lease_data.json contains invalid JSON: {e}")
+        return {"leases": []}
+    except IOError as e:
+        print(f"[WARNING] Could not read lease_data.json: {e}")
+        return {"leases": []}
+
+
+def _migrate_leases_v1(data):
+    """Schema v1: multi-lease format plus all per-lease field migrations.
+
+    Folds the historic _migrate_lease_* checks (previously run on every
+    load) into one step. Each per-lease helper is idempotent.
+    """
+    # Old single-lease format (no "leases" key)
+    if "leases" not in data:
+        print("[INFO] Migrating single-lease data to multi-lease format...")
+        old_lease = data
+        revision = old_lease.pop("revision", None)
+        old_lease["id"] = str(uuid.uuid4())
+        old_lease["created_at"] = old_lease.get("saved_at", datetime.now().isoformat())
+        old_lease["updated_at"] = old_lease.get("saved_at", datetime.now().isoformat())
+        data = {"leases": [old_lease]}
+        if revision is not None:
+            data["revision"] = revision
+
+    for lease in data["leases"]:
+        _migrate_lease_versioning(lease)
+        _migrate_lease_to_new_structure(lease)
+        _migrate_lease_add_lock_in_and_renewal_fields(lease)
+        _migrate_lease_add_expected_payments(lease)
+        _migrate_lease_add_confirmation_flag(lease)
+        _migrate_lease_add_first_month_fields(lease)
+    return data
+
+
+def _migrate_lease_versioning(lease):
+    """Add versioning fields to a lease if missing.
+
+    Migration rules:
+    - lease_group_id = lease.id (each existing lease becomes its own group)
+    - version = 1
+    - is_current = True
+
+    Returns:
+        bool: True if migration was applied, False if already versioned
+    """
+    if "lease_group_id" in lease:
+        return False  # Already has versioning
+
+    lease["lease_group_id"] = lease.get("id")
+    lease["version"] = 1
+    lease["is_current"] = True
+    return True
+
+
+def _migrate_lease_to_new_structure(lease):
+    """Migrate a lease from flat structure to nested structure.
+
+    Returns True if migration was performed, False if already migrated.
+    """
+    # Check if already migrated (has 'current_values' key)
+    if "current_values" in lease:
+        return False
+
+    # Extract existing values
+    field_names = [
+        "lease_nickname", "lessor_name", "lessee_name",
+        "lease_start_date", "lease_end_date",
+        "monthly_rent", "security_deposit", "rent_due_day"
+    ]
+
+    # Build current_values from flat fields
+    current_values = {}
+    for field in field_names:
+        current_values[field] = lease.pop(field, None)
+
+    # Add lock-in period (new field)
+    current_values["lock_in_period"] = {
+        "duration_months": None
+    }
+
+    # Add renewal terms (new field)
+    current_values["renewal_terms"] = {
+        "rent_escalation_percent": None
+    }
+
+    # Build source_document from source_filename
+    source_filename = lease.pop("source_filename", None)
+    lease["source_document"] = {
+        "filename": source_filename,
+        "mimetype": None,
+        "extracted_text": None,
+        "extracted_at": None
+    }
+
+    # Initialize empty ai_extraction
+    lease["ai_extraction"] = None
+
+    # Set current_values
+    lease["current_values"] = current_values
+
+    return True
+
+
+def _migrate_lease_add_lock_in_and_renewal_fields(lease):
+    """Add lock_in_period and renewal_terms to existing leases if missing.
+
+    This migration is idempotent - safe to run multiple times.
+
+    Returns True if migration was performed, False if already has fields.
+    """
+    # Skip if no current_values (will be handled by _migrate_lease_to_new_structure)
+    if "current_values" not in lease:
+        return False
+
+    current_values = lease["current_values"]
+    migrated = False
+
+    # Add lock_in_period if missing
+    if "lock_in_period" not in current_values:
+        current_values["lock_in_period"] = {
+            "duration_months": None
+        }
+        migrated = True
+
+    # Add renewal_terms if missing
+    if "renewal_terms" not in current_values:
+        current_values["renewal_terms"] = {
+            "rent_escalation_percent": None
+        }
+        migrated = True
+
+    return migrated
+
+
+def _default_expected_payments(monthly_rent=None):
+    """Return default expected_payments list for a lease.
+
+    Rent is always expected. Maintenance and utilities default to not expected.
+    If monthly_rent is provided, it becomes the typical_amount for rent.
+    """
+    return [
+        {"type": "rent", "expected": True, "typical_amount": monthly_rent},
+        {"type": "maintenance", "expected": False, "typical_amount": None},
+        {"type": "utilities", "expected": False, "typical_amount": None},
+    ]
+
+
+def _migrate_lease_add_expected_payments(lease):
+    """Add expected_payments to existing leases if missing.
+
+    Default: rent expected (with monthly_rent as typical_amount),
+    maintenance and utilities not expected.
+    """
+    if "current_values" not in lease:
+        return False
+
+    current_values = lease["current_values"]
+
+    if "expected_payments" in current_values:
+        return False
+
+    monthly_rent = current_values.get("monthly_rent")
+    current_values["expected_payments"] = _default_expected_payments(monthly_rent)
+    return True
+
+
+def _migrate_lease_add_confirmation_flag(lease):
+    """Add needs_expected_payment_confirmation flag if missing.
+
+    Existing leases default to false (no confirmation needed).
+    """
+    if "needs_expected_payment_confirmation" in lease:
+        return False
+
+    lease["needs_expected_payment_confirmation"] = False
+    return True
+
+
+def _migrate_lease_add_first_month_fields(lease):
+    """Add first_month_mode, first_month_due_date, first_month_amount if missing.
+
+    Existing leases default to null (no first-month override).
+    """
+    cv = lease.get("current_values")
+    if cv is None:
+        return False
+
+    if "first_month_mode" in cv:
+        return False
+
+    cv["first_month_mode"] = None
+    cv["first_month_due_date"] = None
+    cv["first_month_amount"] = None
+    return True
+
+
+# ----------------------------------------------------------------
+# Store schema versions and migrations
+# ----------------------------------------------------------------
+# Every store carries a top-level "schema_version". STORE_MIGRATIONS
+# lists, per store, the step that takes schema N to N+1 (index N).
+# run_store_migrations() applies pending steps once and saves — at
+# process start and via `flask --app app migrate`. The load helpers
+# then only compare one integer; if they ever meet an older file (a
+# restored backup, say) they upgrade it in memory without saving.
+#
+# To change a store's shape: append a step here, never edit an old one.
+# ----------------------------------------------------------------
+
+STORE_MIGRATIONS = {
+    "leases": [_migrate_leases_v1],
+    "payments": [],
+    "tenant_access": [],
+    "threads": [_migrate_threads_v1, _migrate_threads_v2],
+    "terminations": [],
+}
+
+SCHEMA_VERSIONS = {store: len(steps) for store, steps in STORE_MIGRATIONS.items()}
+
+# Full loaders behind _load_group_records() in the single-file layout
+_STORE_LOADERS = {
+    "leases": _load_all_leases,
+    "payments": _load_all_payments,
+    "threads": _load_all_threads,
+}
+
+
+def _upgrade_store(store, data):
+    """Apply pending migration steps to a decoded store, in memory.
+
+    Returns:
+        dict: the upgraded data, stamped with the current schema_version
+    """
+    for step in STORE_MIGRATIONS[store][data.get("schema_version", 0):]:
+        data = step(data)
+    data["schema_version"] = SCHEMA_VERSIONS[store]
+    return data
+
+
+def run_store_migrations():
+    """Bring every store on disk up to its current schema version.
+
+    Each store is re-read under its lock, so several workers starting
+    at once migrate a file exactly once. Missing, empty or unreadable
+    files are left alone.
+
+    Returns:
+        dict: {store: (from_version, to_version)} for stores rewritten
+    """
+    applied = {}
+    for store in STORE_FILES:
+        with store_lock(store):
+            try:
+                data = _read_store(store)
+                if data is None:
+                    continue
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"[WARNING] Skipping migration of {STORE_FILES[store]}: {e}")
+                continue
+
+            if not isinstance(data, dict):
+                continue
+            from_version = data.get("schema_version")
+            if from_version == SCHEMA_VERSIONS[store]:
+                continue
+
+            data = _upgrade_store(store, data)
+            if _write_store(store, data):
+                applied[store] = (from_version or 0, SCHEMA_VERSIONS[store])
+    return applied
+
+
+# ----------------------------------------------------------------
+# Uploads (lease documents and payment proofs)
+# ----------------------------------------------------------------
+UPLOAD_FOLDER = os.path.join(PROJECT_DIR, "uploads")
+ALLOWED_EXTENSIONS = {"pdf", "png", "jpg", "jpeg"}
+
+# Create uploads directory if it doesn't exist
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+
+def allowed_file(filename):
+    """Check if file has an allowed extension."""
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+# ----------------------------------------------------------------
+# Proof file upload infrastructure (Phase 1 Step 3)
+# ----------------------------------------------------------------
+PROOF_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, "proofs")
+os.makedirs(PROOF_UPLOAD_FOLDER, exist_ok=True)
+
+# Explicit allowed extensions for SERVING proof files.
+# Kept separate from ALLOWED_EXTENSIONS so upload and serving
+# rules remain independent.
+PROOF_ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "pdf"}
+
+# Upload limits. PROOF_MAX_FILE_BYTES caps each proof file;
+# MAX_REQUEST_BYTES becomes Flask's MAX_CONTENT_LENGTH (whole request,
+# all files plus form fields) and is answered with 413 before the
+# body is parsed.
+PROOF_MAX_FILE_BYTES = int(os.environ.get("MAPMYLEASE_PROOF_MAX_BYTES", 10 * 1024 * 1024))
+MAX_REQUEST_BYTES = int(os.environ.get("MAPMYLEASE_MAX_REQUEST_BYTES", 40 * 1024 * 1024))
+PROOF_CHUNK_BYTES = 64 * 1024
+PROOF_META_SUFFIX = ".meta.json"
+
+# Content-addressed proof bytes: uploads/blobs/{sha[:2]}/{sha}.{ext}
+PROOF_BLOB_DIRNAME = "blobs"
+
+
+def _copy_upload_stream(stream, dest, max_bytes):
+    """Copy an upload stream into an open file in chunks, hashing as it goes.
+
+    Args:
+        stream: readable binary stream (FileStorage.stream)
+        dest: open binary file to write to
+        max_bytes: per-file cap; reading stops one chunk past it
+
+    Returns:
+        tuple: (sha256_hex, size) — size > max_bytes means the cap was hit
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(PROOF_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            break
+        digest.update(chunk)
+        dest.write(chunk)
+    return digest.hexdigest(), size
+
+
+def _write_proof_sidecar(full_path, metadata, exclusive=False):
+    """Write {proof}.meta.json next to a proof path (tmp + rename).
+
+    Args:
+        full_path: absolute path of the proof as referenced in
+            proof_files (the file itself need not exist)
+        metadata: dict to store
+        exclusive: fail if a sidecar already exists (new uploads)
+
+    Returns:
+        bool: True on success, False on failure (or if exclusive and
+              the sidecar exists)
+    """
+    meta_path = full_path + PROOF_META_SUFFIX
+    tmp_path = meta_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        if exclusive:
+            # link() refuses to replace: first writer wins
+            os.link(tmp_path, meta_path)
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, meta_path)
+        return True
+    except FileExistsError:
+        os.remove(tmp_path)
+        return False
+    except (IOError, OSError) as e:
+        print(f"[WARNING] Failed to write proof metadata for {full_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def load_proof_metadata(relative_path):
+    """Return the sidecar metadata for a proof file, or None if absent.
+
+    Args:
+        relative_path: path as stored in proof_files / attachments
+            (relative to uploads/)
+    """
+    try:
+        with open(os.path.join(UPLOAD_FOLDER, relative_path) + PROOF_META_SUFFIX,
+                  "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _proof_blob_ref(sha256, filename):
+    """Return a blob's path relative to uploads/: blobs/ab/abcd….ext"""
+    ext = filename.rsplit(".", 1)[1].lower() if "." in filename else "bin"
+    return os.path.join(PROOF_BLOB_DIRNAME, sha256[:2], f"{sha256}.{ext}")
+
+
+def resolve_proof_path(relative_path):
+    """Return the absolute path holding a proof's bytes, or None.
+
+    Pre-dedupe proofs are plain files at their recorded path; newer
+    ones are a sidecar whose "blob" points into uploads/blobs/.
+
+    Args:
+        relative_path: path as stored in proof_files / attachments
+    """
+    full_path = os.path.join(UPLOAD_FOLDER, relative_path)
+    if os.path.isfile(full_path):
+        return full_path
+    metadata = load_proof_metadata(relative_path)
+    if metadata and metadata.get("blob"):
+        blob_path = os.path.join(UPLOAD_FOLDER, metadata["blob"])
+        if os.path.isfile(blob_path):
+            return blob_path
+    return None
+
+
+def _store_proof_blob(tmp_path, blob_ref):
+    """Move a fully written temp file into the blob store.
+
+    Returns:
+        bool: True if the blob was new, False if identical content was
+              already stored (the temp file is then discarded)
+    """
+    blob_path = os.path.join(UPLOAD_FOLDER, blob_ref)
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    try:
+        os.link(tmp_path, blob_path)
+        return True
+    except FileExistsError:
+        return False
+
+
+def save_proof_file(lease_group_id, payment_id, file):
+    """Save a proof file for a payment under uploads/proofs/{lease_group_id}/.
+
+    The upload is streamed in PROOF_CHUNK_BYTES chunks to a temp file
+    while its SHA-256 is computed, stopping at PROOF_MAX_FILE_BYTES.
+    The bytes are stored once per content hash in uploads/blobs/; the
+    payment's own path ({payment_id}_{name}) is a {name}.meta.json
+    sidecar recording the hash, size, original name and blob. The same
+    receipt attached to several confirmations is therefore stored once.
+    resolve_proof_path() maps the recorded path back to the bytes.
+
+    Proofs are immutable once written — never overwritten or deleted.
+
+    Args:
+        lease_group_id: UUID string of the lease group
+        payment_id: UUID string of the payment confirmation
+        file: Werkzeug FileStorage object from form upload
+
+    Returns:
+        tuple: (relative_path, None) on success,
+               (None, error_message) on failure
+    """
+    if not file or not file.filename:
+        return None, "No file provided"
+
+    if not allowed_file(file.filename):
+        return None, "File type not allowed"
+
+    original_name = secure_filename(file.filename)
+    if not original_name:
+        return None, "Invalid filename"
+
+    # Build directory: uploads/proofs/{lease_group_id}/
+    lease_proof_dir = os.path.join(PROOF_UPLOAD_FOLDER, lease_group_id)
+    os.makedirs(lease_proof_dir, exist_ok=True)
+
+    # Build filename: {payment_id}_{original_name}
+    safe_name = f"{payment_id}_{original_name}"
+    full_path = os.path.join(lease_proof_dir, safe_name)
+
+    # Never overwrite existing files (immutability rule)
+    if os.path.exists(full_path) or os.path.exists(full_path + PROOF_META_SUFFIX):
+        return None, "File already exists"
+
+    blob_dir = os.path.join(UPLOAD_FOLDER, PROOF_BLOB_DIRNAME)
+    os.makedirs(blob_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=blob_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            sha256, size = _copy_upload_stream(file.stream, f, PROOF_MAX_FILE_BYTES)
+            if size > PROOF_MAX_FILE_BYTES:
+                return None, f"File too large (max {PROOF_MAX_FILE_BYTES // (1024 * 1024)} MB)"
+            if size == 0:
+                return None, "File is empty"
+            f.flush()
+            os.fsync(f.fileno())
+        blob_ref = _proof_blob_ref(sha256, original_name)
+        _store_proof_blob(tmp_path, blob_ref)
+    except (IOError, OSError) as e:
+        print(f"[WARNING] Failed to save proof file {safe_name}: {e}")
+        return None, "Could not save file"
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    # Return relative path for JSON storage (relative to uploads/)
+    relative_path = os.path.join("proofs", lease_group_id, safe_name)
+    written = _write_proof_sidecar(full_path, {
+        "path": relative_path,
+        "sha256": sha256,
+        "size": size,
+        "blob": blob_ref,
+        "original_filename": file.filename,
+        "content_type": file.mimetype or None,
+        "payment_id": payment_id,
+        "uploaded_at": datetime.now().isoformat(),
+    }, exclusive=True)
+    if not written:
+        return None, "File already exists" if os.path.exists(full_path + PROOF_META_SUFFIX) \
+            else "Could not save file"
+    return relative_path, None
+
+
+def _hash_file(path):
+    """Return (sha256_hex, size) of a file, read in PROOF_CHUNK_BYTES chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(PROOF_CHUNK_BYTES), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+# (path, mtime_ns, size) -> sha256, so repeat requests for the same
+# unchanged file are not re-hashed
+_content_hash_cache = {}
+_CONTENT_HASH_CACHE_MAX = 4096
+
+
+def content_hash(path):
+    """Return a file's SHA-256, cached while its mtime and size are unchanged."""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    sha256 = _content_hash_cache.get(key)
+    if sha256 is None:
+        sha256 = _hash_file(path)[0]
+        if len(_content_hash_cache) >= _CONTENT_HASH_CACHE_MAX:
+            _content_hash_cache.clear()
+        _content_hash_cache[key] = sha256
+    return sha256
+
+
+def dedupe_proof_files(dry_run=False):
+    """Move plain proof files into the blob store, one copy per hash.
+
+    Every file under uploads/proofs/{lease_group_id}/ that still holds
+    its own bytes is hashed, linked into uploads/blobs/ (unless that
+    content is already there), given a sidecar pointing at the blob,
+    and only then removed — so its recorded path resolves at every
+    step. Safe to re-run; already-migrated proofs are skipped.
+
+    Args:
+        dry_run: only count what would be moved and reclaimed
+
+    Returns:
+        dict: {"files": n, "duplicates": n, "bytes_reclaimed": n}
+    """
+    report = {"files": 0, "duplicates": 0, "bytes_reclaimed": 0}
+    seen = set()
+    if not os.path.isdir(PROOF_UPLOAD_FOLDER):
+        return report
+
+    for group in sorted(os.listdir(PROOF_UPLOAD_FOLDER)):
+        group_dir = os.path.join(PROOF_UPLOAD_FOLDER, group)
+        if not os.path.isdir(group_dir):
+            continue
+        for name in sorted(os.listdir(group_dir)):
+            full_path = os.path.join(group_dir, name)
+            if (name.startswith(".") or name.endswith(PROOF_META_SUFFIX)
+                    or name.endswith(".tmp") or not os.path.isfile(full_path)):
+                continue
+
+            sha256, size = _hash_file(full_path)
+            blob_ref = _proof_blob_ref(sha256, name)
+            duplicate = blob_ref in seen or os.path.exists(os.path.join(UPLOAD_FOLDER, blob_ref))
+            seen.add(blob_ref)
+            report["files"] += 1
+            if duplicate:
+                report["duplicates"] += 1
+                report["bytes_reclaimed"] += size
+            if dry_run:
+                continue
+
+            _store_proof_blob(full_path, blob_ref)
+            relative_path = os.path.join("proofs", group, name)
+            metadata = load_proof_metadata(relative_path) or {}
+            metadata.update({"path": relative_path, "sha256": sha256, "size": size,
+                             "blob": blob_ref, "deduplicated_at": datetime.now().isoformat()})
+            if _write_proof_sidecar(full_path, metadata):
+                os.remove(full_path)
+    return report
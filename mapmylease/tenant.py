@@ -0,0 +1,569 @@
+"""
+Tenant-facing views (token links) and the light tenant app.
+
+create_tenant_app() builds a Flask app with only these routes. It
+imports storage and engine — not the landlord dashboard, OCR or AI
+code, and the thread archive only when a page needs it — so tenant
+workers start fast and stay small:
+
+    gunicorn -w 8 "mapmylease.tenant:create_tenant_app()"
+"""
+
+from datetime import datetime
+import uuid
+from flask import render_template, request, redirect, url_for, flash
+
+from mapmylease.engine import (
+    add_message_to_thread,
+    append_payment_confirmations,
+    compute_monthly_coverage,
+    find_open_thread,
+    get_messages_for_thread,
+    get_payments_for_lease_group,
+    get_threads_for_lease_group,
+    validate_token,
+)
+from mapmylease.storage import (
+    _load_group_records,
+    save_proof_file,
+)
+from mapmylease.web import make_app
+
+
+def tenant_payment_response(token, payment_id):
+    """Tenant action: reply to a flagged payment conversation.
+
+    Token-authenticated. Writes to threads.json.
+    Allowed only while an open thread exists for this payment category/period.
+    """
+    # Validate token
+    result = validate_token(token)
+    if not result["valid"]:
+        flash("Invalid or expired link.", "error")
+        return redirect(url_for("tenant_page", token=token))
+
+    lease_group_id = result["lease_group_id"]
+
+    # Validate payment_id exists and belongs to this lease_group_id
+    payment_data = _load_group_records("payments", lease_group_id)
+    payment_record = None
+    for c in payment_data.get("confirmations", []):
+        if c.get("id") == payment_id and c.get("lease_group_id") == lease_group_id:
+            payment_record = c
+            break
+
+    if not payment_record:
+        flash("Payment submission not found.", "error")
+        return redirect(url_for("tenant_page", token=token))
+
+    # Derive topic_ref from payment record
+    confirmation_type = payment_record.get("confirmation_type")
+    period_year = payment_record.get("period_year")
+    period_month = payment_record.get("period_month")
+    topic_ref = f"{confirmation_type}:{period_year}-{period_month:02d}"
+
+    # Validate conversation is open via thread
+    thread = find_open_thread(lease_group_id, "payment_review", topic_ref)
+    if not thread:
+        flash("This conversation is closed.", "error")
+        return redirect(url_for("tenant_page", token=token))
+
+    # Message is required
+    message = request.form.get("message", "").strip()
+    if not message:
+        flash("Please enter a message.", "error")
+        return redirect(url_for("tenant_page", token=token))
+
+    # Handle optional file upload
+    msg_id = str(uuid.uuid4())
+    attachments = []
+    upload_file = request.files.get("attachment")
+    if upload_file and upload_file.filename:
+        relative_path, error = save_proof_file(lease_group_id, msg_id, upload_file)
+        if error:
+            flash(f"File upload failed: {error}", "error")
+            return redirect(url_for("tenant_page", token=token))
+        attachments.append(relative_path)
+
+    # Write to threads.json
+    result = add_message_to_thread(
+        thread_id=thread["id"],
+        actor="tenant",
+        message_type="reply",
+        body=message,
+        payment_id=payment_id,
+        attachments=attachments,
+    )
+
+    if result:
+        flash("Reply sent.", "success")
+    else:
+        flash("Failed to send reply. Please try again.", "error")
+
+    return redirect(url_for("tenant_page", token=token))
+
+
+# ----------------------------------------------------------------
+# TENANT ACCESS ROUTES (Phase 1 — Step 5)
+# ----------------------------------------------------------------
+
+def tenant_page(token):
+    """Tenant-facing payment confirmation page.
+
+    Validates token, loads minimal lease context, renders form.
+    Does NOT modify any data.
+    """
+    result = validate_token(token)
+
+    if not result["valid"]:
+        return render_template("tenant_confirm.html",
+                               token_valid=False,
+                               error_reason=result["reason"])
+
+    lease_group_id = result["lease_group_id"]
+
+    # Read optional month/year prefill from query params
+    prefill_month = request.args.get("month", type=int)
+    prefill_year = request.args.get("year", type=int)
+
+    # Load current lease for context (read-only)
+    lease_data = _load_group_records("leases", lease_group_id)
+    current_lease = None
+    for lease in lease_data.get("leases", []):
+        if (lease.get("lease_group_id") == lease_group_id
+                and lease.get("is_current")):
+            current_lease = lease
+            break
+
+    # Extract display context from current lease (if it exists)
+    lease_nickname = None
+    agreed_rent = None
+    lease_start_date = None
+    lease_end_date = None
+    if current_lease:
+        cv = current_lease.get("current_values", {})
+        lease_nickname = cv.get("lease_nickname") or "Untitled Lease"
+        agreed_rent = cv.get("monthly_rent")
+        lease_start_date = cv.get("lease_start_date")
+        lease_end_date = cv.get("lease_end_date")
+
+    # Load past submissions and thread data for tenant view
+    payment_confirmations = get_payments_for_lease_group(lease_group_id)
+    from mapmylease.thread_archive import with_archived_threads
+    thread_data = with_archived_threads(_load_group_records("threads", lease_group_id),
+                                        lease_group_id)
+    lease_threads = get_threads_for_lease_group(lease_group_id, thread_data)
+
+    # Compute monthly summary for tenant
+    month_names = ["January", "February", "March", "April", "May", "June",
+                   "July", "August", "September", "October", "November", "December"]
+    monthly_summary = []
+    if lease_start_date:
+        try:
+            start_parts = lease_start_date.split("-")
+            start_year, start_month = int(start_parts[0]), int(start_parts[1])
+
+            if lease_end_date:
+                end_parts = lease_end_date.split("-")
+                end_year, end_month = int(end_parts[0]), int(end_parts[1])
+            else:
+                today = datetime.now()
+                end_year, end_month = today.year, today.month
+
+            # Extend to current month if lease is still active
+            today = datetime.now()
+            if (end_year, end_month) < (today.year, today.month):
+                pass  # lease ended, use lease end date
+            else:
+                end_year, end_month = today.year, today.month
+
+            y, m = start_year, start_month
+            while (y, m) <= (end_year, end_month):
+                month_payments = [c for c in payment_confirmations
+                                  if c.get("period_year") == y and c.get("period_month") == m]
+                count = len(month_payments)
+
+                # Derive review status from thread status/waiting_on
+                review_status = "not_submitted"
+                period_str = f"{y}-{str(m).zfill(2)}"
+
+                if count > 0:
+                    month_threads = [
+                        t for t in lease_threads
+                        if t.get("topic_type") == "payment_review"
+                        and t.get("topic_ref", "").endswith(period_str)
+                    ]
+                    worst_priority = 4  # acknowledged
+                    for mt in month_threads:
+                        if mt.get("status") == "open" and mt.get("waiting_on") == "tenant":
+                            if worst_priority > 1:
+                                worst_priority = 1
+                        elif mt.get("status") == "open" and mt.get("waiting_on") == "landlord":
+                            if worst_priority > 2:
+                                worst_priority = 2
+
+                    if worst_priority == 1:
+                        review_status = "reply_from_landlord"
+                    elif worst_priority == 2:
+                        review_status = "submitted"
+                    elif not month_threads:
+                        review_status = "submitted"
+                    else:
+                        review_status = "acknowledged"
+
+                # Compute coverage (skip current month)
+                if (y, m) == (today.year, today.month):
+                    coverage = {"expected_categories": None, "covered_categories": None,
+                                "missing_categories": None, "coverage_summary": None,
+                                "is_complete": None}
+                else:
+                    coverage = compute_monthly_coverage(
+                        cv.get("expected_payments", []), month_payments)
+
+                # Compute per-category review state (tenant-facing) from threads
+                if (y, m) == (today.year, today.month):
+                    category_details = None
+                elif count == 0:
+                    category_details = {}
+                else:
+                    category_details = {}
+                    for cat in (coverage.get("covered_categories") or []):
+                        cat_ref = f"{cat}:{period_str}"
+                        cat_thread = None
+                        for t in lease_threads:
+                            if (t.get("topic_type") == "payment_review"
+                                    and t.get("topic_ref") == cat_ref):
+                                if t.get("status") == "open":
+                                    cat_thread = t
+                                    break
+                                elif cat_thread is None:
+                                    cat_thread = t
+
+                        if cat_thread is None:
+                            state = "submitted"
+                            category_details[cat] = {
+                                "state": state, "date": None,
+                                "actor": None, "flag_date": None,
+                            }
+                        elif cat_thread.get("status") == "resolved":
+                            category_details[cat] = {
+                                "state": "acknowledged",
+                                "date": cat_thread.get("resolved_at"),
+                                "actor": None, "flag_date": None,
+                            }
+                        elif cat_thread.get("waiting_on") == "tenant":
+                            msgs = get_messages_for_thread(cat_thread["id"], thread_data)
+                            flag_msg = next((mg for mg in msgs if mg.get("message_type") == "flag"), None)
+                            category_details[cat] = {
+                                "state": "action_required",
+                                "date": msgs[-1].get("created_at") if msgs else None,
+                                "actor": "landlord",
+                                "flag_date": flag_msg.get("created_at") if flag_msg else None,
+                            }
+                        elif cat_thread.get("waiting_on") == "landlord":
+                            msgs = get_messages_for_thread(cat_thread["id"], thread_data)
+                            last_msg = msgs[-1] if msgs else None
+                            flag_msg = next((mg for mg in msgs if mg.get("message_type") == "flag"), None)
+                            if last_msg and last_msg.get("actor") == "tenant":
+                                category_details[cat] = {
+                                    "state": "you_responded",
+                                    "date": last_msg.get("created_at"),
+                                    "actor": "tenant",
+                                    "flag_date": flag_msg.get("created_at") if flag_msg else None,
+                                }
+                            else:
+                                category_details[cat] = {
+                                    "state": "submitted",
+                                    "date": None, "actor": None,
+                                    "flag_date": None,
+                                }
+
+                    # Add missing expected categories as "not_submitted"
+                    for cat in (coverage.get("missing_categories") or []):
+                        if cat not in category_details:
+                            category_details[cat] = {
+                                "state": "not_submitted",
+                                "date": None,
+                                "actor": None,
+                                "flag_date": None,
+                            }
+
+                monthly_summary.append({
+                    "year": y, "month": m,
+                    "month_name": month_names[m - 1],
+                    "count": count,
+                    "review_status": review_status,
+                    "category_details": category_details,
+                    **coverage,
+                })
+                m += 1
+                if m > 12:
+                    m = 1
+                    y += 1
+
+            monthly_summary.reverse()
+
+            # Mark visibility: last 6 months always visible,
+            # older months only if they have unresolved issues
+            cutoff_m = today.month - 5
+            cutoff_y = today.year
+            if cutoff_m <= 0:
+                cutoff_m += 12
+                cutoff_y -= 1
+            for ms in monthly_summary:
+                within_window = (ms["year"], ms["month"]) >= (cutoff_y, cutoff_m)
+                if within_window:
+                    ms["visible"] = True
+                else:
+                    has_missing = bool(ms.get("missing_categories"))
+                    has_unresolved = False
+                    cd = ms.get("category_details")
+                    if cd and isinstance(cd, dict):
+                        for cat_info in cd.values():
+                            if isinstance(cat_info, dict) and cat_info.get("state") != "acknowledged":
+                                has_unresolved = True
+                                break
+                    ms["visible"] = has_missing or has_unresolved
+        except (ValueError, IndexError):
+            pass  # If date parsing fails, skip summary
+
+    return render_template("tenant_confirm.html",
+                           token_valid=True,
+                           token=token,
+                           lease_group_id=lease_group_id,
+                           lease_nickname=lease_nickname,
+                           agreed_rent=agreed_rent,
+                           payment_confirmations=payment_confirmations,
+                           monthly_summary=monthly_summary,
+                           prefill_month=prefill_month,
+                           prefill_year=prefill_year,
+                           success=False)
+
+
+def tenant_confirm(token):
+    """Accept and persist tenant payment confirmations (one per selected type).
+
+    Validates token again (do NOT trust GET).
+    Creates one append-only payment record per selected section.
+    Rejects entire submission if any section fails validation.
+    Never modifies existing records or proof files.
+    """
+    # Re-validate token (do not trust prior GET)
+    result = validate_token(token)
+
+    if not result["valid"]:
+        return render_template("tenant_confirm.html",
+                               token_valid=False,
+                               error_reason=result["reason"])
+
+    lease_group_id = result["lease_group_id"]
+
+    # Load current lease for amount_agreed (rent only)
+    lease_data = _load_group_records("leases", lease_group_id)
+    current_lease = None
+    for lease in lease_data.get("leases", []):
+        if (lease.get("lease_group_id") == lease_group_id
+                and lease.get("is_current")):
+            current_lease = lease
+            break
+
+    lease_nickname = None
+    agreed_rent = None
+    if current_lease:
+        cv = current_lease.get("current_values", {})
+        lease_nickname = cv.get("lease_nickname") or "Untitled Lease"
+        agreed_rent = cv.get("monthly_rent")
+
+    def render_error(errors):
+        return render_template("tenant_confirm.html",
+                               token_valid=True,
+                               token=token,
+                               lease_group_id=lease_group_id,
+                               lease_nickname=lease_nickname,
+                               agreed_rent=agreed_rent,
+                               success=False,
+                               errors=errors,
+                               form=request.form,
+                               monthly_summary=[])
+
+    # --- Shared fields: month, year, disclaimer, notes ---
+    errors = []
+
+    try:
+        period_month = int(request.form.get("period_month", ""))
+        if not (1 <= period_month <= 12):
+            errors.append("Month must be between 1 and 12.")
+    except (ValueError, TypeError):
+        errors.append("Month is required.")
+        period_month = None
+
+    current_year = datetime.now().year
+    try:
+        period_year = int(request.form.get("period_year", ""))
+        if not (2020 <= period_year <= current_year + 1):
+            errors.append(f"Year must be between 2020 and {current_year + 1}.")
+    except (ValueError, TypeError):
+        errors.append("Year is required.")
+        period_year = None
+
+    disclaimer_checked = request.form.get("disclaimer_acknowledged")
+    if not disclaimer_checked:
+        errors.append("You must acknowledge the disclaimer to submit.")
+
+    notes = request.form.get("notes", "").strip() or None
+
+    # --- Determine which sections are selected ---
+    rent_selected = bool(request.form.get("rent_selected"))
+    maintenance_selected = bool(request.form.get("maintenance_selected"))
+    utilities_selected = bool(request.form.get("utilities_selected"))
+
+    if not (rent_selected or maintenance_selected or utilities_selected):
+        errors.append("Please select at least one payment type.")
+
+    # --- Validate each selected section ---
+    sections = []
+
+    if rent_selected:
+        try:
+            rent_amount = float(request.form.get("rent_amount", ""))
+            if rent_amount <= 0:
+                errors.append("Rent: Amount paid must be greater than zero.")
+        except (ValueError, TypeError):
+            errors.append("Rent: Amount paid is required.")
+            rent_amount = None
+
+        rent_tds_raw = request.form.get("rent_tds", "").strip()
+        rent_tds = None
+        if rent_tds_raw:
+            try:
+                rent_tds = float(rent_tds_raw)
+                if rent_tds < 0:
+                    errors.append("Rent: TDS deducted cannot be negative.")
+                elif rent_amount is not None and rent_tds > rent_amount:
+                    errors.append("Rent: TDS deducted cannot exceed amount paid.")
+            except (ValueError, TypeError):
+                errors.append("Rent: TDS deducted must be a number.")
+
+        rent_amount_agreed = None
+        if agreed_rent is not None:
+            try:
+                rent_amount_agreed = float(agreed_rent)
+            except (ValueError, TypeError):
+                pass
+
+        sections.append({
+            "type": "rent",
+            "amount": rent_amount,
+            "tds": rent_tds,
+            "amount_agreed": rent_amount_agreed,
+            "date_paid": request.form.get("rent_date_paid", "").strip() or None,
+            "proof_key": "rent_proof",
+        })
+
+    if maintenance_selected:
+        try:
+            maint_amount = float(request.form.get("maintenance_amount", ""))
+            if maint_amount <= 0:
+                errors.append("Maintenance: Amount paid must be greater than zero.")
+        except (ValueError, TypeError):
+            errors.append("Maintenance: Amount paid is required.")
+            maint_amount = None
+
+        sections.append({
+            "type": "maintenance",
+            "amount": maint_amount,
+            "tds": None,
+            "amount_agreed": None,
+            "date_paid": request.form.get("maintenance_date_paid", "").strip() or None,
+            "proof_key": "maintenance_proof",
+        })
+
+    if utilities_selected:
+        try:
+            util_amount = float(request.form.get("utilities_amount", ""))
+            if util_amount <= 0:
+                errors.append("Utilities: Amount paid must be greater than zero.")
+        except (ValueError, TypeError):
+            errors.append("Utilities: Amount paid is required.")
+            util_amount = None
+
+        sections.append({
+            "type": "utilities",
+            "amount": util_amount,
+            "tds": None,
+            "amount_agreed": None,
+            "date_paid": request.form.get("utilities_date_paid", "").strip() or None,
+            "proof_key": "utilities_proof",
+        })
+
+    # If any validation errors, reject entire submission
+    if errors:
+        return render_error(errors)
+
+    # --- Handle proof uploads for each section (before creating records) ---
+    now = datetime.now().isoformat()
+    records = []
+
+    for section in sections:
+        payment_id = str(uuid.uuid4())
+        proof_files = []
+
+        proof_file = request.files.get(section["proof_key"])
+        if proof_file and proof_file.filename:
+            relative_path, error = save_proof_file(lease_group_id, payment_id, proof_file)
+            if error:
+                return render_error([f"{section['type'].capitalize()}: Proof upload failed: {error}"])
+            proof_files.append(relative_path)
+
+        records.append({
+            "id": payment_id,
+            "lease_group_id": lease_group_id,
+            "confirmation_type": section["type"],
+            "period_month": period_month,
+            "period_year": period_year,
+            "amount_agreed": section["amount_agreed"],
+            "amount_declared": section["amount"],
+            "tds_deducted": section["tds"],
+            "date_paid": section["date_paid"],
+            "proof_files": proof_files,
+            "verification_status": "unverified",
+            "disclaimer_acknowledged": now,
+            "submitted_at": now,
+            "submitted_via": "tenant_link",
+            "notes": notes,
+        })
+
+    # --- Persist all records at once (no partial saves) ---
+    saved = append_payment_confirmations(records)
+
+    if not saved:
+        return render_error(["Failed to save. Please try again."])
+
+    return render_template("tenant_confirm.html",
+                           token_valid=True,
+                           token=token,
+                           lease_group_id=lease_group_id,
+                           lease_nickname=lease_nickname,
+                           agreed_rent=agreed_rent,
+                           success=True,
+                           monthly_summary=[])
+
+
+TENANT_ROUTES = [
+    ("/tenant/<token>/payment/<payment_id>/response", tenant_payment_response, ["POST"]),
+    ("/tenant/<token>", tenant_page, ["GET"]),
+    ("/tenant/<token>/confirm", tenant_confirm, ["POST"]),
+]
+
+
+def register_tenant_routes(app):
+    """Attach the tenant views under their historical endpoint names."""
+    for rule, view, methods in TENANT_ROUTES:
+        app.add_url_rule(rule, view_func=view, methods=methods)
+
+
+def create_tenant_app():
+    """Build the tenant-only app (token pages, confirmations, replies)."""
+    app = make_app(__name__)
+    register_tenant_routes(app)
+    return app
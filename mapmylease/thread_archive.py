@@ -0,0 +1,297 @@
+"""
+Cold archive for resolved threads.
+
+Resolved threads are immutable history. archive_resolved_threads()
+moves the ones resolved more than THREAD_ARCHIVE_AFTER_DAYS ago, with
+their messages, out of threads.json into one file per lease group under
+DATA_DIR/threads_archive/, so the hot store — and every engine and
+dashboard pass over it — only holds active work.
+
+Archived threads are read back only where history is shown or needed:
+  - with_archived_threads(): lease detail, month history, tenant page
+  - find_archived_thread_data(): build_thread_timeline() for a thread
+    that is no longer in the hot store
+  - archived_topic_refs(): materialise_system_threads(), so an archived
+    payment_review thread still counts as "already reviewed"
+  - iter_archived_threads(): the search index rebuild
+
+A thread with a message still waiting in the notification outbox
+("pending" or "sending") stays hot until it is delivered or dead; the
+sent and dead deliveries of archived messages are dropped with them.
+
+Archive files are written only by archive_resolved_threads(), under the
+threads store lock. Each archive is written before the hot store drops
+its threads, so a crash in between leaves a thread in both places
+(readers prefer the hot copy), never in neither.
+"""
+
+import os
+import json
+from datetime import datetime, timedelta
+from werkzeug.utils import secure_filename
+
+from mapmylease import storage
+from mapmylease.observability import THREAD_ACTIONS_TOTAL
+from mapmylease.storage import _retry_on_conflict, store_lock
+
+THREAD_ARCHIVE_DIRNAME = "threads_archive"
+THREAD_ARCHIVE_INDEX = "index.json"
+
+# Resolved threads older than this (days since resolved_at) are archived
+THREAD_ARCHIVE_AFTER_DAYS = int(os.environ.get("MAPMYLEASE_THREAD_ARCHIVE_DAYS", "180"))
+
+# path -> (file stamp, parsed content); entries are shared, never mutated.
+# _TOPIC_REFS_KEY -> (index stamp, {(lease_group_id, topic_type): set of topic_refs})
+_archive_cache = {}
+_TOPIC_REFS_KEY = "topic_refs"
+
+
+def _archive_dir():
+    return os.path.join(storage.DATA_DIR, THREAD_ARCHIVE_DIRNAME)
+
+
+def _group_archive_path(lease_group_id):
+    return os.path.join(_archive_dir(), secure_filename(str(lease_group_id)) + ".json")
+
+
+def _index_path():
+    return os.path.join(_archive_dir(), THREAD_ARCHIVE_INDEX)
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_ino}-{st.st_mtime_ns}-{st.st_size}"
+
+
+def _read_archive_file(path, empty, cached=True):
+    """Parse an archive file; `empty()` builds the value for a missing one.
+
+    With cached=True the result is shared between callers (read-only).
+    """
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return empty()
+    if cached:
+        hit = _archive_cache.get(path)
+        if hit and hit[0] == stamp:
+            return hit[1]
+    try:
+        with open(path, "rb") as f:
+            data = storage._codec_loads(f.read())
+    except (IOError, OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] Could not read thread archive {os.path.basename(path)}: {e}")
+        return empty()
+    if cached:
+        _archive_cache[path] = (stamp, data)
+    return data
+
+
+def _write_archive_file(path, data):
+    """Atomically write an archive file (tmp + fsync + rename).
+
+    Returns:
+        bool: True on success, False on failure
+    """
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(storage._codec_dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return True
+    except (IOError, OSError) as e:
+        print(f"[WARNING] Failed to write thread archive {os.path.basename(path)}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def _empty_group_archive():
+    return {"threads": [], "messages": []}
+
+
+def _empty_index():
+    return {"threads": {}}
+
+
+# ----------------------------------------------------------------
+# Reading the archive
+# ----------------------------------------------------------------
+
+def load_archived_threads(lease_group_id):
+    """Return the archived threads and messages of one lease group.
+
+    Returns:
+        dict: {"threads": [...], "messages": [...]} (read-only; empty
+              if nothing has been archived for the group)
+    """
+    return _read_archive_file(_group_archive_path(lease_group_id), _empty_group_archive)
+
+
+def archived_topic_refs(lease_group_id, topic_type):
+    """Return the topic_refs of archived threads of one type for a group.
+
+    Reads the small archive index, not the per-group archive files. The
+    index is grouped by (lease group, topic type) once per index stamp,
+    so a dashboard pass costs one lookup per lease group.
+
+    Returns:
+        set of str (the caller's own copy)
+    """
+    path = _index_path()
+    stamp = _file_stamp(path)
+    hit = _archive_cache.get(_TOPIC_REFS_KEY)
+    if hit is None or hit[0] != (path, stamp):
+        refs = {}
+        for entry in _read_archive_file(path, _empty_index)["threads"].values():
+            refs.setdefault((entry.get("lease_group_id"), entry.get("topic_type")),
+                            set()).add(entry.get("topic_ref"))
+        hit = _archive_cache[_TOPIC_REFS_KEY] = ((path, stamp), refs)
+    return set(hit[1].get((lease_group_id, topic_type), ()))
+
+
+def find_archived_thread_data(thread_id):
+    """Return the group archive holding thread_id, or None.
+
+    Returns:
+        dict: {"threads": [...], "messages": [...]} of the thread's lease
+              group (read-only), or None if the thread is not archived
+    """
+    entry = _read_archive_file(_index_path(), _empty_index)["threads"].get(thread_id)
+    if not entry:
+        return None
+    return load_archived_threads(entry.get("lease_group_id"))
+
+
+def with_archived_threads(thread_data, lease_group_id):
+    """Add a lease group's archived threads to loaded thread data.
+
+    For history views. The result is a new dict; thread_data is not
+    modified. A thread present in both (interrupted archive run) is
+    taken from the hot store.
+
+    Args:
+        thread_data: dict from _load_all_threads()
+        lease_group_id: str
+
+    Returns:
+        dict: {"threads": hot + archived, "messages": hot + archived}
+    """
+    archived = load_archived_threads(lease_group_id)
+    if not archived["threads"]:
+        return thread_data
+    hot_thread_ids = {t.get("id") for t in thread_data.get("threads", [])}
+    hot_message_ids = {m.get("id") for m in thread_data.get("messages", [])}
+    merged = dict(thread_data)
+    merged["threads"] = thread_data.get("threads", []) + [
+        t for t in archived["threads"] if t.get("id") not in hot_thread_ids]
+    merged["messages"] = thread_data.get("messages", []) + [
+        m for m in archived["messages"] if m.get("id") not in hot_message_ids]
+    return merged
+
+
+def iter_archived_threads():
+    """Yield (thread, messages) for every archived thread."""
+    index = _read_archive_file(_index_path(), _empty_index)
+    groups = {entry.get("lease_group_id") for entry in index["threads"].values()}
+    for lease_group_id in sorted(groups, key=str):
+        archived = load_archived_threads(lease_group_id)
+        messages_by_thread = {}
+        for message in archived["messages"]:
+            messages_by_thread.setdefault(message.get("thread_id"), []).append(message)
+        for thread in archived["threads"]:
+            yield thread, messages_by_thread.get(thread.get("id"), [])
+
+
+# ----------------------------------------------------------------
+# Archiving
+# ----------------------------------------------------------------
+
+def _resolved_before(thread, cutoff):
+    if thread.get("status") != "resolved" or not thread.get("resolved_at"):
+        return False
+    try:
+        return datetime.fromisoformat(thread["resolved_at"]) < cutoff
+    except (TypeError, ValueError):
+        return False
+
+
+@_retry_on_conflict
+@store_lock("threads")
+def archive_resolved_threads(older_than_days=None, dry_run=False, now=None):
+    """Move old resolved threads and their messages to the cold archive.
+
+    Args:
+        older_than_days: minimum days since resolved_at
+                         (default THREAD_ARCHIVE_AFTER_DAYS)
+        dry_run: report what would move; write nothing
+        now: datetime to measure age from (default: now)
+
+    Returns:
+        dict: {"threads", "messages", "lease_groups"} moved (or that
+              would move), and "hot_threads" left in threads.json
+    """
+    if older_than_days is None:
+        older_than_days = THREAD_ARCHIVE_AFTER_DAYS
+    cutoff = (now or datetime.now()) - timedelta(days=older_than_days)
+
+    thread_data = storage._load_all_threads()
+    undelivered = {d.get("thread_id") for d in thread_data.get("deliveries", [])
+                   if d.get("status") in ("pending", "sending")}
+    cold = [t for t in thread_data["threads"]
+            if _resolved_before(t, cutoff) and t["id"] not in undelivered]
+    cold_ids = {t["id"] for t in cold}
+    cold_messages = [m for m in thread_data["messages"] if m.get("thread_id") in cold_ids]
+
+    by_group = {}
+    for t in cold:
+        by_group.setdefault(t.get("lease_group_id"), ([], []))[0].append(t)
+    group_of = {t["id"]: t.get("lease_group_id") for t in cold}
+    for m in cold_messages:
+        by_group[group_of[m["thread_id"]]][1].append(m)
+
+    report = {"threads": len(cold), "messages": len(cold_messages),
+              "lease_groups": len(by_group),
+              "hot_threads": len(thread_data["threads"]) - len(cold)}
+    if dry_run or not cold:
+        return report
+    # Returned when a write fails: archives already written only
+    # duplicate threads the hot store still has, and the next run
+    # picks them up again
+    nothing_moved = {"threads": 0, "messages": 0, "lease_groups": 0,
+                     "hot_threads": len(thread_data["threads"])}
+
+    index = _read_archive_file(_index_path(), _empty_index, cached=False)
+    for lease_group_id, (threads, messages) in by_group.items():
+        path = _group_archive_path(lease_group_id)
+        archive = _read_archive_file(path, _empty_group_archive, cached=False)
+        known_threads = {t.get("id") for t in archive["threads"]}
+        known_messages = {m.get("id") for m in archive["messages"]}
+        archive["threads"].extend(t for t in threads if t["id"] not in known_threads)
+        archive["messages"].extend(m for m in messages if m.get("id") not in known_messages)
+        if not _write_archive_file(path, archive):
+            return nothing_moved
+        for t in threads:
+            index["threads"][t["id"]] = {"lease_group_id": lease_group_id,
+                                         "topic_type": t.get("topic_type"),
+                                         "topic_ref": t.get("topic_ref")}
+    if not _write_archive_file(_index_path(), index):
+        return nothing_moved
+
+    thread_data["threads"] = [t for t in thread_data["threads"] if t["id"] not in cold_ids]
+    thread_data["messages"] = [m for m in thread_data["messages"]
+                               if m.get("thread_id") not in cold_ids]
+    thread_data["deliveries"] = [d for d in thread_data.get("deliveries", [])
+                                 if d.get("thread_id") not in cold_ids]
+    if not storage._save_threads_file(thread_data):
+        return nothing_moved
+    for t in cold:
+        THREAD_ACTIONS_TOTAL.inc("archived", t.get("topic_type"))
+    return report
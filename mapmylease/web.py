@@ -0,0 +1,162 @@
+"""
+Flask app construction shared by the landlord and tenant apps:
+template filters, jinja globals, upload config, observability hooks
+and the startup migration pass.
+"""
+
+import os
+import mimetypes
+from datetime import datetime
+from urllib.parse import quote
+from flask import Flask, current_app, flash, redirect, request, send_file
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from mapmylease import storage
+from mapmylease.observability import install_observability
+from mapmylease.storage import (
+    MAX_REQUEST_BYTES,
+    PROJECT_DIR,
+    STORE_FILES,
+    UPLOAD_FOLDER,
+    run_store_migrations,
+)
+
+
+def days_until_filter(date_str):
+    """Calculate days remaining until a date."""
+    if not date_str:
+        return None
+    try:
+        end_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        today = datetime.now().date()
+        return (end_date - today).days
+    except ValueError:
+        return None
+
+def format_money_filter(value):
+    """Format a numeric value with commas for display (e.g. 185000 → 185,000)."""
+    if value is None:
+        return '—'
+    try:
+        num = float(value)
+        if num == int(num):
+            return f"{int(num):,}"
+        return f"{num:,.2f}"
+    except (ValueError, TypeError):
+        return str(value)
+
+def format_date_filter(date_str):
+    """Format an ISO date/datetime string to human-readable (e.g. '5 Feb 2026')."""
+    if not date_str:
+        return '—'
+    try:
+        dt = datetime.fromisoformat(date_str)
+        return dt.strftime("%-d %b %Y")
+    except (ValueError, TypeError):
+        return str(date_str)
+
+
+# ----------------------------------------------------------------
+# Serving uploaded files (lease documents, proofs, previews)
+# ----------------------------------------------------------------
+# Every file response carries a strong ETag and answers conditional
+# and Range requests. Content-addressed files (proofs, previews) are
+# cached by the browser for a year without revalidation; lease
+# documents can be re-uploaded under the same name, so they are
+# revalidated (a cheap 304) on every open.
+#
+# MAPMYLEASE_SENDFILE hands the bytes to the front-end server so
+# Python workers never stream files:
+#   x-sendfile        X-Sendfile: <absolute path> (Apache, lighttpd)
+#   x-accel-redirect  X-Accel-Redirect: <MAPMYLEASE_ACCEL_PREFIX><path
+#                     relative to uploads/> (nginx `internal` location
+#                     aliased to the uploads folder)
+# ----------------------------------------------------------------
+SENDFILE_MODE = os.environ.get("MAPMYLEASE_SENDFILE", "").lower()
+ACCEL_REDIRECT_PREFIX = os.environ.get("MAPMYLEASE_ACCEL_PREFIX", "/_uploads/")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def send_upload(path, etag, immutable=False, mimetype=None):
+    """Serve a file from the uploads folder with caching headers.
+
+    Args:
+        path: absolute path of the file (inside the uploads folder)
+        etag: strong ETag value (unquoted), e.g. the content SHA-256
+        immutable: content never changes under this URL
+        mimetype: override the type guessed from the extension
+
+    Returns:
+        Response: 200/206/304 (or an empty X-Accel-Redirect response)
+    """
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if SENDFILE_MODE == "x-accel-redirect":
+        relative_path = os.path.relpath(path, storage.UPLOAD_FOLDER)
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = (
+            ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(relative_path.replace(os.sep, "/")))
+        response.set_etag(etag)
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            del response.headers["X-Accel-Redirect"]
+    else:
+        # conditional=True: If-None-Match/If-Modified-Since → 304,
+        # Range → 206 (Werkzeug); USE_X_SENDFILE applies here
+        response = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+
+    if immutable:
+        response.headers["Cache-Control"] = f"private, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+    response.headers.pop("Expires", None)
+    return response
+
+
+def request_too_large(error):
+    """413 handler: send the user back to the form with a message."""
+    if request.referrer:
+        limit_mb = MAX_REQUEST_BYTES // (1024 * 1024)
+        flash(f"Upload too large (max {limit_mb} MB per submission).", "error")
+        return redirect(request.referrer)
+    return error
+
+
+def make_app(import_name):
+    """Create a Flask app with the shared filters, config and hooks.
+
+    Routes are registered by the caller (landlord.create_app or
+    tenant.create_tenant_app). templates/ and static/ resolve from the
+    project root, so both apps share them.
+
+    Args:
+        import_name: name of the module building the app
+
+    Returns:
+        Flask: the configured app, without landlord or tenant routes
+    """
+    app = Flask(import_name, root_path=PROJECT_DIR)
+    app.secret_key = "dev-secret-key"  # Required for flash messages
+
+    app.add_template_filter(days_until_filter, "days_until")
+    app.add_template_filter(format_money_filter, "format_money")
+    app.add_template_filter(format_date_filter, "format_date")
+
+    # Make datetime.now available in templates (used for year dropdowns)
+    app.jinja_env.globals["now"] = datetime.now
+
+    app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+    app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+    app.config["USE_X_SENDFILE"] = SENDFILE_MODE == "x-sendfile"
+    app.register_error_handler(RequestEntityTooLarge, request_too_large)
+
+    install_observability(app)
+
+    # Apply pending schema migrations once per app start.
+    # MAPMYLEASE_SKIP_MIGRATIONS=1 defers them to `flask --app app migrate`.
+    app.config["STARTUP_MIGRATIONS"] = {}
+    if os.environ.get("MAPMYLEASE_SKIP_MIGRATIONS") != "1":
+        app.config["STARTUP_MIGRATIONS"] = run_store_migrations()
+        for store, (from_version, to_version) in app.config["STARTUP_MIGRATIONS"].items():
+            print(f"[INFO] Migrated {STORE_FILES[store]} schema v{from_version} -> v{to_version}")
+
+    return app
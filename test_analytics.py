@@ -0,0 +1,92 @@
+"""Portfolio analytics: NumPy and pure-Python reductions, month-boundary cache."""
+
+from datetime import date
+
+import pytest
+
+from conftest import write_store
+from mapmylease import analytics
+
+
+def _lease(lease_id, version, start, end):
+    return {"id": lease_id, "lease_group_id": "g-1", "version": version, "status": "active",
+            "current_values": {"lease_nickname": "Wakad 1BHK", "lease_start_date": start,
+                               "lease_end_date": end, "monthly_rent": 10000, "rent_due_day": 5}}
+
+
+def _rent(month, declared, date_paid):
+    return {"id": f"p-{month}", "lease_group_id": "g-1", "confirmation_type": "rent",
+            "period_year": 2025, "period_month": month, "amount_declared": declared,
+            "date_paid": date_paid}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def seeded(request, data_dir, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(analytics, "NUMPY_AVAILABLE", request.param == "numpy")
+    monkeypatch.setattr(analytics, "_analytics_cache", {})
+    # April and May fall between the two versions: a vacancy gap
+    write_store(data_dir, "leases", {"leases": [
+        _lease("v1", 1, "2025-01-01", "2025-03-31"),
+        _lease("v2", 2, "2025-06-01", "2025-12-31"),
+    ]})
+    write_store(data_dir, "payments", {"confirmations": [
+        _rent(1, 10000, "2025-01-05"),
+        _rent(2, 12000, "2025-02-15"),
+        _rent(6, 5000, "2025-06-04"),
+    ]})
+    return request.param
+
+
+def test_monthly_series(seeded):
+    result = analytics.portfolio_analytics(today=date(2025, 7, 10))
+
+    assert result["vectorised"] is (seeded == "numpy")
+    assert result["months"] == ["2025-01", "2025-02", "2025-03", "2025-04", "2025-05", "2025-06"]
+    assert result["occupied_units"] == [1, 1, 1, 0, 0, 1]
+    assert result["vacant_units"] == [0, 0, 0, 1, 1, 0]
+    assert result["collection_rate"] == [1.0, 1.0, 0.0, None, None, 0.5]
+    assert result["arrears_outstanding"] == [0.0, 0.0, 10000.0, 10000.0, 10000.0, 15000.0]
+    assert result["avg_days_late"] == [0.0, 10.0, None, None, None, 0.0]
+    assert [b["count"] for b in result["days_late_distribution"]] == [2, 0, 1, 0, 0]
+    assert result["vacancy_gaps"] == [{"lease_group_id": "g-1", "lease_nickname": "Wakad 1BHK",
+                                       "from": "2025-04", "to": "2025-05", "months": 2}]
+
+
+def test_cached_per_month_boundary(seeded, monkeypatch):
+    builds = []
+    build = analytics.build_portfolio_analytics
+    monkeypatch.setattr(analytics, "build_portfolio_analytics",
+                        lambda as_of: builds.append(as_of) or build(as_of))
+
+    first = analytics.portfolio_analytics(today=date(2025, 7, 1))
+    assert analytics.portfolio_analytics(today=date(2025, 7, 31)) is first
+    assert analytics.portfolio_analytics(today=date(2025, 8, 1))["months"][-1] == "2025-07"
+    assert builds == [date(2025, 6, 30), date(2025, 7, 31)]
+
+
+def test_dashboard_and_json_endpoint(client, seeded):
+    response = client.get("/api/analytics")
+    assert response.status_code == 200
+    assert response.get_json()["vacancy_gaps"][0]["months"] == 2
+    assert client.get("/api/analytics",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    page = client.get("/analytics")
+    assert page.status_code == 200
+    assert b"Vacancy gaps" in page.data and b"Wakad 1BHK" in page.data
+
+
+def test_corrected_month_counts_its_latest_submission_only(seeded, data_dir):
+    payments = [_rent(1, 10000, "2025-01-05"), _rent(2, 12000, "2025-02-15"),
+                _rent(6, 5000, "2025-06-04")]
+    payments[0]["submitted_at"] = "2025-01-05T10:00:00"
+    # The tenant corrects January: 8000 paid, not 10000
+    payments.append(dict(_rent(1, 8000, "2025-01-06"), id="p-1b",
+                         submitted_at="2025-01-07T09:00:00"))
+    write_store(data_dir, "payments", {"confirmations": payments})
+
+    result = analytics.portfolio_analytics(today=date(2025, 7, 10))
+    assert result["collection_rate"][0] == 0.8
+    assert result["avg_days_late"][0] == 1.0
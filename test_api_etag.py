@@ -0,0 +1,77 @@
+"""JSON dashboard API — payload shape and ETag / If-None-Match handling."""
+
+import uuid
+
+from conftest import write_store
+
+
+def _seed_lease(data_dir):
+    lease_id = str(uuid.uuid4())
+    lease = {
+        "id": lease_id,
+        "lease_group_id": lease_id,
+        "version": 1,
+        "is_current": True,
+        "current_values": {
+            "lease_nickname": "Flat 1",
+            "lessor_name": "A Landlord",
+            "lessee_name": "A Tenant",
+            "lease_start_date": "2024-01-01",
+            "lease_end_date": "2030-12-31",
+            "monthly_rent": 1000,
+            "rent_due_day": 5,
+        },
+        "ai_extracted_values": {},
+    }
+    write_store(data_dir, "leases", {"leases": [lease]})
+    return lease_id
+
+
+def test_leases_endpoint_returns_dashboard_fields(client, data_dir):
+    lease_id = _seed_lease(data_dir)
+    resp = client.get("/api/leases")
+    assert resp.status_code == 200
+    leases = resp.get_json()["leases"]
+    assert [l["id"] for l in leases] == [lease_id]
+    assert leases[0]["_needs_attention"] is False
+    assert leases[0]["_is_expired"] is False
+
+
+def test_matching_etag_returns_304(client, data_dir):
+    _seed_lease(data_dir)
+    # First read runs the idempotent lease migrations and rewrites the
+    # file once; stamps are stable from then on.
+    client.get("/api/leases")
+    for url in ("/api/leases", "/api/attention", "/api/alerts"):
+        first = client.get(url)
+        etag = first.headers["ETag"]
+        again = client.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304, url
+        assert again.data == b""
+        assert again.headers["ETag"] == etag
+
+
+def test_etag_changes_when_store_changes(client, data_dir):
+    _seed_lease(data_dir)
+    etag = client.get("/api/leases").headers["ETag"]
+    _seed_lease(data_dir)
+    resp = client.get("/api/leases", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_monthly_summary_pages(client, data_dir):
+    lease_id = _seed_lease(data_dir)
+    resp = client.get(f"/api/leases/{lease_id}/monthly-summary?limit=3")
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert len(body["months"]) == 3
+    assert body["next_before"] is not None
+
+    older = client.get(f"/api/leases/{lease_id}/monthly-summary"
+                       f"?limit=3&before={body['next_before']}").get_json()
+    first_new = (body["months"][-1]["year"], body["months"][-1]["month"])
+    first_old = (older["months"][0]["year"], older["months"][0]["month"])
+    assert first_old < first_new
+
+    assert client.get("/api/leases/nope/monthly-summary").status_code == 404
@@ -0,0 +1,82 @@
+"""Incremental snapshots: delta-only copies, point-in-time restore, hash checks."""
+
+import os
+from datetime import datetime
+
+import pytest
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio
+from mapmylease import backups, storage
+
+
+@pytest.fixture
+def seeded(data_dir, tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    (uploads / "proofs" / "g-1").mkdir(parents=True)
+    (uploads / "proofs" / "g-1" / "jan.pdf").write_bytes(b"%PDF jan")
+    (uploads / "lease.pdf").write_bytes(b"%PDF lease")
+    monkeypatch.setattr(storage, "UPLOAD_FOLDER", str(uploads))
+    monkeypatch.delenv("MAPMYLEASE_BACKUP_DIR", raising=False)
+    write_portfolio(data_dir, generate_portfolio(3, seed=5))
+    return uploads
+
+
+def _add_payment(payment_id):
+    data = storage._load_all_payments()
+    data["confirmations"].append({"id": payment_id, "lease_group_id": "g-1",
+                                  "confirmation_type": "rent", "period_year": 2026,
+                                  "period_month": 1, "amount_declared": 1})
+    assert storage._save_payment_file(data)
+
+
+def test_second_snapshot_copies_only_the_delta(seeded):
+    first = backups.take_snapshot(now=datetime(2026, 10, 1, 9, 0))
+    assert first["hashed"] == first["files"] == 7    # 5 stores + 2 uploads
+
+    _add_payment("p-new")
+    (seeded / "proofs" / "g-1" / "feb.pdf").write_bytes(b"%PDF feb")
+    second = backups.take_snapshot(now=datetime(2026, 10, 2, 9, 0))
+    assert second["files"] == 8
+    assert second["hashed"] == 2 and second["reused"] == 6
+    assert second["bytes_copied"] == os.path.getsize(storage._store_path("payments")) + 8
+
+    assert backups.find_snapshot("2026-10-01") == first["id"]
+    assert backups.find_snapshot("2026-10-02T08:00") == first["id"]
+    assert backups.find_snapshot(second["id"]) == second["id"]
+    with pytest.raises(backups.SnapshotError):
+        backups.find_snapshot("2026-09-30")
+
+
+def test_restore_to_point_in_time_across_layouts(seeded):
+    before = storage._load_all_payments()
+    first = backups.take_snapshot(now=datetime(2026, 10, 1, 9, 0))
+
+    storage.convert_store_layout("sharded")
+    _add_payment("p-new")
+    (seeded / "lease.pdf").write_bytes(b"overwritten")
+
+    report = backups.restore_snapshot(first["id"])
+    assert report["uploads_restored"] == 1
+    assert storage.store_layout() == "single"
+    assert storage._load_all_payments() == before
+    assert (seeded / "lease.pdf").read_bytes() == b"%PDF lease"
+
+    # The pre-restore state is itself a snapshot
+    backups.restore_snapshot(report["safety_snapshot"])
+    assert storage.store_layout() == "sharded"
+    assert "p-new" in {c["id"] for c in storage._load_all_payments()["confirmations"]}
+
+
+def test_corrupt_object_is_detected_and_never_restored(flask_app, seeded):
+    runner = flask_app.test_cli_runner()
+    assert runner.invoke(args=["snapshot", "--label", "nightly"]).exit_code == 0
+    snapshot_id = backups.list_snapshots()[-1]["id"]
+    entry = backups.load_snapshot(snapshot_id)["uploads"]["lease.pdf"]
+    with open(backups._object_path(entry["sha256"]), "wb") as f:
+        f.write(b"bit rot")
+
+    assert backups.verify_snapshot(snapshot_id) == ["uploads/lease.pdf"]
+    (seeded / "lease.pdf").write_bytes(b"current")
+    result = runner.invoke(args=["restore-snapshot", snapshot_id, "--yes"])
+    assert result.exit_code != 0 and "corrupt" in result.output
+    assert (seeded / "lease.pdf").read_bytes() == b"current"
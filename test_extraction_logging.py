@@ -0,0 +1,89 @@
+"""Structured logging in the extraction path: counts and timings, never text."""
+
+import io
+import logging
+
+import pytest
+
+from mapmylease import extraction, observability
+
+
+def minimal_pdf(pages):
+    """Build a small text PDF (one Helvetica line per page)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(len(pages)))
+        + b"] /Count %d >>" % len(pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    """Capture mapmylease log records synchronously at DEBUG."""
+    handler = _ListHandler()
+    previous = observability.log.level
+    observability.log.setLevel(logging.DEBUG)
+    observability.log.addHandler(handler)
+    yield handler.records
+    observability.log.removeHandler(handler)
+    observability.log.setLevel(previous)
+
+
+def test_pdf_extraction_logs_stats_not_content(tmp_path, records):
+    pdf = tmp_path / "lease.pdf"
+    pdf.write_bytes(minimal_pdf(["Lease between Asha and Rahul", "Rent 50000"]))
+
+    full_text, page_texts = extraction.extract_text_from_pdf(str(pdf))
+    assert page_texts == ["Lease between Asha and Rahul", "Rent 50000"]
+
+    summary = next(r for r in records if r.getMessage() == "extract.pdf")
+    assert summary.levelno == logging.INFO
+    assert summary.fields["method"] == "text"
+    assert summary.fields["pages"] == 2
+    assert summary.fields["chars"] == len(full_text)
+
+    pages = [r for r in records if r.getMessage() == "extract.pdf.page"]
+    assert [r.levelno for r in pages] == [logging.DEBUG, logging.DEBUG]
+    assert all(r.fields["ms"] >= 0 for r in pages)
+
+    formatter = observability._KeyValueFormatter()
+    for record in records:
+        line = formatter.format(record)
+        assert "Asha" not in line and "50000" not in line
+
+
+def test_debug_events_are_skipped_at_info(records):
+    observability.log.setLevel(logging.INFO)
+    observability._log_event(logging.DEBUG, "extract.pdf.page", page=1)
+    observability._log_event(logging.INFO, "ai.extract.skipped", reason="no text")
+    assert [r.getMessage() for r in records] == ["ai.extract.skipped"]
+    assert observability._KeyValueFormatter().format(records[0]).endswith('reason="no text"')
@@ -0,0 +1,63 @@
+"""Caching headers, conditional GET, Range and sendfile offload for uploads."""
+
+import hashlib
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from mapmylease import landlord, storage, web
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    folder = tmp_path / "uploads"
+    folder.mkdir()
+    monkeypatch.setattr(storage, "UPLOAD_FOLDER", str(folder))
+    monkeypatch.setattr(storage, "PROOF_UPLOAD_FOLDER", str(folder / "proofs"))
+    monkeypatch.setattr(landlord, "UPLOAD_FOLDER", str(folder))
+    return folder
+
+
+def test_proof_is_immutable_with_content_etag(client, uploads):
+    content = b"\xff\xd8receipt" * 500
+    storage.save_proof_file("lg-1", "pay-1", FileStorage(
+        stream=io.BytesIO(content), filename="r.jpg", content_type="image/jpeg"))
+    url = "/view_proof/lg-1/pay-1_r.jpg"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "private" in response.headers["Cache-Control"]
+    response.close()
+
+    assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_lease_pdf_revalidates_and_serves_ranges(client, uploads):
+    content = bytes(range(256)) * 400
+    (uploads / "lease.pdf").write_bytes(content)
+
+    response = client.get("/view_pdf/lease.pdf")
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    etag = response.headers["ETag"]
+    response.close()
+    assert etag == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert client.get("/view_pdf/lease.pdf", headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get("/view_pdf/lease.pdf", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.data == content[100:200]
+    partial.close()
+
+
+def test_x_accel_redirect_hands_off_the_bytes(client, uploads, monkeypatch):
+    monkeypatch.setattr(web, "SENDFILE_MODE", "x-accel-redirect")
+    (uploads / "lease one.pdf").write_bytes(b"%PDF-1.4")
+
+    response = client.get("/view_pdf/lease one.pdf")
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Redirect"] == "/_uploads/lease%20one.pdf"
+    assert response.data == b""
@@ -0,0 +1,94 @@
+"""fsck: dangling cross-store references, duplicate open threads, safe repairs."""
+
+from datetime import datetime
+
+import pytest
+
+from conftest import write_store
+from mapmylease import engine, fsck, storage
+
+
+def _thread(thread_id, status="open", topic_ref="rent:2026-01", group="g-1"):
+    return {"id": thread_id, "lease_group_id": group, "topic_type": "payment_review",
+            "topic_ref": topic_ref, "status": status, "created_at": "2026-02-01T10:00:00",
+            "resolved_at": None, "needs_landlord_attention": False}
+
+
+def _message(message_id, thread_id, payment_id=None):
+    return {"id": message_id, "thread_id": thread_id, "created_at": "2026-02-01T10:00:00",
+            "actor": "tenant", "message_type": "reply", "body": "hi",
+            "payment_id": payment_id, "attachments": []}
+
+
+def _token(token, group, issued_at):
+    return {"token": token, "lease_group_id": group, "is_active": True, "issued_at": issued_at,
+            "revoked_at": None, "revoked_reason": None, "last_used_at": None}
+
+
+@pytest.fixture
+def broken(data_dir, tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    (uploads / "proofs" / "g-1").mkdir(parents=True)
+    (uploads / "proofs" / "g-1" / "ok.pdf").write_bytes(b"%PDF")
+    monkeypatch.setattr(storage, "UPLOAD_FOLDER", str(uploads))
+
+    write_store(data_dir, "leases", {"leases": [
+        {"id": "l-1", "lease_group_id": "g-1", "version": 1, "is_current": True,
+         "current_values": {"lease_start_date": "2026-01-01", "lease_end_date": "2026-31-12"}}]})
+    write_store(data_dir, "payments", {"confirmations": [
+        {"id": "p-1", "lease_group_id": "g-1", "confirmation_type": "rent", "period_year": 2026,
+         "period_month": 1, "submitted_at": "2026-01-05T10:00:00",
+         "proof_files": ["proofs/g-1/ok.pdf", "proofs/g-1/gone.pdf"]},
+        {"id": "p-2", "lease_group_id": "g-gone", "confirmation_type": "rent", "period_year": 2026,
+         "period_month": 13, "submitted_at": "2026-01-05T10:00:00", "proof_files": []}]})
+    write_store(data_dir, "threads", {"threads": [
+        _thread("t-1"), _thread("t-2"), _thread("t-3", topic_ref="rent:2026-02")],
+        "messages": [_message("m-1", "t-1", "p-1"), _message("m-2", "t-2"),
+                     _message("m-3", "t-missing"), _message("m-4", "t-3", "p-missing")]})
+    write_store(data_dir, "terminations", {"terminations": [
+        {"id": "x-1", "lease_id": "l-gone", "termination_date": "2026-06-30"}]})
+    write_store(data_dir, "tenant_access", {"tenant_tokens": [
+        _token("tok-old", "g-1", "2026-01-01T00:00:00"),
+        _token("tok-new", "g-1", "2026-03-01T00:00:00"),
+        _token("tok-orphan", "g-gone", "2026-01-01T00:00:00")]})
+    return data_dir
+
+
+def test_reports_every_kind_of_issue(broken):
+    report = fsck.check_stores()
+
+    assert report["records"] == 14
+    assert report["counts"] == {
+        "invalid_date": 1, "missing_proof_file": 1, "orphan_confirmation": 1,
+        "invalid_period": 1, "duplicate_open_thread": 1, "orphan_message": 1,
+        "orphan_payment_ref": 1, "orphan_termination": 1, "duplicate_active_token": 1,
+        "orphan_token": 1}
+    duplicate = next(i for i in report["issues"] if i["check"] == "duplicate_open_thread")
+    assert duplicate["id"] == "t-2"
+    assert next(i for i in report["issues"]
+                if i["check"] == "duplicate_active_token")["id"] == "tok-old"
+    assert report["repaired"] == {}
+
+
+def test_repair_fixes_only_the_safe_issues(broken):
+    report = fsck.check_stores(repair=True, now=datetime(2026, 10, 1))
+    assert report["repaired"] == {"duplicate_open_thread": 1, "orphan_message": 1,
+                                  "orphan_payment_ref": 1, "tokens_revoked": 2}
+
+    thread_data = storage._load_all_threads()
+    assert sorted(t["id"] for t in thread_data["threads"]) == ["t-1", "t-3"]
+    assert [m["id"] for m in engine.get_messages_for_thread("t-1", thread_data)] == ["m-1", "m-2"]
+    assert next(m for m in thread_data["messages"] if m["id"] == "m-4")["payment_id"] is None
+    assert engine.validate_token("tok-new")["valid"]
+    assert engine.validate_token("tok-old")["reason"] == "revoked"
+
+    after = fsck.check_stores()
+    assert set(after["counts"]) == {"invalid_date", "missing_proof_file", "orphan_confirmation",
+                                    "invalid_period", "orphan_termination"}
+
+
+def test_cli_exit_status_and_masks_tokens(flask_app, broken):
+    result = flask_app.test_cli_runner().invoke(args=["fsck"])
+    assert result.exit_code == 1
+    assert "tok-orphan" not in result.output and "tok-orph…" in result.output
+    assert "checked 14 records" in result.output
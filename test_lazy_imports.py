@@ -0,0 +1,27 @@
+"""Heavy extraction/AI (and analytics) packages are not imported until first use."""
+
+import os
+import subprocess
+import sys
+
+HEAVY = ("pypdf", "pytesseract", "pdf2image", "PIL", "anthropic", "numpy")
+
+_PROBE = "import sys, app; print(' '.join(m for m in {!r} if m in sys.modules))"
+
+
+def _loaded_after_import(**env):
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(HEAVY)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, MAPMYLEASE_SKIP_MIGRATIONS="1", **env),
+        capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_import_app_skips_extraction_packages():
+    assert _loaded_after_import(MAPMYLEASE_EAGER_IMPORTS="0") == []
+
+
+def test_eager_imports_preload_extraction_packages():
+    loaded = _loaded_after_import(MAPMYLEASE_EAGER_IMPORTS="1")
+    assert {"pypdf", "pytesseract", "pdf2image", "PIL"} <= set(loaded)
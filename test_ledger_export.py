@@ -0,0 +1,110 @@
+"""Streaming ledger export: filters, governing-version join, CSV and XLSX."""
+
+import csv
+import io
+import zipfile
+
+from conftest import write_store
+from mapmylease import reports
+
+
+def _lease(lease_id, version, start, end, nickname):
+    return {"id": lease_id, "lease_group_id": "g-1", "version": version, "status": "active",
+            "current_values": {"lease_nickname": nickname, "lessee_name": "Asha Rao",
+                               "lease_start_date": start, "lease_end_date": end}}
+
+
+def _confirmation(pid, year, month, ctype="rent", tds=1000):
+    return {"id": pid, "lease_group_id": "g-1", "confirmation_type": ctype,
+            "period_year": year, "period_month": month, "amount_agreed": 10000.0,
+            "amount_declared": 10000.0, "tds_deducted": tds, "proof_files": ["a", "b"],
+            "submitted_at": f"{year}-{month:02d}-05T10:00:00"}
+
+
+def _seed(data_dir):
+    write_store(data_dir, "leases", {"leases": [
+        _lease("v1", 1, "2025-01-01", "2025-12-31", "Old nickname"),
+        _lease("v2", 2, "2026-01-01", "2026-12-31", "Koramangala 2BHK"),
+    ]})
+    write_store(data_dir, "payments", {"confirmations": [
+        _confirmation("p-4", 2026, 4),
+        _confirmation("p-1", 2025, 3),
+        _confirmation("p-2", 2025, 12),
+        _confirmation("p-3", 2026, 2, ctype="maintenance", tds=None),
+    ]})
+
+
+def test_rows_are_filtered_ordered_and_joined_to_governing_version(data_dir):
+    _seed(data_dir)
+
+    rows = list(reports.iter_ledger_rows(**reports.ledger_filters(fy="2025-26")))
+
+    assert [r["payment_id"] for r in rows] == ["p-2", "p-3"]
+    assert [(r["governing_version"], r["lease_nickname"]) for r in rows] == [
+        (1, "Old nickname"), (2, "Koramangala 2BHK")]
+    assert {r["financial_year"] for r in rows} == {"2025-26"}
+    assert rows[0]["proof_count"] == 2
+
+    only_rent = reports.ledger_filters(period_from="2025-06", types="rent")
+    assert [r["payment_id"] for r in reports.iter_ledger_rows(**only_rent)] == ["p-2", "p-4"]
+
+
+def test_invalid_filters_are_rejected(client, data_dir):
+    for query in ("fy=last", "from=2025-13", "type=rent,parking", "format=pdf"):
+        response = client.get(f"/export/ledger?{query}")
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_csv_endpoint_streams_chunks(client, data_dir, monkeypatch):
+    _seed(data_dir)
+    monkeypatch.setattr(reports, "EXPORT_CHUNK_CHARS", 1)
+
+    response = client.get("/export/ledger?type=rent", buffered=False)
+    assert response.is_streamed
+    assert 'filename="ledger.csv"' in response.headers["Content-Disposition"]
+    chunks = list(response.response)
+    response.close()
+
+    assert len(chunks) == 4  # header + one chunk per row
+    table = list(csv.DictReader(io.StringIO("".join(
+        c.decode() if isinstance(c, bytes) else c for c in chunks))))
+    assert [row["Confirmation id"] for row in table] == ["p-1", "p-2", "p-4"]
+    assert table[0]["TDS deducted"] == "1000"
+
+
+def test_xlsx_export_is_a_valid_workbook(flask_app, data_dir, tmp_path):
+    _seed(data_dir)
+    out = tmp_path / "ledger.xlsx"
+
+    result = flask_app.test_cli_runner().invoke(
+        args=["export-ledger", str(out), "--fy", "2025", "--type", "maintenance"])
+
+    assert result.output.strip() == f"wrote 1 rows to {out}"
+    with zipfile.ZipFile(out) as zf:
+        assert zf.testzip() is None
+        sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+    assert sheet.count("<row>") == 2
+    assert "Koramangala 2BHK" in sheet and "p-3" in sheet
+
+
+def test_text_cells_cannot_start_a_formula(data_dir):
+    _seed(data_dir)
+    payments = {"confirmations": [
+        dict(_confirmation("p-1", 2025, 3, tds=-5), notes='=HYPERLINK("http://x","paid")'),
+        dict(_confirmation("p-2", 2025, 4), notes="-50 adj")]}
+    write_store(data_dir, "payments", payments)
+
+    table = list(csv.DictReader(io.StringIO("".join(reports.iter_csv(reports.iter_ledger_rows())))))
+    assert table[0]["Notes"] == '\'=HYPERLINK("http://x","paid")'
+    assert table[1]["Notes"] == "'-50 adj"
+    assert table[0]["TDS deducted"] == "-5"
+
+    # Inline strings are never evaluated, so XLSX text is written as entered
+    sheet = b"".join(reports.iter_xlsx(reports.iter_ledger_rows()))
+    with zipfile.ZipFile(io.BytesIO(sheet)) as zf:
+        xml = zf.read("xl/worksheets/sheet1.xml").decode()
+    assert '<t xml:space="preserve">=HYPERLINK("http://x","paid")</t>' in xml
+    assert '<t xml:space="preserve">-50 adj</t>' in xml
+    assert "'=" not in xml and "'-" not in xml
+    assert '<v>-5</v>' in xml
@@ -0,0 +1,55 @@
+"""Prometheus text exposition at /metrics."""
+
+import re
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio
+from mapmylease import observability
+
+
+def _sample(text, name, **labels):
+    """Return the value of one sample line, or None if absent."""
+    label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = re.escape(f"{name}{{{label_text}}}" if labels else name) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_exposition_is_cumulative():
+    h = observability._Histogram("test_latency_seconds", "test", ("route",), buckets=(0.1, 1))
+    observability._METRICS.remove(h)
+    for value in (0.05, 0.5, 5):
+        h.observe(value, "a")
+
+    lines = h.exposition()
+    assert 'test_latency_seconds_bucket{route="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="a",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{route="a"} 3' in lines
+
+
+def test_metrics_cover_requests_stores_engine_and_cache(client, data_dir):
+    write_portfolio(data_dir, generate_portfolio(3, seed=4))
+    before = client.get("/metrics").get_data(as_text=True)
+
+    assert client.get("/").status_code == 200
+    first = client.get("/api/leases")
+    client.get("/api/leases", headers={"If-None-Match": first.headers["ETag"]})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+
+    def delta(name, **labels):
+        return (_sample(text, name, **labels) or 0) - (_sample(before, name, **labels) or 0)
+
+    assert delta("mapmylease_request_duration_seconds_count", endpoint="index", method="GET") == 1
+    assert delta("mapmylease_requests_total", endpoint="index", method="GET", status="200") == 1
+    assert delta("mapmylease_store_load_seconds_count", store="leases") >= 1
+    assert delta("mapmylease_store_io_bytes_count", store="threads", op="read") >= 1
+    assert delta("mapmylease_engine_pass_seconds_count",
+                 **{"pass": "escalate_missing_payment_threads"}) == 1
+    assert delta("mapmylease_api_cache_total", result="hit") == 1
+    assert delta("mapmylease_api_cache_total", result="miss") == 1
+    assert _sample(text, "mapmylease_store_file_bytes", store="leases") > 0
+    assert "# TYPE mapmylease_request_duration_seconds histogram" in text
@@ -0,0 +1,118 @@
+"""Lease detail month history: paging, attention months, cursor validation."""
+
+import json
+import re
+from datetime import date
+
+import pytest
+
+from conftest import write_store
+from mapmylease import landlord
+
+
+def _months_since(year, month):
+    today = date.today()
+    while (year, month) <= (today.year, today.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+@pytest.fixture
+def lease_id(data_dir):
+    """Lease from 2024-01 with rent confirmed and reviewed every month,
+    except March 2024, whose review is still waiting on the landlord."""
+    write_store(data_dir, "leases", {"leases": [{
+        "id": "l-1", "lease_group_id": "g-1", "version": 1, "is_current": True,
+        "current_values": {"lease_nickname": "Baner flat", "lease_start_date": "2024-01-01",
+                           "lease_end_date": "2030-12-31", "monthly_rent": 1000,
+                           "rent_due_day": 5,
+                           "expected_payments": [{"type": "rent", "expected": True}]},
+        "ai_extracted_values": {}}]})
+    confirmations, threads = [], []
+    for y, m in _months_since(2024, 1):
+        period = f"{y}-{m:02d}"
+        confirmations.append({"id": f"p-{period}", "lease_group_id": "g-1",
+                              "confirmation_type": "rent", "period_year": y, "period_month": m,
+                              "amount_agreed": 1000, "amount_declared": 1000,
+                              "tds_deducted": None, "date_paid": f"{period}-05",
+                              "submitted_at": f"{period}-05T10:00:00", "proof_files": [],
+                              "verification_status": "unverified", "notes": None})
+        waiting = period == "2024-03"
+        threads.append({"id": f"t-{period}", "lease_group_id": "g-1",
+                        "topic_type": "payment_review", "topic_ref": f"rent:{period}",
+                        "status": "open" if waiting else "resolved",
+                        "waiting_on": "landlord" if waiting else None,
+                        "created_at": f"{period}-05T10:00:00",
+                        "resolved_at": None if waiting else f"{period}-06T10:00:00",
+                        "needs_landlord_attention": waiting})
+    write_store(data_dir, "payments", {"confirmations": confirmations})
+    write_store(data_dir, "threads", {"threads": threads, "messages": []})
+    return "l-1"
+
+
+def _page_months(html):
+    data = re.search(r"var _llMonthData = (\[.*?\]);\n", html).group(1)
+    return [(ms["year"], ms["month"]) for ms in json.loads(data)]
+
+
+def _skip(html):
+    return re.search(r'data-skip="([^"]*)"', html).group(1)
+
+
+def test_attention_months_always_render_and_are_skipped_when_paging(client, lease_id):
+    html = client.get(f"/?lease_id={lease_id}").get_data(as_text=True)
+    months = _page_months(html)
+    assert len(months) == 13 and months[-1] == (2024, 3)
+    assert _skip(html) == "2024-03"
+
+    before = re.search(r'data-before="([^"]*)"', html).group(1)
+    older = client.get(f"/lease/{lease_id}/months?before={before}&skip=2024-03&limit=60").get_json()
+    older_months = [(ms["year"], ms["month"]) for ms in older["months"]]
+    assert (2024, 3) not in older_months and (2024, 4) in older_months
+    assert not set(older_months) & set(months)
+    assert older["next_before"] is None
+
+
+def test_deep_link_to_an_old_month_is_skipped_too(client, lease_id):
+    html = client.get(f"/?lease_id={lease_id}&open_month=2024-05").get_data(as_text=True)
+    assert _page_months(html)[-2:] == [(2024, 5), (2024, 3)]
+    assert _skip(html) == "2024-05,2024-03"
+
+
+def test_only_attention_months_are_summarised(client, lease_id, monkeypatch):
+    built = []
+    build = landlord.build_landlord_monthly_summary
+
+    def counting_build(lease_data, months, *args):
+        built.extend(months)
+        return build(lease_data, months, *args)
+
+    monkeypatch.setattr(landlord, "build_landlord_monthly_summary", counting_build)
+    client.get(f"/?lease_id={lease_id}")
+    assert len(built) == 13 and built[-1] == (2024, 3)
+
+
+def test_pulled_forward_months_are_capped(client, data_dir, lease_id):
+    # Nothing paid before the first page
+    recent = list(_months_since(2024, 1))[-landlord.MONTH_HISTORY_PAGE_SIZE:]
+    payments = json.loads((data_dir / "payment_data.json").read_text())
+    write_store(data_dir, "payments", {"confirmations": [
+        c for c in payments["confirmations"] if (c["period_year"], c["period_month"]) in recent]})
+
+    html = client.get(f"/?lease_id={lease_id}").get_data(as_text=True)
+    months = _page_months(html)
+    limit = landlord.MONTH_HISTORY_PAGE_SIZE + landlord.MONTH_HISTORY_ATTENTION_LIMIT
+    assert len(months) == limit
+    assert len(_skip(html).split(",")) == landlord.MONTH_HISTORY_ATTENTION_LIMIT
+
+    before = re.search(r'data-before="([^"]*)"', html).group(1)
+    older = client.get(f"/lease/{lease_id}/months?before={before}&skip={_skip(html)}"
+                       f"&limit=60").get_json()
+    older_months = [(ms["year"], ms["month"]) for ms in older["months"]]
+    assert older_months[-1] == (2024, 1) and not set(older_months) & set(months)
+
+
+@pytest.mark.parametrize("before", ["2026-00", "2026-0", "2026-13", "soon"])
+def test_malformed_cursor_is_rejected(client, lease_id, before):
+    assert client.get(f"/lease/{lease_id}/months?before={before}&limit=60").status_code == 400
+    assert client.get(f"/api/leases/{lease_id}/monthly-summary?before={before}").status_code == 400
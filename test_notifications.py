@@ -0,0 +1,137 @@
+"""Notification outbox: enqueued with the message, drained in batches,
+retried with backoff, rate limited per channel."""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from mapmylease import engine, notifications, storage
+
+
+@pytest.fixture
+def outbox(data_dir, monkeypatch):
+    monkeypatch.setattr(notifications, "NOTIFY_CHANNELS", ("file",))
+    monkeypatch.setattr(notifications, "_rate_limiters", {})
+    monkeypatch.setattr(notifications, "_transport_instances", {})
+    monkeypatch.setattr(notifications, "TRANSPORTS", dict(notifications.TRANSPORTS))
+    return engine.ensure_thread_exists("g-1", "payment_review", "rent:2026-01")
+
+
+def test_message_is_delivered_through_the_outbox(outbox, data_dir):
+    msg = engine.add_message_to_thread(outbox["id"], "landlord", "flag", "Please re-upload")
+    engine.add_message_to_thread(outbox["id"], "landlord", "nudge", "internal")
+
+    [delivery] = storage._load_all_threads()["deliveries"]
+    assert delivery["message_id"] == msg["id"] and delivery["recipient"] == "tenant"
+    assert delivery["status"] == "pending"
+
+    report = notifications.drain_outbox()
+    assert report == {"claimed": 1, "sent": 1, "retry": 0, "dead": 0, "rate_limited": 0}
+    lines = (data_dir / "outbox" / "file.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["body"] == "Please re-upload"
+
+    thread_data = storage._load_all_threads()
+    sent = next(m for m in thread_data["messages"] if m["id"] == msg["id"])
+    assert sent["delivered_via"] == ["internal", "file"]
+    assert notifications.outbox_status() == {"file": {"sent": 1}}
+    assert notifications.drain_outbox()["claimed"] == 0
+
+
+def test_failures_back_off_then_go_dead(outbox, monkeypatch):
+    class Down:
+        def __init__(self, channel):
+            pass
+
+        def send_batch(self, deliveries):
+            raise ConnectionError("relay down")
+
+    notifications.register_transport("file", Down)
+    monkeypatch.setattr(notifications, "NOTIFY_MAX_ATTEMPTS", 3)
+    engine.add_message_to_thread(outbox["id"], "tenant", "reply", "paid")
+
+    now = datetime.now()
+    assert notifications.drain_outbox(now=now)["retry"] == 1
+    [delivery] = storage._load_all_threads()["deliveries"]
+    assert delivery["next_attempt_at"] == (now + timedelta(seconds=30)).isoformat()
+    assert "relay down" in delivery["last_error"]
+
+    assert notifications.drain_outbox(now=now + timedelta(seconds=29))["claimed"] == 0
+    assert notifications.drain_outbox(now=now + timedelta(seconds=30))["retry"] == 1
+    assert notifications.drain_outbox(now=now + timedelta(seconds=90))["dead"] == 1
+    assert notifications.outbox_status() == {"file": {"dead": 1}}
+
+
+def test_channel_rate_limit_defers_the_rest(outbox, flask_app, monkeypatch):
+    monkeypatch.setitem(notifications.NOTIFY_RATE_LIMITS, "file", 2)
+    for i in range(5):
+        engine.add_message_to_thread(outbox["id"], "tenant", "reply", str(i))
+
+    report = notifications.drain_outbox()
+    assert report["sent"] == 2 and report["rate_limited"] == 3
+
+    # The one-shot CLI waits for the limit and sends everything due
+    result = flask_app.test_cli_runner().invoke(args=["drain-outbox"])
+    assert result.exit_code == 0
+    assert "sent 3, retry 0, dead 0" in result.output
+    assert notifications.outbox_status() == {"file": {"sent": 5}}
+
+
+def test_rate_limited_drain_reports_the_wait_for_the_next_token(outbox, monkeypatch):
+    monkeypatch.setitem(notifications.NOTIFY_RATE_LIMITS, "file", 2)
+    for i in range(3):
+        engine.add_message_to_thread(outbox["id"], "tenant", "reply", str(i))
+
+    report, wait = notifications._drain_batch()
+    assert report["sent"] == 2 and report["rate_limited"] == 1
+    report, wait = notifications._drain_batch()
+    assert report["claimed"] == 0 and 0.4 < wait <= 0.5
+
+
+def test_dead_deliveries_are_pruned_after_retention(outbox, monkeypatch):
+    class Down:
+        def __init__(self, channel):
+            pass
+
+        def send_batch(self, deliveries):
+            raise ConnectionError("relay down")
+
+    notifications.register_transport("file", Down)
+    monkeypatch.setattr(notifications, "NOTIFY_MAX_ATTEMPTS", 1)
+    engine.add_message_to_thread(outbox["id"], "tenant", "reply", "paid")
+    now = datetime.now()
+    assert notifications.drain_outbox(now=now)["dead"] == 1
+    [dead] = storage._load_all_threads()["deliveries"]
+    assert dead["last_attempt_at"] == now.isoformat()
+
+    notifications.register_transport("file", notifications.FileTransport)
+    engine.add_message_to_thread(outbox["id"], "tenant", "reply", "paid again")
+    later = now + timedelta(days=notifications.NOTIFY_DEAD_RETAIN_DAYS, seconds=1)
+    assert notifications.drain_outbox(now=later)["sent"] == 1
+    assert notifications.outbox_status() == {"file": {"sent": 1}}
+
+
+def test_only_the_drainer_lock_holder_drains(outbox):
+    engine.add_message_to_thread(outbox["id"], "tenant", "reply", "paid")
+    other_process = notifications._try_drainer_lock()
+    assert other_process is not None
+
+    stop = threading.Event()
+    worker = threading.Thread(target=notifications.run_outbox_worker,
+                              kwargs={"stop_event": stop, "poll_seconds": 0.01})
+    worker.start()
+    try:
+        time.sleep(0.1)
+        assert notifications.outbox_status() == {"file": {"pending": 1}}
+        os.close(other_process)            # releases the lock
+        deadline = time.monotonic() + 5
+        while notifications.outbox_status() != {"file": {"sent": 1}}:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        notifications._outbox_wakeup.set()
+        worker.join()
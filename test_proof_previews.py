@@ -0,0 +1,72 @@
+"""Lazy proof thumbnails cached by content hash."""
+
+import io
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from mapmylease import previews, storage
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    folder = tmp_path / "uploads"
+    monkeypatch.setattr(storage, "UPLOAD_FOLDER", str(folder))
+    monkeypatch.setattr(storage, "PROOF_UPLOAD_FOLDER", str(folder / "proofs"))
+    return folder
+
+
+def _photo(width=2400, height=1800):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buf, "JPEG")
+    return FileStorage(stream=io.BytesIO(buf.getvalue()), filename="receipt.jpg",
+                       content_type="image/jpeg")
+
+
+def test_thumbnail_is_rendered_once_and_cached(client, uploads, monkeypatch):
+    path, _ = storage.save_proof_file("lg-1", "pay-1", _photo())
+    url = "/view_proof/lg-1/preview/thumb/pay-1_receipt.jpg"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    assert max(Image.open(io.BytesIO(response.data)).size) == previews.PREVIEW_SIZES["thumb"]
+    response.close()
+
+    sha = storage.load_proof_metadata(path)["sha256"]
+    assert (uploads / "previews" / f"{sha}-thumb.jpg").exists()
+
+    monkeypatch.setattr(previews, "_render_preview", lambda *a: pytest.fail("re-rendered"))
+    client.get(url).close()
+
+
+def test_unrenderable_or_unknown_previews(client, uploads):
+    storage.save_proof_file("lg-1", "pay-1", FileStorage(
+        stream=io.BytesIO(b"not really a pdf"), filename="r.pdf", content_type="application/pdf"))
+    storage.save_proof_file("lg-1", "pay-2", FileStorage(
+        stream=io.BytesIO(b"not really a jpeg"), filename="r.jpg", content_type="image/jpeg"))
+
+    assert client.get("/view_proof/lg-1/preview/thumb/pay-1_r.pdf").status_code == 404
+    broken_image = client.get("/view_proof/lg-1/preview/thumb/pay-2_r.jpg")
+    assert broken_image.status_code == 302
+    assert broken_image.headers["Location"].endswith("/view_proof/lg-1/pay-2_r.jpg")
+    assert client.get("/view_proof/lg-1/preview/huge/pay-2_r.jpg").status_code == 404
+
+
+def test_proof_without_sidecar_is_hashed_once(client, uploads, monkeypatch):
+    # Saved before sidecars existed: bytes on disk, no recorded sha256
+    legacy = uploads / "proofs" / "lg-1" / "pay-1_old.jpg"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(_photo(400, 300).read())
+    assert storage.load_proof_metadata("proofs/lg-1/pay-1_old.jpg") is None
+
+    hashed = []
+    hash_file = storage._hash_file
+    monkeypatch.setattr(storage, "_hash_file", lambda path: hashed.append(path) or hash_file(path))
+    monkeypatch.setattr(storage, "_content_hash_cache", {})
+    for _ in range(3):
+        response = client.get("/view_proof/lg-1/preview/thumb/pay-1_old.jpg")
+        assert response.status_code == 200
+        response.close()
+    assert len(hashed) == 1
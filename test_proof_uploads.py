@@ -0,0 +1,95 @@
+"""Proof uploads: streaming size caps, SHA-256 sidecars, content-addressed blobs."""
+
+import hashlib
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio
+from mapmylease import storage
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    folder = tmp_path / "uploads"
+    monkeypatch.setattr(storage, "UPLOAD_FOLDER", str(folder))
+    monkeypatch.setattr(storage, "PROOF_UPLOAD_FOLDER", str(folder / "proofs"))
+    monkeypatch.setattr(storage, "PROOF_CHUNK_BYTES", 1024)
+    return folder
+
+
+def _upload(content, filename="receipt.jpg"):
+    return FileStorage(stream=io.BytesIO(content), filename=filename, content_type="image/jpeg")
+
+
+def test_proof_is_hashed_and_stored_once_per_content(uploads):
+    content = b"\xff\xd8" + bytes(range(256)) * 40
+    sha = hashlib.sha256(content).hexdigest()
+
+    path, error = storage.save_proof_file("lg-1", "pay-1", _upload(content))
+    again, _ = storage.save_proof_file("lg-1", "pay-2", _upload(content))
+
+    assert error is None
+    assert path == "proofs/lg-1/pay-1_receipt.jpg"
+    meta = storage.load_proof_metadata(path)
+    assert meta["sha256"] == sha
+    assert meta["size"] == len(content)
+    assert meta["original_filename"] == "receipt.jpg"
+    assert meta["blob"] == f"blobs/{sha[:2]}/{sha}.jpg"
+    assert storage.load_proof_metadata(again)["blob"] == meta["blob"]
+    for recorded in (path, again):
+        with open(storage.resolve_proof_path(recorded), "rb") as f:
+            assert f.read() == content
+    assert [p.name for p in (uploads / "blobs").rglob("*") if p.is_file()] == [f"{sha}.jpg"]
+
+
+def test_oversized_or_duplicate_proof_leaves_no_file(uploads, monkeypatch):
+    monkeypatch.setattr(storage, "PROOF_MAX_FILE_BYTES", 4096)
+
+    path, error = storage.save_proof_file("lg-1", "pay-1", _upload(b"x" * 5000))
+    assert path is None and error.startswith("File too large")
+    assert list((uploads / "proofs" / "lg-1").iterdir()) == []
+    assert not any(p.is_file() for p in (uploads / "blobs").rglob("*"))
+
+    assert storage.save_proof_file("lg-1", "pay-2", _upload(b"ok"))[1] is None
+    assert storage.save_proof_file("lg-1", "pay-2", _upload(b"other")) == (None, "File already exists")
+    with open(storage.resolve_proof_path("proofs/lg-1/pay-2_receipt.jpg"), "rb") as f:
+        assert f.read() == b"ok"
+
+
+def test_request_over_limit_is_rejected_before_parsing(flask_app, client, data_dir, uploads):
+    portfolio = generate_portfolio(2, seed=5)
+    write_portfolio(data_dir, portfolio)
+    token = next(t["token"] for t in portfolio["tenant_access"]["tenant_tokens"] if t["is_active"])
+    flask_app.config["MAX_CONTENT_LENGTH"] = 1024
+
+    response = client.post(f"/tenant/{token}/confirm",
+                           data={"rent_proof": (io.BytesIO(b"x" * 4096), "r.jpg")},
+                           headers={"Referer": f"/tenant/{token}"})
+
+    assert response.status_code == 302
+    assert response.headers["Location"] == f"/tenant/{token}"
+    assert not (uploads / "proofs").exists()
+
+
+def test_dedupe_migrates_legacy_proofs_and_view_proof_still_serves(flask_app, client, uploads):
+    receipt = b"%PDF-1.4 same receipt" * 100
+    for group, name in (("lg-1", "p1_a.pdf"), ("lg-1", "p2_a.pdf"), ("lg-2", "p3_b.pdf")):
+        (uploads / "proofs" / group).mkdir(parents=True, exist_ok=True)
+        (uploads / "proofs" / group / name).write_bytes(receipt)
+
+    assert storage.dedupe_proof_files(dry_run=True)["bytes_reclaimed"] == 2 * len(receipt)
+    assert (uploads / "proofs" / "lg-1" / "p1_a.pdf").exists()
+
+    result = flask_app.test_cli_runner().invoke(args=["dedupe-proofs"])
+    assert f"reclaimed {2 * len(receipt):,} bytes" in result.output
+    assert not (uploads / "proofs" / "lg-1" / "p1_a.pdf").exists()
+    assert len([p for p in (uploads / "blobs").rglob("*") if p.is_file()]) == 1
+    assert storage.dedupe_proof_files() == {"files": 0, "duplicates": 0, "bytes_reclaimed": 0}
+
+    response = client.get("/view_proof/lg-2/p3_b.pdf")
+    assert response.status_code == 200
+    assert response.data == receipt
+    response.close()
+    assert client.get("/view_proof/lg-2/missing.pdf").status_code == 404
@@ -0,0 +1,58 @@
+"""Opt-in request profiling and the /debug/perf report."""
+
+import collections
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio
+from mapmylease import observability
+
+
+def test_debug_perf_is_hidden_when_profiling_is_off(client, monkeypatch):
+    monkeypatch.setattr(observability, "PERF_ENABLED", False)
+    assert client.get("/debug/perf").status_code == 404
+
+
+def test_profile_records_store_timings_and_counts(client, data_dir, monkeypatch):
+    write_portfolio(data_dir, generate_portfolio(3, seed=2))
+    monkeypatch.setattr(observability, "PERF_ENABLED", True)
+    monkeypatch.setattr(observability, "_perf_history", collections.deque(maxlen=10))
+
+    assert client.get("/").status_code == 200
+
+    (perf,) = observability._perf_history
+    assert perf["endpoint"] == "index"
+    assert perf["status"] == 200
+    assert perf["wall_ms"] > 0
+    assert perf["parses"] > 0
+    assert perf["timings"]["load:leases"]["calls"] >= 1
+    assert perf["timings"]["render:index.html"]["calls"] == 1
+    assert perf["profile_file"] is None
+
+    page = client.get("/debug/perf")
+    assert page.status_code == 200
+    assert b"load:leases" in page.data
+    assert len(observability._perf_history) == 1    # the report itself is not recorded
+
+
+def test_slow_request_dumps_cprofile(client, data_dir, monkeypatch):
+    monkeypatch.setattr(observability, "PERF_ENABLED", True)
+    monkeypatch.setattr(observability, "PERF_CPROFILE", True)
+    monkeypatch.setattr(observability, "PERF_SLOW_MS", 0)
+    monkeypatch.setattr(observability, "_perf_history", collections.deque(maxlen=10))
+
+    assert client.get("/api/leases").status_code == 200
+
+    (perf,) = observability._perf_history
+    assert perf["profile_file"].endswith(".prof")
+    assert (data_dir / "profiles" / perf["profile_file"]).exists()
+
+
+def test_profile_records_route_patterns_not_tenant_tokens(client, data_dir, monkeypatch):
+    portfolio = generate_portfolio(2, seed=3)
+    write_portfolio(data_dir, portfolio)
+    token = next(t["token"] for t in portfolio["tenant_access"]["tenant_tokens"] if t["is_active"])
+    monkeypatch.setattr(observability, "PERF_ENABLED", True)
+    monkeypatch.setattr(observability, "_perf_history", collections.deque(maxlen=10))
+
+    assert client.get(f"/tenant/{token}?t={token}").status_code == 200
+    assert observability._perf_history[0]["path"] == "/tenant/<token>"
+    assert token not in client.get("/debug/perf").get_data(as_text=True)
@@ -0,0 +1,79 @@
+"""Full-text search: FTS5 and in-memory backends, incremental updates."""
+
+import pytest
+
+from conftest import write_store
+from mapmylease import engine, search, storage
+
+
+def _lease(lease_id, nickname, text):
+    return {
+        "id": lease_id,
+        "lease_group_id": lease_id,
+        "version": 1,
+        "is_current": True,
+        "source_document": {"filename": f"{lease_id}.pdf", "extracted_text": text},
+        "current_values": {"lease_nickname": nickname, "lessee_name": "Asha Rao",
+                           "renewal_terms": {"rent_escalation_percent": 5}},
+    }
+
+
+@pytest.fixture(params=["fts5", "memory"])
+def backend(request, data_dir, monkeypatch):
+    if request.param == "fts5" and not search.FTS5_AVAILABLE:
+        pytest.skip("sqlite3 built without FTS5")
+    monkeypatch.setattr(search, "FTS5_AVAILABLE", request.param == "fts5")
+    monkeypatch.setattr(search, "_memory_index", None)
+    write_store(data_dir, "leases", {"leases": [
+        _lease("l-1", "Indiranagar flat", "Rent shall escalate by 5% annually. Escalation clause 7."),
+        _lease("l-2", "Powai studio", "No escalation during the lock-in period."),
+        _lease("l-3", "Saket villa", "Maintenance is payable by the lessee."),
+    ]})
+    write_store(data_dir, "threads", {"threads": [
+        {"id": "t-1", "lease_group_id": "l-3", "topic_type": "payment_review",
+         "topic_ref": "rent:2026-01", "status": "open"},
+    ], "messages": []})
+    return request.param
+
+
+def test_ranked_hits_with_escaped_snippets(backend):
+    result = search.search("escalat")
+    assert result["backend"] == backend
+    assert [h["lease_id"] for h in result["hits"]][:2] in (["l-1", "l-2"], ["l-2", "l-1"])
+    assert "<mark>" in result["hits"][0]["snippet_html"]
+    assert search.search("indiranagar")["hits"][0]["lease_id"] == "l-1"
+    assert search.search("escalation villa")["hits"] == []
+
+
+def test_new_messages_are_searchable_and_external_writes_rebuild(backend, data_dir):
+    engine.add_message_to_thread("t-1", "tenant", "reply", "Paid via NEFT ref <X123>")
+    (hit,) = search.search("neft x123")["hits"]
+    assert hit["kind"] == "message" and hit["thread_id"] == "t-1"
+    assert "&lt;<mark>X123</mark>&gt;" in hit["snippet_html"]
+
+    write_store(data_dir, "leases", {"leases": [_lease("l-9", "Adyar flat", "escalation")]})
+    assert [h["lease_id"] for h in search.search("escalation")["hits"]] == ["l-9"]
+
+
+def test_writes_the_index_missed_are_not_marked_indexed(backend):
+    assert search.search("cheque")["hits"] == []       # index built and current
+    data = storage._load_all_threads()
+    data["messages"].append({"id": "m-direct", "thread_id": "t-1", "actor": "system",
+                             "message_type": "reply", "body": "Cheque deposited"})
+    assert storage._save_threads_file(data)
+
+    engine.add_message_to_thread("t-1", "landlord", "reply", "Received, thanks")
+    assert [h["message_id"] for h in search.search("cheque")["hits"]] == ["m-direct"]
+    assert search.search("received")["hits"]
+
+    # Inside a unit of work the update waits for the unit's commit
+    with storage.unit_of_work("threads"):
+        engine.add_message_to_thread("t-1", "tenant", "reply", "UPI transfer done")
+    assert search.search("upi")["hits"]
+
+
+def test_search_route(client, backend):
+    assert client.get("/search").status_code == 400
+    response = client.get("/search?q=powai&limit=5")
+    assert response.status_code == 200
+    assert response.get_json()["hits"][0]["title"] == "Powai studio"
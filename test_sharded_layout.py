@@ -0,0 +1,127 @@
+"""Per-lease-group sharded layout: conversion both ways, group-local writes and reads."""
+
+import os
+
+import pytest
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio
+from mapmylease import storage
+from mapmylease.tenant import create_tenant_app
+
+SHARDED = ("leases", "payments", "threads")
+
+
+def _records(store):
+    data = storage._STORE_LOADERS[store]()
+    return {k: v for k, v in data.items() if k != "revision"}
+
+
+@pytest.fixture
+def portfolio(data_dir):
+    portfolio = generate_portfolio(4, seed=7)
+    write_portfolio(data_dir, portfolio)
+    return portfolio
+
+
+def _shard_files(data_dir, gid, store="payments"):
+    return sorted(n for n in os.listdir(data_dir / "groups" / gid) if n.startswith(store + "."))
+
+
+def _add_payment(gid, payment_id="p-new"):
+    data = storage._load_all_payments()
+    data["confirmations"].append({"id": payment_id, "lease_group_id": gid,
+                                  "confirmation_type": "rent", "period_year": 2026,
+                                  "period_month": 1, "amount_declared": 1})
+    return data
+
+
+def _group_ids(portfolio):
+    return sorted({l["lease_group_id"] for l in portfolio["leases"]["leases"]})
+
+
+def test_convert_round_trip(flask_app, portfolio, data_dir):
+    before = {store: _records(store) for store in SHARDED}
+    runner = flask_app.test_cli_runner()
+
+    result = runner.invoke(args=["convert-layout", "sharded"])
+    assert "payment_data.json: 4 lease groups -> sharded" in result.output
+    assert storage.store_layout() == "sharded"
+    assert not (data_dir / "payment_data.json").exists()
+    assert (data_dir / "tenant_access.json").exists()
+    gid = _group_ids(portfolio)[0]
+    assert sorted(name.split(".")[0] for name in os.listdir(data_dir / "groups" / gid)) == [
+        "lease", "payments", "threads"]
+    assert {store: _records(store) for store in SHARDED} == before
+
+    assert runner.invoke(args=["convert-layout", "sharded"]).output == "already sharded\n"
+    runner.invoke(args=["convert-layout", "single"])
+    assert storage.store_layout() == "single"
+    assert not (data_dir / "groups").exists()
+    assert {store: _records(store) for store in SHARDED} == before
+    assert storage._load_all_payments()["revision"] == 3
+
+
+def test_write_touches_only_its_group(portfolio, data_dir):
+    storage.convert_store_layout("sharded")
+    target, *others = _group_ids(portfolio)
+
+    def stamps():
+        return {gid: _shard_files(data_dir, gid) for gid in [target, *others]}
+    before = stamps()
+
+    data = _add_payment(target)
+    assert storage._save_payment_file(data)
+
+    after = stamps()
+    assert after[target] != before[target]
+    assert all(after[gid] == before[gid] for gid in others)
+
+    group = storage._load_group_records("payments", target)
+    assert "p-new" in {c["id"] for c in group["confirmations"]}
+    assert {c["lease_group_id"] for c in group["confirmations"]} == {target}
+    assert storage._disk_revision("payments") == data["revision"]
+
+
+def test_tenant_page_reads_only_its_group(portfolio, monkeypatch):
+    storage.convert_store_layout("sharded")
+    token = next(t for t in portfolio["tenant_access"]["tenant_tokens"] if t["is_active"])
+    client = create_tenant_app().test_client()
+
+    reads = []
+    read_shard = storage._read_shard
+    monkeypatch.setattr(storage, "_read_shard",
+                        lambda store, gid, *a, **kw: reads.append(gid) or read_shard(store, gid, *a, **kw))
+
+    assert client.get(f"/tenant/{token['token']}").status_code == 200
+    assert reads and set(reads) == {token["lease_group_id"]}
+
+
+def test_failed_commit_changes_nothing_visible(portfolio, data_dir, monkeypatch):
+    storage.convert_store_layout("sharded")
+    first, second = _group_ids(portfolio)[:2]
+    before = storage._load_all_payments()
+    files_before = {gid: _shard_files(data_dir, gid) for gid in (first, second)}
+
+    data = _add_payment(first, "p-1")
+    data["confirmations"].append({**data["confirmations"][-1], "id": "p-2",
+                                  "lease_group_id": second})
+    write = storage._write_file_atomic
+
+    def fail_on_head(path, content):
+        if os.path.dirname(path) == str(data_dir / "groups"):
+            raise OSError("disk full")
+        write(path, content)
+    monkeypatch.setattr(storage, "_write_file_atomic", fail_on_head)
+
+    assert storage._save_payment_file(data) is False
+    assert storage._load_all_payments() == before
+    assert {gid: _shard_files(data_dir, gid) for gid in (first, second)} == files_before
+
+    # A crash after the shards but before the head leaves only
+    # unreferenced files; the next commit clears them away
+    monkeypatch.setattr(storage, "_write_file_atomic", write)
+    (data_dir / "groups" / first / "payments.deadbeef.json").write_text("{}")
+    assert storage._load_all_payments() == before
+    assert storage._save_payment_file(_add_payment(first, "p-3"))
+    assert len(_shard_files(data_dir, first)) == 1
+    assert "p-3" in {c["id"] for c in storage._load_group_records("payments", first)["confirmations"]}
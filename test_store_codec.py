@@ -0,0 +1,36 @@
+"""Store codec — compact on-disk layout, cross-codec reads, pretty export."""
+
+import json
+
+import pytest
+
+from mapmylease import engine, storage
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson", "msgspec"])
+def test_codecs_roundtrip_and_read_legacy_layout(data_dir, monkeypatch, codec):
+    monkeypatch.setattr(storage, "STORE_CODEC", storage._resolve_store_codec(codec))
+    # Pre-codec files were written with indent=2 and no revision
+    (data_dir / "payment_data.json").write_text(
+        json.dumps({"confirmations": [{"id": "a", "notes": "₹ paid"}]}, indent=2),
+        encoding="utf-8")
+
+    assert engine.append_payment_confirmations([{"id": "b"}])
+
+    raw = (data_dir / "payment_data.json").read_bytes()
+    assert raw.startswith(b'{"revision":1,')
+    assert b"\n" not in raw
+    ids = [c["id"] for c in storage._load_all_payments()["confirmations"]]
+    assert ids == ["a", "b"]
+
+
+def test_export_json_writes_pretty_copies(flask_app, data_dir, tmp_path):
+    engine.append_payment_confirmations([{"id": "a"}])
+    out = tmp_path / "export"
+
+    result = flask_app.test_cli_runner().invoke(args=["export-json", str(out)])
+
+    assert result.exit_code == 0, result.output
+    text = (out / "payment_data.json").read_text(encoding="utf-8")
+    assert text.startswith('{\n  "revision": 1')
+    assert not (out / "threads.json").exists()
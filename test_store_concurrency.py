@@ -0,0 +1,143 @@
+"""Store locking / revision checks under concurrent writers.
+
+Spawns several worker processes that hammer the same DATA_DIR through
+the app's own write helpers, then checks nothing was lost.
+"""
+
+import multiprocessing
+import threading
+
+import pytest
+
+from conftest import write_store
+
+from mapmylease import engine, observability, storage
+
+WORKERS = 4
+WRITES_PER_WORKER = 25
+
+
+def _confirm_worker(data_dir, worker_no):
+    storage.DATA_DIR = data_dir
+    for i in range(WRITES_PER_WORKER):
+        assert engine.append_payment_confirmations([{
+            "id": f"{worker_no}-{i}",
+            "lease_group_id": "lg-1",
+            "confirmation_type": "rent",
+            "period_month": 1,
+            "period_year": 2026,
+            "amount_declared": 1,
+        }])
+
+
+def _message_worker(data_dir, thread_id, worker_no):
+    storage.DATA_DIR = data_dir
+    for i in range(WRITES_PER_WORKER):
+        msg = engine.add_message_to_thread(
+            thread_id, "tenant", "reply", f"{worker_no}-{i}")
+        assert msg is not None
+
+
+def _run_workers(target, *args):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=target, args=(*args, n)) for n in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+    assert all(p.exitcode == 0 for p in procs)
+
+
+def test_concurrent_confirmations_are_not_lost(data_dir):
+    _run_workers(_confirm_worker, str(data_dir))
+
+    data = storage._load_all_payments()
+    ids = {c["id"] for c in data["confirmations"]}
+    assert len(ids) == WORKERS * WRITES_PER_WORKER
+    assert data["revision"] == WORKERS * WRITES_PER_WORKER
+
+
+def test_concurrent_messages_are_not_lost(data_dir):
+    thread = engine.ensure_thread_exists("lg-1", "payment_review", "rent:2026-01")
+    _run_workers(_message_worker, str(data_dir), thread["id"])
+
+    messages = engine.get_messages_for_thread(thread["id"])
+    assert len(messages) == WORKERS * WRITES_PER_WORKER
+
+
+def test_stale_save_raises_conflict(data_dir):
+    engine.append_payment_confirmations([{"id": "a"}])
+    stale = storage._load_all_payments()
+
+    engine.append_payment_confirmations([{"id": "b"}])
+
+    stale["confirmations"].append({"id": "c"})
+    with pytest.raises(storage.StoreConflict):
+        storage._save_payment_file(stale)
+    ids = [c["id"] for c in storage._load_all_payments()["confirmations"]]
+    assert ids == ["a", "b"]
+
+
+def test_store_lock_is_reentrant(data_dir):
+    with storage.store_lock("threads"):
+        with storage.store_lock("payments", "threads"):
+            assert engine.append_payment_confirmations([])
+
+
+def test_unit_of_work_commits_each_store_once(data_dir):
+    observability._request_io.fsyncs = 0
+    with storage.unit_of_work("threads"):
+        for month in range(1, 4):
+            thread = engine.ensure_thread_exists(
+                "lg-1", "payment_review", f"rent:2026-{month:02d}")
+            engine.add_message_to_thread(thread["id"], "landlord", "flag", "?")
+        # Loads inside the unit see staged writes
+        assert len(storage._load_all_threads()["threads"]) == 3
+        assert not (data_dir / "threads.json").exists()
+
+    assert observability._request_io.fsyncs == 1
+    data = storage._load_all_threads()
+    assert len(data["threads"]) == 3
+    assert len(data["messages"]) == 3
+
+
+def test_unit_of_work_discards_on_error(data_dir):
+    with pytest.raises(ValueError):
+        with storage.unit_of_work("threads"):
+            engine.ensure_thread_exists("lg-1", "payment_review", "rent:2026-01")
+            raise ValueError("boom")
+    assert storage._load_all_threads()["threads"] == []
+
+
+def test_unit_of_work_reports_a_failed_commit(data_dir, monkeypatch):
+    monkeypatch.setattr(storage, "_commit_store_bytes", lambda store, content: False)
+    with storage.unit_of_work("threads") as unit:
+        engine.ensure_thread_exists("lg-1", "payment_review", "rent:2026-01")
+    assert unit.ok is False and unit.failed == ["threads"]
+
+
+def test_unit_without_held_locks_drops_writes_that_lost_a_race(data_dir):
+    with storage.unit_of_work("threads", hold_locks=False) as unit:
+        engine.ensure_thread_exists("lg-1", "payment_review", "rent:2026-01")
+        # Another writer gets the lock mid-unit (it would block otherwise)
+        writer = threading.Thread(target=engine.ensure_thread_exists,
+                                  args=("lg-2", "payment_review", "rent:2026-01"))
+        writer.start()
+        writer.join()
+
+    assert unit.ok is False
+    assert [t["lease_group_id"] for t in storage._load_all_threads()["threads"]] == ["lg-2"]
+
+
+def test_review_reports_a_failed_commit(client, data_dir, monkeypatch):
+    write_store(data_dir, "payments", {"confirmations": [
+        {"id": "p-1", "lease_group_id": "lg-1", "confirmation_type": "rent",
+         "period_year": 2026, "period_month": 1}]})
+    monkeypatch.setattr(storage, "_commit_store_bytes", lambda store, content: False)
+
+    client.post("/lease/lg-1/payment/p-1/review",
+                data={"review_type": "flagged", "internal_note": "Please re-upload"})
+
+    with client.session_transaction() as session:
+        assert session["_flashes"] == [("error", "Failed to save review. Please try again.")]
+    assert storage._load_all_threads()["threads"] == []
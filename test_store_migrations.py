@@ -0,0 +1,47 @@
+"""Store schema migrations — one-time upgrade, stamped files, no per-load work."""
+
+import json
+
+from mapmylease import engine, storage
+
+
+def _legacy_lease_file(data_dir):
+    # Flat, pre-versioning lease in the old single-lease format
+    legacy = {"lease_nickname": "Old flat", "monthly_rent": 900,
+              "source_filename": "old.pdf", "saved_at": "2024-01-01T00:00:00"}
+    (data_dir / "lease_data.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+
+def test_runner_upgrades_and_stamps_once(data_dir):
+    _legacy_lease_file(data_dir)
+    (data_dir / "threads.json").write_text(
+        json.dumps({"threads": [{"id": "t1"}], "messages": []}), encoding="utf-8")
+
+    applied = storage.run_store_migrations()
+
+    assert applied == {"leases": (0, 1), "threads": (0, 2)}
+    leases = storage._load_all_leases()
+    assert leases["schema_version"] == storage.SCHEMA_VERSIONS["leases"]
+    lease = leases["leases"][0]
+    assert lease["current_values"]["lease_nickname"] == "Old flat"
+    assert lease["current_values"]["expected_payments"][0]["typical_amount"] == 900
+    assert lease["needs_expected_payment_confirmation"] is False
+    assert storage._load_all_threads()["threads"][0]["needs_landlord_attention"] is False
+
+    assert storage.run_store_migrations() == {}
+
+
+def test_loads_never_write(data_dir):
+    _legacy_lease_file(data_dir)
+    before = (data_dir / "lease_data.json").read_bytes()
+
+    lease = storage._load_all_leases()["leases"][0]
+
+    assert lease["lease_group_id"] == lease["id"]
+    assert (data_dir / "lease_data.json").read_bytes() == before
+
+
+def test_new_stores_are_stamped_current(data_dir):
+    engine.append_payment_confirmations([{"id": "a"}])
+    raw = json.loads((data_dir / "payment_data.json").read_text(encoding="utf-8"))
+    assert raw["schema_version"] == storage.SCHEMA_VERSIONS["payments"]
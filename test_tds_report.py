@@ -0,0 +1,89 @@
+"""Annual TDS report: per-tenant financial-year totals, cache invalidation."""
+
+import csv
+import io
+
+import pytest
+
+from conftest import write_store
+from mapmylease import reports
+
+
+def _lease(lease_id, version, start, end, lessee):
+    return {"id": lease_id, "lease_group_id": "g-1", "version": version, "status": "active",
+            "current_values": {"lease_nickname": "Baner flat", "lessee_name": lessee,
+                               "lease_start_date": start, "lease_end_date": end}}
+
+
+def _confirmation(year, month, ctype="rent", agreed=20000, declared=20000, tds=2000):
+    return {"id": f"{ctype}-{year}-{month}", "lease_group_id": "g-1", "confirmation_type": ctype,
+            "period_year": year, "period_month": month, "amount_agreed": agreed,
+            "amount_declared": declared, "tds_deducted": tds}
+
+
+@pytest.fixture
+def seeded(data_dir, monkeypatch):
+    monkeypatch.setattr(reports, "_tds_report_cache", {})
+    write_store(data_dir, "leases", {"leases": [
+        _lease("v1", 1, "2025-01-01", "2025-09-30", "Asha Rao"),
+        _lease("v2", 2, "2025-10-01", "2026-09-30", "Vikram Iyer"),
+    ]})
+    payments = [_confirmation(2025, 3)]  # FY 2024-25
+    payments += [_confirmation(2025, m) for m in (4, 5, 6)]
+    payments += [_confirmation(2025, 11, declared=18000, tds=None),
+                 _confirmation(2025, 11, ctype="maintenance", agreed=None, declared=1500, tds=0)]
+    write_store(data_dir, "payments", {"confirmations": payments})
+    return data_dir
+
+
+def test_totals_per_lessee_and_financial_year(seeded):
+    report = reports.tds_report(2025)
+
+    assert report["financial_year"] == "2025-26"
+    asha, vikram = report["rows"]
+    assert (asha["lessee_name"], asha["months"], asha["amount_declared"], asha["tds_deducted"]) == (
+        "Asha Rao", 3, 60000.0, 6000.0)
+    assert (vikram["rent_declared"], vikram["maintenance_declared"], vikram["difference"]) == (
+        18000.0, 1500.0, -500.0)
+    assert report["totals"]["amount_declared"] == 79500.0
+    assert report["totals"]["confirmations"] == 5
+
+
+def test_resubmitted_month_counts_once(seeded):
+    correction = {**_confirmation(2025, 5, declared=21000, tds=2100),
+                  "id": "rent-2025-5-b", "submitted_at": "2025-06-02T09:00:00"}
+    write_store(seeded, "payments", {"confirmations": [
+        {**_confirmation(2025, m), "submitted_at": f"2025-{m:02d}-05T09:00:00"} for m in (4, 5, 6)
+    ] + [correction]})
+
+    (asha,) = reports.tds_report(2025)["rows"]
+    assert (asha["months"], asha["confirmations"]) == (3, 3)
+    assert (asha["amount_agreed"], asha["amount_declared"], asha["tds_deducted"]) == (
+        60000.0, 61000.0, 6100.0)
+
+
+def test_cached_until_a_new_confirmation(seeded, monkeypatch):
+    builds = []
+    build = reports.build_tds_report
+    monkeypatch.setattr(reports, "build_tds_report", lambda fy: builds.append(fy) or build(fy))
+
+    first = reports.tds_report(2025)
+    assert reports.tds_report(2025) is first
+    assert builds == [2025]
+
+    write_store(seeded, "payments", {"confirmations": [_confirmation(2025, 4, tds=1234)]})
+    assert reports.tds_report(2025)["totals"]["tds_deducted"] == 1234.0
+    assert builds == [2025, 2025]
+
+
+def test_page_and_csv(client, seeded):
+    page = client.get("/reports/tds?fy=2025-26")
+    assert page.status_code == 200
+    assert b"Vikram Iyer" in page.data and b"FY 2025-26" in page.data
+    assert client.get("/reports/tds?fy=soon").status_code == 400
+
+    response = client.get("/reports/tds.csv?fy=2025")
+    assert 'filename="tds-report-fy2025-26.csv"' in response.headers["Content-Disposition"]
+    table = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [(r["Lessee"], r["TDS deducted"]) for r in table] == [
+        ("Asha Rao", "6000.0"), ("Vikram Iyer", "0.0")]
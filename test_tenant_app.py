@@ -0,0 +1,36 @@
+"""The tenant-only app serves token pages without landlord or extraction code."""
+
+import os
+import subprocess
+import sys
+
+from benchmarks.synthetic import generate_portfolio, write_portfolio
+from mapmylease.tenant import create_tenant_app
+
+_PROBE = ("import sys; from mapmylease.tenant import create_tenant_app; create_tenant_app(); "
+          "print(' '.join(m for m in sys.modules if m.startswith('mapmylease')))")
+
+
+def test_tenant_app_serves_token_page_only(data_dir):
+    portfolio = generate_portfolio(3, seed=4)
+    write_portfolio(data_dir, portfolio)
+    token = next(t["token"] for t in portfolio["tenant_access"]["tenant_tokens"] if t["is_active"])
+    client = create_tenant_app().test_client()
+
+    assert client.get(f"/tenant/{token}").status_code == 200
+    assert client.get("/").status_code == 404
+    assert client.get("/api/leases").status_code == 404
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/debug/perf").status_code == 404
+
+
+def test_tenant_app_does_not_import_landlord_or_extraction():
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, MAPMYLEASE_SKIP_MIGRATIONS="1"),
+        capture_output=True, text=True, check=True)
+    loaded = set(result.stdout.split())
+    assert "mapmylease.storage" in loaded and "mapmylease.engine" in loaded
+    assert not loaded & {"mapmylease.landlord", "mapmylease.extraction", "mapmylease.search",
+                         "mapmylease.thread_archive", "mapmylease.notifications"}
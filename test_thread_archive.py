@@ -0,0 +1,119 @@
+"""Cold archive for resolved threads: what moves, and who still sees it."""
+
+from datetime import datetime
+
+import pytest
+
+from conftest import write_store
+from mapmylease import engine, search, storage, thread_archive
+
+NOW = datetime(2026, 10, 1)
+
+
+def _thread(thread_id, status, resolved_at=None, topic_ref="rent:2025-01"):
+    return {"id": thread_id, "lease_group_id": "g-1", "topic_type": "payment_review",
+            "topic_ref": topic_ref, "status": status, "resolved_at": resolved_at,
+            "needs_landlord_attention": False}
+
+
+def _message(message_id, thread_id, body):
+    return {"id": message_id, "thread_id": thread_id, "created_at": "2025-02-01T10:00:00",
+            "actor": "tenant", "message_type": "reply", "body": body, "attachments": []}
+
+
+@pytest.fixture
+def threads(data_dir, monkeypatch):
+    monkeypatch.setattr(thread_archive, "_archive_cache", {})
+    write_store(data_dir, "threads", {"threads": [
+        _thread("t-old", "resolved", "2025-02-10T09:00:00", "rent:2025-01"),
+        _thread("t-recent", "resolved", "2026-09-20T09:00:00", "rent:2026-08"),
+        _thread("t-open", "open", topic_ref="rent:2026-09"),
+    ], "messages": [
+        _message("m-1", "t-old", "Paid by NEFT, reference attached"),
+        _message("m-2", "t-old", "Acknowledged"),
+        _message("m-3", "t-open", "Still waiting"),
+    ]})
+    return data_dir
+
+
+def test_only_old_resolved_threads_move(threads):
+    dry = thread_archive.archive_resolved_threads(older_than_days=90, dry_run=True, now=NOW)
+    assert dry == {"threads": 1, "messages": 2, "lease_groups": 1, "hot_threads": 2}
+    assert len(storage._load_all_threads()["threads"]) == 3
+
+    assert thread_archive.archive_resolved_threads(older_than_days=90, now=NOW) == dry
+    hot = storage._load_all_threads()
+    assert sorted(t["id"] for t in hot["threads"]) == ["t-open", "t-recent"]
+    assert [m["id"] for m in hot["messages"]] == ["m-3"]
+    archived = thread_archive.load_archived_threads("g-1")
+    assert [t["id"] for t in archived["threads"]] == ["t-old"]
+    assert len(archived["messages"]) == 2
+
+    again = thread_archive.archive_resolved_threads(older_than_days=90, now=NOW)
+    assert again["threads"] == 0
+
+
+def test_outbox_deliveries_follow_the_archive(threads):
+    thread_data = storage._load_all_threads()
+    thread_data["threads"].append(_thread("t-old-2", "resolved", "2025-03-10T09:00:00", "rent:2025-02"))
+    thread_data["messages"].append(_message("m-4", "t-old-2", "Paid"))
+    thread_data["deliveries"] = [
+        {"id": "d-dead", "message_id": "m-1", "thread_id": "t-old", "status": "dead"},
+        {"id": "d-pending", "message_id": "m-4", "thread_id": "t-old-2", "status": "pending"},
+    ]
+    storage._save_threads_file(thread_data)
+
+    assert thread_archive.archive_resolved_threads(older_than_days=90, now=NOW)["threads"] == 1
+    hot = storage._load_all_threads()
+    assert "t-old-2" in {t["id"] for t in hot["threads"]}
+    assert [d["id"] for d in hot["deliveries"]] == ["d-pending"]
+
+
+def test_archived_topic_refs_are_grouped_once_per_index_version(threads, monkeypatch):
+    assert thread_archive.archived_topic_refs("g-1", "payment_review") == set()
+    thread_archive.archive_resolved_threads(older_than_days=90, now=NOW)
+    assert thread_archive.archived_topic_refs("g-1", "payment_review") == {"rent:2025-01"}
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("index re-read although it did not change")
+
+    with monkeypatch.context() as m:
+        m.setattr(thread_archive, "_read_archive_file", no_reads)
+        refs = thread_archive.archived_topic_refs("g-1", "payment_review")
+        refs.add("rent:2099-01")        # the caller's copy
+        assert thread_archive.archived_topic_refs("g-1", "payment_review") == {"rent:2025-01"}
+        assert thread_archive.archived_topic_refs("g-2", "payment_review") == set()
+
+    thread_archive.archive_resolved_threads(older_than_days=0, now=NOW)
+    assert thread_archive.archived_topic_refs("g-1", "payment_review") == {
+        "rent:2025-01", "rent:2026-08"}
+
+
+def test_archived_threads_still_count_for_history_and_idempotency(threads):
+    thread_archive.archive_resolved_threads(older_than_days=90, now=NOW)
+    write_store(threads, "payments", {"confirmations": [
+        {"id": "p-1", "lease_group_id": "g-1", "confirmation_type": "rent",
+         "period_year": 2025, "period_month": 1}]})
+
+    # rent:2025-01 was reviewed long ago; no new thread for it
+    assert engine.materialise_system_threads("g-1") is False
+
+    hot = storage._load_all_threads()
+    timeline = engine.build_thread_timeline("t-old", hot, {})
+    assert [e["body"] for e in timeline] == ["Paid by NEFT, reference attached", "Acknowledged"]
+
+    history = thread_archive.with_archived_threads(hot, "g-1")
+    assert {t["id"] for t in history["threads"]} == {"t-old", "t-recent", "t-open"}
+    assert len(hot["threads"]) == 2
+
+
+def test_cli_and_search_rebuild_include_archive(flask_app, threads, monkeypatch):
+    monkeypatch.setattr(search, "FTS5_AVAILABLE", False)
+    monkeypatch.setattr(search, "_memory_index", None)
+
+    result = flask_app.test_cli_runner().invoke(args=["archive-threads", "--older-than-days", "400"])
+    assert result.output.startswith("archived ")
+    assert "2 messages from 1 lease groups" in result.output
+
+    hits = search.search("NEFT")["hits"]
+    assert [h["message_id"] for h in hits] == ["m-1"]